@@ -0,0 +1,100 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\benchmarks\bench_component_discovery.py total lines 101 
+########################################################################
+
+"""
+Component discovery per forked job worker: a full rescan (list + parse every manifest), a fresh
+ComponentIndex loaded from component_index.json (stat-only validation), and the parent's index
+inherited through the Singleton registry. Checks that changed, new, removed and broken manifests
+are picked up first.
+Usage: python benchmarks/bench_component_discovery.py [components] [workers]   (default 400 8)
+Runs against synthetic manifests in a temporary directory (POSIX fork start method).
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import multiprocessing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from flowork_kernel.utils.component_index import ComponentIndex, get_component_index, COMPONENT_INDEX_FILE
+def write_components(base_dir: str, count: int):
+    for i in range(count):
+        item_dir = os.path.join(base_dir, f"module_{i}")
+        os.makedirs(item_dir)
+        with open(os.path.join(item_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump({"id": f"module_{i}", "name": f"Module {i}", "properties": [{"id": f"p{j}", "type": "string", "default": "x" * 40} for j in range(60)]}, f)
+    os.makedirs(os.path.join(base_dir, "no_manifest"))
+def rescan(base_dir: str) -> int:
+    """What every manager did on each boot before the index: list the folder, parse every manifest."""
+    found = 0
+    for item_id in os.listdir(base_dir):
+        manifest_path = os.path.join(base_dir, item_id, "manifest.json")
+        if item_id == "__pycache__" or not os.path.isfile(manifest_path):
+            continue
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                json.load(f)
+            found += 1
+        except ValueError:
+            pass
+    return found
+def check_behaviour(data_dir: str):
+    base_dir = os.path.join(data_dir, "check")
+    write_components(base_dir, 10)
+    index_path = os.path.join(data_dir, "check_index.json")
+    index = ComponentIndex(index_path)
+    assert len(index.scan(base_dir)) == 10
+    index.save()
+    time.sleep(0.01)
+    with open(os.path.join(base_dir, "module_5", "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"id": "module_5", "name": "Changed"}, f)
+    shutil.rmtree(os.path.join(base_dir, "module_7"))
+    os.makedirs(os.path.join(base_dir, "broken"))
+    with open(os.path.join(base_dir, "broken", "manifest.json"), "w", encoding="utf-8") as f:
+        f.write("{")
+    reloaded = ComponentIndex(index_path)
+    entries = {item_id: (manifest, error) for item_id, _, manifest, error in reloaded.scan(base_dir)}
+    assert entries["module_5"][0]["name"] == "Changed" and "module_7" not in entries
+    assert entries["broken"][0] is None and entries["broken"][1] is not None
+    assert reloaded.stats["parsed"] == 1 and reloaded.stats["reused"] == 8, reloaded.stats
+    print(f"index: changed, removed and broken manifests picked up ({reloaded.stats})")
+def _worker(mode: str, base_dir: str, index_path: str, results):
+    started = time.perf_counter()
+    if mode == "rescan":
+        rescan(base_dir)
+    elif mode == "index file":
+        ComponentIndex(index_path).scan(base_dir)
+    else:
+        get_component_index().scan(base_dir)
+    results.put((time.perf_counter() - started) * 1000)
+def bench(data_dir: str, count: int, workers: int):
+    base_dir = os.path.join(data_dir, "modules")
+    write_components(base_dir, count)
+    index_path = os.path.join(data_dir, COMPONENT_INDEX_FILE)
+    started = time.perf_counter()
+    parent_index = get_component_index(data_dir)
+    parent_index.scan(base_dir)
+    parent_index.save()
+    print(f"parent: cold index build of {count} components {(time.perf_counter() - started) * 1000:.1f} ms")
+    ctx = multiprocessing.get_context("fork")
+    for mode in ("rescan", "index file", "inherited"):
+        results = ctx.Queue()
+        processes = [ctx.Process(target=_worker, args=(mode, base_dir, index_path, results)) for _ in range(workers)]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        timings = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        wall_ms = (time.perf_counter() - started) * 1000
+        print(f"{mode:>10}: per-worker discovery avg {sum(timings) / len(timings):7.1f} ms, {workers}-worker wall {wall_ms:6.0f} ms")
+if __name__ == "__main__":
+    data_dir = tempfile.mkdtemp(prefix="flowork-bench-")
+    try:
+        check_behaviour(data_dir)
+        bench(data_dir, int(sys.argv[1]) if len(sys.argv) > 1 else 400, int(sys.argv[2]) if len(sys.argv) > 2 else 8)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
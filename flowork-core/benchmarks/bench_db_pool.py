@@ -0,0 +1,76 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\benchmarks\bench_db_pool.py total lines 77 
+########################################################################
+
+"""
+core.db point-read cost: a new connection per request (create_connection, what the services did)
+vs a pooled one (DatabaseService.get_connection). Also checks that a transaction re-enters the same
+connection, rolls back on error and that concurrent writers all commit through the busy retry.
+Usage: python benchmarks/bench_db_pool.py [requests] [threads]   (default 2000 16)
+Runs against a throwaway core.db in a temporary directory.
+"""
+import os
+import sys
+import time
+import logging
+import tempfile
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from flowork_kernel.services.database_service.database_service import DatabaseService
+POINT_READ = "SELECT graph_version FROM Workflows WHERE workflow_id = ?"
+WRITES_PER_THREAD = 200
+def open_service() -> DatabaseService:
+    return DatabaseService(db_name=os.path.join(tempfile.mkdtemp(prefix="flowork-bench-"), "core.db")) # (English Hardcode) Absolute, so it is not joined onto the kernel data dir
+def check_behaviour(db: DatabaseService, threads: int):
+    with db.transaction() as conn:
+        conn.execute("INSERT INTO Workflows (workflow_id, name) VALUES ('outer', 'outer')")
+        with db.get_connection() as inner:
+            assert inner is conn, "a nested checkout in the same thread got another connection"
+    try:
+        with db.transaction() as conn:
+            conn.execute("INSERT INTO Workflows (workflow_id, name) VALUES ('rolled-back', 'x')")
+            raise ValueError
+    except ValueError:
+        pass
+    def count(conn, workflow_id):
+        return conn.execute("SELECT COUNT(*) FROM Workflows WHERE workflow_id = ?", (workflow_id,)).fetchone()[0]
+    assert db.run_with_retry(count, "outer") == 1 and db.run_with_retry(count, "rolled-back") == 0
+    errors = []
+    def _writer():
+        try:
+            for i in range(WRITES_PER_THREAD):
+                with db.transaction() as conn:
+                    conn.execute("INSERT INTO Workflows (workflow_id, name) VALUES (?, 'n')", (f"{threading.get_ident()}-{i}",))
+        except Exception as e:
+            errors.append(e)
+    writers = [threading.Thread(target=_writer) for _ in range(threads)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    total = db.run_with_retry(lambda conn: conn.execute("SELECT COUNT(*) FROM Workflows").fetchone()[0])
+    assert not errors and total == 1 + threads * WRITES_PER_THREAD, (errors[:2], total)
+    print(f"pool: nested checkout, rollback and {threads} concurrent writers OK ({db.pool.stats})")
+def bench(db: DatabaseService, requests: int):
+    started = time.perf_counter()
+    for _ in range(requests):
+        conn = db.create_connection()
+        conn.execute(POINT_READ, ("missing",)).fetchone()
+        conn.close()
+    per_connect = (time.perf_counter() - started) / requests
+    started = time.perf_counter()
+    for _ in range(requests):
+        with db.get_connection() as conn:
+            conn.execute(POINT_READ, ("missing",)).fetchone()
+    pooled = (time.perf_counter() - started) / requests
+    print(f"point SELECT, connection per request: {per_connect * 1e6:8.1f} us")
+    print(f"point SELECT, pooled connection:       {pooled * 1e6:8.1f} us")
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    service = open_service()
+    try:
+        check_behaviour(service, int(sys.argv[2]) if len(sys.argv) > 2 else 16)
+        bench(service, int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
+    finally:
+        service.close()
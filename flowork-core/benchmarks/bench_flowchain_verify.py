@@ -0,0 +1,89 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\benchmarks\bench_flowchain_verify.py total lines 90 
+########################################################################
+
+"""
+Preset load cost as a Flow-Chain grows: first (full) verification, cached load and appending one
+version, with real EIP-191 signatures. Also checks that a tampered version is caught on the next
+cached load.
+Usage: python benchmarks/bench_flowchain_verify.py [versions ...]   (default 10 100 300)
+Runs against throwaway preset folders in a temporary directory.
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import contextlib
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from flowork_kernel.utils.flowchain_verifier import verify_workflow_chain, invalidate_chain_cache, calculate_hash
+CACHED_LOADS = 20
+ACCOUNT = Account.create()
+def append_version(workflow_dir: str, version: int, previous_path: str = None) -> str:
+    """Writes version `version` the way PresetManagerService.save_preset does, signed like the GUI."""
+    workflow_data = {"nodes": [{"id": f"node-{i}", "module_id": "bench_module", "config_values": {"step": version}} for i in range(20)], "connections": []}
+    message = json.dumps({"workflow_data": workflow_data}, sort_keys=True, separators=(',', ':'))
+    signature = ACCOUNT.sign_message(encode_defunct(text=message)).signature.hex()
+    path = os.path.join(workflow_dir, f"v{version}_2026-01-01T00-00-{version:05d}Z.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": version,
+            "author_id": ACCOUNT.address,
+            "timestamp": "2026-01-01T00:00:00Z",
+            "previous_hash": calculate_hash(previous_path) if previous_path else None,
+            "workflow_data": workflow_data,
+            "signature": signature,
+        }, f, indent=4)
+    return path
+def build_chain(workflow_dir: str, versions: int) -> str:
+    os.makedirs(workflow_dir)
+    path = None
+    for version in range(1, versions + 1):
+        path = append_version(workflow_dir, version, path)
+    return path
+def timed_verify(workflow_dir: str, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()): # (English Hardcode) The verifier prints per call
+        started = time.perf_counter()
+        ok, message = verify_workflow_chain(workflow_dir, **kwargs)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    assert ok, message
+    return elapsed_ms
+def check_tamper(base_dir: str):
+    workflow_dir = os.path.join(base_dir, "tamper")
+    build_chain(workflow_dir, 5)
+    timed_verify(workflow_dir)
+    victim = sorted(os.listdir(workflow_dir))[2]
+    with open(os.path.join(workflow_dir, victim), "r+", encoding="utf-8") as f:
+        data = json.load(f)
+        data["workflow_data"]["nodes"][0]["config_values"]["step"] = "tampered"
+        f.seek(0)
+        json.dump(data, f, indent=4)
+        f.truncate()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ok, message = verify_workflow_chain(workflow_dir)
+    assert not ok and "Invalid signature" in message, message
+    print("flow-chain: tampered version caught on the next cached load")
+def bench(base_dir: str, versions: int):
+    workflow_dir = os.path.join(base_dir, f"chain_{versions}")
+    last_path = build_chain(workflow_dir, versions)
+    invalidate_chain_cache()
+    first_ms = timed_verify(workflow_dir)
+    cached_ms = sum(timed_verify(workflow_dir) for _ in range(CACHED_LOADS)) / CACHED_LOADS
+    full_ms = timed_verify(workflow_dir, full_audit=True)
+    append_version(workflow_dir, versions + 1, last_path)
+    append_ms = timed_verify(workflow_dir)
+    print(f"{versions:>5} versions: first verify {first_ms:8.1f} ms, cached load {cached_ms:6.2f} ms, "
+          f"load after append-one {append_ms:6.2f} ms, full audit {full_ms:8.1f} ms")
+if __name__ == "__main__":
+    base = tempfile.mkdtemp(prefix="flowork-bench-")
+    try:
+        check_tamper(base)
+        for count in [int(arg) for arg in sys.argv[1:]] or [10, 100, 300]:
+            bench(base, count)
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
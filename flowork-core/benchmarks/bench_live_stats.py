@@ -0,0 +1,89 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\benchmarks\bench_live_stats.py total lines 90 
+########################################################################
+
+"""
+/api/v1/engine/live-stats cost: the former per-request scan over every finished job vs
+ExecutionStatsEngine.snapshot(). Checks that both agree on the counters and hotspots first.
+Usage: python benchmarks/bench_live_stats.py [jobs]   (default 100000)
+Jobs end within the last 30 hours, none in the minute around the 24h edge (where the minute
+buckets and the exact scan may differ by design).
+"""
+import os
+import sys
+import time
+import random
+from collections import Counter, defaultdict
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from flowork_kernel.services.api_server_service.execution_stats import ExecutionStatsEngine, STATS_WINDOW_SECONDS
+PRESETS = 40
+SNAPSHOTS = 100
+def make_jobs(count: int, now: float) -> list:
+    rng = random.Random(7)
+    jobs = []
+    for i in range(count):
+        age = rng.uniform(0, 30 * 3600)
+        if abs(age - STATS_WINDOW_SECONDS) < 120:
+            age += 240
+        end_time = now - age
+        jobs.append({
+            "status": rng.choice(("SUCCEEDED", "SUCCEEDED", "FAILED")),
+            "start_time": end_time - rng.uniform(0.01, 5),
+            "end_time": end_time,
+            "preset_name": f"preset-{i % PRESETS}",
+            "user_context": {"id": rng.choice(("Alice", "bob"))} if rng.random() < 0.8 else None,
+        })
+    jobs.sort(key=lambda job: job["end_time"])
+    return jobs
+def scan_finished_jobs(jobs: list, user_id: str, now: float) -> dict:
+    """The loop engine_routes ran on every request before ExecutionStatsEngine."""
+    since = now - STATS_WINDOW_SECONDS
+    stats = {"success": 0, "failed": 0}
+    failing = Counter()
+    durations = defaultdict(lambda: [0.0, 0])
+    for job in jobs:
+        user_context = job.get("user_context")
+        owner_id = user_context.get("id") if isinstance(user_context, dict) else None
+        if user_id and owner_id and owner_id.lower() != user_id.lower():
+            continue
+        if job["end_time"] >= since:
+            if job["status"] == "SUCCEEDED":
+                stats["success"] += 1
+            elif job["status"] == "FAILED":
+                stats["failed"] += 1
+                failing[job["preset_name"]] += 1
+            entry = durations[job["preset_name"]]
+            entry[0] += (job["end_time"] - job["start_time"]) * 1000
+            entry[1] += 1
+    slowest = sorted(((name, total / count) for name, (total, count) in durations.items()), key=lambda item: item[1], reverse=True)[:5]
+    return {"execution_stats_24h": stats, "top_failing_presets": failing.most_common(5), "top_slowest_presets": slowest}
+def check_agreement(engine: ExecutionStatsEngine, jobs: list, now: float):
+    for user_id in ("alice", "BOB", None):
+        expected = scan_finished_jobs(jobs, user_id, now)
+        snapshot = engine.snapshot(user_id, now=now)
+        assert snapshot["execution_stats_24h"] == expected["execution_stats_24h"], (user_id, snapshot["execution_stats_24h"])
+        assert [item["count"] for item in snapshot["top_failing_presets"]] == [count for _, count in expected["top_failing_presets"]]
+        for item, (name, avg_ms) in zip(snapshot["top_slowest_presets"], expected["top_slowest_presets"]):
+            assert item["name"] == name and abs(item["avg_duration_ms"] - avg_ms) < 1e-6, (item, name, avg_ms)
+            assert item["p95_duration_ms"] >= avg_ms
+    print("snapshot matches the full scan for alice, bob and all users")
+def bench(engine: ExecutionStatsEngine, jobs: list, now: float):
+    started = time.perf_counter()
+    scan_finished_jobs(jobs, "alice", now)
+    scan_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    for _ in range(SNAPSHOTS):
+        engine.snapshot("alice", now=now)
+    snapshot_ms = (time.perf_counter() - started) * 1000 / SNAPSHOTS
+    print(f"{len(jobs):,} finished jobs: full scan {scan_ms:.1f} ms, snapshot {snapshot_ms:.3f} ms per request")
+if __name__ == "__main__":
+    now = time.time()
+    jobs = make_jobs(int(sys.argv[1]) if len(sys.argv) > 1 else 100000, now)
+    engine = ExecutionStatsEngine()
+    started = time.perf_counter()
+    for job in jobs:
+        engine.record(job, now=now)
+    print(f"recorded {len(jobs):,} jobs in {(time.perf_counter() - started) * 1000:.0f} ms")
+    check_agreement(engine, jobs, now)
+    bench(engine, jobs, now)
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\dashboard_server.py total lines 289 
+# File NAME : C:\FLOWORK\flowork-core\dashboard_server.py total lines 278 
 ########################################################################
 
 import threading
@@ -137,19 +137,8 @@ def run_dashboard_server(kernel_instance, host="0.0.0.0", port=5001):
     def get_active_jobs():
         api_service = kernel_instance.get_service("api_server_service")
         active_jobs = []
-        if api_service and hasattr(api_service, "job_statuses"):
-            with api_service.job_statuses_lock:
-                for job_id, job_data in api_service.job_statuses.items():
-                    if job_data.get("status") == "RUNNING":
-                        start_time = job_data.get("start_time", 0)
-                        duration = time.time() - start_time
-                        active_jobs.append(
-                            {
-                                "id": job_id,
-                                "preset": job_data.get("preset_name", "N/A"),
-                                "duration_seconds": round(duration, 2),
-                            }
-                        )
+        if api_service and hasattr(api_service, "job_status_store"):
+            active_jobs = api_service.job_status_store.active_jobs()
         return jsonify(active_jobs)
     @app.route("/api/system_specs")
     def get_system_specs():
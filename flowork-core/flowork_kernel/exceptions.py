@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\exceptions.py total lines 36 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\exceptions.py total lines 42 
 ########################################################################
 
 """
@@ -33,3 +33,9 @@ class MandatoryUpdateRequiredError(FloworkException):
 class PermissionDeniedError(FloworkException):
     """Raised when an action is attempted without the required license tier or permission."""
     pass
+class ExecutionRejectedError(FloworkException):
+    """Raised when a workflow run is not admitted (job queue full or per-user limit reached). Retry later."""
+    def __init__(self, message, reason="queue_full", retry_after=5):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\execution\CheckpointManager.py total lines 57 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\execution\CheckpointManager.py total lines 59 
 ########################################################################
 
 class CheckpointManager:
@@ -34,6 +34,8 @@ class CheckpointManager:
             "payload": payload
         }
         self.state_manager.set(checkpoint_key, checkpoint_data)
+        if hasattr(self.state_manager, "flush"):
+            self.state_manager.flush() # (English Hardcode) A checkpoint is only useful if it survives a crash
         self.kernel.write_to_log(f"CHECKPOINT: Workflow state saved after node '{node_name}'.", "INFO")
     def load(self, context_id: str):
         """
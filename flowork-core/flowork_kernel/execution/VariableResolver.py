@@ -1,13 +1,80 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\execution\VariableResolver.py total lines 48 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\execution\VariableResolver.py total lines 105 
 ########################################################################
 
 import re
+VARIABLE_PATTERN = re.compile(r'\{\{vars\.([A-Z0-9_]+)\}\}')
+_STATIC, _VAR, _TEXT, _DICT, _LIST = range(5)
+def _clone_static(value):
+    if isinstance(value, dict):
+        return {k: _clone_static(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_clone_static(v) for v in value]
+    return value
+def _compile_node(item):
+    """Returns (kind, data). Subtrees without placeholders collapse into a single _STATIC node."""
+    if isinstance(item, dict):
+        children = [(k, _compile_node(v)) for k, v in item.items()]
+        if all(node[0] == _STATIC for _, node in children):
+            return (_STATIC, item)
+        return (_DICT, children)
+    if isinstance(item, list):
+        children = [_compile_node(v) for v in item]
+        if all(node[0] == _STATIC for node in children):
+            return (_STATIC, item)
+        return (_LIST, children)
+    if isinstance(item, str) and "{{vars." in item:
+        match_full = VARIABLE_PATTERN.fullmatch(item)
+        if match_full:
+            return (_VAR, (match_full.group(1), item))
+        parts, last_end = [], 0
+        for match in VARIABLE_PATTERN.finditer(item):
+            if match.start() > last_end:
+                parts.append(item[last_end:match.start()])
+            parts.append((match.group(1), match.group(0)))
+            last_end = match.end()
+        if not any(isinstance(part, tuple) for part in parts):
+            return (_STATIC, item)
+        if last_end < len(item):
+            parts.append(item[last_end:])
+        return (_TEXT, tuple(parts))
+    return (_STATIC, item)
+def _render_node(node, lookup):
+    kind, data = node
+    if kind == _STATIC:
+        return _clone_static(data)
+    if kind == _VAR:
+        return lookup(data[0])
+    if kind == _TEXT:
+        out = []
+        for part in data:
+            if isinstance(part, tuple):
+                value = lookup(part[0])
+                out.append(str(value) if value is not None else part[1])
+            else:
+                out.append(part)
+        return "".join(out)
+    if kind == _DICT:
+        return {k: _render_node(child, lookup) for k, child in data}
+    return [_render_node(child, lookup) for child in data]
+class CompiledTemplate:
+    """
+    A node config parsed once into static parts and `{{vars.NAME}}` slots.
+    render() returns a fresh structure (safe for the caller to mutate) with the slots filled in.
+    """
+    __slots__ = ("_root", "has_variables")
+    def __init__(self, config_item):
+        self._root = _compile_node(config_item)
+        self.has_variables = self._root[0] != _STATIC
+    def render(self, lookup):
+        """`lookup(var_name)` returns the variable value or None (placeholder is then kept)."""
+        return _render_node(self._root, lookup)
 class VariableResolver:
     """
     A dedicated class for resolving variable placeholders within a node's configuration.
     It recursively handles dictionaries, lists, and strings.
+    Hot paths should compile() a config once (e.g. per workflow version) and render it per run.
     """
     def __init__(self, kernel):
         """
@@ -16,32 +83,22 @@ class VariableResolver:
             kernel: The main application kernel.
         """
         self.kernel = kernel
-    def resolve(self, config_item: any) -> any:
+    @staticmethod
+    def compile(config_item: any) -> CompiledTemplate:
+        return CompiledTemplate(config_item)
+    def resolve(self, config_item: any, user_id: str = None) -> any:
         """
         Recursively resolves variable placeholders in a given configuration item.
         Args:
             config_item: The configuration item (string, dict, list) to resolve.
+            user_id: Owner of the variables (None = global variables).
         Returns:
             The configuration item with all placeholders replaced by their actual values.
         """
+        template = CompiledTemplate(config_item)
+        if not template.has_variables:
+            return config_item
         variable_manager = self.kernel.get_service("variable_manager")
-        if isinstance(config_item, dict):
-            return {k: self.resolve(v) for k, v in config_item.items()}
-        elif isinstance(config_item, list):
-            return [self.resolve(elem) for elem in config_item]
-        elif isinstance(config_item, str):
-            pattern = r'\{\{vars\.([A-Z0-9_]+)\}\}'
-            match_full = re.fullmatch(pattern, config_item)
-            if match_full:
-                var_name = match_full.group(1)
-                if variable_manager: # MODIFIED: Use the locally fetched instance
-                    return variable_manager.get_variable(var_name)
-                return config_item # Fallback if service not found
-            def replace_match(match):
-                var_name = match.group(1)
-                if variable_manager: # MODIFIED: Use the locally fetched instance
-                    value = variable_manager.get_variable(var_name)
-                    return str(value) if value is not None else match.group(0)
-                return match.group(0) # Fallback if service not found
-            return re.sub(pattern, replace_match, config_item)
-        return config_item
+        if not variable_manager:
+            return config_item # Fallback if service not found
+        return template.render(lambda var_name: variable_manager.get_variable(var_name, user_id=user_id))
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\kernel_logic.py total lines 631 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\kernel_logic.py total lines 634 
 ########################################################################
 
 import os
@@ -17,6 +17,7 @@ from typing import List, Dict, Any, Callable
 import requests
 from packaging import version
 from flowork_kernel.exceptions import PermissionDeniedError
+from flowork_kernel.utils.component_index import get_component_index, COMPONENT_INDEX_FILE
 class JsonFormatter(logging.Formatter):
     def format(self, record):
         log_record = {
@@ -525,6 +526,7 @@ sQIDAQAB
             "trigger_index.cache",
             "plugin_index.cache", # Add plugin cache if it exists
             "tool_index.cache", # Add tool cache if it exists
+            COMPONENT_INDEX_FILE,
         ]:
             cache_path = os.path.join(self.data_path, cache_file)
             if os.path.exists(cache_path):
@@ -532,6 +534,7 @@ sQIDAQAB
                     os.remove(cache_path)
                 except OSError as e:
                      self.write_to_log(f"Could not remove cache file {cache_path}: {e}", "WARN") # English Hardcode
+        get_component_index(self.data_path).invalidate() # (English Hardcode) Forget the in-memory copy as well
         mm = self.get_service("module_manager_service", is_system_call=True)
         if mm: mm.discover_and_load_modules()
         pm = self.get_service("plugin_manager_service", is_system_call=True)
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\api_server_service\api_server_service.py total lines 621 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\api_server_service\api_server_service.py total lines 634 
 ########################################################################
 
 import asyncio
@@ -20,7 +20,7 @@ import logging # <-- START PENAMBAHAN KODE (ROADMAP 4.4)
 from urllib.parse import urlparse, unquote
 from ..base_service import BaseService
 from .routes.base_api_route import BaseApiRoute
-from flowork_kernel.exceptions import PermissionDeniedError
+from flowork_kernel.exceptions import PermissionDeniedError, ExecutionRejectedError
 from collections import deque
 from flowork_kernel.utils.tracing_setup import (
     setup_tracing,
@@ -29,16 +29,31 @@ from flowork_kernel.utils.tracing_setup import (
 from .routes.filesystem_routes import FilesystemRoutes
 from .routes.engine_routes import EngineRoutes
 from .routes.preset_routes import PresetRoutes # Import class rute preset yang baru
+from .job_status_store import JobStatusStore, JOB_STATUS_SPILL
+JOB_STATUS_SYNC_SECONDS = float(os.getenv("CORE_JOB_STATUS_SYNC_SECONDS", "2"))
+from .execution_stats import ExecutionStatsEngine
+from .component_catalog import ComponentCatalog, COMPONENT_TYPES
+from .dashboard_stream import DashboardStream
 from flowork_kernel.services.ops_service.ops_service import get_autoscaling_advice
 class ApiServerService(BaseService):
     def __init__(self, kernel, service_id: str):
         BaseService.__init__(self, kernel, service_id)
         self.tracer = setup_tracing(service_name="flowork-core")
-        self.job_statuses = {}
-        self.job_statuses_lock = threading.Lock()
+        self.execution_stats = ExecutionStatsEngine()
+        self._status_sync_lock = threading.Lock()
+        self._status_sync_thread = None
+        self.job_status_store = JobStatusStore(
+            spill_path=os.path.join(self.kernel.data_path, "job_history.db") if JOB_STATUS_SPILL else None, # English Hardcode
+            on_finished=lambda job_id, record: self.execution_stats.record(record),
+        )
+        self.dashboard_stream = DashboardStream(
+            active_jobs_provider=lambda owner_id: self.job_status_store.active_jobs(user_id=owner_id),
+        )
+        self.dashboard_stream.add_listener(self._publish_dashboard_delta)
         self.recent_events = deque(maxlen=15)
         self.kernel.write_to_log("Service 'ApiServerService' initialized.", "DEBUG")
         self.core_component_ids = None
+        self.component_catalog = ComponentCatalog(self._safe_get_service, lambda: self.core_component_ids)
         self.variable_manager = None
         self.preset_manager = None
         self.state_manager = None
@@ -66,34 +81,14 @@ class ApiServerService(BaseService):
         self.runner = None
         self.site = None
     def update_job_status(self, job_id: str, status_data: dict):
-        with self.job_statuses_lock:
-            if job_id not in self.job_statuses:
-                self.job_statuses[job_id] = {}
-            if "user_context" in status_data:
-                self.job_statuses[job_id]["user_context"] = status_data.pop("user_context")
-            self.job_statuses[job_id].update(status_data)
-            if self.event_bus:
-                active_jobs = []
-                for j_id, j_data in self.job_statuses.items():
-                    if j_data.get("status") == "RUNNING":
-                        start_time = j_data.get("start_time", 0)
-                        duration = time.time() - start_time
-                        active_jobs.append(
-                            {
-                                "id": j_id,
-                                "preset": j_data.get("preset_name", "N/A"),
-                                "duration_seconds": round(duration, 2),
-                                "user_context": j_data.get("user_context")
-                            }
-                        )
-                self.event_bus.publish(
-                    "DASHBOARD_ACTIVE_JOBS_UPDATE", # English Hardcode
-                    {"active_jobs": active_jobs},
-                    publisher_id=self.service_id,
-                )
+        record = self.job_status_store.update(job_id, status_data)
+        self.dashboard_stream.record(job_id, record)
+    def _publish_dashboard_delta(self, message: dict):
+        """(DashboardStream tick) Makes the coalesced deltas available to in-process subscribers."""
+        if self.event_bus:
+            self.event_bus.publish("DASHBOARD_JOBS_DELTA", message, publisher_id=self.service_id) # English Hardcode
     def get_job_status(self, job_id: str) -> dict | None:
-        with self.job_statuses_lock:
-            return self.job_statuses.get(job_id)
+        return self.job_status_store.get(job_id)
     def log_recent_event(self, event_string: str):
         if "dashboard/summary" in event_string or "/health" in event_string:
             return
@@ -104,6 +99,11 @@ class ApiServerService(BaseService):
         self.app = web.Application(middlewares=[self.middleware_handler])
         self._load_api_routes()
         self.core_component_ids = await self._load_protected_component_ids()
+        self.component_catalog.invalidate()
+        if self.event_bus:
+            self.event_bus.subscribe(
+                "COMPONENT_LIST_CHANGED", f"{self.service_id}_component_catalog", self._on_component_list_changed # English Hardcode
+            )
         port = self.loc.get_setting("webhook_port", 8989) if self.loc else 8989
         host = "0.0.0.0"
         self.runner = web.AppRunner(self.app)
@@ -208,6 +208,10 @@ class ApiServerService(BaseService):
                 )
             else:
                 return web.json_response({"error": "Failed to trigger workflow (e.g., preset not found)."}, status=404) # English Hardcode
+        except ExecutionRejectedError as e:
+            return web.json_response(
+                {"error": str(e), "reason": e.reason, "retry_after": e.retry_after}, status=429, headers={"Retry-After": str(e.retry_after)} # English Hardcode
+            )
         except json.JSONDecodeError:
             return web.json_response({"error": "Bad Request: Body must be in valid JSON format."}, status=400) # English Hardcode
         except Exception as e:
@@ -293,6 +297,17 @@ class ApiServerService(BaseService):
         self.kernel.write_to_log("    - Registered: GET /ops/advice", "DETAIL") # (English Hardcode)
         self.kernel.write_to_log("    - Registered: POST /webhook/{preset_name}", "DETAIL") # English Hardcode
         self.kernel.write_to_log("API route discovery complete.", "SUCCESS") # English Hardcode
+    def _on_component_list_changed(self, event_data):
+        """(EventBus thread) Marks the affected catalog type stale; a hot-reload also re-reads the protected IDs."""
+        event_data = event_data if isinstance(event_data, dict) else {}
+        if event_data.get("status") == "hot_reloaded": # English Hardcode
+            try:
+                self.core_component_ids = asyncio.run(self._load_protected_component_ids())
+            except Exception as e:
+                self.kernel.write_to_log(f"Component catalog: could not reload protected IDs: {e}", "WARN") # English Hardcode
+        comp_type = event_data.get("type")
+        comp_type = f"{comp_type}s" if comp_type and f"{comp_type}s" in COMPONENT_TYPES else comp_type
+        self.component_catalog.invalidate(comp_type)
     async def _load_protected_component_ids(self):
         protected_ids = set()
         config_path = os.path.join(self.kernel.data_path, "protected_components.txt") # English Hardcode
@@ -333,6 +348,8 @@ class ApiServerService(BaseService):
             self.kernel.write_to_log("Stopping aiohttp server...", "INFO") # English Hardcode
             await self.runner.cleanup()
             self.kernel.write_to_log("aiohttp server stopped.", "SUCCESS") # English Hardcode
+        self.dashboard_stream.stop()
+        self.job_status_store.close()
     @web.middleware
     async def middleware_handler(self, request, handler):
         start_time = time.time()
@@ -460,16 +477,41 @@ class ApiServerService(BaseService):
         mode: str = "EXECUTE", # English Hardcode
         user_context: dict = None,
     ) -> str | None:
-        """(MODIFIED) Triggers a workflow execution asynchronously."""
+        """(MODIFIED) Awaitable wrapper around submit_workflow() for the aiohttp handlers."""
+        return await asyncio.to_thread(
+            self.submit_workflow,
+            preset_name,
+            initial_payload=initial_payload,
+            raw_workflow_data=raw_workflow_data,
+            start_node_id=start_node_id,
+            mode=mode,
+            user_context=user_context,
+        )
+    def submit_workflow(
+        self,
+        preset_name: str,
+        initial_payload: dict = None,
+        raw_workflow_data: dict = None,
+        start_node_id: str = None,
+        mode: str = "EXECUTE", # English Hardcode
+        user_context: dict = None,
+        source: str = "api", # English Hardcode
+    ) -> str | None:
+        """
+        Queues a preset (or raw workflow) run through WorkflowExecutorService.submit_execution, the
+        same durable job queue the engine socket uses. Safe to call from any thread (cron, triggers).
+        Returns the execution id (also the job id for status queries), or None if the workflow could
+        not be found/started. Raises ExecutionRejectedError when admission control defers the run.
+        """
         workflow_data = None
         trigger_source_log = "" # English Hardcode
+        user_id = (user_context.get("user_id") or user_context.get("id")) if user_context else None # Ambil ID user dari context
         if raw_workflow_data:
-            self.logger("Triggering workflow from raw data provided by API call.", "DEBUG") # English Hardcode
+            self.kernel.write_to_log("Triggering workflow from raw data provided by API call.", "DEBUG") # English Hardcode
             workflow_data = raw_workflow_data
             trigger_source_log = "raw API call" # English Hardcode
         elif self.preset_manager:
-            self.logger(f"Triggering workflow from saved preset: '{preset_name}'", "DEBUG") # English Hardcode
-            user_id = user_context.get("user_id") if user_context else None # Ambil ID user dari context
+            self.kernel.write_to_log(f"Triggering workflow from saved preset: '{preset_name}'", "DEBUG") # English Hardcode
             workflow_data = self.preset_manager.get_preset_data(preset_name, user_id=user_id)
             trigger_source_log = f"preset '{preset_name}'" # English Hardcode
         else:
@@ -489,100 +531,72 @@ class ApiServerService(BaseService):
         if "data" not in initial_payload: initial_payload["data"] = {} # English Hardcode
         if "history" not in initial_payload: initial_payload["history"] = [] # English Hardcode
         initial_payload["data"]["user_context"] = user_context # English Hardcode
+        workflow_executor = self.workflow_executor or self._safe_get_service("workflow_executor_service")
+        if not workflow_executor:
+            self.kernel.write_to_log(
+                f"Cannot trigger workflow {trigger_source_log}, WorkflowExecutor service is unavailable (likely due to license tier).", # English Hardcode
+                "ERROR",
+            )
+            return None
+        if mode != "EXECUTE": # English Hardcode
+            self.kernel.write_to_log(f"Mode '{mode}' is not supported by the job queue, running {trigger_source_log} in EXECUTE mode.", "WARN") # English Hardcode
         job_id = str(uuid.uuid4())
-        initial_status = {
+        workflow_id = None if raw_workflow_data else self.preset_manager._get_workflow_id(user_id, preset_name)
+        try:
+            workflow_executor.submit_execution(
+                workflow_data,
+                workflow_id=workflow_id,
+                user_id=user_id,
+                initial_payload=initial_payload,
+                start_node_id=start_node_id,
+                execution_id=job_id,
+                source=source,
+            )
+        except ValueError as e:
+            self.kernel.write_to_log(f"API Trigger failed for {trigger_source_log}: {e}", "ERROR") # English Hardcode
+            return None
+        self.update_job_status(job_id, {
             "type": "workflow", # English Hardcode
-            "status": "QUEUED", # English Hardcode
+            "status": "RUNNING", # (English Hardcode) Same as its Executions row; reconciled by _sync_workflow_statuses
             "preset_name": preset_name if not raw_workflow_data else "Raw Execution", # English Hardcode
             "start_time": time.time(),
             "user_context": user_context # Simpan user context di status job
-        }
-        self.update_job_status(job_id, initial_status)
+        })
+        self._ensure_status_sync_thread()
         self.kernel.write_to_log(
             f"Job '{job_id}' for {trigger_source_log} has been queued. User Context: {user_context}", "INFO" # English Hardcode
         )
-        workflow_executor = self.kernel.get_service("workflow_executor_service")
-        if workflow_executor:
-            nodes_list = workflow_data.get("nodes", []) # English Hardcode
-            connections_list = workflow_data.get("connections", []) # English Hardcode
-            nodes_dict = {node["id"]: node for node in nodes_list} # English Hardcode
-            connections_dict = {conn["id"]: conn for conn in connections_list} # English Hardcode
-            global_loop_config = workflow_data.get("global_loop_config") # English Hardcode
-            payload = {
-                'workflow_id': job_id, # Kita gunakan job_id sebagai workflow_id
-                'user_id': user_context.get("user_id") if user_context else "system",
-                'initial_data': initial_payload
-            }
-            exec_thread = threading.Thread(
-                target=workflow_executor.execute_workflow_legacy_sync_runner, # Asumsikan ada fungsi ini
-                kwargs={
-                    "nodes": nodes_dict,
-                    "connections": connections_dict,
-                    "initial_payload": initial_payload,
-                    "logger": self.kernel.write_to_log,
-                    "status_updater": lambda *args: None,
-                    "highlighter": lambda *args: None,
-                    "workflow_context_id": job_id,
-                    "job_status_updater": self.update_job_status,
-                    "start_node_id": start_node_id,
-                    "mode": mode,
-                    "user_context": user_context,
-                    "global_loop_config": global_loop_config,
-                    "preset_name": preset_name if not raw_workflow_data else "Raw Execution"
-                }
-            )
-            exec_payload = {
-                'workflow_id': preset_name, # Ini adalah ID alur kerja (misal 'test-webhook')
-                'user_id': user_context.get("user_id") if user_context else "system",
-                'initial_data': initial_payload,
-                'execution_id': job_id # ID eksekusi unik ini
-            }
-            def run_async_in_thread(coro):
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    loop.run_until_complete(coro)
-                finally:
-                    loop.close()
-            async def run_workflow_coro():
-                exec_payload = {
-                    'workflow_id': preset_name,
-                    'user_id': user_context.get("user_id") if user_context else "system",
-                    'initial_data': initial_payload,
-                    'execution_id': job_id
-                }
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None, # Gunakan thread pool default
-                workflow_executor.execute_workflow_legacy_sync_runner, # Asumsikan ada fungsi ini
-                nodes_dict,
-                connections_dict,
-                initial_payload,
-                self.kernel.write_to_log,
-                lambda *args: None,
-                lambda *args: None,
-                job_id,
-                self.update_job_status,
-                start_node_id,
-                mode,
-                user_context,
-                global_loop_config,
-                preset_name if not raw_workflow_data else "Raw Execution"
-            )
-        else:
-            self.kernel.write_to_log(
-                f"Cannot trigger workflow {trigger_source_log}, WorkflowExecutor service is unavailable (likely due to license tier).", # English Hardcode
-                "ERROR",
-            )
-            fail_status = {
-                "status": "FAILED", # English Hardcode
-                "error": "WorkflowExecutor service unavailable.", # English Hardcode
-                "end_time": time.time(),
-                "user_context": user_context # Include context in fail status
-            }
-            self.update_job_status(job_id, fail_status)
-            return None # Indicate failure
         return job_id
+    def _ensure_status_sync_thread(self):
+        with self._status_sync_lock:
+            if self._status_sync_thread is None or not self._status_sync_thread.is_alive():
+                self._status_sync_thread = threading.Thread(target=self._status_sync_loop, name="JobStatusSync", daemon=True) # English Hardcode
+                self._status_sync_thread.start()
+    def _status_sync_loop(self):
+        """Polls core.db for the RUNNING workflow entries only; exits when none are left."""
+        while True:
+            time.sleep(JOB_STATUS_SYNC_SECONDS)
+            try:
+                if not self._sync_workflow_statuses():
+                    with self._status_sync_lock:
+                        if not self.job_status_store.running_job_ids(job_type="workflow"): # English Hardcode
+                            self._status_sync_thread = None
+                            return
+            except Exception as e:
+                self.kernel.write_to_log(f"Job status sync failed: {e}", "WARN") # English Hardcode
+    def _sync_workflow_statuses(self) -> int:
+        """Copies finished Executions into the job-status store. Returns how many workflow jobs are still running."""
+        running = self.job_status_store.running_job_ids(job_type="workflow") # English Hardcode
+        if not running or not self.workflow_executor:
+            return len(running)
+        finished_status = {"DONE": "SUCCEEDED", "FAILED": "FAILED"} # English Hardcode
+        still_running = 0
+        for job_id, (status, _) in self.workflow_executor.get_execution_statuses(running).items():
+            if status in finished_status:
+                self.update_job_status(job_id, {"status": finished_status[status], "end_time": time.time()})
+            else:
+                still_running += 1
+        return still_running
     def trigger_scan_by_api(self, scanner_id: str = None) -> str | None:
         """Triggers a diagnostics scan asynchronously."""
         if not self.diagnostics_service:
@@ -591,13 +605,12 @@ class ApiServerService(BaseService):
             )
             return None
         job_id = f"scan_{uuid.uuid4()}" # English Hardcode
-        with self.job_statuses_lock:
-            self.job_statuses[job_id] = {
-                "type": "diagnostics_scan", # English Hardcode
-                "status": "QUEUED", # English Hardcode
-                "start_time": time.time(),
-                "target": "ALL" if not scanner_id else scanner_id, # English Hardcode
-            }
+        self.job_status_store.set(job_id, {
+            "type": "diagnostics_scan", # English Hardcode
+            "status": "QUEUED", # English Hardcode
+            "start_time": time.time(),
+            "target": "ALL" if not scanner_id else scanner_id, # English Hardcode
+        })
         scan_thread = threading.Thread(
             target=self._run_scan_worker, args=(job_id, scanner_id), daemon=True
         )
@@ -0,0 +1,154 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\api_server_service\component_catalog.py total lines 155 
+########################################################################
+
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict, deque
+COMPONENT_TYPES = {
+    "modules": ("module_manager_service", "loaded_modules"),
+    "plugins": ("plugin_manager_service", "loaded_plugins"),
+    "tools": ("tools_manager_service", "loaded_tools"),
+    "widgets": ("widget_manager_service", "loaded_widgets"),
+    "triggers": ("trigger_manager_service", "loaded_triggers"),
+    "ai_providers": ("ai_provider_manager_service", "loaded_providers"),
+}
+CATALOG_CHANGE_LOG_SIZE = 4096 # (English Hardcode) Older "since" versions get a full list instead of a delta
+CATALOG_PAGE_CACHE_SIZE = 32 # (English Hardcode) Serialized (offset, limit) pages kept per component type
+class _CatalogSnapshot:
+    __slots__ = ("version", "entries", "ordered", "pages")
+    def __init__(self, version, entries):
+        self.version = version
+        self.entries = entries
+        self.ordered = sorted(entries.values(), key=lambda x: x["name"])
+        self.pages = OrderedDict()
+class ComponentCatalog:
+    """
+    Versioned, precomputed component lists for the list endpoints.
+    A component type is rebuilt only after invalidate() (install, uninstall, pause, discovery,
+    hot-reload). The rebuild diffs against the previous snapshot, bumps the catalog version only if
+    something changed and records each change, so clients can ask for "changes since version N".
+    Pages are serialized once per snapshot and served with an ETag made of the version and a hash
+    of the page body. Versions start at the boot time in milliseconds, so they keep increasing
+    across restarts: a "since" or ETag from an earlier process never matches the new catalog.
+    """
+    def __init__(self, manager_lookup, core_ids_provider):
+        self._manager_lookup = manager_lookup # (English Hardcode) service name -> service instance or None
+        self._core_ids_provider = core_ids_provider
+        self._lock = threading.Lock()
+        self._version = time.time_ns() // 1000000 # (English Hardcode) Boot epoch, see class docstring
+        self._snapshots = {}
+        self._dirty = set(COMPONENT_TYPES)
+        self._changes = deque() # (English Hardcode) (version, comp_type, item_id, entry or None for removed)
+        self._log_floor = self._version
+    @property
+    def version(self) -> int:
+        return self._version
+    def invalidate(self, comp_type: str = None):
+        with self._lock:
+            if comp_type in COMPONENT_TYPES:
+                self._dirty.add(comp_type)
+            else:
+                self._dirty.update(COMPONENT_TYPES)
+    @staticmethod
+    def _entry(item_id, item_data, core_ids):
+        manifest = item_data.get("manifest", {})
+        return {
+            "id": item_id,
+            "name": manifest.get("name", item_id),
+            "version": manifest.get("version", "N/A"),
+            "is_paused": item_data.get("is_paused", False),
+            "description": manifest.get("description", ""),
+            "is_core": item_id in core_ids,
+            "tier": manifest.get("tier", "free"),
+            "is_installed": item_data.get("is_installed", False),
+            "manifest": manifest,
+        }
+    def _build_entries(self, comp_type):
+        manager_name, items_attr_name = COMPONENT_TYPES[comp_type]
+        manager = self._manager_lookup(manager_name)
+        if not manager:
+            return None
+        core_ids = self._core_ids_provider() or set()
+        items = getattr(manager, items_attr_name, {}) or {}
+        entries = {}
+        for item_id, item_data in list(items.items()):
+            entry = self._entry(item_id, item_data, core_ids)
+            entries[item_id] = json.loads(json.dumps(entry, default=str)) # (English Hardcode) Detached, JSON-safe copy
+        return entries
+    def snapshot(self, comp_type: str):
+        """(Re)builds the type if it was invalidated. Returns None if its manager is unavailable."""
+        with self._lock:
+            snapshot = self._snapshots.get(comp_type)
+            if snapshot is not None and comp_type not in self._dirty:
+                return snapshot
+            entries = self._build_entries(comp_type)
+            if entries is None:
+                return None
+            self._dirty.discard(comp_type)
+            previous = snapshot.entries if snapshot is not None else {}
+            changed = [item_id for item_id, entry in entries.items() if previous.get(item_id) != entry]
+            removed = [item_id for item_id in previous if item_id not in entries]
+            if snapshot is not None and not changed and not removed:
+                return snapshot
+            self._version += 1
+            for item_id in changed:
+                self._changes.append((self._version, comp_type, item_id, entries[item_id]))
+            for item_id in removed:
+                self._changes.append((self._version, comp_type, item_id, None))
+            while len(self._changes) > CATALOG_CHANGE_LOG_SIZE:
+                self._log_floor = self._changes.popleft()[0]
+            snapshot = _CatalogSnapshot(self._version, entries)
+            self._snapshots[comp_type] = snapshot
+            return snapshot
+    def items(self, comp_type: str) -> list:
+        snapshot = self.snapshot(comp_type)
+        return list(snapshot.ordered) if snapshot else []
+    def page(self, comp_type: str, offset: int, limit: int):
+        """Returns (json_bytes, etag, version) for one page of the name-sorted list, or None."""
+        snapshot = self.snapshot(comp_type)
+        if snapshot is None:
+            return None
+        key = (offset, limit)
+        with self._lock:
+            cached = snapshot.pages.get(key)
+            if cached is None:
+                body = json.dumps(snapshot.ordered[offset : offset + limit]).encode("utf-8")
+                digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+                cached = snapshot.pages[key] = (body, f'"{comp_type}-v{snapshot.version}-{offset}-{limit}-{digest}"')
+                if len(snapshot.pages) > CATALOG_PAGE_CACHE_SIZE:
+                    snapshot.pages.popitem(last=False)
+            else:
+                snapshot.pages.move_to_end(key)
+        return cached[0], cached[1], snapshot.version
+    def changes_since(self, comp_type: str, since_version: int):
+        """
+        {"version", "since", "full": False, "changed": [...], "removed": [ids]} for one type, or the
+        same shape with "full": True and every item when since_version is older than the change log.
+        """
+        snapshot = self.snapshot(comp_type)
+        if snapshot is None:
+            return None
+        with self._lock:
+            if since_version < self._log_floor or since_version > self._version:
+                return {"version": snapshot.version, "since": since_version, "full": True, "changed": list(snapshot.ordered), "removed": []}
+            latest = {}
+            for version, change_type, item_id, entry in self._changes:
+                if version > since_version and change_type == comp_type:
+                    latest[item_id] = entry
+        return {
+            "version": snapshot.version,
+            "since": since_version,
+            "full": False,
+            "changed": [entry for entry in latest.values() if entry is not None],
+            "removed": [item_id for item_id, entry in latest.items() if entry is None],
+        }
+    @staticmethod
+    def etag_matches(if_none_match: str, etag: str) -> bool:
+        if not if_none_match:
+            return False
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
@@ -0,0 +1,157 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\api_server_service\dashboard_stream.py total lines 158 
+########################################################################
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from .job_status_store import ACTIVE_JOB_STATUSES
+DASHBOARD_TICK_SECONDS = float(os.getenv("CORE_DASHBOARD_TICK_MS", "250")) / 1000.0 # (English Hardcode) Coalescing window per owner
+DASHBOARD_HISTORY_SIZE = int(os.getenv("CORE_DASHBOARD_HISTORY", "256")) # (English Hardcode) Messages kept for resume-after-reconnect
+DELTA_STARTED = "started" # English Hardcode
+DELTA_UPDATED = "updated" # English Hardcode
+DELTA_FINISHED = "finished" # English Hardcode
+def _owner_of(record: dict):
+    user_context = record.get("user_context")
+    owner_id = user_context.get("id") if isinstance(user_context, dict) else None
+    return owner_id.lower() if owner_id else None
+class DashboardStream:
+    """
+    Coalesced job deltas for the dashboards, instead of the full active-job list per update.
+    record() is called on every job status change and only remembers the latest state of each job
+    per owner. Every tick, each owner with changes gets ONE message:
+        {"seq", "owner_id", "ts", "deltas": [{"kind": started|updated|finished, "job": {...}}],
+         "summary": {"active", "started", "finished", "failed"}}
+    seq is monotonic per engine. resume(owner_id, since_seq) replays the recent messages a client
+    missed, or returns a fresh snapshot when they are no longer in the history.
+    """
+    def __init__(self, active_jobs_provider, tick_seconds: float = DASHBOARD_TICK_SECONDS,
+                 history_size: int = DASHBOARD_HISTORY_SIZE):
+        self.logger = logging.getLogger("DashboardStream") # English Hardcode
+        self._listeners = [] # (English Hardcode) listener(message), called from the tick thread
+        self.active_jobs_provider = active_jobs_provider # (English Hardcode) active_jobs_provider(owner_id or None) -> list
+        self.tick_seconds = max(0.01, tick_seconds)
+        self._lock = threading.Lock()
+        self._pending = {} # (English Hardcode) owner -> {job_id: [kind, job]}
+        self._active = {} # (English Hardcode) job_id -> owner, for started/updated and the active counts
+        self._active_per_owner = {}
+        self._seq = 0
+        self._history = deque(maxlen=max(1, history_size))
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    @staticmethod
+    def _job_view(job_id: str, record: dict) -> dict:
+        job = {
+            "id": job_id,
+            "preset": record.get("preset_name", "N/A"), # English Hardcode
+            "status": record.get("status"),
+            "start_time": record.get("start_time"),
+            "end_time": record.get("end_time"),
+        }
+        if record.get("error"):
+            job["error"] = str(record["error"])[:500]
+        return job
+    def record(self, job_id: str, record: dict):
+        status = record.get("status")
+        if status is None:
+            return
+        owner = _owner_of(record)
+        job = self._job_view(job_id, record)
+        with self._lock:
+            was_active = job_id in self._active
+            if status in ACTIVE_JOB_STATUSES:
+                kind = DELTA_UPDATED if was_active else DELTA_STARTED
+                if not was_active:
+                    self._active[job_id] = owner
+                    self._active_per_owner[owner] = self._active_per_owner.get(owner, 0) + 1
+            else:
+                kind = DELTA_FINISHED
+                if was_active:
+                    previous_owner = self._active.pop(job_id)
+                    remaining = self._active_per_owner.get(previous_owner, 1) - 1
+                    if remaining > 0:
+                        self._active_per_owner[previous_owner] = remaining
+                    else:
+                        self._active_per_owner.pop(previous_owner, None)
+            owner_pending = self._pending.setdefault(owner, {})
+            queued = owner_pending.get(job_id)
+            if queued and queued[0] == DELTA_STARTED and kind == DELTA_UPDATED:
+                queued[1] = job # (English Hardcode) Still "started" for clients, with the latest state
+            else:
+                owner_pending[job_id] = [kind, job]
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._tick_loop, name="DashboardStream", daemon=True) # English Hardcode
+                self._thread.start()
+        self._wakeup.set()
+    def _tick_loop(self):
+        while not self._stop_event.is_set():
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._stop_event.wait(self.tick_seconds):
+                break
+            self.flush()
+    def flush(self):
+        """Builds and publishes one message per owner with pending changes."""
+        messages = []
+        now = time.time()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            for owner, jobs in pending.items():
+                deltas = [{"kind": kind, "job": job} for kind, job in jobs.values()]
+                self._seq += 1
+                message = {
+                    "seq": self._seq,
+                    "owner_id": owner,
+                    "ts": now,
+                    "deltas": deltas,
+                    "summary": {
+                        "active": self._active_per_owner.get(owner, 0),
+                        "started": sum(1 for delta in deltas if delta["kind"] == DELTA_STARTED),
+                        "finished": sum(1 for delta in deltas if delta["kind"] == DELTA_FINISHED),
+                        "failed": sum(1 for delta in deltas if delta["kind"] == DELTA_FINISHED and delta["job"]["status"] == "FAILED"), # English Hardcode
+                    },
+                }
+                self._history.append(message)
+                messages.append(message)
+        for message in messages:
+            for listener in list(self._listeners):
+                try:
+                    listener(message)
+                except Exception as e:
+                    self.logger.warning(f"Dashboard listener failed for delta #{message['seq']}: {e}") # English Log
+    def resume(self, owner_id: str = None, since_seq: int = None) -> dict:
+        """
+        {"type": "replay", "seq", "messages": [...]} when every message after since_seq is still in
+        the history, else {"type": "snapshot", "seq", "active_jobs": [...]}. Messages of jobs
+        without an owner are visible to everyone, as in active_jobs().
+        """
+        owner_id = owner_id.lower() if owner_id else None
+        with self._lock:
+            current_seq = self._seq
+            if since_seq is not None and 0 <= since_seq <= current_seq:
+                oldest_seq = self._history[0]["seq"] if self._history else current_seq + 1
+                if since_seq == current_seq or oldest_seq <= since_seq + 1:
+                    return {
+                        "type": "replay", # English Hardcode
+                        "seq": current_seq,
+                        "messages": [
+                            message for message in self._history
+                            if message["seq"] > since_seq and (owner_id is None or message["owner_id"] in (owner_id, None))
+                        ],
+                    }
+        return {"type": "snapshot", "seq": current_seq, "active_jobs": self.active_jobs_provider(owner_id)} # English Hardcode
+    def stop(self):
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        self.flush()
@@ -0,0 +1,167 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\api_server_service\execution_stats.py total lines 168 
+########################################################################
+
+import math
+import time
+import threading
+from collections import deque
+STATS_WINDOW_SECONDS = 24 * 60 * 60
+STATS_BUCKET_SECONDS = 60
+HISTOGRAM_BINS_PER_OCTAVE = 4 # (English Hardcode) Log-linear bins, ~19% wide, like a coarse HDR histogram
+ALL_USERS = "*" # (English Hardcode) Aggregate over every job, used when no user header is sent
+def _histogram_bin(duration_ms: float) -> int:
+    if duration_ms < 1:
+        return 0
+    return int(math.log2(duration_ms) * HISTOGRAM_BINS_PER_OCTAVE) + 1
+def _bin_upper_ms(bin_index: int) -> float:
+    if bin_index <= 0:
+        return 1.0
+    return 2 ** (bin_index / HISTOGRAM_BINS_PER_OCTAVE)
+class PresetStats:
+    """Counters plus a duration histogram for one preset. Mergeable and subtractable."""
+    __slots__ = ("success", "failed", "timed", "total_ms", "histogram")
+    def __init__(self):
+        self.success = 0
+        self.failed = 0
+        self.timed = 0
+        self.total_ms = 0.0
+        self.histogram = {}
+    def add(self, other, sign: int = 1):
+        self.success += sign * other.success
+        self.failed += sign * other.failed
+        self.timed += sign * other.timed
+        self.total_ms += sign * other.total_ms
+        for bin_index, count in other.histogram.items():
+            remaining = self.histogram.get(bin_index, 0) + sign * count
+            if remaining:
+                self.histogram[bin_index] = remaining
+            else:
+                self.histogram.pop(bin_index, None)
+    def is_empty(self) -> bool:
+        return not (self.success or self.failed or self.timed)
+    def percentile_ms(self, fraction: float) -> float | None:
+        if self.timed <= 0:
+            return None
+        rank = fraction * self.timed
+        seen = 0
+        for bin_index in sorted(self.histogram):
+            seen += self.histogram[bin_index]
+            if seen >= rank:
+                return _bin_upper_ms(bin_index)
+        return _bin_upper_ms(max(self.histogram))
+class ExecutionStatsEngine:
+    """
+    Rolling 24h execution statistics, updated once per finished job instead of recomputed per request.
+    Each finished job lands in the minute bucket of its end_time, keyed by owner (lower-cased user id,
+    None for jobs without a user_context) and preset. Window totals per owner are kept alongside the
+    buckets: a record adds to them, an expiring bucket is subtracted from them. snapshot() only reads
+    the totals, so its cost depends on the number of presets, not on the number of jobs.
+    """
+    def __init__(self, window_seconds: int = STATS_WINDOW_SECONDS, bucket_seconds: int = STATS_BUCKET_SECONDS):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self._lock = threading.Lock()
+        self._buckets = deque() # (English Hardcode) [bucket_key, {owner: {preset: PresetStats}}], oldest first
+        self._totals = {} # (English Hardcode) owner -> {preset: PresetStats} over the whole window
+    def _owner_keys(self, job_data: dict):
+        user_context = job_data.get("user_context")
+        owner_id = user_context.get("id") if isinstance(user_context, dict) else None
+        return (ALL_USERS, owner_id.lower() if owner_id else None)
+    def record(self, job_data: dict, now: float = None):
+        """Counts one finished job (same rules as the old scan: SUCCEEDED/FAILED counters, duration if started)."""
+        end_time = job_data.get("end_time")
+        if not end_time:
+            return
+        now = now or time.time()
+        if end_time < now - self.window_seconds:
+            return
+        job_status = job_data.get("status")
+        preset_name = job_data.get("preset_name", "Unknown Preset") # English Hardcode
+        delta = PresetStats()
+        if job_status == "SUCCEEDED": # English Hardcode
+            delta.success = 1
+        elif job_status == "FAILED": # English Hardcode
+            delta.failed = 1
+        start_time = job_data.get("start_time")
+        if start_time:
+            duration_ms = (end_time - start_time) * 1000
+            delta.timed = 1
+            delta.total_ms = duration_ms
+            delta.histogram[_histogram_bin(duration_ms)] = 1
+        if delta.is_empty():
+            return
+        bucket_key = int(end_time // self.bucket_seconds)
+        with self._lock:
+            self._expire(now)
+            bucket = self._bucket_for(bucket_key)
+            for owner in self._owner_keys(job_data):
+                bucket.setdefault(owner, {}).setdefault(preset_name, PresetStats()).add(delta)
+                self._totals.setdefault(owner, {}).setdefault(preset_name, PresetStats()).add(delta)
+    def _bucket_for(self, bucket_key):
+        """(Under _lock) Buckets stay sorted; late arrivals (end_time in an older minute) are inserted in place."""
+        if not self._buckets or self._buckets[-1][0] < bucket_key:
+            self._buckets.append([bucket_key, {}])
+            return self._buckets[-1][1]
+        for index in range(len(self._buckets) - 1, -1, -1):
+            existing_key, bucket = self._buckets[index]
+            if existing_key == bucket_key:
+                return bucket
+            if existing_key < bucket_key:
+                self._buckets.insert(index + 1, [bucket_key, {}])
+                return self._buckets[index + 1][1]
+        self._buckets.appendleft([bucket_key, {}])
+        return self._buckets[0][1]
+    def _expire(self, now):
+        first_live_key = int((now - self.window_seconds) // self.bucket_seconds) + 1
+        while self._buckets and self._buckets[0][0] < first_live_key:
+            _, bucket = self._buckets.popleft()
+            for owner, presets in bucket.items():
+                owner_totals = self._totals.get(owner, {})
+                for preset_name, stats in presets.items():
+                    total = owner_totals.get(preset_name)
+                    if total is None:
+                        continue
+                    total.add(stats, sign=-1)
+                    if total.is_empty():
+                        del owner_totals[preset_name]
+                if not owner_totals:
+                    self._totals.pop(owner, None)
+    def snapshot(self, user_id: str = None, top_n: int = 5, now: float = None) -> dict:
+        """
+        The live-stats view for one user (their jobs plus jobs without an owner, as before) or for
+        everyone when user_id is empty.
+        """
+        with self._lock:
+            self._expire(now or time.time())
+            if user_id:
+                sources = [self._totals.get(user_id.lower(), {}), self._totals.get(None, {})]
+            else:
+                sources = [self._totals.get(ALL_USERS, {})]
+            merged = {}
+            for presets in sources:
+                for preset_name, stats in presets.items():
+                    merged.setdefault(preset_name, PresetStats()).add(stats)
+        success = sum(stats.success for stats in merged.values())
+        failed = sum(stats.failed for stats in merged.values())
+        failing = sorted(
+            ((name, stats.failed) for name, stats in merged.items() if stats.failed),
+            key=lambda item: item[1], reverse=True,
+        )[:top_n]
+        slowest = sorted(
+            (
+                {
+                    "name": name,
+                    "avg_duration_ms": stats.total_ms / stats.timed,
+                    "p95_duration_ms": stats.percentile_ms(0.95),
+                }
+                for name, stats in merged.items() if stats.timed
+            ),
+            key=lambda item: item["avg_duration_ms"], reverse=True,
+        )[:top_n]
+        return {
+            "execution_stats_24h": {"success": success, "failed": failed}, # English Hardcode
+            "top_failing_presets": [{"name": name, "count": count} for name, count in failing],
+            "top_slowest_presets": slowest,
+        }
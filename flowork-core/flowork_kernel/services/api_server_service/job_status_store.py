@@ -0,0 +1,225 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\api_server_service\job_status_store.py total lines 226 
+########################################################################
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import deque
+JOB_STATUS_TTL_SECONDS = float(os.getenv("CORE_JOB_STATUS_TTL_SECONDS", str(24 * 60 * 60))) # (English Hardcode) Finished jobs stay in memory this long
+JOB_STATUS_MAX_FINISHED = int(os.getenv("CORE_JOB_STATUS_MAX_FINISHED", "20000"))
+JOB_STATUS_BUCKET_SECONDS = 60
+JOB_STATUS_SPILL = os.getenv("CORE_JOB_STATUS_SPILL", "0") == "1" # (English Hardcode) Keep evicted jobs in data/job_history.db
+ACTIVE_JOB_STATUSES = frozenset(("QUEUED", "PENDING", "RUNNING", "PAUSED")) # English Hardcode
+class JobStatusStore:
+    """
+    Job statuses for ApiServerService.
+    Live jobs are kept in a dict plus a RUNNING index, so the active-jobs list costs O(running).
+    Finished jobs go into a ring of time buckets (JOB_STATUS_BUCKET_SECONDS wide) and are evicted
+    once older than the TTL or when more than max_finished are kept, oldest first. Evicted jobs are
+    written to an optional SQLite history file so get() can still answer for them.
+    on_finished(job_id, record_copy) is called once per job when it reaches a final status.
+    """
+    def __init__(self, spill_path: str = None, ttl_seconds: float = JOB_STATUS_TTL_SECONDS,
+                 max_finished: int = JOB_STATUS_MAX_FINISHED, bucket_seconds: int = JOB_STATUS_BUCKET_SECONDS,
+                 on_finished=None):
+        self.logger = logging.getLogger("JobStatusStore") # English Hardcode
+        self.ttl_seconds = ttl_seconds
+        self.max_finished = max(1, max_finished)
+        self.bucket_seconds = max(1, bucket_seconds)
+        self.on_finished = on_finished
+        self.lock = threading.RLock()
+        self._jobs = {}
+        self._running = {} # (English Hardcode) job_id -> record, insertion ordered (oldest start first)
+        self._finished_bucket = {} # (English Hardcode) job_id -> bucket key of the ring slot holding it
+        self._buckets = deque() # (English Hardcode) [bucket_key, deque(job_ids)], oldest on the left
+        self._finished_count = 0
+        self.stats = {"evicted": 0, "spilled": 0, "spill_errors": 0}
+        self._spill_conn = None
+        self._spill_lock = threading.Lock()
+        if spill_path:
+            self._open_spill(spill_path)
+    def _open_spill(self, spill_path: str):
+        try:
+            os.makedirs(os.path.dirname(spill_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(spill_path, timeout=10.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS JobHistory ("
+                "job_id TEXT PRIMARY KEY, status TEXT, preset_name TEXT, user_id TEXT, "
+                "start_time REAL, end_time REAL, data TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_job_history_end_time ON JobHistory (end_time)")
+            conn.commit()
+            self._spill_conn = conn
+        except sqlite3.Error as e:
+            self.logger.error(f"Job history spill disabled, cannot open '{spill_path}': {e}") # English Log
+            self._spill_conn = None
+    def update(self, job_id: str, status_data: dict) -> dict:
+        """Merges status_data into the job's record (user_context is stored as given) and returns a copy."""
+        now = time.time()
+        newly_finished = False
+        with self.lock:
+            record = self._jobs.get(job_id)
+            if record is None:
+                record = self._jobs[job_id] = {}
+            record.update(status_data)
+            status = record.get("status")
+            if status == "RUNNING": # English Hardcode
+                self._running[job_id] = record
+            else:
+                self._running.pop(job_id, None)
+            if status is not None and status not in ACTIVE_JOB_STATUSES:
+                if job_id not in self._finished_bucket:
+                    self._add_finished(job_id, now)
+                    newly_finished = True
+            elif self._finished_bucket.pop(job_id, None) is not None:
+                self._finished_count -= 1 # (English Hardcode) Restarted job, its old ring slot is skipped lazily
+            evicted = self._evict(now)
+            snapshot = dict(record)
+        if evicted:
+            self._spill(evicted)
+        if newly_finished and self.on_finished:
+            try:
+                self.on_finished(job_id, snapshot)
+            except Exception as e:
+                self.logger.warning(f"on_finished hook failed for job '{job_id}': {e}") # English Log
+        return snapshot
+    def _add_finished(self, job_id, now):
+        bucket_key = int(now // self.bucket_seconds)
+        if not self._buckets or self._buckets[-1][0] != bucket_key:
+            self._buckets.append([bucket_key, deque()])
+        self._buckets[-1][1].append(job_id)
+        self._finished_bucket[job_id] = bucket_key
+        self._finished_count += 1
+    def _evict(self, now):
+        """(Under lock) Drops expired / surplus finished jobs and returns [(job_id, record)] for the spill."""
+        evicted = []
+        expired_before = int((now - self.ttl_seconds) // self.bucket_seconds)
+        while self._buckets:
+            bucket_key, job_ids = self._buckets[0]
+            if bucket_key >= expired_before and self._finished_count <= self.max_finished:
+                break
+            if not job_ids:
+                self._buckets.popleft()
+                continue
+            job_id = job_ids.popleft()
+            if self._finished_bucket.get(job_id) != bucket_key:
+                continue # (English Hardcode) Stale slot of a restarted job
+            del self._finished_bucket[job_id]
+            self._finished_count -= 1
+            record = self._jobs.pop(job_id, None)
+            if record is not None:
+                evicted.append((job_id, record))
+        self.stats["evicted"] += len(evicted)
+        return evicted
+    def _spill(self, evicted):
+        if self._spill_conn is None:
+            return
+        rows = []
+        for job_id, record in evicted:
+            user_context = record.get("user_context")
+            rows.append((
+                job_id,
+                record.get("status"),
+                record.get("preset_name"),
+                user_context.get("id") if isinstance(user_context, dict) else None,
+                record.get("start_time"),
+                record.get("end_time"),
+                json.dumps(record, default=str),
+            ))
+        try:
+            with self._spill_lock, self._spill_conn:
+                self._spill_conn.executemany(
+                    "INSERT OR REPLACE INTO JobHistory (job_id, status, preset_name, user_id, start_time, end_time, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+            self.stats["spilled"] += len(rows)
+        except sqlite3.Error as e:
+            self.stats["spill_errors"] += 1
+            self.logger.warning(f"Failed to spill {len(rows)} finished jobs to history: {e}") # English Log
+    def get(self, job_id: str) -> dict | None:
+        with self.lock:
+            record = self._jobs.get(job_id)
+            if record is not None:
+                return dict(record)
+        if self._spill_conn is None:
+            return None
+        try:
+            with self._spill_lock:
+                row = self._spill_conn.execute("SELECT data FROM JobHistory WHERE job_id = ?", (job_id,)).fetchone()
+        except sqlite3.Error:
+            return None
+        return json.loads(row[0]) if row else None
+    def set(self, job_id: str, record: dict):
+        """Replaces a job's record entirely (e.g. a freshly queued job)."""
+        with self.lock:
+            self._jobs.pop(job_id, None)
+            self._running.pop(job_id, None)
+            if self._finished_bucket.pop(job_id, None) is not None:
+                self._finished_count -= 1
+        self.update(job_id, record)
+    def active_jobs(self, user_id: str = None, include_user_context: bool = False, now: float = None) -> list:
+        """RUNNING jobs in the dashboard format, optionally only those owned by user_id. O(running)."""
+        now = now or time.time()
+        user_id = user_id.lower() if user_id else None
+        active = []
+        with self.lock:
+            for job_id, record in self._running.items():
+                user_context = record.get("user_context")
+                if user_id:
+                    owner_id = user_context.get("id") if isinstance(user_context, dict) else None
+                    if owner_id and owner_id.lower() != user_id:
+                        continue
+                entry = {
+                    "id": job_id,
+                    "preset": record.get("preset_name", "N/A"), # English Hardcode
+                    "duration_seconds": round(now - record.get("start_time", 0), 2),
+                }
+                if include_user_context:
+                    entry["user_context"] = user_context
+                active.append(entry)
+        return active
+    def running_job_ids(self, job_type: str = None) -> list:
+        with self.lock:
+            return [job_id for job_id, record in self._running.items() if job_type is None or record.get("type") == job_type]
+    def finished_since(self, since_ts: float) -> list:
+        """Copies of the in-memory finished jobs that were completed at or after since_ts, newest first."""
+        first_bucket = int(since_ts // self.bucket_seconds)
+        finished, seen = [], set()
+        with self.lock:
+            for bucket_key, job_ids in reversed(self._buckets):
+                if bucket_key < first_bucket:
+                    break
+                for job_id in reversed(job_ids):
+                    if job_id in seen or self._finished_bucket.get(job_id) != bucket_key:
+                        continue
+                    seen.add(job_id)
+                    record = self._jobs.get(job_id)
+                    if record is not None:
+                        finished.append((job_id, dict(record)))
+        return finished
+    def __len__(self):
+        with self.lock:
+            return len(self._jobs)
+    def get_metrics(self) -> dict:
+        with self.lock:
+            metrics = {
+                "jobs": len(self._jobs),
+                "running": len(self._running),
+                "finished": self._finished_count,
+                "buckets": len(self._buckets),
+            }
+        metrics.update(self.stats)
+        return metrics
+    def close(self):
+        if self._spill_conn is not None:
+            with self._spill_lock:
+                self._spill_conn.close()
+                self._spill_conn = None
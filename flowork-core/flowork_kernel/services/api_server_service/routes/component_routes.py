@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\api_server_service\routes\component_routes.py total lines 266 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\api_server_service\routes\component_routes.py total lines 277 
 ########################################################################
 
 from .base_api_route import BaseApiRoute
@@ -142,6 +142,11 @@ class ComponentRoutes(BaseApiRoute):
             )
         return manager, None
     async def handle_get_components(self, request):
+        """
+        Detail requests read the manager directly. List requests are served from the component
+        catalog: pre-serialized pages with an ETag (If-None-Match -> 304), or with ?since=<version>
+        only what changed after that catalog version.
+        """
         resource_type = (
             request.match_info.get("resource_type") or request.path.split("/")[3]
         )
@@ -149,7 +154,8 @@ class ComponentRoutes(BaseApiRoute):
         manager, error = self._get_manager_for_type(resource_type)
         if error:
             return self._json_response([], status=200)
-        core_files = await self.service_instance._load_protected_component_ids()
+        if not item_id:
+            return self._catalog_list_response(request, resource_type)
         items_attr_map = {
             "module_manager_service": "loaded_modules",
             "plugin_manager_service": "loaded_plugins",
@@ -165,51 +171,55 @@ class ComponentRoutes(BaseApiRoute):
                 status=500,
             )
         items = getattr(manager, items_attr_name, {})
-        if item_id:
-            if item_id in items:
-                item_data = items[item_id]
-                manifest = item_data.get("manifest", {})
-                response_item = {
-                    "id": item_id,
-                    "name": manifest.get("name", item_id),
-                    "version": manifest.get("version", "N/A"),
-                    "is_paused": item_data.get("is_paused", False),
-                    "description": manifest.get("description", ""),
-                    "manifest": manifest,
-                    "path": item_data.get("path"),
-                }
-                return self._json_response(response_item)
-            else:
-                return self._json_response(
-                    {"error": f"Component '{item_id}' not found in '{resource_type}'."},
-                    status=404,
-                )
+        if item_id in items:
+            item_data = items[item_id]
+            manifest = item_data.get("manifest", {})
+            response_item = {
+                "id": item_id,
+                "name": manifest.get("name", item_id),
+                "version": manifest.get("version", "N/A"),
+                "is_paused": item_data.get("is_paused", False),
+                "description": manifest.get("description", ""),
+                "manifest": manifest,
+                "path": item_data.get("path"),
+            }
+            return self._json_response(response_item)
         else:
-            response_data = []
-            for item_id_loop, item_data in items.items():
-                manifest = item_data.get("manifest", {})
-                response_data.append(
-                    {
-                        "id": item_id_loop,
-                        "name": manifest.get("name", item_id_loop),
-                        "version": manifest.get("version", "N/A"),
-                        "is_paused": item_data.get("is_paused", False),
-                        "description": manifest.get("description", ""),
-                        "is_core": item_id_loop in core_files,
-                        "tier": manifest.get("tier", "free"),
-                        "manifest": manifest,
-                    }
-                )
-            query_params = request.query
+            return self._json_response(
+                {"error": f"Component '{item_id}' not found in '{resource_type}'."},
+                status=404,
+            )
+    def _catalog_list_response(self, request, resource_type):
+        catalog = self.service_instance.component_catalog
+        query_params = request.query
+        if_none_match = request.headers.get("If-None-Match")
+        if "since" in query_params:
             try:
-                limit = int(query_params.get("limit", 50))
-                offset = int(query_params.get("offset", 0))
-            except (ValueError, IndexError):
-                limit = 50
-                offset = 0
-            sorted_data = sorted(response_data, key=lambda x: x["name"])
-            paginated_data = sorted_data[offset : offset + limit]
-            return self._json_response(paginated_data)
+                since_version = int(query_params.get("since"))
+            except ValueError:
+                return self._json_response({"error": "'since' must be an integer catalog version."}, status=400)
+            delta = catalog.changes_since(resource_type, since_version)
+            if delta is None:
+                return self._json_response([], status=200)
+            etag = f'"{resource_type}-v{delta["version"]}-since-{since_version}"'
+            headers = {"ETag": etag, "X-Catalog-Version": str(delta["version"]), "Cache-Control": "no-cache"} # English Hardcode
+            if catalog.etag_matches(if_none_match, etag):
+                return web.Response(status=304, headers=headers)
+            return self._json_response(delta, headers=headers)
+        try:
+            limit = int(query_params.get("limit", 50))
+            offset = int(query_params.get("offset", 0))
+        except (ValueError, IndexError):
+            limit = 50
+            offset = 0
+        page = catalog.page(resource_type, max(offset, 0), max(limit, 0))
+        if page is None:
+            return self._json_response([], status=200)
+        body, etag, version = page
+        headers = {"ETag": etag, "X-Catalog-Version": str(version), "Cache-Control": "no-cache"} # English Hardcode
+        if catalog.etag_matches(if_none_match, etag):
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=body, content_type="application/json", headers=headers)
     async def handle_install_components(self, request):
         return self._json_response(
             {"error": "Install via API is not implemented yet."}, status=501
@@ -251,6 +261,7 @@ class ComponentRoutes(BaseApiRoute):
             )
         success = pause_method(item_id, is_paused)
         if success:
+            self.service_instance.component_catalog.invalidate(resource_type)
             action = "paused" if is_paused else "resumed"
             return self._json_response(
                 {
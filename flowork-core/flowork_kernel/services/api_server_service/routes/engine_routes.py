@@ -1,13 +1,11 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\api_server_service\routes\engine_routes.py total lines 220 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\api_server_service\routes\engine_routes.py total lines 169 
 ########################################################################
 
 import datetime
-import time
 from .base_api_route import BaseApiRoute
 from flowork_kernel.exceptions import PermissionDeniedError
-from collections import Counter, defaultdict
 class EngineRoutes(BaseApiRoute):
     """
     Manages API routes for direct engine actions like scheduling.
@@ -35,51 +33,14 @@ class EngineRoutes(BaseApiRoute):
         """
         user_id_from_header = request.headers.get("X-Flowork-User-ID")
         self.logger(f"[Core Engine API] Received /live-stats request for User-ID: {user_id_from_header}", "INFO", "ApiServer") # English Log
-        active_jobs = []
-        twenty_four_hours_ago = time.time() - (24 * 60 * 60)
-        execution_stats_24h = {"success": 0, "failed": 0} # English Hardcode
-        top_failing_presets = Counter()
-        slowest_presets_list = []
-        if self.service_instance.job_statuses:
-            with self.service_instance.job_statuses_lock:
-                all_jobs_copy = list(self.service_instance.job_statuses.items())
-            for job_id, job_data in all_jobs_copy:
-                job_user_context = job_data.get("user_context")
-                job_owner_id = job_user_context.get("id") if isinstance(job_user_context, dict) else None
-                if user_id_from_header and job_owner_id and job_owner_id.lower() != user_id_from_header.lower():
-                    continue
-                job_status = job_data.get("status")
-                if job_status == "RUNNING": # English Hardcode
-                    start_time = job_data.get("start_time", 0)
-                    duration = time.time() - start_time
-                    active_jobs.append(
-                        {
-                            "id": job_id,
-                            "preset": job_data.get("preset_name", "N/A"), # English Hardcode
-                            "duration_seconds": round(duration, 2),
-                        }
-                    )
-                end_time = job_data.get("end_time")
-                if end_time and end_time >= twenty_four_hours_ago:
-                    preset_name = job_data.get("preset_name", "Unknown Preset") # English Hardcode
-                    if job_status == "SUCCEEDED": # English Hardcode
-                        execution_stats_24h["success"] += 1
-                    elif job_status == "FAILED": # English Hardcode
-                        execution_stats_24h["failed"] += 1
-                        top_failing_presets[preset_name] += 1
-                    start_time = job_data.get("start_time")
-                    if start_time:
-                        duration_ms = (end_time - start_time) * 1000
-                        slowest_presets_list.append({
-                            "name": preset_name,
-                            "avg_duration_ms": duration_ms
-                        })
+        active_jobs = self.service_instance.job_status_store.active_jobs(user_id=user_id_from_header)
+        stats_24h = self.service_instance.execution_stats.snapshot(user_id=user_id_from_header)
+        execution_stats_24h = stats_24h["execution_stats_24h"]
         self.logger(f"[Core Engine API] Found {len(active_jobs)} active jobs relevant to user {user_id_from_header}", "DEBUG", "ApiServer") # English Log
         preset_count = 0
         if self.service_instance.preset_manager and user_id_from_header:
             try:
-                preset_list = self.service_instance.preset_manager.get_preset_list(user_id=user_id_from_header)
-                preset_count = len(preset_list)
+                preset_count = self.service_instance.preset_manager.get_preset_count(user_id=user_id_from_header)
             except Exception as e:
                  self.logger(f"[Core Engine API] Error getting preset count for user {user_id_from_header}: {e}", "WARN", "ApiServer") # English Log
                  preset_count = 0 # Fallback jika gagal
@@ -108,24 +69,12 @@ class EngineRoutes(BaseApiRoute):
             ),
             "presets": preset_count,
         }
-        top_failing_list = [{"name": name, "count": count} for name, count in top_failing_presets.most_common(5)]
-        avg_slowest = defaultdict(lambda: {'total_time': 0, 'count': 0})
-        for item in slowest_presets_list:
-            avg_slowest[item['name']]['total_time'] += item['avg_duration_ms']
-            avg_slowest[item['name']]['count'] += 1
-        avg_slowest_list = []
-        for name, data in avg_slowest.items():
-            avg_slowest_list.append({
-                "name": name,
-                "avg_duration_ms": data['total_time'] / data['count']
-            })
-        final_slowest_list = sorted(avg_slowest_list, key=lambda x: x['avg_duration_ms'], reverse=True)[:5]
         live_data = {
             "active_jobs": active_jobs,
             "system_overview": system_overview,
             "execution_stats_24h": execution_stats_24h, # Data untuk chart "Executions (24h)"
-            "top_failing_presets": top_failing_list, # Data untuk "Performance Hotspots"
-            "top_slowest_presets": final_slowest_list, # Data untuk "Performance Hotspots"
+            "top_failing_presets": stats_24h["top_failing_presets"], # Data untuk "Performance Hotspots"
+            "top_slowest_presets": stats_24h["top_slowest_presets"], # Data untuk "Performance Hotspots"
             "recent_activity": list(self.service_instance.recent_events), # Kirim juga event terbaru
             "usage_stats": {"used": execution_stats_24h["success"] + execution_stats_24h["failed"]} # Data kuota (total eksekusi)
         }
@@ -1,9 +1,10 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\api_server_service\routes\execution_routes.py total lines 247 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\api_server_service\routes\execution_routes.py total lines 258 
 ########################################################################
 
 from .base_api_route import BaseApiRoute
+from flowork_kernel.exceptions import ExecutionRejectedError
 import time
 import uuid
 class ExecutionRoutes(BaseApiRoute):
@@ -23,6 +24,12 @@ class ExecutionRoutes(BaseApiRoute):
             "POST /api/v1/workflow/pause/{job_id}": self.handle_pause_workflow,
             "POST /api/v1/workflow/resume/{job_id}": self.handle_resume_workflow,
         }
+    def _rejected_response(self, error: ExecutionRejectedError):
+        return self._json_response(
+            {"status": "error", "message": str(error), "reason": error.reason, "retry_after": error.retry_after},
+            status=429,
+            headers={"Retry-After": str(error.retry_after)},
+        )
     async def handle_get_connection_history(self, request):  # (PERBAIKAN)
         context_id = request.match_info.get("context_id")  # (PERBAIKAN)
         connection_id = request.match_info.get("connection_id")  # (PERBAIKAN)
@@ -68,7 +75,7 @@ class ExecutionRoutes(BaseApiRoute):
                 f"API call received to execute raw workflow in '{mode}' mode.", "INFO"
             )
             user_context = request.get("user_context", None)  # (PERBAIKAN)
-            job_id = self.service_instance.trigger_workflow_by_api(
+            job_id = await self.service_instance.trigger_workflow_by_api(
                 preset_name="raw_execution_from_canvas",
                 initial_payload=initial_payload,
                 raw_workflow_data={"nodes": nodes, "connections": connections},
@@ -90,6 +97,8 @@ class ExecutionRoutes(BaseApiRoute):
                     {"status": "error", "message": "Failed to queue the raw workflow."},
                     status=500,
                 )
+        except ExecutionRejectedError as e:
+            return self._rejected_response(e)
         except Exception as e:
             self.logger(f"Error handling raw workflow execution: {e}", "CRITICAL")
             return self._json_response(
@@ -134,7 +143,7 @@ class ExecutionRoutes(BaseApiRoute):
                         time.time(),
                         user_id=user_id,
                     )
-            job_id = self.service_instance.trigger_workflow_by_api(
+            job_id = await self.service_instance.trigger_workflow_by_api(
                 preset_name,
                 initial_payload,
                 user_context=user_context,
@@ -156,6 +165,8 @@ class ExecutionRoutes(BaseApiRoute):
                     },
                     status=404,
                 )
+        except ExecutionRejectedError as e:
+            return self._rejected_response(e)
         except Exception as e:
             self.logger(
                 f"Error handling API execution for '{preset_name}': {e}", "ERROR"
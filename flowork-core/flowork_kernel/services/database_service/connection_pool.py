@@ -0,0 +1,147 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\database_service\connection_pool.py total lines 148 
+########################################################################
+
+"""
+Connection reuse for core.db.
+
+Opening a sqlite3 connection and re-applying the PRAGMAs costs far more than the short
+statements most services run, and a fresh connection also starts with an empty statement
+cache. SQLiteConnectionPool keeps a bounded set of configured connections: a thread checks one
+out, re-entrant checkouts in the same thread get the same connection, and it goes back to an
+idle LIFO stack afterwards (so the warmest connection and its prepared statements are reused).
+run_with_busy_retry is the single SQLITE_BUSY/locked retry policy used by the services and
+the job workers.
+"""
+import os
+import time
+import random
+import logging
+import sqlite3
+import threading
+DB_POOL_SIZE = max(1, int(os.getenv("CORE_DB_POOL_SIZE", "8")))
+DB_POOL_CHECKOUT_TIMEOUT_SECONDS = float(os.getenv("CORE_DB_POOL_CHECKOUT_TIMEOUT", "10"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("CORE_DB_STATEMENT_CACHE_SIZE", "256")) # (English Hardcode) sqlite3 per-connection prepared statement LRU
+MAX_DB_RETRIES = 5
+def is_busy_error(error: Exception) -> bool:
+    """True for SQLITE_BUSY / SQLITE_LOCKED, the only errors worth retrying."""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in message or 'busy' in message) # English Hardcode
+def run_with_busy_retry(db_conn, func, *args, retries: int = MAX_DB_RETRIES, **kwargs):
+    """
+    Calls func(db_conn, *args, **kwargs), retrying with exponential backoff + jitter when SQLite
+    reports busy/locked. `func` must leave no transaction open when it raises (rollback first),
+    which is what every BEGIN IMMEDIATE helper in this code base already does.
+    """
+    pid = os.getpid()
+    for attempt in range(retries):
+        try:
+            return func(db_conn, *args, **kwargs)
+        except sqlite3.Error as e:
+            if not is_busy_error(e):
+                logging.error(f"[PID {pid}] Unhandled DB Error: {e}", exc_info=True) # English Hardcode
+                raise
+            if db_conn is not None and db_conn.in_transaction:
+                db_conn.rollback()
+            if attempt == retries - 1:
+                logging.critical(f"[PID {pid}] DB failed permanently after {retries} retries.") # English Hardcode
+                raise
+            logging.warning(f"[PID {pid}] DB Busy/Locked on attempt {attempt+1}/{retries}. Retrying...") # English Hardcode
+            time.sleep(random.uniform(0.1, 0.5) * (2 ** attempt))
+    return None # Should not be reached
+class PoolExhaustedError(sqlite3.OperationalError):
+    pass
+class SQLiteConnectionPool:
+    """
+    Bounded, thread-aware pool of configured connections to one database file.
+    `connect` is the factory (it applies the PRAGMAs once per connection).
+    Fork-safe: a child process that inherits the pool starts with an empty one.
+    """
+    def __init__(self, connect, max_size: int = DB_POOL_SIZE, checkout_timeout: float = DB_POOL_CHECKOUT_TIMEOUT_SECONDS):
+        self._connect = connect
+        self.max_size = max(1, max_size)
+        self.checkout_timeout = checkout_timeout
+        self._cond = threading.Condition(threading.Lock())
+        self._reset_state()
+    def _reset_state(self):
+        self._pid = os.getpid()
+        self._idle = []
+        self._open_count = 0
+        self._local = threading.local()
+        self.stats = {"created": 0, "reused": 0, "waits": 0, "discarded": 0}
+    def _ensure_process(self):
+        if self._pid != os.getpid():
+            self._cond = threading.Condition(threading.Lock())
+            self._reset_state() # (English Hardcode) Never share SQLite handles across fork, just forget the parent's
+    def acquire(self):
+        """Checks out this thread's connection (re-entrant). Pair every call with release()."""
+        self._ensure_process()
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            return held
+        deadline = time.monotonic() + self.checkout_timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    self.stats["reused"] += 1
+                    break
+                if self._open_count < self.max_size:
+                    self._open_count += 1
+                    conn = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhaustedError(f"All {self.max_size} core.db connections are checked out.") # English Hardcode
+                self.stats["waits"] += 1
+                self._cond.wait(remaining)
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                conn = None
+            if conn is None:
+                with self._cond:
+                    self._open_count -= 1
+                    self._cond.notify()
+                raise sqlite3.OperationalError("Failed to open a core.db connection for the pool.") # English Hardcode
+            self.stats["created"] += 1
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+    def release(self, conn):
+        if getattr(self._local, "conn", None) is not conn:
+            return # (English Hardcode) Not ours (e.g. checked out before a fork), nothing to hand back
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+        self._local.conn = None
+        healthy = True
+        try:
+            if conn.in_transaction:
+                conn.rollback() # (English Hardcode) Never hand an open transaction to the next thread
+        except sqlite3.Error:
+            healthy = False
+        with self._cond:
+            if healthy and self._pid == os.getpid():
+                self._idle.append(conn)
+            else:
+                self._open_count -= 1
+                self.stats["discarded"] += 1
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._cond.notify()
+    def close_all(self):
+        with self._cond:
+            for conn in self._idle:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._open_count -= len(self._idle)
+            self._idle = []
+            self._cond.notify_all()
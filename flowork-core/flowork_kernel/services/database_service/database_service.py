@@ -1,14 +1,33 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\database_service\database_service.py total lines 156 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\database_service\database_service.py total lines 347 
 ########################################################################
 
 import sqlite3
 import logging
 import os
 import threading
+from contextlib import contextmanager
 from flowork_kernel.singleton import Singleton # (ADDED) Import Singleton
 from typing import Set # <-- START ADDED CODE (FIX - Self-Healing)
+from .connection_pool import SQLiteConnectionPool, run_with_busy_retry, DB_STATEMENT_CACHE_SIZE, MAX_DB_RETRIES
+NODES_COLUMNS_SQL = '''
+                node_id TEXT NOT NULL,
+                workflow_id TEXT NOT NULL,
+                node_type TEXT NOT NULL,
+                config_json TEXT,
+                PRIMARY KEY (workflow_id, node_id),
+                FOREIGN KEY (workflow_id) REFERENCES Workflows (workflow_id)
+'''
+EDGES_COLUMNS_SQL = '''
+                edge_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                workflow_id TEXT NOT NULL,
+                source_node_id TEXT NOT NULL,
+                target_node_id TEXT NOT NULL,
+                FOREIGN KEY (workflow_id) REFERENCES Workflows (workflow_id),
+                FOREIGN KEY (workflow_id, source_node_id) REFERENCES Nodes (workflow_id, node_id),
+                FOREIGN KEY (workflow_id, target_node_id) REFERENCES Nodes (workflow_id, node_id)
+'''
 class DatabaseService(metaclass=Singleton):
     def __init__(self, db_name='core.db'): # English Hardcode
         self.logger = logging.getLogger(self.__class__.__name__)
@@ -18,6 +37,7 @@ class DatabaseService(metaclass=Singleton):
         self.db_path = os.path.join(self.data_dir, db_name)
         os.makedirs(self.data_dir, exist_ok=True)
         self.logger.info(f"Database path set to: {self.db_path}") # English Hardcode
+        self.pool = SQLiteConnectionPool(lambda: self.create_connection(pooled=True))
         self.initialize_database()
     def _get_existing_columns(self, cursor: sqlite3.Cursor, table_name: str) -> Set[str]:
         """(English Hardcode) Helper function to get all column names from a table."""
@@ -27,6 +47,62 @@ class DatabaseService(metaclass=Singleton):
         except sqlite3.Error as e:
             self.logger.warning(f"Could not get table info for {table_name}: {e}") # English Hardcode
             return set()
+    def _migrate_workflow_scoped_nodes(self, conn: sqlite3.Connection, cursor: sqlite3.Cursor):
+        """
+        (English Hardcode) (FIX - Self-Healing) Old databases keyed Nodes by node_id alone, so two workflows
+        (e.g. an edited canvas run and its saved preset) could not share node ids. Rebuilds Nodes and Edges
+        with the (workflow_id, node_id) key, keeping every row.
+        """
+        cursor.execute("PRAGMA table_info(Nodes);")
+        primary_key = [row[1] for row in sorted(cursor.fetchall(), key=lambda row: row[5]) if row[5]]
+        if primary_key != ["node_id"]:
+            return
+        self.logger.warning("Nodes table is keyed by node_id only. Rebuilding Nodes/Edges with (workflow_id, node_id)...") # English Hardcode
+        conn.commit()
+        cursor.execute("PRAGMA foreign_keys=OFF;") # (English Hardcode) Tables are swapped under their foreign keys
+        try:
+            cursor.execute("BEGIN IMMEDIATE;")
+            cursor.execute("CREATE TABLE Nodes_scoped (%s);" % NODES_COLUMNS_SQL)
+            cursor.execute("INSERT OR IGNORE INTO Nodes_scoped (node_id, workflow_id, node_type, config_json) SELECT node_id, workflow_id, node_type, config_json FROM Nodes")
+            cursor.execute("CREATE TABLE Edges_scoped (%s);" % EDGES_COLUMNS_SQL)
+            cursor.execute("INSERT INTO Edges_scoped (edge_id, workflow_id, source_node_id, target_node_id) SELECT edge_id, workflow_id, source_node_id, target_node_id FROM Edges")
+            cursor.execute("DROP TABLE Edges;")
+            cursor.execute("DROP TABLE Nodes;")
+            cursor.execute("ALTER TABLE Nodes_scoped RENAME TO Nodes;")
+            cursor.execute("ALTER TABLE Edges_scoped RENAME TO Edges;")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            cursor.execute("PRAGMA foreign_keys=ON;")
+    def _reconcile_finished_executions(self, conn: sqlite3.Connection, cursor: sqlite3.Cursor):
+        """
+        (English Hardcode) (FIX - Self-Healing) Older cores never finalized Executions, so their runs stay
+        RUNNING after the last job ended and retention/admission treat them as live. Marks every RUNNING
+        execution without a PENDING/RUNNING job as FAILED (any job failed) or DONE, finished at its last job.
+        Runs at startup, before workers or submissions can add jobs to these executions.
+        """
+        try:
+            cursor.execute('''
+            UPDATE Executions SET
+                status = CASE WHEN EXISTS (
+                    SELECT 1 FROM Jobs j WHERE j.execution_id = Executions.execution_id AND j.status = 'FAILED'
+                ) THEN 'FAILED' ELSE 'DONE' END,
+                finished_at = COALESCE(
+                    (SELECT MAX(j.finished_at) FROM Jobs j WHERE j.execution_id = Executions.execution_id),
+                    created_at
+                )
+            WHERE status = 'RUNNING' AND NOT EXISTS (
+                SELECT 1 FROM Jobs j WHERE j.execution_id = Executions.execution_id AND j.status IN ('PENDING', 'RUNNING')
+            );
+            ''')
+            if cursor.rowcount:
+                self.logger.warning(f"Finalized {cursor.rowcount} execution(s) left RUNNING with no active jobs.") # English Hardcode
+            conn.commit()
+        except sqlite3.Error as e:
+            self.logger.error(f"Failed to reconcile finished executions: {e}", exc_info=True) # English Hardcode
+            conn.rollback()
     def _ensure_backward_compatible_columns(self, conn: sqlite3.Connection, cursor: sqlite3.Cursor):
         """
         (English Hardcode) (FIX - Self-Healing) Non-destructively adds missing columns to the Jobs table
@@ -41,10 +117,36 @@ class DatabaseService(metaclass=Singleton):
             if "user_id" not in jobs_columns:
                 self.logger.warning("Column 'user_id' missing from Jobs table. Adding it now...") # English Hardcode
                 cursor.execute("ALTER TABLE Jobs ADD COLUMN user_id TEXT")
+            workflows_columns = self._get_existing_columns(cursor, "Workflows")
+            if "graph_version" not in workflows_columns:
+                self.logger.warning("Column 'graph_version' missing from Workflows table. Adding it now...") # English Hardcode
+                cursor.execute("ALTER TABLE Workflows ADD COLUMN graph_version INTEGER NOT NULL DEFAULT 0")
             executions_columns = self._get_existing_columns(cursor, "Executions")
             if "user_id" not in executions_columns:
                  self.logger.warning("Column 'user_id' missing from Executions table. Adding it now...") # English Hardcode
                  cursor.execute("ALTER TABLE Executions ADD COLUMN user_id TEXT")
+            if "claimed_by" not in jobs_columns:
+                self.logger.warning("Column 'claimed_by' missing from Jobs table. Adding it now...") # English Hardcode
+                cursor.execute("ALTER TABLE Jobs ADD COLUMN claimed_by TEXT")
+            if "lease_expires_at" not in jobs_columns:
+                self.logger.warning("Column 'lease_expires_at' missing from Jobs table. Adding it now...") # English Hardcode
+                cursor.execute("ALTER TABLE Jobs ADD COLUMN lease_expires_at DATETIME")
+            if "priority" not in jobs_columns:
+                self.logger.warning("Column 'priority' missing from Jobs table. Adding it now...") # English Hardcode
+                cursor.execute("ALTER TABLE Jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+            if "input_payload_hash" not in jobs_columns:
+                self.logger.warning("Column 'input_payload_hash' missing from Jobs table. Adding it now...") # English Hardcode
+                cursor.execute("ALTER TABLE Jobs ADD COLUMN input_payload_hash TEXT")
+            if "output_payload_hash" not in jobs_columns:
+                self.logger.warning("Column 'output_payload_hash' missing from Jobs table. Adding it now...") # English Hardcode
+                cursor.execute("ALTER TABLE Jobs ADD COLUMN output_payload_hash TEXT")
+            if "exec_seq" not in jobs_columns:
+                self.logger.warning("Column 'exec_seq' missing from Jobs table. Adding it now...") # English Hardcode
+                cursor.execute("ALTER TABLE Jobs ADD COLUMN exec_seq INTEGER")
+                cursor.execute(
+                    "UPDATE Jobs SET exec_seq = (SELECT e.rowid FROM Executions e WHERE e.execution_id = Jobs.execution_id) "
+                    "WHERE status IN ('PENDING', 'RUNNING')"
+                ) # (English Hardcode) Finished jobs are never claimed again
             conn.commit()
             self.logger.info("Schema validation complete.") # English Hardcode
         except sqlite3.Error as e:
@@ -72,29 +174,17 @@ class DatabaseService(metaclass=Singleton):
             CREATE TABLE IF NOT EXISTS Workflows (
                 workflow_id TEXT PRIMARY KEY,
                 name TEXT NOT NULL,
+                graph_version INTEGER NOT NULL DEFAULT 0,
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP
             );
             ''')
             cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Nodes (
-                node_id TEXT PRIMARY KEY,
-                workflow_id TEXT NOT NULL,
-                node_type TEXT NOT NULL,
-                config_json TEXT,
-                FOREIGN KEY (workflow_id) REFERENCES Workflows (workflow_id)
-            );
-            ''')
+            CREATE TABLE IF NOT EXISTS Nodes (%s);
+            ''' % NODES_COLUMNS_SQL)
             cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Edges (
-                edge_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                workflow_id TEXT NOT NULL,
-                source_node_id TEXT NOT NULL,
-                target_node_id TEXT NOT NULL,
-                FOREIGN KEY (workflow_id) REFERENCES Workflows (workflow_id),
-                FOREIGN KEY (source_node_id) REFERENCES Nodes (node_id),
-                FOREIGN KEY (target_node_id) REFERENCES Nodes (node_id)
-            );
-            ''')
+            CREATE TABLE IF NOT EXISTS Edges (%s);
+            ''' % EDGES_COLUMNS_SQL)
+            self._migrate_workflow_scoped_nodes(conn, cursor)
             self.logger.info("Ensuring reliable Job Queue schema exists (Executions, Jobs)...") # English Hardcode
             cursor.execute('''
             CREATE TABLE IF NOT EXISTS Executions (
@@ -120,26 +210,89 @@ class DatabaseService(metaclass=Singleton):
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                 started_at DATETIME,
                 finished_at DATETIME,
+                claimed_by TEXT,
+                lease_expires_at DATETIME,
+                input_payload_hash TEXT,
+                output_payload_hash TEXT,
+                priority INTEGER NOT NULL DEFAULT 0,
+                exec_seq INTEGER,
+                FOREIGN KEY (execution_id) REFERENCES Executions (execution_id) ON DELETE CASCADE
+            );
+            ''')
+            self.logger.info("Ensuring payload store schema exists (Payloads)...") # English Hardcode
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS Payloads (
+                payload_hash TEXT PRIMARY KEY,
+                codec TEXT NOT NULL DEFAULT 'zlib',
+                body BLOB NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                ref_count INTEGER NOT NULL DEFAULT 0,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            );
+            ''')
+            self.logger.info("Ensuring DAG scheduler schema exists (JoinArrivals)...") # English Hardcode
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS JoinArrivals (
+                execution_id TEXT NOT NULL,
+                node_id TEXT NOT NULL,
+                source_node_id TEXT NOT NULL,
+                input_data TEXT,
+                input_payload_hash TEXT,
+                arrived_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (execution_id, node_id, source_node_id),
                 FOREIGN KEY (execution_id) REFERENCES Executions (execution_id) ON DELETE CASCADE
             );
             ''')
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON Jobs (status, created_at);")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_executions_workflow_user ON Executions (workflow_id, user_id);")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_executions_status_finished ON Executions (status, finished_at);")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_executions_user_status ON Executions (user_id, status);")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_nodes_workflow ON Nodes (workflow_id);")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_edges_workflow_source ON Edges (workflow_id, source_node_id);")
             self._ensure_backward_compatible_columns(conn, cursor)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_priority_created ON Jobs (status, priority DESC, created_at);")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_execution_status ON Jobs (execution_id, status);")
+            cursor.execute("DROP INDEX IF EXISTS idx_executions_status_created;") # (English Hardcode) Replaced by Jobs.exec_seq
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_exec_seq ON Jobs (status, exec_seq, priority DESC, created_at);") # (English Hardcode) Claim order: oldest execution first
+            self._reconcile_finished_executions(conn, cursor)
+            cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_jobs_release_payloads AFTER DELETE ON Jobs
+            BEGIN
+                UPDATE Payloads SET ref_count = ref_count - 1 WHERE payload_hash = OLD.input_payload_hash;
+                UPDATE Payloads SET ref_count = ref_count - 1 WHERE payload_hash = OLD.output_payload_hash;
+                DELETE FROM Payloads WHERE ref_count <= 0
+                    AND payload_hash IN (OLD.input_payload_hash, OLD.output_payload_hash);
+            END;
+            ''')
+            cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_join_arrivals_release_payloads AFTER DELETE ON JoinArrivals
+            BEGIN
+                UPDATE Payloads SET ref_count = ref_count - 1 WHERE payload_hash = OLD.input_payload_hash;
+                DELETE FROM Payloads WHERE ref_count <= 0 AND payload_hash = OLD.input_payload_hash;
+            END;
+            ''')
             conn.commit()
             conn.close()
             self.logger.info(f"Database (core.db) initialized with WAL mode and DAG schema.") # English Hardcode
         except sqlite3.Error as e:
             self.logger.error(f"Error initializing core database: {e}") # English Hardcode
-    def create_connection(self):
+    def create_connection(self, pooled: bool = False):
         """
         (Per Roadmap 2/8)
         Creates and configures a new, worker-safe SQLite connection.
         This is the 'factory function' recommended in the .docx.
+        Long-lived owners (job workers) keep one of these; request-scoped code should use
+        get_connection() / transaction() so connections and their statement caches are reused.
         """
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=5.0,
+                check_same_thread=not pooled, # (English Hardcode) Pooled connections move between threads, one thread at a time
+                cached_statements=DB_STATEMENT_CACHE_SIZE
+            )
+            conn.execute('PRAGMA auto_vacuum=INCREMENTAL;') # (English Hardcode) Only takes effect on a NEW core.db, must precede WAL (see JobRetentionService)
             conn.execute('PRAGMA journal_mode=WAL;') # (ADDED) Ensure WAL mode on every connection
             conn.execute('PRAGMA synchronous=NORMAL;')
             conn.execute('PRAGMA foreign_keys=ON;')
@@ -153,3 +306,41 @@ class DatabaseService(metaclass=Singleton):
             if conn:
                 conn.close()
             return None
+    def acquire_connection(self):
+        """Checks out a pooled connection for the calling thread. Always pair with release_connection()."""
+        return self.pool.acquire()
+    def release_connection(self, conn):
+        self.pool.release(conn)
+    @contextmanager
+    def get_connection(self):
+        """
+        Pooled connection as a context manager. Same semantics as `with sqlite3.connect(...)`:
+        an open transaction is committed on success and rolled back on error.
+        """
+        conn = self.pool.acquire()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self.pool.release(conn)
+    @contextmanager
+    def transaction(self, retries: int = MAX_DB_RETRIES):
+        """
+        Pooled connection inside BEGIN IMMEDIATE. Taking the write lock is retried on SQLITE_BUSY;
+        the body runs once and commits on success or rolls back on error. For bodies that must be
+        re-run as a whole after a busy error, use run_with_retry().
+        """
+        with self.get_connection() as conn:
+            run_with_busy_retry(conn, lambda c: c.execute("BEGIN IMMEDIATE;"), retries=retries)
+            yield conn
+    def run_with_retry(self, func, *args, **kwargs):
+        """Calls func(conn, *args, **kwargs) on a pooled connection with the shared SQLITE_BUSY retry policy."""
+        with self.get_connection() as conn:
+            return run_with_busy_retry(conn, func, *args, **kwargs)
+    def close(self):
+        self.pool.close_all()
@@ -0,0 +1,75 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\database_service\payload_store.py total lines 76 
+########################################################################
+
+"""
+Content-addressed payload store for the Jobs queue (core.db side table `Payloads`).
+
+Small payloads stay inline in Jobs.input_data / Jobs.output_data exactly as before.
+Large payloads are serialized ONCE, stored once per distinct content (sha256) and referenced
+from Jobs.input_payload_hash / Jobs.output_payload_hash. `ref_count` counts the Jobs columns
+pointing at a blob; the `trg_jobs_release_payloads` trigger (see DatabaseService) releases
+references when Jobs rows are deleted and drops blobs that are no longer referenced.
+"""
+import os
+import json
+import zlib
+import hashlib
+from typing import NamedTuple, Optional
+PAYLOAD_INLINE_MAX_BYTES = int(os.getenv("CORE_PAYLOAD_INLINE_MAX_BYTES", "16384"))
+PAYLOAD_COMPRESS_LEVEL = 1 # (English Hardcode) Fast zlib level, payloads are written once and read a few times
+class PreparedPayload(NamedTuple):
+    inline_text: Optional[str]
+    payload_hash: Optional[str]
+    body: Optional[bytes]
+    size_bytes: int
+def prepare_payload(data, inline_max_bytes: int = None) -> PreparedPayload:
+    """
+    Serializes `data` once. Call this OUTSIDE the write transaction: hashing and
+    compressing a multi-MB payload must not extend the time the SQLite write lock is held.
+    """
+    if inline_max_bytes is None:
+        inline_max_bytes = PAYLOAD_INLINE_MAX_BYTES
+    text = json.dumps(data, default=str)
+    raw = text.encode("utf-8")
+    if len(raw) <= inline_max_bytes:
+        return PreparedPayload(text, None, None, len(raw))
+    payload_hash = hashlib.sha256(raw).hexdigest()
+    return PreparedPayload(None, payload_hash, zlib.compress(raw, PAYLOAD_COMPRESS_LEVEL), len(raw))
+def store_payload(cursor, prepared: PreparedPayload, references: int):
+    """
+    (Inside a write transaction) Registers `references` new Jobs columns pointing at this payload.
+    Returns the (inline_text, payload_hash) pair to write into the Jobs row(s).
+    """
+    if prepared.payload_hash is None or references <= 0:
+        return prepared.inline_text, None
+    cursor.execute(
+        "UPDATE Payloads SET ref_count = ref_count + ? WHERE payload_hash = ?",
+        (references, prepared.payload_hash)
+    )
+    if cursor.rowcount == 0:
+        cursor.execute(
+            "INSERT INTO Payloads (payload_hash, codec, body, size_bytes, ref_count) VALUES (?, ?, ?, ?, ?)",
+            (prepared.payload_hash, "zlib", prepared.body, prepared.size_bytes, references) # English Hardcode
+        )
+    return None, prepared.payload_hash
+def release_payload(cursor, payload_hash: Optional[str]):
+    """(Inside a write transaction) Drops one reference to `payload_hash`, and the blob with its last one."""
+    if not payload_hash:
+        return
+    cursor.execute("UPDATE Payloads SET ref_count = ref_count - 1 WHERE payload_hash = ?", (payload_hash,))
+    cursor.execute("DELETE FROM Payloads WHERE payload_hash = ? AND ref_count <= 0", (payload_hash,))
+def load_payload(cursor, inline_text, payload_hash, default=None):
+    """Resolves a Jobs payload column pair back into Python data."""
+    if payload_hash:
+        cursor.execute("SELECT codec, body FROM Payloads WHERE payload_hash = ?", (payload_hash,))
+        row = cursor.fetchone()
+        if not row:
+            raise LookupError(f"Payload {payload_hash} is referenced by a job but missing from the store.") # English Hardcode
+        codec, body = row
+        raw = zlib.decompress(body) if codec == "zlib" else body # English Hardcode
+        return json.loads(raw)
+    if inline_text:
+        return json.loads(inline_text)
+    return default
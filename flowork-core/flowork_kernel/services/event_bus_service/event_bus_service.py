@@ -1,54 +1,129 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\event_bus_service\event_bus_service.py total lines 65 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\event_bus_service\event_bus_service.py total lines 174 
 ########################################################################
 
+import os
 import json
+import time
+import asyncio
 import threading
 from typing import Dict, Any, Callable
 from ..base_service import BaseService
+from .event_dispatch import (
+    EventDispatcher, Subscription, TopicStats, is_pattern, matches,
+    OVERFLOW_DROP_OLDEST,
+)
+EVENT_BUS_WORKERS = int(os.getenv("CORE_EVENT_BUS_WORKERS", "8")) # (English Hardcode) Shared delivery threads for all subscribers
+EVENT_BUS_QUEUE_SIZE = int(os.getenv("CORE_EVENT_BUS_QUEUE_SIZE", "1000")) # (English Hardcode) Default per-subscriber queue bound
+EVENT_BUS_BLOCK_TIMEOUT = float(os.getenv("CORE_EVENT_BUS_BLOCK_TIMEOUT", "5.0"))
+EVENT_BUS_DROP_WARNING_SECONDS = 10 # (English Hardcode) At most one "dropped" warning per topic in this interval
+EVENT_BUS_LOG_PAYLOADS = os.getenv("CORE_EVENT_BUS_LOG_PAYLOADS", "0") == "1" # (English Hardcode) Serialize event data into the DETAIL log
 class EventBusService(BaseService):
     """
     Service that provides a centralized message bus for different parts of the application
     to communicate without being directly coupled.
+    (Worker pool) publish() only appends the event to each matching subscriber's bounded queue;
+    a fixed pool of EVENT_BUS_WORKERS threads (or the subscriber's own event loop, for coroutine
+    callbacks) delivers them in order. Subscriptions may use patterns ("DASHBOARD_*", "*").
     """
     def __init__(self, kernel, service_id: str):
         super().__init__(kernel, service_id)
-        self._subscribers: Dict[str, Dict[str, Callable]] = {}
+        self._subscribers: Dict[str, Dict[str, Subscription]] = {}
         self._lock = threading.Lock() # (PENAMBAHAN KODE) Lock untuk thread-safety
-        self.kernel.write_to_log("Service 'EventBus' initialized.", "DEBUG") # English Log
+        self._routes: Dict[str, tuple] = {} # (English Hardcode) event_name -> matching subscriptions, cleared on (un)subscribe
+        self._stats: Dict[str, TopicStats] = {}
+        self._stats_lock = threading.Lock()
+        self._drop_warned_at: Dict[str, float] = {}
+        self._dispatcher = EventDispatcher(EVENT_BUS_WORKERS, self._on_delivered)
+        self.kernel.write_to_log(f"Service 'EventBus' initialized ({EVENT_BUS_WORKERS} delivery workers).", "DEBUG") # English Log
+    def _topic_stats(self, event_name: str) -> TopicStats:
+        """(Under _stats_lock)"""
+        stats = self._stats.get(event_name)
+        if stats is None:
+            stats = self._stats[event_name] = TopicStats()
+        return stats
+    def _on_delivered(self, event_name, subscription, latency_ms, ok):
+        with self._stats_lock:
+            stats = self._topic_stats(event_name)
+            stats.delivered += 1
+            if not ok:
+                stats.failed += 1
+            stats.total_latency_ms += latency_ms
+            if latency_ms > stats.max_latency_ms:
+                stats.max_latency_ms = latency_ms
+    def _get_routes(self, event_name: str) -> tuple:
+        routes = self._routes.get(event_name)
+        if routes is not None:
+            return routes
+        with self._lock:
+            routes = tuple(
+                subscription
+                for pattern, subscriptions in self._subscribers.items()
+                if matches(pattern, event_name)
+                for subscription in subscriptions.values()
+            )
+            self._routes[event_name] = routes
+        return routes
     def publish(self, event_name: str, event_data: Dict[str, Any], publisher_id: str = "SYSTEM"):
         """
         Publishes an event to all registered subscribers.
+        Never waits for the subscribers, except for "block" subscriptions whose queue is full.
         """
         self.kernel.write_to_log(f"EVENT PUBLISHED: Name='{event_name}', Publisher='{publisher_id}'", "INFO") # English Log
-        try:
-            event_data_str = json.dumps(event_data, default=str, indent=2)
-            if len(event_data_str) > 1000: # Batasi log jika data terlalu besar
-                event_data_str = event_data_str[:1000] + "... (truncated)" # English Log
-            self.kernel.write_to_log(f"EVENT DATA: {event_data_str}", "DETAIL") # English Log
-        except Exception as e:
-            self.kernel.write_to_log(f"EVENT DATA: [Could not serialize: {e}]", "DETAIL") # English Log
-        with self._lock:
-            if event_name in self._subscribers:
-                subscribers_to_notify = list(self._subscribers[event_name].items())
-            else:
-                subscribers_to_notify = [] # (PENAMBAHAN KODE) Pastikan list ada
-        for subscriber_id, callback in subscribers_to_notify:
-            self.kernel.write_to_log(f"EventBus: Notifying subscriber '{subscriber_id}' for event '{event_name}'...", "DEBUG") # English Log
+        if EVENT_BUS_LOG_PAYLOADS:
             try:
-                threading.Thread(target=callback, args=(event_data,)).start()
+                event_data_str = json.dumps(event_data, default=str)
+                if len(event_data_str) > 1000: # Batasi log jika data terlalu besar
+                    event_data_str = event_data_str[:1000] + "... (truncated)" # English Log
+                self.kernel.write_to_log(f"EVENT DATA: {event_data_str}", "DETAIL") # English Log
             except Exception as e:
-                self.kernel.write_to_log(f"Error executing subscriber '{subscriber_id}' for event '{event_name}': {e}", "ERROR") # English Log
-    def subscribe(self, event_name: str, subscriber_id: str, callback: Callable):
+                self.kernel.write_to_log(f"EVENT DATA: [Could not serialize: {e}]", "DETAIL") # English Log
+        dropped = 0
+        for subscription in self._get_routes(event_name):
+            accepted, needs_schedule, dropped_count = subscription.offer(event_name, event_data)
+            dropped += dropped_count
+            if needs_schedule:
+                try:
+                    self._dispatcher.schedule(subscription)
+                except Exception as e:
+                    self.kernel.write_to_log(f"Error scheduling subscriber '{subscription.subscriber_id}' for event '{event_name}': {e}", "ERROR") # English Log
+        warn_dropped = None
+        with self._stats_lock:
+            stats = self._topic_stats(event_name)
+            stats.published += 1
+            stats.dropped += dropped
+            if dropped:
+                now = time.monotonic()
+                if now - self._drop_warned_at.get(event_name, 0.0) >= EVENT_BUS_DROP_WARNING_SECONDS:
+                    self._drop_warned_at[event_name] = now
+                    warn_dropped = stats.dropped
+        if warn_dropped:
+            self.logger.warning(f"EventBus: subscriber queue full for '{event_name}', {warn_dropped} event(s) dropped so far.") # English Log
+    def subscribe(self, event_name: str, subscriber_id: str, callback: Callable,
+                  max_queue: int = EVENT_BUS_QUEUE_SIZE, overflow: str = OVERFLOW_DROP_OLDEST,
+                  block_timeout: float = EVENT_BUS_BLOCK_TIMEOUT, loop: asyncio.AbstractEventLoop = None):
         """
-        Subscribes a component to a specific event.
+        Subscribes a component to a specific event, or to a pattern such as "DASHBOARD_*" or "*".
+        overflow decides what happens when the subscriber's queue is full: "drop_oldest" (default),
+        "drop_new" or "block". Coroutine callbacks run on `loop` (default: the loop running the
+        subscribe() call); without a loop they run on a worker thread via asyncio.run.
         """
+        if loop is None and asyncio.iscoroutinefunction(callback):
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+        subscription = Subscription(event_name, subscriber_id, callback, max_queue, overflow, block_timeout, loop)
         with self._lock:
             if event_name not in self._subscribers:
                 self._subscribers[event_name] = {}
-            self._subscribers[event_name][subscriber_id] = callback
-        self.kernel.write_to_log(f"SUBSCRIBE: Component '{subscriber_id}' successfully subscribed to event '{event_name}'.", "INFO") # English Log
+            previous = self._subscribers[event_name].get(subscriber_id)
+            self._subscribers[event_name][subscriber_id] = subscription
+            self._routes.clear()
+        if previous:
+            previous.close()
+        self.kernel.write_to_log(f"SUBSCRIBE: Component '{subscriber_id}' successfully subscribed to {'pattern' if is_pattern(event_name) else 'event'} '{event_name}'.", "INFO") # English Log
     def unsubscribe(self, event_name: str, subscriber_id: str):
         """
         Removes a subscriber for a specific event.
@@ -56,9 +131,43 @@ class EventBusService(BaseService):
         with self._lock:
             if event_name in self._subscribers and subscriber_id in self._subscribers[event_name]:
                 try:
-                    del self._subscribers[event_name][subscriber_id]
+                    self._subscribers[event_name].pop(subscriber_id).close()
+                    if not self._subscribers[event_name]:
+                        del self._subscribers[event_name]
+                    self._routes.clear()
                     self.kernel.write_to_log(f"UNSUBSCRIBE: Component '{subscriber_id}' removed from event '{event_name}'.", "INFO") # English Log
                 except Exception as e:
                     self.kernel.write_to_log(f"Error during unsubscribe for '{subscriber_id}': {e}", "WARN") # English Log
             else:
                 self.kernel.write_to_log(f"UNSUBSCRIBE: No subscription found for '{subscriber_id}' on event '{event_name}'.", "DEBUG") # English Log
+    def get_metrics(self) -> dict:
+        """Per-topic throughput/latency counters and the current per-subscriber queue depths."""
+        with self._stats_lock:
+            topics = {event_name: stats.as_dict() for event_name, stats in self._stats.items()}
+        with self._lock:
+            subscriptions = [
+                subscription for subscriptions in self._subscribers.values() for subscription in subscriptions.values()
+            ]
+        return {
+            "workers": self._dispatcher.worker_count,
+            "topics": topics,
+            "subscribers": [
+                {
+                    "subscriber_id": subscription.subscriber_id,
+                    "event": subscription.pattern,
+                    "queued": len(subscription.pending),
+                    "max_queue": subscription.max_queue,
+                    "overflow": subscription.overflow,
+                    "async": subscription.is_async,
+                }
+                for subscription in subscriptions
+            ],
+        }
+    def stop(self):
+        with self._lock:
+            subscriptions = [
+                subscription for subscriptions in self._subscribers.values() for subscription in subscriptions.values()
+            ]
+        for subscription in subscriptions:
+            subscription.close()
+        self._dispatcher.stop()
@@ -0,0 +1,184 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\event_bus_service\event_dispatch.py total lines 185 
+########################################################################
+
+import time
+import queue
+import asyncio
+import fnmatch
+import logging
+import threading
+from collections import deque
+OVERFLOW_DROP_OLDEST = "drop_oldest" # (English Hardcode) Keep the newest events (state updates)
+OVERFLOW_DROP_NEW = "drop_new" # (English Hardcode) Keep what is queued, reject the new event
+OVERFLOW_BLOCK = "block" # (English Hardcode) Publisher waits for room (up to block_timeout), then drops
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEW, OVERFLOW_BLOCK)
+DRAIN_BATCH_SIZE = 32 # (English Hardcode) Events one worker delivers to a subscriber before yielding it
+def is_pattern(event_name: str) -> bool:
+    return any(char in event_name for char in "*?[")
+class TopicStats:
+    __slots__ = ("published", "delivered", "dropped", "failed", "total_latency_ms", "max_latency_ms")
+    def __init__(self):
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+        self.total_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+    def as_dict(self) -> dict:
+        return {
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "avg_latency_ms": round(self.total_latency_ms / self.delivered, 3) if self.delivered else None,
+            "max_latency_ms": round(self.max_latency_ms, 3),
+        }
+class Subscription:
+    """
+    One subscriber on one event name or pattern ("DASHBOARD_*", "*").
+    Events wait in a bounded per-subscriber queue and are delivered in publish order, one at a time,
+    either by the shared worker pool (plain callables) or on the subscriber's own event loop
+    (coroutine functions).
+    """
+    def __init__(self, pattern, subscriber_id, callback, max_queue, overflow, block_timeout, loop=None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}'. Use one of {OVERFLOW_POLICIES}.") # English Hardcode
+        self.pattern = pattern
+        self.subscriber_id = subscriber_id
+        self.callback = callback
+        self.max_queue = max(1, max_queue)
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.loop = loop
+        self.is_async = loop is not None and asyncio.iscoroutinefunction(callback) # (English Hardcode) Without a loop, coroutines run on a worker via asyncio.run
+        self.pending = deque() # (English Hardcode) (event_name, event_data, enqueued_at)
+        self.condition = threading.Condition()
+        self.scheduled = False # (English Hardcode) True while a worker (or loop task) owns the drain
+        self.active = True
+    def offer(self, event_name, event_data):
+        """Queues one event. Returns (accepted, needs_schedule, dropped_count)."""
+        with self.condition:
+            if not self.active:
+                return False, False, 0
+            dropped = 0
+            if len(self.pending) >= self.max_queue:
+                if self.overflow == OVERFLOW_DROP_NEW:
+                    return False, False, 1
+                if self.overflow == OVERFLOW_BLOCK:
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self.pending) >= self.max_queue and self.active:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return False, False, 1
+                        self.condition.wait(remaining)
+                    if not self.active:
+                        return False, False, 0
+                else:
+                    self.pending.popleft()
+                    dropped = 1
+            self.pending.append((event_name, event_data, time.perf_counter()))
+            needs_schedule = not self.scheduled
+            self.scheduled = True
+            return True, needs_schedule, dropped
+    def take(self, limit):
+        with self.condition:
+            batch = [self.pending.popleft() for _ in range(min(limit, len(self.pending)))]
+            if batch:
+                self.condition.notify_all()
+            return batch
+    def release(self) -> bool:
+        """Ends a drain. Returns True if events arrived meanwhile and the drain must be rescheduled."""
+        with self.condition:
+            if self.pending and self.active:
+                return True
+            self.scheduled = False
+            return False
+    def close(self):
+        with self.condition:
+            self.active = False
+            self.pending.clear()
+            self.condition.notify_all()
+class EventDispatcher:
+    """
+    Fixed pool of worker threads shared by all thread-based subscriptions.
+    Only subscriptions with queued events sit in the ready queue, each at most once, so one slow
+    subscriber keeps one worker busy and never delays the others' queues.
+    """
+    def __init__(self, worker_count: int, on_delivered, name: str = "EventBusWorker"):
+        self.logger = logging.getLogger("EventDispatcher") # English Hardcode
+        self.worker_count = max(1, worker_count)
+        self.on_delivered = on_delivered # (English Hardcode) (event_name, subscription, latency_ms, ok)
+        self.name = name
+        self._ready = queue.SimpleQueue()
+        self._workers = []
+        self._start_lock = threading.Lock()
+        self._stopping = False
+    def _ensure_workers(self):
+        if self._workers:
+            return
+        with self._start_lock:
+            if self._workers or self._stopping:
+                return
+            for index in range(self.worker_count):
+                worker = threading.Thread(target=self._worker_loop, name=f"{self.name}-{index}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+    def schedule(self, subscription: Subscription):
+        if subscription.is_async:
+            self._schedule_on_loop(subscription)
+            return
+        self._ensure_workers()
+        self._ready.put(subscription)
+    def _worker_loop(self):
+        while True:
+            subscription = self._ready.get()
+            if subscription is None:
+                return
+            for event_name, event_data, enqueued_at in subscription.take(DRAIN_BATCH_SIZE):
+                ok = True
+                try:
+                    result = subscription.callback(event_data)
+                    if asyncio.iscoroutine(result):
+                        asyncio.run(result)
+                except Exception as e:
+                    ok = False
+                    self.logger.error(f"Error executing subscriber '{subscription.subscriber_id}' for event '{event_name}': {e}", exc_info=True) # English Log
+                self.on_delivered(event_name, subscription, (time.perf_counter() - enqueued_at) * 1000, ok)
+            if subscription.release():
+                self._ready.put(subscription) # (English Hardcode) Back of the line, other subscribers get a turn
+    def _schedule_on_loop(self, subscription: Subscription):
+        loop = subscription.loop
+        if loop.is_closed():
+            self.logger.warning(f"Async subscriber '{subscription.subscriber_id}' lost its event loop, dropping its queue.") # English Log
+            subscription.take(subscription.max_queue)
+            subscription.release()
+            return
+        loop.call_soon_threadsafe(lambda: loop.create_task(self._drain_async(subscription)))
+    async def _drain_async(self, subscription: Subscription):
+        while True:
+            for event_name, event_data, enqueued_at in subscription.take(DRAIN_BATCH_SIZE):
+                ok = True
+                try:
+                    await subscription.callback(event_data)
+                except Exception as e:
+                    ok = False
+                    self.logger.error(f"Error executing async subscriber '{subscription.subscriber_id}' for event '{event_name}': {e}", exc_info=True) # English Log
+                self.on_delivered(event_name, subscription, (time.perf_counter() - enqueued_at) * 1000, ok)
+            if not subscription.release():
+                return
+            await asyncio.sleep(0) # (English Hardcode) Yield to the loop between batches
+    def stop(self, timeout: float = 5.0):
+        with self._start_lock:
+            self._stopping = True
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            self._ready.put(None)
+        deadline = time.monotonic() + timeout
+        for worker in workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+def matches(pattern: str, event_name: str) -> bool:
+    if not is_pattern(pattern):
+        return pattern == event_name
+    return fnmatch.fnmatchcase(event_name, pattern)
@@ -1,22 +1,19 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\gateway_connector_service\gateway_connector_service.py total lines 901 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\gateway_connector_service\gateway_connector_service.py total lines 918 
 ########################################################################
 
 import socketio
 import os
 import asyncio
 import logging
-import uuid
-import json
-import multiprocessing
 import requests
 import time
 from dotenv import load_dotenv
 from flowork_kernel.services.base_service import BaseService
 from flowork_kernel.singleton import Singleton
-from flowork_kernel.services.database_service.database_service import DatabaseService
 from flowork_kernel.services.variable_manager_service.variable_manager_service import VariableManagerService
+from flowork_kernel.exceptions import ExecutionRejectedError
 
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '..', '..', '.env'))
 CURRENT_PAYLOAD_VERSION = 2
@@ -156,6 +153,25 @@ class GatewayConnectorService(BaseService):
                 versioned_response = {'v': CURRENT_PAYLOAD_VERSION, 'payload': {'presets': [], 'error': str(e)}} #
                 await self.sio.emit('response_presets_list', versioned_response, namespace='/engine-socket') # (MODIFIED)
 
+        @self.sio.event(namespace='/engine-socket')
+        async def request_dashboard_snapshot(data):
+            """
+            (English Hardcode) A GUI (re)subscribed to the dashboard stream. Replays the deltas it missed
+            since 'since_seq', or sends a snapshot of the active jobs if they are no longer buffered.
+            """
+            if not isinstance(data, dict) or data.get('v') != CURRENT_PAYLOAD_VERSION: return
+            real_data = data.get('payload', {})
+            user_id = real_data.get('user_context', {}).get('id')
+            api_server = self.kernel_services.get("api_server_service")
+            stream = getattr(api_server, "dashboard_stream", None)
+            if not stream:
+                self.logger.error("Cannot answer 'request_dashboard_snapshot': ApiServer dashboard stream not available.") # (English Hardcode)
+                return
+            since_seq = real_data.get('since_seq')
+            resume = stream.resume(user_id, since_seq if isinstance(since_seq, int) else None)
+            resume['gui_sid'] = real_data.get('gui_sid')
+            await self.sio.emit('response_dashboard_snapshot', {'v': CURRENT_PAYLOAD_VERSION, 'payload': resume}, namespace='/engine-socket')
+
         @self.sio.event(namespace='/engine-socket') #
         async def execute_workflow(data):
             """
@@ -175,61 +191,35 @@ class GatewayConnectorService(BaseService):
                 workflow_data = real_data.get('workflow_data', {}) # (English Hardcode) Get nodes/edges from payload
                 start_node_id = real_data.get('start_node_id') # (English Hardcode) Get specific start node
                 self.logger.info(f"Received 'execute_workflow' for user {user_id} (Exec ID: {execution_id}") # (English Hardcode)
-                db_service = Singleton.get_instance(DatabaseService) #
-                if not db_service: # (English Hardcode) Removed preset_manager check
-                    self.logger.error("'db_service' not found. Cannot execute.") # (English Hardcode)
+                executor = self.kernel_services.get("workflow_executor_service") #
+                if not executor: # (English Hardcode) Removed preset_manager check
+                    self.logger.error("'workflow_executor_service' not found. Cannot execute.") # (English Hardcode)
                     return
-                nodes = workflow_data.get('nodes', []) #
-                edges = workflow_data.get('connections', []) # (FIX) Key is 'connections'
-                target_node_ids = {edge['target'] for edge in edges} #
                 if start_node_id: #
-                    starting_nodes = [start_node_id] # (English Hardcode) User specified start node
                     self.logger.info(f"Starting workflow {execution_id} from specific node: {start_node_id}") # (English Hardcode)
-                else:
-                    starting_nodes = [node['id'] for node in nodes if node['id'] not in target_node_ids] #
-                if not starting_nodes: #
-                    self.logger.warning(f"Workflow {workflow_id} has no starting nodes. Execution stopped.") # (English Hardcode)
-                    return
-                conn = db_service.create_connection() #
-                if not conn: #
-                    self.logger.error("Failed to create DB connection. Cannot queue jobs.") # (English Hardcode)
-                    return
                 try:
-                    cursor = conn.cursor() #
-                    cursor.execute( #
-                        "INSERT INTO Executions (execution_id, workflow_id, user_id, status) VALUES (?, ?, ?, ?)",
-                        (execution_id, workflow_id, user_id, 'RUNNING')
-                    )
-                    jobs_to_insert = [] #
-                    for node_id in starting_nodes: #
-                        job_id = str(uuid.uuid4()) #
-                        jobs_to_insert.append(( #
-                            job_id,
-                            execution_id,
-                            node_id,
-                            'PENDING',
-                            json.dumps(initial_payload) # (English Hardcode) Pass initial payload to all starting nodes
-                        ))
-                    cursor.executemany( #
-                        "INSERT INTO Jobs (job_id, execution_id, node_id, status, input_data) VALUES (?, ?, ?, ?, ?)",
-                        jobs_to_insert
+                    await asyncio.to_thread( # (English Hardcode) Same admission-controlled queue path as REST, cron and triggers
+                        executor.submit_execution,
+                        workflow_data,
+                        workflow_id=workflow_id,
+                        user_id=user_id,
+                        initial_payload=initial_payload,
+                        start_node_id=start_node_id,
+                        execution_id=execution_id,
+                        source="socket", # English Hardcode
                     )
-                    conn.commit() #
-                    self.logger.info(f"Successfully queued {len(starting_nodes)} starting jobs in DB for Exec ID: {execution_id}") # (English Hardcode)
-                    try:
-                        job_event = Singleton.get_instance(multiprocessing.Event) #
-                        if job_event: #
-                            job_event.set() #
-                            self.logger.debug(f"Job event (bell) set for Exec ID: {execution_id}") # (English Hardcode)
-                        else:
-                            self.logger.error("Failed to get job_event from Singleton. Workers may not wake up immediately.") # (English Hardcode)
-                    except Exception as e:
-                        self.logger.error(f"Error while setting job_event (bell): {e}", exc_info=True) # (English Hardcode)
-                except Exception as e:
-                    conn.rollback() #
-                    self.logger.error(f"Failed to insert jobs into DB: {e}", exc_info=True) # (English Hardcode)
-                finally:
-                    conn.close() #
+                    self.logger.info(f"Successfully queued starting jobs in DB for Exec ID: {execution_id}") # (English Hardcode)
+                except ExecutionRejectedError as e:
+                    self.logger.warning(f"Execution {execution_id} deferred by admission control: {e}") # (English Hardcode)
+                    await self.sio.emit('execution_rejected', {'v': CURRENT_PAYLOAD_VERSION, 'payload': { #
+                        'job_id': execution_id,
+                        'reason': e.reason,
+                        'retry_after': e.retry_after,
+                        'message': str(e),
+                        'user_context': user_context
+                    }}, namespace='/engine-socket')
+                except ValueError as e:
+                    self.logger.warning(f"Workflow {workflow_id} was not queued: {e}") # (English Hardcode)
             except Exception as e:
                 self.logger.error(f"Error handling 'execute_workflow': {e}", exc_info=True) # (English Hardcode)
 
@@ -310,10 +300,16 @@ class GatewayConnectorService(BaseService):
             manager_name = manager_map.get(component_type)
             components_list = []
             error_msg = None
+            api_server = self.kernel_services.get("api_server_service")
+            catalog = getattr(api_server, "component_catalog", None)
+            catalog_snapshot = None
 
             if manager_name:
                 manager = self.kernel_services.get(manager_name)
-                if manager:
+                if manager and catalog:
+                    catalog_snapshot = catalog.snapshot(component_type) # (English Hardcode) Rebuilt only after install/uninstall/pause/reload
+                    components_list = list(catalog_snapshot.ordered) if catalog_snapshot else []
+                elif manager:
                     try:
                         items_attr_map = {
                             "module_manager_service": "loaded_modules",
@@ -352,6 +348,7 @@ class GatewayConnectorService(BaseService):
             versioned_response = {'v': CURRENT_PAYLOAD_VERSION, 'payload': {
                 'component_type': component_type,
                 'components': components_list,
+                'catalog_version': catalog_snapshot.version if catalog_snapshot else None,
                 'error': error_msg
             }}
             await self.sio.emit('response_component_list', versioned_response, namespace='/engine-socket')
@@ -725,6 +722,7 @@ class GatewayConnectorService(BaseService):
             }
             manager_name = manager_map.get(component_type)
             manager = self.kernel_services.get(manager_name)
+            catalog = getattr(self.kernel_services.get("api_server_service"), "component_catalog", None)
 
             if not manager:
                 self.logger.error(f"Cannot install {component_id}: Manager {manager_name} not found.")
@@ -741,6 +739,8 @@ class GatewayConnectorService(BaseService):
                         'is_installed': True
                     }}
                      await self.sio.emit('component_install_status', versioned_response, namespace='/engine-socket')
+                     if catalog:
+                         catalog.invalidate(component_type)
                      await request_components_list(data) # (English Hardcode) Refresh list
                 asyncio.run(send_update())
 
@@ -763,6 +763,7 @@ class GatewayConnectorService(BaseService):
             }
             manager_name = manager_map.get(component_type)
             manager = self.kernel_services.get(manager_name)
+            catalog = getattr(self.kernel_services.get("api_server_service"), "component_catalog", None)
 
             if not manager:
                 self.logger.error(f"Cannot uninstall {component_id}: Manager {manager_name} not found.")
@@ -779,6 +780,8 @@ class GatewayConnectorService(BaseService):
                         'is_installed': False
                     }}
                     await self.sio.emit('component_install_status', versioned_response, namespace='/engine-socket')
+                    if catalog:
+                        catalog.invalidate(component_type)
                     await request_components_list(data) # (English Hardcode) Refresh list
                 asyncio.run(send_update())
 
@@ -819,11 +822,21 @@ class GatewayConnectorService(BaseService):
                 'update_dataset_row',
                 'delete_dataset_row',
                 'install_component',
-                'uninstall_component'
+                'uninstall_component',
+                'request_dashboard_snapshot'
             ]
             if event not in known_events: #
                 self.logger.warning(f"Received unhandled event '{event}' in /engine-socket namespace.") # (English Hardcode)
 
+    async def _forward_dashboard_delta(self, message):
+        """(DashboardStream tick, scheduled on our loop) Relays one coalesced delta message to the Gateway."""
+        if not self.sio.connected:
+            return # (English Hardcode) GUIs resync with request_dashboard_snapshot after a reconnect
+        try:
+            await self.sio.emit('dashboard_delta', {'v': CURRENT_PAYLOAD_VERSION, 'payload': message}, namespace='/engine-socket')
+        except Exception as e:
+            self.logger.warning(f"[GatewayConnector] Failed to forward dashboard delta #{message.get('seq')}: {e}") # (English Hardcode)
+
     async def _engine_heartbeat(self):
         """
         (English) Periodically send engine vitals to Gateway so it can keep user↔engine mapping alive.
@@ -855,6 +868,10 @@ class GatewayConnectorService(BaseService):
             self.logger.error("GatewayConnectorService not properly set up. Missing URL, Engine ID or Token.") # (English Hardcode)
             return
         self.logger.info(f"Starting GatewayConnectorService, resolving home gateway from {self.gateway_url}...") # (English Hardcode)
+        stream = getattr(self.kernel_services.get("api_server_service"), "dashboard_stream", None)
+        if stream:
+            loop = asyncio.get_running_loop()
+            stream.add_listener(lambda message: asyncio.run_coroutine_threadsafe(self._forward_dashboard_delta(message), loop))
         resolved_http_url = self._resolve_home_gateway() # (English Hardcode) This is http://...:8000
 
         if resolved_http_url.startswith("https://"): # English Hardcode
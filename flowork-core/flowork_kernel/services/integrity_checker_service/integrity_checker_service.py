@@ -1,11 +1,12 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\integrity_checker_service\integrity_checker_service.py total lines 105 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\integrity_checker_service\integrity_checker_service.py total lines 128 
 ########################################################################
 
 import os
 import json
 import hashlib
+import threading
 from ..base_service import BaseService
 class IntegrityCheckerService(BaseService):
     """
@@ -13,6 +14,8 @@ class IntegrityCheckerService(BaseService):
     [V3] Now performs a two-layer check. It loads the core manifest and
     also loads the addon manifest if it exists, merging them for a full system verification.
     [V4] Now respects dev mode from the Kernel.
+    [V5] After the file check, re-audits every preset Flow-Chain (hashes and signatures) in the
+    background and logs the broken chains.
     """
     def __init__(self, kernel, service_id: str):
         super().__init__(kernel, service_id)
@@ -102,3 +105,23 @@ class IntegrityCheckerService(BaseService):
             self.loc.get("log_integrity_all_ok", count=len(full_integrity_manifest)),
             "SUCCESS",
         )
+        self.start_preset_chain_audit()
+    def start_preset_chain_audit(self):
+        """Runs PresetManagerService.audit_preset_chains() on a daemon thread, so startup does not wait for it."""
+        thread = threading.Thread(target=self.audit_preset_chains, name="PresetChainAudit", daemon=True) # English Hardcode
+        thread.start()
+        return thread
+    def audit_preset_chains(self) -> dict:
+        """Full Flow-Chain audit of every user's presets. Returns {workflow_path: message} of the broken chains."""
+        preset_manager = self.kernel.get_service("preset_manager_service", is_system_call=True)
+        if not preset_manager or not hasattr(preset_manager, "audit_preset_chains"):
+            self.kernel.write_to_log("Preset Flow-Chain audit skipped: PresetManagerService is not available.", "WARN") # English Hardcode
+            return {}
+        try:
+            failures = preset_manager.audit_preset_chains()
+        except Exception as e:
+            self.kernel.write_to_log(f"Preset Flow-Chain audit failed: {e}", "ERROR") # English Hardcode
+            return {}
+        if failures:
+            self.kernel.write_to_log(f"Preset Flow-Chain audit: {len(failures)} broken chain(s): {', '.join(sorted(failures))}", "ERROR") # English Hardcode
+        return failures
@@ -0,0 +1,366 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\job_retention_service\job_retention_service.py total lines 367 
+########################################################################
+
+import os
+import json
+import zlib
+import time
+import logging
+import sqlite3
+import threading
+from flowork_kernel.services.base_service import BaseService
+from flowork_kernel.singleton import Singleton
+from flowork_kernel.services.database_service.database_service import DatabaseService
+from flowork_kernel.services.database_service.payload_store import load_payload
+from flowork_kernel.services.workflow_executor_service.workflow_executor_service import RAW_WORKFLOW_PREFIX
+try:
+    from prometheus_client import Counter, Gauge
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+RETENTION_TTL_HOURS = {
+    "DONE": float(os.getenv("CORE_RETENTION_DONE_HOURS", "72")), # English Hardcode
+    "FAILED": float(os.getenv("CORE_RETENTION_FAILED_HOURS", "336")), # English Hardcode
+}
+RETENTION_INTERVAL_SECONDS = int(os.getenv("CORE_RETENTION_INTERVAL_SECONDS", "600"))
+RETENTION_BATCH_SIZE = max(1, int(os.getenv("CORE_RETENTION_BATCH_SIZE", "200"))) # (English Hardcode) Executions per write transaction
+RETENTION_ARCHIVE_ENABLED = os.getenv("CORE_RETENTION_ARCHIVE", "1") == "1" # (English Hardcode) "0" deletes without archiving
+RETENTION_VACUUM_PAGES = int(os.getenv("CORE_RETENTION_VACUUM_PAGES", "2000")) # (English Hardcode) Pages freed per incremental_vacuum step
+RETENTION_ALLOW_FULL_VACUUM = os.getenv("CORE_RETENTION_ALLOW_FULL_VACUUM", "0") == "1" # (English Hardcode) One-time conversion of old DBs
+ARCHIVE_COMPRESS_LEVEL = 6
+class JobRetentionService(BaseService):
+    """
+    Keeps the live queue in core.db small.
+
+    Every RETENTION_INTERVAL_SECONDS it takes finished executions (Executions.status DONE/FAILED)
+    older than their per-status TTL, copies them with all their jobs into a compressed archive
+    database (data/archive/jobs_archive.db, one zlib blob of input/output/error per job), deletes
+    them from the live tables in small batches (the payload store triggers release shared blobs)
+    and returns the freed pages to the OS with incremental vacuum. Jobs without an Executions row
+    (ad-hoc runs) follow the same TTLs. Executions that are still RUNNING are never touched; runs
+    that older cores left RUNNING after their last job are finalized by DatabaseService at startup.
+    Inline ("_raw::<hash>") workflows whose executions and jobs are all gone lose their
+    Workflows/Nodes/Edges rows too.
+    """
+    def __init__(self, kernel, service_id: str):
+        super().__init__(kernel, service_id)
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.db_service = Singleton.get_instance(DatabaseService)
+        if not self.db_service:
+            self.logger.error("CRITICAL: Missing DB Service from Singleton. Retention is disabled.") # English Hardcode
+        self.archive_path = None
+        if self.db_service and RETENTION_ARCHIVE_ENABLED:
+            archive_dir = os.path.join(self.db_service.data_dir, "archive") # English Hardcode
+            os.makedirs(archive_dir, exist_ok=True)
+            self.archive_path = os.path.join(archive_dir, "jobs_archive.db") # English Hardcode
+        self.stop_event = threading.Event()
+        self.worker_thread = None
+        self._run_lock = threading.Lock()
+        self.stats = {
+            "runs": 0,
+            "executions_archived": 0,
+            "jobs_archived": 0,
+            "executions_deleted": 0,
+            "jobs_deleted": 0,
+            "raw_workflows_deleted": 0,
+            "pages_reclaimed": 0,
+            "bytes_reclaimed": 0,
+            "last_run_at": None,
+            "last_run_seconds": 0.0,
+            "last_error": None,
+            "db_size_bytes": 0,
+            "freelist_pages": 0,
+        }
+        self._prom = None
+        if PROMETHEUS_AVAILABLE:
+            try:
+                self._prom = {
+                    "rows": Counter("flowork_retention_rows_total", "Rows removed from the live queue by retention", ["table", "action"]),
+                    "bytes": Counter("flowork_retention_reclaimed_bytes_total", "Bytes returned to the OS by incremental vacuum"),
+                    "db_size": Gauge("flowork_core_db_size_bytes", "Size of core.db after the last retention run"),
+                    "freelist": Gauge("flowork_core_db_freelist_pages", "Free pages left in core.db after the last retention run"),
+                }
+            except ValueError as e:
+                self.logger.warning(f"Retention metrics already registered, Prometheus export disabled: {e}") # English Hardcode
+    def start(self):
+        if not self.db_service or self.worker_thread:
+            return
+        self.worker_thread = threading.Thread(target=self._retention_loop, name="JobRetention", daemon=True) # English Hardcode
+        self.worker_thread.start()
+        self.logger.info(
+            f"Retention started: TTL {RETENTION_TTL_HOURS} hours, every {RETENTION_INTERVAL_SECONDS}s, archive={'on' if self.archive_path else 'off'}." # English Hardcode
+        )
+    def stop(self):
+        self.stop_event.set()
+        if self.worker_thread:
+            self.worker_thread.join(timeout=5)
+    def get_metrics(self) -> dict:
+        with self._run_lock:
+            return dict(self.stats, ttl_hours=dict(RETENTION_TTL_HOURS), archive_path=self.archive_path)
+    def _retention_loop(self):
+        while not self.stop_event.wait(RETENTION_INTERVAL_SECONDS):
+            try:
+                self.run_once()
+            except Exception as e:
+                self.stats["last_error"] = str(e)
+                self.logger.error(f"Retention run failed: {e}", exc_info=True) # English Hardcode
+    def run_once(self) -> dict:
+        """Runs one retention pass (archive, delete, incremental vacuum). Returns the counts of this pass."""
+        if not self.db_service:
+            return {}
+        with self._run_lock:
+            started = time.monotonic()
+            summary = {"executions": 0, "jobs": 0, "orphan_jobs": 0, "raw_workflows": 0, "bytes_reclaimed": 0}
+            conn = self.db_service.create_connection()
+            if not conn:
+                raise sqlite3.Error("Failed to create DB connection for retention.") # English Hardcode
+            archive_conn = self._open_archive() if self.archive_path else None
+            try:
+                while not self.stop_event.is_set():
+                    execution_ids = self._select_expired_executions(conn)
+                    if not execution_ids:
+                        break
+                    executions, jobs = self._process_execution_batch(conn, archive_conn, execution_ids)
+                    summary["executions"] += executions
+                    summary["jobs"] += jobs
+                    if not executions:
+                        break # (English Hardcode) Only executions with re-queued jobs are left, retry next run
+                while not self.stop_event.is_set():
+                    jobs = self._process_orphan_job_batch(conn, archive_conn)
+                    if not jobs:
+                        break
+                    summary["orphan_jobs"] += jobs
+                while not self.stop_event.is_set():
+                    workflows = self._process_raw_workflow_batch(conn)
+                    if not workflows:
+                        break
+                    summary["raw_workflows"] += workflows
+                summary["bytes_reclaimed"] = self._incremental_vacuum(conn)
+            finally:
+                conn.close()
+                if archive_conn:
+                    archive_conn.close()
+            self.stats["runs"] += 1
+            self.stats["last_run_at"] = time.time()
+            self.stats["last_run_seconds"] = round(time.monotonic() - started, 3)
+            self.stats["last_error"] = None
+            if summary["executions"] or summary["orphan_jobs"]:
+                self.logger.info(
+                    f"Retention removed {summary['executions']} execution(s), {summary['jobs'] + summary['orphan_jobs']} job(s), "
+                    f"reclaimed {summary['bytes_reclaimed']} bytes in {self.stats['last_run_seconds']}s." # English Hardcode
+                )
+            return summary
+    def _open_archive(self):
+        archive_conn = sqlite3.connect(self.archive_path, timeout=30.0)
+        archive_conn.execute("PRAGMA journal_mode=WAL;")
+        archive_conn.execute("PRAGMA synchronous=NORMAL;")
+        archive_conn.execute('''
+        CREATE TABLE IF NOT EXISTS ArchivedExecutions (
+            execution_id TEXT PRIMARY KEY,
+            workflow_id TEXT,
+            user_id TEXT,
+            status TEXT,
+            created_at DATETIME,
+            finished_at DATETIME,
+            archived_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        ''')
+        archive_conn.execute('''
+        CREATE TABLE IF NOT EXISTS ArchivedJobs (
+            job_id TEXT PRIMARY KEY,
+            execution_id TEXT,
+            node_id TEXT,
+            workflow_id TEXT,
+            user_id TEXT,
+            status TEXT,
+            created_at DATETIME,
+            started_at DATETIME,
+            finished_at DATETIME,
+            body BLOB
+        );
+        ''')
+        archive_conn.execute("CREATE INDEX IF NOT EXISTS idx_archived_jobs_execution ON ArchivedJobs (execution_id);")
+        archive_conn.execute("CREATE INDEX IF NOT EXISTS idx_archived_executions_user ON ArchivedExecutions (user_id, finished_at);")
+        archive_conn.commit()
+        return archive_conn
+    def _ttl_clause(self, column):
+        """SQL fragment + params selecting terminal statuses older than their TTL."""
+        clauses, params = [], []
+        for status, hours in RETENTION_TTL_HOURS.items():
+            if hours <= 0:
+                continue # (English Hardcode) TTL 0 keeps that status forever
+            clauses.append(f"(status = ? AND {column} < datetime('now', ?))")
+            params.extend([status, f"-{int(hours * 3600)} seconds"])
+        return " OR ".join(clauses), params
+    def _select_expired_executions(self, conn):
+        clause, params = self._ttl_clause("COALESCE(finished_at, created_at)")
+        if not clause:
+            return []
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT execution_id FROM Executions WHERE {clause} LIMIT ?", (*params, RETENTION_BATCH_SIZE))
+        return [row[0] for row in cursor.fetchall()]
+    def _archive_rows(self, conn, archive_conn, execution_rows, job_rows):
+        """Writes executions/jobs to the archive DB and commits there BEFORE the live rows are deleted."""
+        if not archive_conn:
+            return
+        cursor = conn.cursor()
+        archived_jobs = []
+        for job_id, execution_id, node_id, workflow_id, user_id, status, input_data, input_hash, output_data, output_hash, error_message, created_at, started_at, finished_at in job_rows:
+            body = {
+                "input": load_payload(cursor, input_data, input_hash),
+                "output": load_payload(cursor, output_data, output_hash),
+                "error": error_message,
+            }
+            archived_jobs.append((
+                job_id, execution_id, node_id, workflow_id, user_id, status, created_at, started_at, finished_at,
+                zlib.compress(json.dumps(body, default=str).encode("utf-8"), ARCHIVE_COMPRESS_LEVEL)
+            ))
+        if execution_rows:
+            archive_conn.executemany(
+                "INSERT OR REPLACE INTO ArchivedExecutions (execution_id, workflow_id, user_id, status, created_at, finished_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                execution_rows
+            )
+        if archived_jobs:
+            archive_conn.executemany(
+                "INSERT OR REPLACE INTO ArchivedJobs (job_id, execution_id, node_id, workflow_id, user_id, status, created_at, started_at, finished_at, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                archived_jobs
+            )
+        archive_conn.commit()
+    def _load_job_rows(self, conn, where_sql, params):
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT job_id, execution_id, node_id, workflow_id, user_id, status, input_data, input_payload_hash, "
+            "output_data, output_payload_hash, error_message, created_at, started_at, finished_at "
+            f"FROM Jobs WHERE {where_sql}",
+            params
+        )
+        return cursor.fetchall()
+    def _process_execution_batch(self, conn, archive_conn, execution_ids):
+        placeholders = ",".join("?" for _ in execution_ids)
+        if archive_conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT execution_id, workflow_id, user_id, status, created_at, finished_at FROM Executions WHERE execution_id IN ({placeholders})",
+                execution_ids
+            )
+            execution_rows = cursor.fetchall()
+            job_rows = self._load_job_rows(conn, f"execution_id IN ({placeholders})", execution_ids)
+            self._archive_rows(conn, archive_conn, execution_rows, job_rows)
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE;")
+        try:
+            cursor.execute(
+                f"DELETE FROM Jobs WHERE execution_id IN ({placeholders}) AND status NOT IN ('PENDING', 'RUNNING')",
+                execution_ids
+            )
+            jobs_deleted = cursor.rowcount
+            cursor.execute(
+                f"DELETE FROM Executions WHERE execution_id IN ({placeholders}) "
+                f"AND NOT EXISTS (SELECT 1 FROM Jobs WHERE Jobs.execution_id = Executions.execution_id)",
+                execution_ids
+            )
+            executions_deleted = cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        self._count("executions", executions_deleted, archived=bool(archive_conn))
+        self._count("jobs", jobs_deleted, archived=bool(archive_conn))
+        return executions_deleted, jobs_deleted
+    def _process_orphan_job_batch(self, conn, archive_conn):
+        clause, params = self._ttl_clause("COALESCE(finished_at, created_at)")
+        if not clause:
+            return 0
+        orphan_sql = f"({clause}) AND NOT EXISTS (SELECT 1 FROM Executions e WHERE e.execution_id = Jobs.execution_id)"
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT job_id FROM Jobs WHERE {orphan_sql} LIMIT ?", (*params, RETENTION_BATCH_SIZE))
+        job_ids = [row[0] for row in cursor.fetchall()]
+        if not job_ids:
+            return 0
+        placeholders = ",".join("?" for _ in job_ids)
+        if archive_conn:
+            self._archive_rows(conn, archive_conn, [], self._load_job_rows(conn, f"job_id IN ({placeholders})", job_ids))
+        cursor.execute("BEGIN IMMEDIATE;")
+        try:
+            cursor.execute(f"DELETE FROM Jobs WHERE job_id IN ({placeholders})", job_ids)
+            jobs_deleted = cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        self._count("jobs", jobs_deleted, archived=bool(archive_conn))
+        return jobs_deleted
+    def _process_raw_workflow_batch(self, conn):
+        """Deletes inline workflows no execution or job refers to any more. Returns the number of workflows removed."""
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE;") # (English Hardcode) Serialized with submit, which re-creates the rows if it needs them again
+        try:
+            cursor.execute(
+                "SELECT workflow_id FROM Workflows w WHERE workflow_id LIKE ? "
+                "AND NOT EXISTS (SELECT 1 FROM Executions e WHERE e.workflow_id = w.workflow_id) "
+                "AND NOT EXISTS (SELECT 1 FROM Jobs j WHERE j.workflow_id = w.workflow_id) LIMIT ?",
+                (RAW_WORKFLOW_PREFIX + "%", RETENTION_BATCH_SIZE)
+            )
+            workflow_ids = [row[0] for row in cursor.fetchall()]
+            if workflow_ids:
+                placeholders = ",".join("?" for _ in workflow_ids)
+                cursor.execute(f"DELETE FROM Edges WHERE workflow_id IN ({placeholders})", workflow_ids)
+                cursor.execute(f"DELETE FROM Nodes WHERE workflow_id IN ({placeholders})", workflow_ids)
+                cursor.execute(f"DELETE FROM Workflows WHERE workflow_id IN ({placeholders})", workflow_ids)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        self.stats["raw_workflows_deleted"] += len(workflow_ids)
+        return len(workflow_ids)
+    def _count(self, table, rows, archived):
+        if not rows:
+            return
+        self.stats[f"{table}_deleted"] += rows
+        if archived:
+            self.stats[f"{table}_archived"] += rows
+        if self._prom:
+            self._prom["rows"].labels(table=table, action="archived" if archived else "deleted").inc(rows) # English Hardcode
+    def _incremental_vacuum(self, conn):
+        """Returns free pages to the OS. Returns the number of bytes the file shrank by."""
+        cursor = conn.cursor()
+        page_size = cursor.execute("PRAGMA page_size;").fetchone()[0]
+        size_before = cursor.execute("PRAGMA page_count;").fetchone()[0] * page_size
+        auto_vacuum = cursor.execute("PRAGMA auto_vacuum;").fetchone()[0]
+        if auto_vacuum != 2: # (English Hardcode) 2 == INCREMENTAL
+            if not RETENTION_ALLOW_FULL_VACUUM:
+                self.logger.debug("core.db was created without auto_vacuum=INCREMENTAL; set CORE_RETENTION_ALLOW_FULL_VACUUM=1 to convert it once.") # English Hardcode
+            else:
+                self.logger.warning("Converting core.db to auto_vacuum=INCREMENTAL with a one-time full VACUUM...") # English Hardcode
+                cursor.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+                cursor.execute("VACUUM;")
+        else:
+            freelist = cursor.execute("PRAGMA freelist_count;").fetchone()[0]
+            while freelist > 0 and not self.stop_event.is_set():
+                cursor.execute(f"PRAGMA incremental_vacuum({RETENTION_VACUUM_PAGES});")
+                cursor.fetchall()
+                remaining = cursor.execute("PRAGMA freelist_count;").fetchone()[0]
+                if remaining >= freelist:
+                    break
+                freelist = remaining
+        try:
+            cursor.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+        except sqlite3.Error as e:
+            self.logger.debug(f"WAL checkpoint skipped: {e}") # English Hardcode
+        page_count = cursor.execute("PRAGMA page_count;").fetchone()[0]
+        size_after = page_count * page_size
+        reclaimed = max(0, size_before - size_after)
+        self.stats["pages_reclaimed"] += reclaimed // page_size
+        self.stats["bytes_reclaimed"] += reclaimed
+        self.stats["db_size_bytes"] = size_after
+        self.stats["freelist_pages"] = cursor.execute("PRAGMA freelist_count;").fetchone()[0]
+        if self._prom:
+            if reclaimed:
+                self._prom["bytes"].inc(reclaimed)
+            self._prom["db_size"].set(size_after)
+            self._prom["freelist"].set(self.stats["freelist_pages"])
+        return reclaimed
@@ -0,0 +1,216 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\module_manager_service\instance_pool.py total lines 217 
+########################################################################
+
+import os
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+CONCURRENCY_SHARED = "shared" # (English Hardcode) One instance for every thread (the old behaviour, module must be thread-safe)
+CONCURRENCY_PER_THREAD = "per-thread" # (English Hardcode) One instance per calling thread, created on first use
+CONCURRENCY_POOLED = "pooled" # (English Hardcode) N instances created up front, each leased to one job at a time
+CONCURRENCY_PROCESS = "process-isolated" # (English Hardcode) Runs in the worker's supervised child process (see workers/watchdog.py)
+CONCURRENCY_MODES = (CONCURRENCY_SHARED, CONCURRENCY_PER_THREAD, CONCURRENCY_POOLED, CONCURRENCY_PROCESS)
+POOL_ACQUIRE_TIMEOUT_SECONDS = float(os.getenv("CORE_MODULE_POOL_ACQUIRE_TIMEOUT", "300"))
+MAX_POOL_SIZE = int(os.getenv("CORE_MODULE_POOL_MAX_SIZE", "16")) # (English Hardcode) Guards against "pooled:500" in a manifest
+class ConcurrencyContract:
+    """
+    The concurrency model a component declares in its manifest. Accepted forms:
+        "concurrency": "shared" | "per-thread" | "pooled:4" | "process-isolated"
+        "concurrency": {"mode": "pooled", "size": 4, "max_concurrency": 2}
+        "max_concurrency": 1   (top level, any mode)
+    A legacy `"isolation": {"mode": "process"}` block without a concurrency entry means process-isolated.
+    max_concurrency is None when unlimited; for pooled it never exceeds the pool size.
+    """
+    __slots__ = ("mode", "pool_size", "max_concurrency")
+    def __init__(self, mode: str = CONCURRENCY_SHARED, pool_size: int = 1, max_concurrency: int = None):
+        self.mode = mode
+        self.pool_size = pool_size
+        self.max_concurrency = max_concurrency
+    @classmethod
+    def from_manifest(cls, manifest: dict):
+        manifest = manifest or {}
+        declared = manifest.get("concurrency")
+        max_concurrency = manifest.get("max_concurrency")
+        pool_size = None
+        if isinstance(declared, dict):
+            mode = declared.get("mode", CONCURRENCY_SHARED)
+            pool_size = declared.get("size")
+            max_concurrency = declared.get("max_concurrency", max_concurrency)
+        elif isinstance(declared, str) and declared.strip():
+            mode, _, size_text = declared.strip().partition(":")
+            pool_size = size_text or None
+        else:
+            isolation = manifest.get("isolation")
+            is_isolated = isinstance(isolation, dict) and isolation.get("mode") == "process" # English Hardcode
+            mode = CONCURRENCY_PROCESS if is_isolated else CONCURRENCY_SHARED
+        mode = mode.strip().lower()
+        if mode not in CONCURRENCY_MODES:
+            raise ValueError(f"Unknown concurrency mode '{mode}'. Use one of {CONCURRENCY_MODES}.") # English Hardcode
+        if mode == CONCURRENCY_POOLED:
+            pool_size = min(MAX_POOL_SIZE, max(1, int(pool_size or 1)))
+        else:
+            pool_size = 1
+        if max_concurrency is not None:
+            max_concurrency = max(1, int(max_concurrency))
+            if mode == CONCURRENCY_POOLED:
+                max_concurrency = min(max_concurrency, pool_size)
+        return cls(mode, pool_size, max_concurrency)
+    def as_dict(self) -> dict:
+        return {"mode": self.mode, "pool_size": self.pool_size, "max_concurrency": self.max_concurrency}
+class ModuleInstancePool:
+    """
+    The instances of one module, handed out according to its ConcurrencyContract.
+    lease() blocks while the module is at its max_concurrency (or, for pooled, while every instance
+    is busy) and raises TimeoutError when no slot frees up in time. factory() builds and on_load()s
+    one instance and returns None on failure; close() calls on_unload() on everything it built.
+    """
+    def __init__(self, module_id: str, contract: ConcurrencyContract, factory):
+        self.logger = logging.getLogger("ModuleInstancePool") # English Hardcode
+        self.module_id = module_id
+        self.contract = contract
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._build_lock = threading.Lock() # (English Hardcode) Serializes first-time builds of the shared instance
+        self._reserved = 0 # (English Hardcode) Pooled instances built or being built
+        self._all = [] # (English Hardcode) Every instance built, for primary() and close()
+        self._idle = deque() # (English Hardcode) Pooled instances not leased right now
+        self._per_thread = {} # (English Hardcode) Thread -> its per-thread instance
+        self._slots = threading.BoundedSemaphore(contract.max_concurrency) if contract.max_concurrency else None
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._closed = False
+    def _build(self):
+        instance = self._factory()
+        if instance is not None:
+            with self._lock:
+                self._all.append(instance)
+        return instance
+    def _reserve_pooled(self) -> bool:
+        """(Under _lock) Claims the right to build one more pooled instance."""
+        if self._closed or self._reserved >= self.contract.pool_size:
+            return False
+        self._reserved += 1
+        return True
+    def _build_pooled(self, idle: bool):
+        instance = self._build()
+        with self._lock:
+            if instance is None:
+                self._reserved -= 1 # (English Hardcode) Let a later lease retry the build
+            elif idle:
+                self._idle.append(instance)
+                self._available.notify()
+        return instance
+    def warm_up(self) -> int:
+        """Builds the missing instances of a pooled module now. Returns how many were built."""
+        if self.contract.mode != CONCURRENCY_POOLED:
+            return 0
+        built = 0
+        while True:
+            with self._lock:
+                if not self._reserve_pooled():
+                    return built
+            if self._build_pooled(idle=True) is None:
+                return built
+            built += 1
+    def primary(self):
+        """The instance for non-leased callers (get_instance): the shared one, this thread's one, or the first pooled one."""
+        if self.contract.mode == CONCURRENCY_PER_THREAD:
+            return self._thread_instance()
+        if self._all:
+            return self._all[0]
+        if self.contract.mode == CONCURRENCY_POOLED:
+            with self._lock:
+                reserved = self._reserve_pooled()
+            return self._build_pooled(idle=True) if reserved else (self._all[0] if self._all else None)
+        with self._build_lock:
+            return self._all[0] if self._all else self._build()
+    def _thread_instance(self):
+        """
+        The calling thread's own instance. Job threads are short-lived (one per job under the
+        watchdog), so an instance left behind by a finished thread is handed over, not rebuilt.
+        """
+        thread = threading.current_thread()
+        with self._lock:
+            instance = self._per_thread.get(thread)
+            if instance is not None:
+                return instance
+            for owner, orphan in list(self._per_thread.items()):
+                if not owner.is_alive():
+                    del self._per_thread[owner]
+                    self._per_thread[thread] = orphan
+                    return orphan
+        instance = self._build()
+        if instance is not None:
+            with self._lock:
+                self._per_thread[thread] = instance
+        return instance
+    def acquire(self, timeout: float = POOL_ACQUIRE_TIMEOUT_SECONDS):
+        if self._slots is not None and not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"Module '{self.module_id}' is at its max concurrency ({self.contract.max_concurrency}) for {timeout}s.") # English Hardcode
+        try:
+            if self.contract.mode == CONCURRENCY_POOLED:
+                instance = self._take_pooled(timeout)
+            elif self.contract.mode == CONCURRENCY_PER_THREAD:
+                instance = self._thread_instance()
+            else:
+                instance = self.primary()
+        except BaseException:
+            if self._slots is not None:
+                self._slots.release()
+            raise
+        if instance is None:
+            if self._slots is not None:
+                self._slots.release()
+            return None
+        with self._lock:
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+        return instance
+    def _take_pooled(self, timeout):
+        """Waits for an idle pooled instance, building the missing ones lazily if warm_up() was skipped."""
+        with self._available:
+            if not self._available.wait_for(lambda: self._idle or self._closed or self._reserved < self.contract.pool_size, timeout):
+                raise TimeoutError(f"All {self.contract.pool_size} instances of module '{self.module_id}' stayed busy for {timeout}s.") # English Hardcode
+            if self._idle:
+                return self._idle.popleft()
+            if not self._reserve_pooled():
+                return None # (English Hardcode) Pool was closed while waiting
+        return self._build_pooled(idle=False)
+    def release(self, instance):
+        with self._lock:
+            self._in_use = max(0, self._in_use - 1)
+            if self.contract.mode == CONCURRENCY_POOLED and instance is not None and not self._closed:
+                self._idle.append(instance)
+                self._available.notify()
+        if self._slots is not None:
+            self._slots.release()
+    @contextmanager
+    def lease(self, timeout: float = POOL_ACQUIRE_TIMEOUT_SECONDS):
+        instance = self.acquire(timeout)
+        try:
+            yield instance
+        finally:
+            if instance is not None:
+                self.release(instance)
+    def close(self):
+        with self._lock:
+            self._closed = True
+            instances, self._all = self._all, []
+            self._idle.clear()
+            self._per_thread = {}
+            self._available.notify_all()
+        for instance in instances:
+            if hasattr(instance, "on_unload"):
+                try:
+                    instance.on_unload()
+                except Exception as e:
+                    self.logger.warning(f"on_unload failed for an instance of '{self.module_id}': {e}") # English Log
+    def get_metrics(self) -> dict:
+        with self._lock:
+            metrics = self.contract.as_dict()
+            metrics.update({"instances": len(self._all), "idle": len(self._idle), "in_use": self._in_use, "peak_in_use": self._peak_in_use})
+        return metrics
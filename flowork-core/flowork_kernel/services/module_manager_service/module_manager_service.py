@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\module_manager_service\module_manager_service.py total lines 520 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\module_manager_service\module_manager_service.py total lines 621 
 ########################################################################
 
 import os
@@ -15,9 +15,12 @@ import zipfile
 import tempfile
 import shutil
 from flowork_kernel.exceptions import PermissionDeniedError
+from flowork_kernel.utils.component_index import get_component_index
 import hashlib
 import threading
 import shutil
+from contextlib import contextmanager
+from .instance_pool import ConcurrencyContract, ModuleInstancePool, CONCURRENCY_POOLED, CONCURRENCY_PER_THREAD, POOL_ACQUIRE_TIMEOUT_SECONDS
 
 class ModuleManagerService(BaseService):
     """
@@ -28,6 +31,8 @@ class ModuleManagerService(BaseService):
         self.modules_dir = self.kernel.modules_path
         self.loaded_modules = {}
         self.instance_cache = {}
+        self.instance_pools = {} # (English Hardcode) module_id -> ModuleInstancePool, per the manifest "concurrency" contract
+        self._pools_lock = threading.Lock()
         self.paused_status_file = os.path.join(
             self.kernel.data_path, "paused_modules.json"
         )
@@ -54,6 +59,7 @@ class ModuleManagerService(BaseService):
 
         self.loaded_modules.clear()
         self.instance_cache.clear()
+        self._close_pools()
         paused_ids = self._load_paused_status()
 
         if not os.path.exists(self.modules_dir):
@@ -62,35 +68,32 @@ class ModuleManagerService(BaseService):
             )
             return
 
-        for item_id in os.listdir(self.modules_dir):
+        component_index = get_component_index(self.kernel.data_path)
+        for item_id, item_dir, manifest, manifest_error in component_index.scan(self.modules_dir):
             if item_id in self.kernel.globally_disabled_components:
                 self.logger.warning(f"Skipping globally disabled module: {item_id}")
                 continue
-            item_dir = os.path.join(self.modules_dir, item_id)
-            if os.path.isdir(item_dir) and item_id != "__pycache__":
-                manifest_path = os.path.join(item_dir, "manifest.json")
-                if not os.path.exists(manifest_path):
-                    continue
-                try:
-                    with open(manifest_path, "r", encoding="utf-8") as f:
-                        manifest = json.load(f)
-                    is_paused = item_id in paused_ids
-                    install_marker_path = os.path.join(item_dir, ".installed") # English Hardcode
-                    is_installed = os.path.exists(install_marker_path)
-                    module_data = {
-                        "manifest": manifest,
-                        "path": item_dir,
-                        "installed_as": "module",
-                        "is_paused": is_paused,
-                        "permissions": manifest.get("permissions", []),
-                        "tier": manifest.get("tier", "free").lower(),
-                        "is_installed": is_installed, # (KODE DARI CHAT SEBELUMNYA)
-                    }
-                    self.loaded_modules[item_id] = module_data
-                except Exception as e:
-                    self.logger.warning(
-                        f"   ! Failed to process manifest for module '{item_id}': {e}"
-                    )
+            try:
+                if manifest_error:
+                    raise manifest_error
+                is_paused = item_id in paused_ids
+                install_marker_path = os.path.join(item_dir, ".installed") # English Hardcode
+                is_installed = os.path.exists(install_marker_path)
+                module_data = {
+                    "manifest": manifest,
+                    "path": item_dir,
+                    "installed_as": "module",
+                    "is_paused": is_paused,
+                    "permissions": manifest.get("permissions", []),
+                    "tier": manifest.get("tier", "free").lower(),
+                    "is_installed": is_installed, # (KODE DARI CHAT SEBELUMNYA)
+                }
+                self.loaded_modules[item_id] = module_data
+            except Exception as e:
+                self.logger.warning(
+                    f"   ! Failed to process manifest for module '{item_id}': {e}"
+                )
+        component_index.save()
 
         self.logger.warning(
             f"<<< MATA-MATA (1/4) >>> ModuleManagerService: Discovery complete. Final 'loaded_modules' contains {len(self.loaded_modules)} items: {list(self.loaded_modules.keys())}"
@@ -116,9 +119,29 @@ class ModuleManagerService(BaseService):
                     return os.path.join(lib_path, py_dirs[0], "site-packages") # English Hardcode
         return None
 
-    def get_instance(self, module_id):
-        if module_id in self.instance_cache:
-            return self.instance_cache[module_id]
+    def get_concurrency_contract(self, module_id):
+        manifest = self.get_manifest(module_id)
+        if manifest is None:
+            return None
+        try:
+            return ConcurrencyContract.from_manifest(manifest)
+        except (TypeError, ValueError) as e:
+            self.logger.warning(f"Invalid concurrency contract for '{module_id}', using 'shared': {e}") # English Hardcode
+            return ConcurrencyContract()
+
+    def get_concurrency_limits(self):
+        """{module_id: max_concurrency} for every module that declares a limit (see ModuleConcurrencyGate)."""
+        limits = {}
+        for module_id in list(self.loaded_modules):
+            contract = self.get_concurrency_contract(module_id)
+            if contract and contract.max_concurrency:
+                limits[module_id] = contract.max_concurrency
+        return limits
+
+    def _get_pool(self, module_id):
+        pool = self.instance_pools.get(module_id)
+        if pool is not None:
+            return pool
         if module_id not in self.loaded_modules:
             self.logger.error(
                 f"Attempted to get instance for unknown module_id: {module_id}"
@@ -134,8 +157,82 @@ class ModuleManagerService(BaseService):
             self.logger.error(f"Attempted to get instance for non-installed module: {module_id}") # English Hardcode
             return None
 
+        with self._pools_lock:
+            pool = self.instance_pools.get(module_id)
+            if pool is None:
+                contract = self.get_concurrency_contract(module_id)
+                pool = ModuleInstancePool(module_id, contract, lambda: self._create_instance(module_id))
+                self.instance_pools[module_id] = pool
+        return pool
+
+    def _close_pools(self, module_id=None):
+        with self._pools_lock:
+            if module_id is None:
+                pools = list(self.instance_pools.values())
+                self.instance_pools.clear()
+            else:
+                pool = self.instance_pools.pop(module_id, None)
+                pools = [pool] if pool else []
+        for pool in pools:
+            pool.close()
+
+    def get_instance(self, module_id):
+        """
+        The module's primary instance, for callers that do not lease one per job (prewarm, UI, kernel).
+        Job execution should use lease_instance() so the manifest concurrency contract is respected.
+        """
+        if module_id in self.instance_cache:
+            return self.instance_cache[module_id]
+        pool = self._get_pool(module_id)
+        if pool is None:
+            return None
+        module_instance = pool.primary()
+        if module_instance is not None and pool.contract.mode != CONCURRENCY_PER_THREAD:
+            self.instance_cache[module_id] = module_instance
+            self.loaded_modules[module_id]["instance"] = module_instance
+        return module_instance
+
+    @contextmanager
+    def lease_instance(self, module_id, timeout=POOL_ACQUIRE_TIMEOUT_SECONDS):
+        """
+        Yields an instance reserved for one job (None if the module cannot be loaded): the shared
+        one, the calling thread's own one, or an idle pooled one. Blocks while the module is at its
+        max_concurrency inside this process and raises TimeoutError when no slot frees up in time.
+        """
+        pool = self._get_pool(module_id)
+        if pool is None:
+            yield None
+            return
+        with pool.lease(timeout) as module_instance:
+            yield module_instance
+
+    def warm_up_pools(self):
+        """Builds (and on_load()s) every instance of the installed, active 'pooled' modules up front."""
+        warmed = 0
+        for module_id, module_data in list(self.loaded_modules.items()):
+            if module_data.get("is_paused", False) or not module_data.get("is_installed", False):
+                continue
+            contract = self.get_concurrency_contract(module_id)
+            if contract is None or contract.mode != CONCURRENCY_POOLED:
+                continue
+            pool = self._get_pool(module_id)
+            built = pool.warm_up() if pool else 0
+            if built:
+                warmed += built
+                self.logger.info(f"Warmed up {built} pooled instance(s) of '{module_id}'.") # English Hardcode
+        return warmed
+
+    def get_pool_metrics(self):
+        return {module_id: pool.get_metrics() for module_id, pool in list(self.instance_pools.items())}
+
+    def _create_instance(self, module_id):
+        """Loads the module's entry point and builds one on_load()ed instance. Returns None on failure."""
+        module_data = self.loaded_modules.get(module_id)
+        if module_data is None:
+            return None
+
         self.logger.debug(
-            f"Just-In-Time Load: Instantiating '{module_id}' for the first time."
+            f"Just-In-Time Load: Instantiating '{module_id}'."
         )
 
         vendor_path = os.path.join(module_data["path"], "vendor")
@@ -226,8 +323,6 @@ class ModuleManagerService(BaseService):
             if hasattr(module_instance, "on_load"):
                 module_instance.on_load()
 
-            self.instance_cache[module_id] = module_instance
-            self.loaded_modules[module_id]["instance"] = module_instance
             return module_instance
 
         except PermissionDeniedError as e:
@@ -294,13 +389,18 @@ class ModuleManagerService(BaseService):
 
     def set_module_paused(self, module_id, is_paused):
         if module_id in self.loaded_modules:
-            instance = self.instance_cache.get(module_id)
-            if is_paused and instance:
-                if hasattr(instance, "on_unload"):
-                    instance.on_unload()
-                del self.instance_cache[module_id]
+            if is_paused:
+                self.instance_cache.pop(module_id, None)
+                self.loaded_modules[module_id].pop("instance", None)
+                self._close_pools(module_id) # (English Hardcode) Calls on_unload on every instance it built
             self.loaded_modules[module_id]["is_paused"] = is_paused
             self._save_paused_status()
+            event_bus = self.kernel.get_service("event_bus")
+            if event_bus:
+                event_bus.publish(
+                    "COMPONENT_LIST_CHANGED",
+                    {"type": "module", "id": module_id, "paused": is_paused},
+                )
             return True
         return False
 
@@ -505,6 +605,7 @@ class ModuleManagerService(BaseService):
             del self.loaded_modules[component_id]
             if component_id in self.instance_cache:
                 del self.instance_cache[component_id]
+            self._close_pools(component_id)
             self.logger.info(
                 f"Component '{component_id}' folder deleted successfully."
             )
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\plugin_manager_service\plugin_manager_service.py total lines 442 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\plugin_manager_service\plugin_manager_service.py total lines 445 
 ########################################################################
 
 import os
@@ -16,6 +16,7 @@ import tempfile
 import shutil
 import hashlib
 from flowork_kernel.exceptions import PermissionDeniedError
+from flowork_kernel.utils.component_index import get_component_index
 import threading
 import shutil
 
@@ -59,6 +60,7 @@ class PluginManagerService(BaseService):
         self.instance_cache.clear()
         paused_ids = self._load_paused_status()
 
+        component_index = get_component_index(self.kernel.data_path)
         paths_to_scan = [self.plugins_dir, self.system_plugins_dir]
         for base_path in paths_to_scan:
             if not os.path.exists(base_path):
@@ -68,39 +70,34 @@ class PluginManagerService(BaseService):
                 f"PluginManager: Scanning for plugins in '{base_path}'"
             )  # English Log
 
-            for item_id in os.listdir(base_path):
+            for item_id, item_dir, manifest, manifest_error in component_index.scan(base_path):
                 if item_id in self.kernel.globally_disabled_components:
                     self.logger.warning(f"Skipping globally disabled plugin: {item_id}")
                     continue
 
-                item_dir = os.path.join(base_path, item_id)
-                if os.path.isdir(item_dir) and item_id != "__pycache__":
-                    manifest_path = os.path.join(item_dir, "manifest.json")
-                    if not os.path.exists(manifest_path):
-                        continue
-
-                    try:
-                        with open(manifest_path, "r", encoding="utf-8") as f:
-                            manifest = json.load(f)
-
-                        is_paused = item_id in paused_ids
-                        install_marker_path = os.path.join(item_dir, ".installed") # English Hardcode
-                        is_installed = os.path.exists(install_marker_path)
-
-                        module_data = {
-                            "manifest": manifest,
-                            "path": item_dir,
-                            "installed_as": "plugin",
-                            "is_paused": is_paused,
-                            "permissions": manifest.get("permissions", []),
-                            "tier": manifest.get("tier", "free").lower(),
-                            "is_installed": is_installed, # (KODE DARI CHAT SEBELUMNYA)
-                        }
-                        self.loaded_plugins[item_id] = module_data
-                    except Exception as e:
-                        self.logger.warning(
-                            f"   ! Failed to process manifest for plugin '{item_id}': {e}"
-                        )  # English Log
+                try:
+                    if manifest_error:
+                        raise manifest_error
+
+                    is_paused = item_id in paused_ids
+                    install_marker_path = os.path.join(item_dir, ".installed") # English Hardcode
+                    is_installed = os.path.exists(install_marker_path)
+
+                    module_data = {
+                        "manifest": manifest,
+                        "path": item_dir,
+                        "installed_as": "plugin",
+                        "is_paused": is_paused,
+                        "permissions": manifest.get("permissions", []),
+                        "tier": manifest.get("tier", "free").lower(),
+                        "is_installed": is_installed, # (KODE DARI CHAT SEBELUMNYA)
+                    }
+                    self.loaded_plugins[item_id] = module_data
+                except Exception as e:
+                    self.logger.warning(
+                        f"   ! Failed to process manifest for plugin '{item_id}': {e}"
+                    )  # English Log
+        component_index.save()
 
         self.logger.info(
             f"PluginManager: Discovery complete. Found {len(self.loaded_plugins)} plugins."
@@ -331,6 +328,12 @@ class PluginManagerService(BaseService):
                 del self.instance_cache[plugin_id]
             self.loaded_plugins[plugin_id]["is_paused"] = is_paused
             self._save_paused_status()
+            event_bus = self.kernel.get_service("event_bus")
+            if event_bus:
+                event_bus.publish(
+                    "COMPONENT_LIST_CHANGED",
+                    {"type": "plugin", "id": plugin_id, "paused": is_paused},
+                )
             return True
         return False
 
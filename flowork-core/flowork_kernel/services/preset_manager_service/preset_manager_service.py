@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\preset_manager_service\preset_manager_service.py total lines 322 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\preset_manager_service\preset_manager_service.py total lines 444 
 ########################################################################
 
 import os
@@ -8,22 +8,46 @@ import json
 import shutil
 import datetime
 import threading
+import time
+from collections import OrderedDict
 from ..base_service import BaseService
 from flowork_kernel.exceptions import PresetNotFoundError
-from flowork_kernel.utils.flowchain_verifier import verify_workflow_chain, calculate_hash
+from flowork_kernel.utils.flowchain_verifier import verify_workflow_chain, calculate_hash, invalidate_chain_cache
 from flowork_kernel.services.database_service.database_service import DatabaseService
 from flowork_kernel.singleton import Singleton
+from flowork_kernel.workers.graph_cache import GRAPH_EPOCH_SINGLETON_KEY, bump_graph_epoch
 import logging
+PRESET_CACHE_MAX_BYTES = int(os.getenv("CORE_PRESET_CACHE_MAX_BYTES", str(64 * 1024 * 1024))) # (English Hardcode) Parsed workflow_data kept in memory, by version file size
+def _copy_json(value):
+    """Fresh dict/list tree for a cached JSON document (cheaper than json.loads or deepcopy)."""
+    if isinstance(value, dict):
+        return {k: _copy_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(v) for v in value]
+    return value
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
 class PresetManagerService(BaseService):
     """
     (REMASTERED - FASE 5) Manages hybrid storage:
     1. Saves versioned, signed history to JSON files (Flow-Chain).
     2. Populates the latest version into the SQL database for the DAG JobWorker.
+    Parsed latest versions are kept in a byte-capped LRU keyed by workflow folder and checked
+    against the latest version file's (path, size, mtime); folder listings are re-read only when
+    the folder mtime changes. save/delete drop the entries right away, out-of-band edits are
+    caught by the mtime checks. Callers always get their own copy of the cached data.
     """
     def __init__(self, kernel, service_id: str):
         super().__init__(kernel, service_id)
         self.users_data_path = os.path.join(self.kernel.data_path, "users")
         self._save_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._preset_data_cache = OrderedDict() # (English Hardcode) workflow_path -> ((file, size, mtime_ns), workflow_data, size)
+        self._preset_data_cache_bytes = 0
+        self._listing_cache = {} # (English Hardcode) (kind, directory) -> (dir mtime_ns, result)
         self.state_manager = self.kernel.get_service("state_manager_service")
         self.trigger_manager = None
         self.db_service = None # Akan di-inject di start()
@@ -68,10 +92,35 @@ class PresetManagerService(BaseService):
         workflow_path = os.path.join(base_presets_dir, name)
         os.makedirs(workflow_path, exist_ok=True)
         return workflow_path
+    def _cached_listing(self, kind: str, directory: str, build):
+        """build() result for a directory, reused while the directory's mtime is unchanged."""
+        mtime_ns = _mtime_ns(directory)
+        if mtime_ns is None:
+            return None
+        key = (kind, directory)
+        with self._cache_lock:
+            cached = self._listing_cache.get(key)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+        result = build()
+        with self._cache_lock:
+            self._listing_cache[key] = (mtime_ns, result)
+        return result
+    def _invalidate_preset_cache(self, workflow_path: str):
+        with self._cache_lock:
+            entry = self._preset_data_cache.pop(workflow_path, None)
+            if entry:
+                self._preset_data_cache_bytes -= entry[2]
+            for directory in (workflow_path, os.path.dirname(workflow_path)):
+                for kind in ("latest", "versions", "presets"): # English Hardcode
+                    self._listing_cache.pop((kind, directory), None)
     def _get_latest_version_file(self, workflow_path: str):
         """
         Finds the latest (highest version number) .json file in a workflow directory.
         """
+        result = self._cached_listing("latest", workflow_path, lambda: self._find_latest_version_file(workflow_path)) # English Hardcode
+        return result if result is not None else (None, 0)
+    def _find_latest_version_file(self, workflow_path: str):
         if not os.path.isdir(workflow_path):
             return None, 0
         files = [f for f in os.listdir(workflow_path) if f.endswith('.json') and f.startswith('v')]
@@ -85,6 +134,15 @@ class PresetManagerService(BaseService):
         latest_file = max(files, key=get_version_num)
         latest_version_num = get_version_num(latest_file)
         return os.path.join(workflow_path, latest_file), latest_version_num
+    def _invalidate_worker_graph_caches(self):
+        """
+        Bumps the shared graph epoch so every worker re-validates its compiled workflow graphs
+        against the `graph_version` stamps (must be called AFTER the SQL commit).
+        """
+        try:
+            bump_graph_epoch(Singleton.get_instance(GRAPH_EPOCH_SINGLETON_KEY))
+        except Exception as e:
+            self.logger.warning(f"Could not bump workflow graph epoch, workers will re-validate lazily: {e}") # English Hardcode
     def _sync_trigger_rules_for_preset(
         self,
         preset_name: str,
@@ -132,6 +190,9 @@ class PresetManagerService(BaseService):
         self.trigger_manager.start_all_listeners()
     def get_preset_list(self, user_id: str):
         presets_dir = self._get_user_presets_path(user_id)
+        preset_list = self._cached_listing("presets", presets_dir, lambda: self._list_presets(presets_dir, user_id)) # English Hardcode
+        return [dict(item) for item in preset_list or []]
+    def _list_presets(self, presets_dir: str, user_id: str):
         try:
             preset_folders = [d for d in os.listdir(presets_dir) if os.path.isdir(os.path.join(presets_dir, d)) and not d == "_versions"]
             return [{"name": name} for name in sorted(preset_folders)]
@@ -140,6 +201,11 @@ class PresetManagerService(BaseService):
         except Exception as e:
             self.logger.error(f"Could not get preset list for user '{user_id}': {e}") # English Hardcode
             return []
+    def get_preset_count(self, user_id: str) -> int:
+        """Same number as len(get_preset_list()), re-listed only when the presets folder changed."""
+        presets_dir = self._get_user_presets_path(user_id)
+        preset_list = self._cached_listing("presets", presets_dir, lambda: self._list_presets(presets_dir, user_id)) # English Hardcode
+        return len(preset_list or [])
     def get_preset_data(self, name: str, user_id: str):
         workflow_path = self._get_preset_workflow_path(user_id, name)
         is_valid, message = verify_workflow_chain(workflow_path)
@@ -151,14 +217,36 @@ class PresetManagerService(BaseService):
             self.logger.warning(f"No version files found for preset '{name}', but folder exists.") # English Hardcode
             return None # Return empty/none if no versions exist
         try:
+            stat_result = os.stat(latest_file_path)
+            fingerprint = (latest_file_path, stat_result.st_size, stat_result.st_mtime_ns)
+            with self._cache_lock:
+                entry = self._preset_data_cache.get(workflow_path)
+                if entry and entry[0] == fingerprint:
+                    self._preset_data_cache.move_to_end(workflow_path)
+            if entry and entry[0] == fingerprint:
+                return _copy_json(entry[1]) # (English Hardcode) Cached trees are never mutated, copying outside the lock is safe
             with open(latest_file_path, "r", encoding="utf-8") as f:
                 chain_data = json.load(f)
-                return chain_data.get("workflow_data") # Return only the workflow part
+            workflow_data = chain_data.get("workflow_data") # Return only the workflow part
+            self._cache_preset_data(workflow_path, fingerprint, workflow_data, stat_result.st_size)
+            return _copy_json(workflow_data)
         except (IOError, json.JSONDecodeError) as e:
             self.logger.error(
                 f"Could not read or parse latest preset file '{latest_file_path}': {e}" # English Hardcode
             )
             return None
+    def _cache_preset_data(self, workflow_path, fingerprint, workflow_data, size):
+        if size > PRESET_CACHE_MAX_BYTES:
+            return
+        with self._cache_lock:
+            previous = self._preset_data_cache.pop(workflow_path, None)
+            if previous:
+                self._preset_data_cache_bytes -= previous[2]
+            self._preset_data_cache[workflow_path] = (fingerprint, workflow_data, size)
+            self._preset_data_cache_bytes += size
+            while self._preset_data_cache_bytes > PRESET_CACHE_MAX_BYTES:
+                _, evicted = self._preset_data_cache.popitem(last=False)
+                self._preset_data_cache_bytes -= evicted[2]
     def save_preset(self, name: str, workflow_data: dict, user_id: str, signature: str) -> bool:
         if not name.strip() or not user_id:
             return False
@@ -184,19 +272,23 @@ class PresetManagerService(BaseService):
                 new_file_path = os.path.join(workflow_path, new_filename)
                 with open(new_file_path, "w", encoding="utf-8") as f:
                     json.dump(new_chain_data, f, indent=4)
+                self._invalidate_preset_cache(workflow_path)
                 self.logger.info(f"Flow-Chain: Saved version {new_version} for preset '{name}'.") # English Hardcode
                 if not self.db_service:
                     raise Exception("DatabaseService is not available.") # English Hardcode
-                conn = self.db_service.create_connection()
+                conn = self.db_service.acquire_connection()
                 if not conn:
                      raise Exception("Failed to create DB connection for SQL population.") # English Hardcode
                 try:
                     cursor = conn.cursor()
                     self.logger.info(f"SQL POPULATOR: Refreshing SQL tables for workflow_id: {workflow_id_sql}") # English Hardcode
-                    cursor.execute("DELETE FROM Nodes WHERE workflow_id = ?", (workflow_id_sql,))
                     cursor.execute("DELETE FROM Edges WHERE workflow_id = ?", (workflow_id_sql,))
+                    cursor.execute("DELETE FROM Nodes WHERE workflow_id = ?", (workflow_id_sql,))
                     cursor.execute("DELETE FROM Workflows WHERE workflow_id = ?", (workflow_id_sql,))
-                    cursor.execute("INSERT INTO Workflows (workflow_id, name) VALUES (?, ?)", (workflow_id_sql, name))
+                    cursor.execute(
+                        "INSERT INTO Workflows (workflow_id, name, graph_version) VALUES (?, ?, ?)",
+                        (workflow_id_sql, name, time.time_ns()) # (English Hardcode) Version stamp checked by the workers' graph cache
+                    )
                     nodes_to_insert = []
                     for node in workflow_data.get("nodes", []):
                         nodes_to_insert.append((
@@ -216,12 +308,13 @@ class PresetManagerService(BaseService):
                     cursor.executemany("INSERT INTO Edges (workflow_id, source_node_id, target_node_id) VALUES (?, ?, ?)", edges_to_insert)
                     conn.commit()
                     self.logger.info(f"SQL POPULATOR: Successfully synced {len(nodes_to_insert)} nodes and {len(edges_to_insert)} edges.") # English Hardcode
+                    self._invalidate_worker_graph_caches()
                 except Exception as sql_e:
                     conn.rollback()
                     self.logger.critical(f"SQL POPULATOR: FAILED. Rolling back changes. Error: {sql_e}") # English Hardcode
                     raise sql_e # Lempar ulang error
                 finally:
-                    conn.close()
+                    self.db_service.release_connection(conn)
                 self._sync_trigger_rules_for_preset(
                     name, workflow_data, user_id=user_id
                 )
@@ -236,28 +329,31 @@ class PresetManagerService(BaseService):
             with self._save_lock:
                 if os.path.isdir(workflow_path):
                     shutil.rmtree(workflow_path)
+                    invalidate_chain_cache(workflow_path)
                     self.logger.info(f"Flow-Chain: Deleted preset folder '{name}'.") # English Hardcode
                 else:
                     self.logger.warning(f"Flow-Chain: Preset folder '{name}' not found, skipping delete.") # English Hardcode
+                self._invalidate_preset_cache(workflow_path)
                 if not self.db_service:
                     raise Exception("DatabaseService is not available.") # English Hardcode
-                conn = self.db_service.create_connection()
+                conn = self.db_service.acquire_connection()
                 if not conn:
                      raise Exception("Failed to create DB connection for SQL cleanup.") # English Hardcode
                 try:
                     cursor = conn.cursor()
                     self.logger.info(f"SQL CLEANUP: Deleting records for workflow_id: {workflow_id_sql}") # English Hardcode
-                    cursor.execute("DELETE FROM Nodes WHERE workflow_id = ?", (workflow_id_sql,))
                     cursor.execute("DELETE FROM Edges WHERE workflow_id = ?", (workflow_id_sql,))
+                    cursor.execute("DELETE FROM Nodes WHERE workflow_id = ?", (workflow_id_sql,))
                     cursor.execute("DELETE FROM Workflows WHERE workflow_id = ?", (workflow_id_sql,))
                     conn.commit()
                     self.logger.info(f"SQL CLEANUP: Successfully deleted workflow records.") # English Hardcode
+                    self._invalidate_worker_graph_caches()
                 except Exception as sql_e:
                     conn.rollback()
                     self.logger.critical(f"SQL CLEANUP: FAILED. Rolling back changes. Error: {sql_e}") # English Hardcode
                     raise sql_e # Lempar ulang error
                 finally:
-                    conn.close()
+                    self.db_service.release_connection(conn)
                 self._sync_trigger_rules_for_preset(
                     name, None, user_id=user_id, is_delete=True
                 )
@@ -267,6 +363,9 @@ class PresetManagerService(BaseService):
             return False
     def get_preset_versions(self, name: str, user_id: str) -> list:
         workflow_path = self._get_preset_workflow_path(user_id, name)
+        versions = self._cached_listing("versions", workflow_path, lambda: self._list_preset_versions(workflow_path)) # English Hardcode
+        return [dict(version) for version in versions or []]
+    def _list_preset_versions(self, workflow_path: str) -> list:
         if not os.path.isdir(workflow_path):
             return []
         files = [f for f in os.listdir(workflow_path) if f.endswith('.json') and f.startswith('v')]
@@ -296,6 +395,29 @@ class PresetManagerService(BaseService):
             except Exception:
                 continue # Skip files with incorrect name format
         return versions
+    def audit_preset_chains(self, user_id: str = None) -> dict:
+        """
+        Full Flow-Chain re-audit for the integrity scanner: every version file of every preset (of
+        one user, or of all users) is re-hashed and its signature re-checked, ignoring the
+        verification cache. Returns {workflow_path: message} for the chains that failed.
+        """
+        if user_id is not None:
+            user_ids = [user_id]
+        else:
+            try:
+                user_ids = [d for d in os.listdir(self.users_data_path) if os.path.isdir(os.path.join(self.users_data_path, d, "presets"))]
+            except FileNotFoundError:
+                user_ids = []
+        failures = {}
+        for audit_user_id in user_ids:
+            for preset in self.get_preset_list(audit_user_id):
+                workflow_path = os.path.join(self._get_user_presets_path(audit_user_id), preset["name"])
+                is_valid, message = verify_workflow_chain(workflow_path, full_audit=True)
+                if not is_valid:
+                    failures[workflow_path] = message
+                    self.logger.error(f"CRITICAL: Flow-Chain audit failed for preset '{preset['name']}' of '{audit_user_id}'. {message}") # English Hardcode
+        self.logger.info(f"Flow-Chain audit finished: {len(failures)} broken chain(s).") # English Hardcode
+        return failures
     def load_preset_version(self, name: str, version_filename: str, user_id: str):
         workflow_path = self._get_preset_workflow_path(user_id, name)
         version_path = os.path.join(workflow_path, version_filename)
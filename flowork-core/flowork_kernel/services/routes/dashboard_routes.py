@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\routes\dashboard_routes.py total lines 75 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\routes\dashboard_routes.py total lines 62 
 ########################################################################
 
 import os
@@ -20,20 +20,7 @@ class DashboardRoutes(BaseApiRoute):
         """
         Gathers and returns a summary of system activity for the dashboard.
         """
-        active_jobs = []
-        if self.service_instance.job_statuses:
-            with self.service_instance.job_statuses_lock:
-                for job_id, job_data in self.service_instance.job_statuses.items():
-                    if job_data.get("status") == "RUNNING":
-                        start_time = job_data.get("start_time", 0)
-                        duration = time.time() - start_time
-                        active_jobs.append(
-                            {
-                                "id": job_id,
-                                "preset": job_data.get("preset_name", "N/A"),
-                                "duration_seconds": round(duration, 2),
-                            }
-                        )
+        active_jobs = self.service_instance.job_status_store.active_jobs()
         recent_events = list(self.service_instance.recent_events)
         execution_stats = {"success": 0, "failed": 0}
         preset_counter = Counter()
@@ -1,13 +1,14 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\scheduler_manager_service\scheduler_manager_service.py total lines 85 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\scheduler_manager_service\scheduler_manager_service.py total lines 100 
 ########################################################################
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.jobstores.base import JobLookupError
-from datetime import datetime
+from datetime import datetime, timedelta
 from ..base_service import BaseService
+from flowork_kernel.exceptions import ExecutionRejectedError
 class SchedulerManagerService(BaseService):
     """
     Manages all scheduling tasks (Cron Jobs) for Flowork.
@@ -47,8 +48,22 @@ class SchedulerManagerService(BaseService):
             return
         def job_wrapper():
             self.kernel.write_to_log(f"Executing scheduled job '{rule_id}' for preset '{preset_name}'.", "INFO") # English Log
-            api_service.trigger_workflow_by_api(preset_name, initial_payload={"triggered_by": "scheduler", "rule_id": rule_id})
-            self.kernel.write_to_log(f"Job '{rule_id}' finished. It will run again on its next schedule.", "INFO") # English Log
+            try:
+                api_service.submit_workflow(
+                    preset_name, initial_payload={"triggered_by": "scheduler", "rule_id": rule_id}, source="cron" # English Hardcode
+                )
+            except ExecutionRejectedError as e:
+                retry_at = datetime.now() + timedelta(seconds=e.retry_after)
+                self.scheduler.add_job(
+                    job_wrapper,
+                    trigger="date", # English Hardcode
+                    run_date=retry_at,
+                    id=f"{rule_id}__deferred", # (English Hardcode) At most one deferred run per rule, however often the cron fires
+                    replace_existing=True,
+                )
+                self.kernel.write_to_log(f"Scheduled job '{rule_id}' deferred until {retry_at:%H:%M:%S}: {e}", "WARN") # English Log
+                return
+            self.kernel.write_to_log(f"Job '{rule_id}' queued. It will run again on its next schedule.", "INFO") # English Log
         try:
             self.scheduler.add_job(
                 job_wrapper, # (MODIFIED) We schedule our new wrapper function.
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\startup_service\startup_service.py total lines 161 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\startup_service\startup_service.py total lines 162 
 ########################################################################
 
 from ..base_service import BaseService
@@ -52,6 +52,7 @@ class StartupService(BaseService):
                 "localization_manager": lambda s: s.load_all_languages(),
                 "scheduler_manager_service": lambda s: s.start(),
                 "gateway_connector_service": None,
+                "job_retention_service": None,
             }
             for service_id, start_action in essential_services_to_start.items():
                 try:
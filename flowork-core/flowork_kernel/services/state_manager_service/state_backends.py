@@ -0,0 +1,118 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\state_manager_service\state_backends.py total lines 119 
+########################################################################
+
+import os
+import json
+import sqlite3
+import tempfile
+import threading
+STATE_DELETED = object() # (English Hardcode) Marker in a dirty batch: the key was deleted
+class JsonFileStateBackend:
+    """
+    Original on-disk format: one state.json for the global scope and one per user.
+    A flush rewrites each DIRTY scope once (however many keys changed since the last flush),
+    via temp file + rename (plus fsync on durable flushes), so a crash never leaves a truncated
+    state.json behind.
+    """
+    name = "json" # English Hardcode
+    needs_snapshot = True
+    def __init__(self, global_path: str, user_path_func):
+        self.global_path = global_path
+        self.user_path_func = user_path_func
+    def _path(self, scope):
+        return self.global_path if scope is None else self.user_path_func(scope)
+    def load(self, scope) -> dict:
+        path = self._path(scope)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    def write(self, scope, changes: dict, snapshot: dict, durable: bool):
+        path = self._path(scope)
+        directory = os.path.dirname(path)
+        fd, temp_path = tempfile.mkstemp(prefix=".state-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, indent=4)
+                if durable:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+    def reopen_after_fork(self):
+        pass
+    def close(self):
+        pass
+class SQLiteStateBackend:
+    """
+    One row per (scope, key) in data/state.db, so a flush costs O(changed keys) instead of
+    O(state size). Existing state.json files are imported the first time a scope is loaded.
+    """
+    name = "sqlite" # English Hardcode
+    needs_snapshot = False
+    GLOBAL_SCOPE = "" # (English Hardcode) user_id values are never empty
+    def __init__(self, db_path: str, legacy_backend: JsonFileStateBackend = None):
+        self.db_path = db_path
+        self.legacy_backend = legacy_backend
+        self._inherited_conns = []
+        self._conn = self._connect()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS State (scope TEXT NOT NULL, key TEXT NOT NULL, value TEXT, PRIMARY KEY (scope, key))"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS StateScopes (scope TEXT PRIMARY KEY)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10.0, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA synchronous=FULL;") # (English Hardcode) Every flush is one batched, fsynced commit
+        return conn
+    def reopen_after_fork(self):
+        """
+        (Child process) SQLite connections must not be used across fork(). The parent's handle is
+        kept referenced but never touched (closing it here could disturb the parent's locks).
+        """
+        self._inherited_conns.append(self._conn)
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+    def _scope_key(self, scope):
+        return self.GLOBAL_SCOPE if scope is None else scope
+    def load(self, scope) -> dict:
+        scope_key = self._scope_key(scope)
+        with self._lock:
+            known = self._conn.execute("SELECT 1 FROM StateScopes WHERE scope = ?", (scope_key,)).fetchone()
+            if not known and self.legacy_backend:
+                try:
+                    legacy_state = self.legacy_backend.load(scope)
+                except (IOError, ValueError):
+                    legacy_state = {}
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO State (scope, key, value) VALUES (?, ?, ?)",
+                        [(scope_key, key, json.dumps(value)) for key, value in legacy_state.items()]
+                    )
+                    self._conn.execute("INSERT OR IGNORE INTO StateScopes (scope) VALUES (?)", (scope_key,))
+                return legacy_state
+            rows = self._conn.execute("SELECT key, value FROM State WHERE scope = ?", (scope_key,)).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+    def write(self, scope, changes: dict, snapshot: dict, durable: bool):
+        scope_key = self._scope_key(scope)
+        upserts = [(scope_key, key, json.dumps(value)) for key, value in changes.items() if value is not STATE_DELETED]
+        deletes = [(scope_key, key) for key, value in changes.items() if value is STATE_DELETED]
+        with self._lock:
+            with self._conn:
+                self._conn.execute("INSERT OR IGNORE INTO StateScopes (scope) VALUES (?)", (scope_key,))
+                if upserts:
+                    self._conn.executemany("INSERT OR REPLACE INTO State (scope, key, value) VALUES (?, ?, ?)", upserts)
+                if deletes:
+                    self._conn.executemany("DELETE FROM State WHERE scope = ? AND key = ?", deletes)
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\state_manager_service\state_manager_service.py total lines 141 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\state_manager_service\state_manager_service.py total lines 186 
 ########################################################################
 
 import os
@@ -8,13 +8,24 @@ import json
 import threading
 from collections import OrderedDict
 from ..base_service import BaseService
+from .state_backends import JsonFileStateBackend, SQLiteStateBackend, STATE_DELETED
+STATE_BACKEND = os.getenv("CORE_STATE_BACKEND", "json").lower() # (English Hardcode) "json" (state.json files) or "sqlite" (data/state.db)
+STATE_FLUSH_INTERVAL_SECONDS = float(os.getenv("CORE_STATE_FLUSH_INTERVAL", "1.0"))
+STATE_FLUSH_MAX_DIRTY_KEYS = int(os.getenv("CORE_STATE_FLUSH_MAX_DIRTY", "256")) # (English Hardcode) Flush early once this many keys are pending
 class StateManagerService(BaseService):
     """
     Manages persistent state data for the entire application in a thread-safe manner.
     (REMASTERED V2 FOR MULTI-TENANCY) Now handles both global state and user-specific state.
+    (Write-behind) set/delete only update the in-memory cache and mark the key dirty. A background
+    flusher writes all dirty keys of a scope in one go every STATE_FLUSH_INTERVAL_SECONDS (or as
+    soon as STATE_FLUSH_MAX_DIRTY_KEYS are pending), outside the state lock. Call flush() when a
+    value must be on disk before continuing (checkpoints); stop() flushes on shutdown.
+    A forked job worker gets fresh locks, its own flusher and its own backend connection; the
+    parent's pending changes stay with the parent, which flushes them.
     """
     GLOBAL_STATE_FILENAME = "state.json"
     USER_STATE_FILENAME = "state.json"
+    STATE_DB_FILENAME = "state.db"
     MAX_USER_CACHE_SIZE = 100
     def __init__(self, kernel, service_id: str):
         super().__init__(kernel, service_id)
@@ -26,115 +37,149 @@ class StateManagerService(BaseService):
         self._global_state_cache = {}
         self._user_state_cache = OrderedDict()
         self._lock = threading.Lock()
+        self._io_lock = threading.Lock() # (English Hardcode) Serializes flushes, never held together with _lock while writing
+        self._dirty = {} # (English Hardcode) scope (None = global, else user_id) -> {key: value or STATE_DELETED}
+        self._dirty_count = 0
+        self._flush_wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._flusher_thread = None
+        json_backend = JsonFileStateBackend(self.global_state_file_path, self._get_user_state_path)
+        if STATE_BACKEND == "sqlite": # English Hardcode
+            self._backend = SQLiteStateBackend(
+                os.path.join(self.kernel.data_path, self.STATE_DB_FILENAME), legacy_backend=json_backend
+            )
+        else:
+            self._backend = json_backend
         self.kernel.write_to_log(
-            "Service 'StateManager' (Hybrid Multi-Tenant) initialized.", "DEBUG"
+            f"Service 'StateManager' (Hybrid Multi-Tenant, write-behind, backend={self._backend.name}) initialized.", "DEBUG"
         )
         self._load_global_state()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reinit_after_fork)
+    def _reinit_after_fork(self):
+        """(Child process, right after fork) Locks, thread and connection of the parent are unusable here."""
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._dirty = {}
+        self._dirty_count = 0
+        self._flush_wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._flusher_thread = None
+        self._backend.reopen_after_fork()
     def _load_global_state(self):
         try:
-            if os.path.exists(self.global_state_file_path):
-                with open(self.global_state_file_path, "r", encoding="utf-8") as f:
-                    self._global_state_cache = json.load(f)
+            self._global_state_cache = self._backend.load(None)
+            if self._global_state_cache:
                 self.kernel.write_to_log(
                     f"StateManager: Global state loaded successfully.", "INFO"
                 )
-            else:
-                self._global_state_cache = {}
         except (IOError, json.JSONDecodeError) as e:
             self.kernel.write_to_log(
                 f"StateManager: Failed to load global state: {e}. Using empty state.",
                 "ERROR",
             )
             self._global_state_cache = {}
-    def _save_global_state(self):
-        try:
-            with open(self.global_state_file_path, "w", encoding="utf-8") as f:
-                json.dump(self._global_state_cache, f, indent=4)
-        except IOError as e:
-            self.kernel.write_to_log(
-                f"StateManager: FAILED to save global state. Error: {e}", "ERROR"
-            )
     def _get_user_state_path(self, user_id: str):
         user_dir = os.path.join(self.users_data_path, user_id)
         os.makedirs(user_dir, exist_ok=True)
         return os.path.join(user_dir, self.USER_STATE_FILENAME)
     def _load_user_state_from_file(self, user_id: str):
-        state_file_path = self._get_user_state_path(user_id)
         try:
-            if os.path.exists(state_file_path):
-                with open(state_file_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            return {}
+            return self._backend.load(user_id)
         except (IOError, json.JSONDecodeError):
             return {}
-    def _save_user_state_to_file(self, user_id: str, state_data: dict):
-        state_file_path = self._get_user_state_path(user_id)
-        try:
-            with open(state_file_path, "w", encoding="utf-8") as f:
-                json.dump(state_data, f, indent=4)
-        except IOError as e:
-            self.kernel.write_to_log(
-                f"StateManager: FAILED to save state for user '{user_id}'. Error: {e}",
-                "ERROR",
-            )
+    def _get_user_cache(self, user_id: str):
+        """(Under _lock) Returns the cached state dict of a user, loading it on first access."""
+        if user_id not in self._user_state_cache:
+            self._user_state_cache[user_id] = self._load_user_state_from_file(user_id)
+            if len(self._user_state_cache) > self.MAX_USER_CACHE_SIZE:
+                for cached_user_id in list(self._user_state_cache.keys()):
+                    if cached_user_id != user_id and cached_user_id not in self._dirty:
+                        del self._user_state_cache[cached_user_id] # (English Hardcode) Oldest CLEAN entry, dirty ones wait for their flush
+                        break
+        self._user_state_cache.move_to_end(user_id)  # Tandai sebagai baru diakses
+        return self._user_state_cache[user_id]
+    def _mark_dirty(self, scope, key, value):
+        """(Under _lock) Queues one key for the next flush."""
+        scope_changes = self._dirty.setdefault(scope, {})
+        if key not in scope_changes:
+            self._dirty_count += 1
+        scope_changes[key] = value
+        if self._flusher_thread is None:
+            self._flusher_thread = threading.Thread(target=self._flush_loop, name="StateFlusher", daemon=True) # English Hardcode
+            self._flusher_thread.start()
+        if self._dirty_count >= STATE_FLUSH_MAX_DIRTY_KEYS:
+            self._flush_wakeup.set()
     def get(self, key, user_id: str = None, default=None):
         with self._lock:
             if user_id:
-                if user_id not in self._user_state_cache:
-                    self._user_state_cache[user_id] = self._load_user_state_from_file(
-                        user_id
-                    )
-                    if len(self._user_state_cache) > self.MAX_USER_CACHE_SIZE:
-                        self._user_state_cache.popitem(
-                            last=False
-                        )  # Hapus yang paling lama
-                self._user_state_cache.move_to_end(
-                    user_id
-                )  # Tandai sebagai baru diakses
-                return self._user_state_cache[user_id].get(key, default)
+                return self._get_user_cache(user_id).get(key, default)
             else:
                 return self._global_state_cache.get(key, default)
     def set(self, key, value, user_id: str = None):
         with self._lock:
             if user_id:
-                if user_id not in self._user_state_cache:
-                    self._user_state_cache[user_id] = self._load_user_state_from_file(
-                        user_id
-                    )
-                self._user_state_cache[user_id][key] = value
-                self._user_state_cache.move_to_end(user_id)
-                self._save_user_state_to_file(user_id, self._user_state_cache[user_id])
-                self.kernel.write_to_log(
-                    f"StateManager: State for key '{key}' for user '{user_id}' has been set.",
-                    "DEBUG",
-                )
+                self._get_user_cache(user_id)[key] = value
+                self._mark_dirty(user_id, key, value)
             else:
                 self._global_state_cache[key] = value
-                self._save_global_state()
-                self.kernel.write_to_log(
-                    f"StateManager: Global state for key '{key}' has been set.", "DEBUG"
-                )
+                self._mark_dirty(None, key, value)
     def delete(self, key, user_id: str = None):
         with self._lock:
-            if user_id:
-                if user_id not in self._user_state_cache:
-                    self._user_state_cache[user_id] = self._load_user_state_from_file(
-                        user_id
-                    )
-                if key in self._user_state_cache[user_id]:
-                    del self._user_state_cache[user_id][key]
-                    self._save_user_state_to_file(
-                        user_id, self._user_state_cache[user_id]
-                    )
-                    self.kernel.write_to_log(
-                        f"StateManager: State for key '{key}' for user '{user_id}' has been deleted.",
-                        "DEBUG",
-                    )
-            else:
-                if key in self._global_state_cache:
-                    del self._global_state_cache[key]
-                    self._save_global_state()
+            state = self._get_user_cache(user_id) if user_id else self._global_state_cache
+            if key in state:
+                del state[key]
+                self._mark_dirty(user_id or None, key, STATE_DELETED)
+    def flush(self, durable: bool = True):
+        """
+        Writes every pending change now. With durable=True (the default) the data is fsynced
+        before this returns, so callers like CheckpointManager can rely on it surviving a crash.
+        """
+        with self._io_lock:
+            with self._lock:
+                batch, self._dirty, self._dirty_count = self._dirty, {}, 0
+                snapshots = {}
+                if self._backend.needs_snapshot:
+                    for scope, changes in batch.items():
+                        state = self._global_state_cache if scope is None else self._user_state_cache.get(scope)
+                        if state is None:
+                            state = self._load_user_state_from_file(scope) # (English Hardcode) Evicted after a failed flush, rebuild it
+                            state.update({k: v for k, v in changes.items() if v is not STATE_DELETED})
+                            for k in [k for k, v in changes.items() if v is STATE_DELETED]:
+                                state.pop(k, None)
+                        snapshots[scope] = dict(state)
+            failed = {}
+            for scope, changes in batch.items():
+                try:
+                    self._backend.write(scope, changes, snapshots.get(scope), durable)
+                except Exception as e: # (English Hardcode) Incl. sqlite3.Error ("database is locked"): the batch must go back to _dirty
+                    failed[scope] = changes
                     self.kernel.write_to_log(
-                        f"StateManager: Global state for key '{key}' has been deleted.",
-                        "DEBUG",
+                        f"StateManager: FAILED to save state for {'global scope' if scope is None else repr(scope)}. Error: {e}",
+                        "ERROR",
                     )
+            if failed:
+                with self._lock:
+                    for scope, changes in failed.items():
+                        newer = self._dirty.get(scope, {})
+                        merged = dict(changes)
+                        merged.update(newer) # (English Hardcode) Keep changes made while we were writing
+                        self._dirty_count += len(merged) - len(newer)
+                        self._dirty[scope] = merged
+            return not failed
+    def _flush_loop(self):
+        while not self._stop_event.is_set():
+            self._flush_wakeup.wait(STATE_FLUSH_INTERVAL_SECONDS)
+            self._flush_wakeup.clear()
+            if self._dirty:
+                try:
+                    self.flush(durable=False)
+                except Exception as e:
+                    self.kernel.write_to_log(f"StateManager: Background flush failed, retrying next interval. Error: {e}", "ERROR") # English Log
+    def stop(self):
+        self._stop_event.set()
+        self._flush_wakeup.set()
+        if self._flusher_thread:
+            self._flusher_thread.join(timeout=5)
+        self.flush(durable=True)
+        self._backend.close()
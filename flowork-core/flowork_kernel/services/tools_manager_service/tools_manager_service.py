@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\tools_manager_service\tools_manager_service.py total lines 369 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\tools_manager_service\tools_manager_service.py total lines 373 
 ########################################################################
 
 import os
@@ -16,6 +16,7 @@ import tempfile
 import shutil
 import hashlib
 from flowork_kernel.exceptions import PermissionDeniedError
+from flowork_kernel.utils.component_index import get_component_index
 import threading
 import shutil
 
@@ -70,38 +71,35 @@ class ToolsManagerService(BaseService):
             os.makedirs(self.tools_dir, exist_ok=True)
             return  # Stop here if the directory was just created
 
-        for item_id in os.listdir(self.tools_dir):
+        component_index = get_component_index(self.kernel.data_path)
+        for item_id, item_dir, manifest, manifest_error in component_index.scan(self.tools_dir):
             if item_id in self.kernel.globally_disabled_components:
                 self.logger.warning(f"Skipping globally disabled tool: {item_id}")
                 continue
 
-            item_dir = os.path.join(self.tools_dir, item_id)
-            if os.path.isdir(item_dir) and item_id != "__pycache__":
-                manifest_path = os.path.join(item_dir, "manifest.json")
-                if not os.path.exists(manifest_path):
-                    continue
-                try:
-                    with open(manifest_path, "r", encoding="utf-8") as f:
-                        manifest = json.load(f)
-
-                    is_paused = item_id in paused_ids
-                    install_marker_path = os.path.join(item_dir, ".installed") # English Hardcode
-                    is_installed = os.path.exists(install_marker_path)
-
-                    tool_data = {
-                        "manifest": manifest,
-                        "path": item_id and item_dir,
-                        "installed_as": "tool",
-                        "is_paused": is_paused,
-                        "permissions": manifest.get("permissions", []),
-                        "tier": manifest.get("tier", "free").lower(),
-                        "is_installed": is_installed, # (KODE DARI CHAT SEBELUMNYA)
-                    }
-                    self.loaded_tools[item_id] = tool_data
-                except Exception as e:
-                    self.logger.warning(
-                        f"   ! Failed to process manifest for tool '{item_id}': {e}"
-                    )
+            try:
+                if manifest_error:
+                    raise manifest_error
+
+                is_paused = item_id in paused_ids
+                install_marker_path = os.path.join(item_dir, ".installed") # English Hardcode
+                is_installed = os.path.exists(install_marker_path)
+
+                tool_data = {
+                    "manifest": manifest,
+                    "path": item_id and item_dir,
+                    "installed_as": "tool",
+                    "is_paused": is_paused,
+                    "permissions": manifest.get("permissions", []),
+                    "tier": manifest.get("tier", "free").lower(),
+                    "is_installed": is_installed, # (KODE DARI CHAT SEBELUMNYA)
+                }
+                self.loaded_tools[item_id] = tool_data
+            except Exception as e:
+                self.logger.warning(
+                    f"   ! Failed to process manifest for tool '{item_id}': {e}"
+                )
+        component_index.save()
 
         self.logger.info(
             f"ToolsManager: Discovery complete. Found {len(self.loaded_tools)} tools."
@@ -260,6 +258,12 @@ class ToolsManagerService(BaseService):
                 del self.instance_cache[tool_id]
             self.loaded_tools[tool_id]["is_paused"] = is_paused
             self._save_paused_status()
+            event_bus = self.kernel.get_service("event_bus")
+            if event_bus:
+                event_bus.publish(
+                    "COMPONENT_LIST_CHANGED",
+                    {"type": "tool", "id": tool_id, "paused": is_paused},
+                )
             return True
         return False
 
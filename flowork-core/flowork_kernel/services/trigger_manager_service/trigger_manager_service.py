@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\trigger_manager_service\trigger_manager_service.py total lines 478 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\trigger_manager_service\trigger_manager_service.py total lines 446 
 ########################################################################
 
 import os
@@ -14,6 +14,8 @@ import zipfile
 import shutil
 from flowork_kernel.api_contract import BaseTriggerListener
 from ..base_service import BaseService
+from flowork_kernel.exceptions import ExecutionRejectedError
+from flowork_kernel.utils.component_index import get_component_index
 import hashlib
 import subprocess
 import sys
@@ -30,7 +32,6 @@ class TriggerManagerService(BaseService):
         self.triggers_dir = self.kernel.triggers_path
         self.loaded_triggers = {}
         self.active_listeners = []
-        self.cache_file = os.path.join(self.kernel.data_path, "trigger_index.cache")
         self.logger.debug("Service 'TriggerManager' initialized.") # English Log
     def start(self):
         """
@@ -46,71 +47,33 @@ class TriggerManagerService(BaseService):
             self.logger.info(
                 "TriggerManager is now waiting for the signal to start all listeners."
             )
-    def _is_cache_valid(self):
-        if not os.path.exists(self.cache_file):
-            return False
-        cache_mod_time = os.path.getmtime(self.cache_file)
-        if os.path.exists(self.triggers_dir):
-            if os.path.getmtime(self.triggers_dir) > cache_mod_time:
-                return False
-            for root, dirs, _ in os.walk(self.triggers_dir):
-                for d in dirs:
-                    if os.path.getmtime(os.path.join(root, d)) > cache_mod_time:
-                        return False
-        return True
     def discover_and_load_triggers(self):
+        """
+        Manifests come from the shared component index (stat-validated, see utils/component_index.py),
+        which replaced the trigger_index.cache file and its os.walk validity check.
+        """
         self.logger.info(
             "TriggerManager: Starting discovery and loading of Trigger modules..."
         )
         self.loaded_triggers.clear()
-        if self._is_cache_valid():
-            self.logger.info(
-                "TriggerManager: Valid cache found. Loading triggers from index..."
-            )
-            with open(self.cache_file, "r", encoding="utf-8") as f:
-                cached_data = json.load(f)
-            for trigger_id, trigger_data in cached_data.items():
-                self._process_single_trigger(
-                    trigger_dir=trigger_data["path"],
-                    trigger_id=trigger_id,
-                    manifest_override=trigger_data["manifest"],
-                )
-            self.logger.info(
-                f"Trigger discovery from cache complete. Total processed: {len(self.loaded_triggers)}"
-            )
-            return
-        self.logger.warning(
-            "TriggerManager: Cache not found or stale. Discovering from disk..."
-        )
-        discovered_data_for_cache = {}
         if not os.path.exists(self.triggers_dir):
             self.logger.warning(
                 f"Triggers directory '{self.triggers_dir}' not found. Skipping."
             )
             return
-        for trigger_id in os.listdir(self.triggers_dir):
-            if trigger_id in self.kernel.globally_disabled_components:
+        disabled_components = getattr(self.kernel, "globally_disabled_components", set())
+        component_index = get_component_index(self.kernel.data_path)
+        for trigger_id, trigger_dir, manifest, manifest_error in component_index.scan(self.triggers_dir):
+            if trigger_id in disabled_components:
                 self.logger.warning(f"Skipping globally disabled trigger: {trigger_id}")
                 continue
-            trigger_dir = os.path.join(self.triggers_dir, trigger_id)
-            if not os.path.isdir(trigger_dir) or trigger_id == "__pycache__":
+            if manifest_error:
+                self.logger.error(
+                    f" ! Failed to load trigger manifest for '{trigger_id}': {manifest_error}"
+                )
                 continue
-            manifest = self._process_single_trigger(trigger_dir, trigger_id)
-            if manifest:
-                discovered_data_for_cache[trigger_id] = {
-                    "manifest": manifest,
-                    "path": trigger_dir,
-                }
-        try:
-            with open(self.cache_file, "w", encoding="utf-8") as f:
-                json.dump(discovered_data_for_cache, f)
-            self.logger.info(
-                f"TriggerManager: Trigger index cache created at {self.cache_file}"
-            )
-        except Exception as e:
-            self.logger.error(
-                f"TriggerManager: Failed to write trigger cache file: {e}"
-            )
+            self._process_single_trigger(trigger_dir, trigger_id, manifest_override=manifest)
+        component_index.save()
         self.logger.info(
             f"Trigger discovery complete. Total processed: {len(self.loaded_triggers)}"
         )
@@ -317,9 +280,14 @@ class TriggerManagerService(BaseService):
         }
         api_service = self.kernel.get_service("api_server_service")
         if api_service:
-            api_service.trigger_workflow_by_api(
-                preset_name=preset_to_run, initial_payload=initial_payload
-            )
+            try:
+                api_service.submit_workflow(
+                    preset_name=preset_to_run, initial_payload=initial_payload, source="trigger" # English Hardcode
+                )
+            except ExecutionRejectedError as e:
+                self.logger.warning(
+                    f"Trigger rule '{rule_data.get('name')}' dropped by admission control: {e}" # English Log
+                )
     def _worker_install_dependencies(self, trigger_id: str, on_complete: callable):
         """Worker thread for installing dependencies."""
         try:
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\variable_manager_service\variable_manager_service.py total lines 227 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\variable_manager_service\variable_manager_service.py total lines 333 
 ########################################################################
 
 import os
@@ -11,9 +11,44 @@ import logging
 import secrets
 import string
 import random
+import time
+import itertools
+from types import MappingProxyType
 from collections import OrderedDict
 from ..base_service import BaseService
 from flowork_kernel.exceptions import PermissionDeniedError
+VARIABLE_COUNTER_PERSIST_SECONDS = float(os.getenv("CORE_VARIABLE_COUNTER_PERSIST_SECONDS", "5"))
+VARIABLE_FILE_CHECK_SECONDS = float(os.getenv("CORE_VARIABLE_FILE_CHECK_SECONDS", "2")) # (English Hardcode) How often a snapshot re-stats variables.json (edits from other processes)
+class VariableSnapshot:
+    """
+    Immutable, pre-decoded view of one user's variables. Readers never lock: a change builds a
+    new snapshot and swaps the reference. `entries` maps name -> (mode, value, values) where
+    secrets are already base64-decoded and disabled variables are left out.
+    """
+    __slots__ = ("entries", "file_mtime_ns", "checked_at")
+    def __init__(self, user_vars: dict, file_mtime_ns):
+        entries = {}
+        for name, var_data in user_vars.items():
+            if not isinstance(var_data, dict) or not var_data.get("is_enabled", True):
+                continue
+            is_secret = var_data.get("is_secret")
+            mode = var_data.get("mode", "single")
+            if mode == "single":
+                value = var_data.get("value")
+                entries[name] = ("single", _decode_secret(value) if is_secret and value else value, ()) # English Hardcode
+            elif mode in ["random", "sequential"]:
+                values = tuple(
+                    _decode_secret(v) if is_secret and v else v for v in var_data.get("values", [])
+                )
+                entries[name] = (mode, None, values)
+        self.entries = MappingProxyType(entries)
+        self.file_mtime_ns = file_mtime_ns
+        self.checked_at = time.monotonic()
+def _decode_secret(value):
+    try:
+        return base64.b64decode(str(value).encode("utf-8")).decode("utf-8")
+    except Exception:
+        return None
 class VariableManagerService(BaseService):
     """
     Acts as a secure vault for all global and secret variables.
@@ -29,8 +64,14 @@ class VariableManagerService(BaseService):
             OrderedDict()
         )  # TAMBAHAN: [PERBAIKAN] Menggunakan OrderedDict untuk LRU Cache
         self._lock = threading.Lock()
+        self._snapshots = {} # (English Hardcode) user_id -> VariableSnapshot, read without the lock
+        self._sequential_counters = {} # (English Hardcode) (user_id, name) -> itertools.count, next() is atomic
+        self._counter_positions = {} # (English Hardcode) (user_id, name) -> last index handed out
+        self._counters_dirty = False
+        self._persist_thread = None
+        self._stop_event = threading.Event()
         self.kernel.write_to_log(
-            "Service 'VariableManager' (Multi-Tenant & Cached) initialized.", "DEBUG"
+            "Service 'VariableManager' (Multi-Tenant & Cached, lock-free snapshots) initialized.", "DEBUG"
         )
     def _get_user_variables_path(self, user_id: str):
         if not user_id:
@@ -84,21 +125,63 @@ class VariableManagerService(BaseService):
         return user_vars
     def _save_variables_to_file(self, user_id: str, data_to_save: dict):
         variables_file_path = self._get_user_variables_path(user_id)
+        temp_path = f"{variables_file_path}.{os.getpid()}.tmp"
         try:
-            with open(variables_file_path, "w", encoding="utf-8") as f:
+            with open(temp_path, "w", encoding="utf-8") as f:
                 json.dump(data_to_save, f, indent=4)
+            os.replace(temp_path, variables_file_path) # (English Hardcode) Readers in other processes never see a half-written file
         except IOError as e:
             self.kernel.write_to_log(
                 f"VariableManager: Failed to save variables for user '{user_id}': {e}",
                 "ERROR",
             )
+    def _get_cached_user_vars(self, user_id: str):
+        """(Under _lock) Raw variables.json content of a user, loaded on first access (LRU)."""
+        if user_id in self._variables_data_cache:
+            self._variables_data_cache.move_to_end(user_id)
+        else:
+            self.kernel.write_to_log(
+                f"VariableManager CACHE MISS for user '{user_id}'. Loading from disk.",
+                "DEBUG",
+            )
+            self._variables_data_cache[user_id] = self._load_variables_from_file(user_id)
+            if len(self._variables_data_cache) > self.MAX_USER_CACHE_SIZE:
+                evicted_user_id, _ = self._variables_data_cache.popitem(last=False)
+                self._snapshots.pop(evicted_user_id, None)
+        return self._variables_data_cache[user_id]
+    def _file_mtime_ns(self, user_id: str):
+        try:
+            return os.stat(self._get_user_variables_path(user_id)).st_mtime_ns
+        except OSError:
+            return None
+    def _publish_snapshot(self, user_id: str):
+        """(Under _lock) Rebuilds and swaps the snapshot after the cached variables changed."""
+        snapshot = VariableSnapshot(self._variables_data_cache.get(user_id, {}), self._file_mtime_ns(user_id))
+        self._snapshots[user_id] = snapshot
+        return snapshot
+    def get_snapshot(self, user_id: str = None) -> VariableSnapshot:
+        """
+        Lock-free in the common case. Every VARIABLE_FILE_CHECK_SECONDS the file is re-stat'ed so
+        edits made by another process (API server vs. job workers) are picked up.
+        """
+        snapshot = self._snapshots.get(user_id)
+        if snapshot is not None:
+            if time.monotonic() - snapshot.checked_at < VARIABLE_FILE_CHECK_SECONDS:
+                return snapshot
+            if self._file_mtime_ns(user_id) == snapshot.file_mtime_ns:
+                snapshot.checked_at = time.monotonic()
+                return snapshot
+        with self._lock:
+            current = self._snapshots.get(user_id)
+            if current is not snapshot and current is not None:
+                return current # (English Hardcode) Another thread already rebuilt it
+            if snapshot is not None:
+                self._variables_data_cache.pop(user_id, None) # (English Hardcode) File changed on disk, reload it
+            self._get_cached_user_vars(user_id)
+            return self._publish_snapshot(user_id)
     def get_all_variables_for_api(self, user_id: str):
         with self._lock:
-            if user_id not in self._variables_data_cache:
-                self._variables_data_cache[user_id] = self._load_variables_from_file(
-                    user_id
-                )
-            user_vars = self._variables_data_cache.get(user_id, {})
+            user_vars = self._get_cached_user_vars(user_id)
             api_safe_vars = json.loads(json.dumps(user_vars))
             for name, data in api_safe_vars.items():
                 if data.get("is_secret"):
@@ -111,49 +194,67 @@ class VariableManagerService(BaseService):
                 for name, data in sorted(api_safe_vars.items())
             ]
     def get_variable(self, name, user_id: str = None):
+        entry = self.get_snapshot(user_id).entries.get(name)
+        if entry is None:
+            return None
+        mode, value, values = entry
+        if mode == "single":
+            return value
+        if not values:
+            return None
+        if mode == "random":
+            return random.choice(values)
+        counter_key = (user_id, name)
+        counter = self._sequential_counters.get(counter_key)
+        if counter is None:
+            counter = self._create_sequential_counter(counter_key)
+        position = next(counter)
+        self._counter_positions[counter_key] = position
+        self._counters_dirty = True
+        return values[position % len(values)]
+    def _create_sequential_counter(self, counter_key):
         with self._lock:
-            if user_id in self._variables_data_cache:
-                self._variables_data_cache.move_to_end(user_id)
-            else:
-                self.kernel.write_to_log(
-                    f"VariableManager CACHE MISS for user '{user_id}'. Loading from disk.",
-                    "DEBUG",
-                )
-                user_vars_from_file = self._load_variables_from_file(user_id)
-                self._variables_data_cache[user_id] = user_vars_from_file
-                if len(self._variables_data_cache) > self.MAX_USER_CACHE_SIZE:
-                    self._variables_data_cache.popitem(last=False)
-            user_vars = self._variables_data_cache.get(user_id, {})
-            var_data = user_vars.get(name)
-            if not var_data or not var_data.get("is_enabled", True):
-                return None
-            mode = var_data.get("mode", "single")
-            value_to_return = None
-            if mode == "single":
-                value_to_return = var_data.get("value")
-            elif mode in ["random", "sequential"]:
-                values_list = var_data.get("values", [])
-                if not values_list:
-                    return None
-                if mode == "random":
-                    value_to_return = random.choice(values_list)
-                elif mode == "sequential":
-                    current_index = var_data.get("sequential_index", 0)
-                    value_to_return = values_list[current_index]
-                    var_data["sequential_index"] = (current_index + 1) % len(
-                        values_list
-                    )
-                    self._save_variables_to_file(user_id, user_vars)
-            if var_data.get("is_secret") and value_to_return:
-                try:
-                    decoded_bytes = base64.b64decode(
-                        str(value_to_return).encode("utf-8")
-                    )
-                    return decoded_bytes.decode("utf-8")
-                except Exception:
-                    return None
-            else:
-                return value_to_return
+            counter = self._sequential_counters.get(counter_key)
+            if counter is None:
+                user_id, name = counter_key
+                var_data = self._get_cached_user_vars(user_id).get(name) or {}
+                start_index = int(var_data.get("sequential_index", 0) or 0)
+                counter = itertools.count(start_index)
+                self._sequential_counters[counter_key] = counter
+                if self._persist_thread is None:
+                    self._persist_thread = threading.Thread(target=self._persist_loop, name="VariableCounterPersist", daemon=True) # English Hardcode
+                    self._persist_thread.start()
+            return counter
+    def _persist_loop(self):
+        while not self._stop_event.wait(VARIABLE_COUNTER_PERSIST_SECONDS):
+            if self._counters_dirty:
+                self.persist_counters()
+    def persist_counters(self):
+        """Writes the in-memory sequential positions back to variables.json (periodically and on stop)."""
+        with self._lock:
+            self._counters_dirty = False
+            users_to_save = set()
+            for (user_id, name), position in list(self._counter_positions.items()):
+                var_data = self._get_cached_user_vars(user_id).get(name)
+                if not var_data or not var_data.get("values"):
+                    continue
+                new_index = (position + 1) % len(var_data["values"])
+                if var_data.get("sequential_index") != new_index:
+                    var_data["sequential_index"] = new_index
+                    users_to_save.add(user_id)
+            for user_id in users_to_save:
+                self._save_variables_to_file(user_id, self._variables_data_cache[user_id])
+                snapshot = self._snapshots.get(user_id)
+                if snapshot is not None:
+                    snapshot.file_mtime_ns = self._file_mtime_ns(user_id) # (English Hardcode) Our own write is not an external edit
+    def _reset_counter(self, user_id, name):
+        """(Under _lock) A redefined variable restarts its rotation from its stored index."""
+        self._sequential_counters.pop((user_id, name), None)
+        self._counter_positions.pop((user_id, name), None)
+    def stop(self):
+        self._stop_event.set()
+        if self._counters_dirty:
+            self.persist_counters()
     def set_variable(
         self,
         name,
@@ -168,11 +269,7 @@ class VariableManagerService(BaseService):
                 "Variable name must only contain uppercase letters (A-Z), numbers (0-9), and underscores (_)."
             )
         with self._lock:
-            if user_id not in self._variables_data_cache:
-                self.get_variable(
-                    "any_key_to_load_data", user_id=user_id
-                )  # Trik untuk load data ke cache
-            user_vars = self._variables_data_cache.get(user_id, {})
+            user_vars = self._get_cached_user_vars(user_id)
             if mode == "single":
                 processed_value = value
                 if is_secret and value and value != "PLEASE_EDIT_ME":
@@ -211,16 +308,25 @@ class VariableManagerService(BaseService):
                     "is_enabled": is_enabled,
                     "sequential_index": 0,
                 }
+            self._reset_counter(user_id, name)
+            self._save_variables_to_file(user_id, user_vars)
+            self._publish_snapshot(user_id)
+    def set_variable_enabled_state(self, name, is_enabled: bool, user_id: str = None):
+        with self._lock:
+            user_vars = self._get_cached_user_vars(user_id)
+            if name not in user_vars:
+                return False
+            user_vars[name]["is_enabled"] = bool(is_enabled)
             self._save_variables_to_file(user_id, user_vars)
+            self._publish_snapshot(user_id)
+            return True
     def delete_variable(self, name, user_id: str):
         with self._lock:
-            if user_id not in self._variables_data_cache:
-                self.get_variable(
-                    "any_key_to_load_data", user_id=user_id
-                )  # Trik untuk load data ke cache
-            user_vars = self._variables_data_cache.get(user_id, {})
+            user_vars = self._get_cached_user_vars(user_id)
             if name in user_vars:
                 del user_vars[name]
+                self._reset_counter(user_id, name)
                 self._save_variables_to_file(user_id, user_vars)
+                self._publish_snapshot(user_id)
                 return True
             return False
@@ -1,13 +1,132 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\workflow_executor_service\workflow_executor_service.py total lines 29 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\services\workflow_executor_service\workflow_executor_service.py total lines 351 
 ########################################################################
 
-import logging
+import os
+import json
+import time
 import uuid
+import hashlib
+import logging
 from flowork_kernel.services.base_service import BaseService
 from flowork_kernel.singleton import Singleton
 from flowork_kernel.services.database_service.database_service import DatabaseService
+from flowork_kernel.services.database_service.payload_store import prepare_payload, store_payload, load_payload
+from flowork_kernel.workers.graph_cache import analyze_dag
+from flowork_kernel.workers.wakeup import JobWakeupChannel
+from flowork_kernel.exceptions import ExecutionRejectedError
+SUBMIT_MAX_PENDING_JOBS = int(os.getenv("CORE_SUBMIT_MAX_PENDING_JOBS", "10000")) # (English Hardcode) Queue-depth limit, 0 = unlimited
+SUBMIT_MAX_ACTIVE_PER_USER = int(os.getenv("CORE_SUBMIT_MAX_ACTIVE_PER_USER", "50")) # (English Hardcode) RUNNING executions per user, 0 = unlimited
+SUBMIT_RETRY_AFTER_SECONDS = int(os.getenv("CORE_SUBMIT_RETRY_AFTER", "5"))
+RAW_WORKFLOW_PREFIX = "_raw::" # English Hardcode
+class DagScheduler:
+    """
+    Graph-aware fan-out for one execution, used INSIDE the worker's finish transaction.
+
+    - Direct children are queued immediately with their critical-path priority, so independent
+      branches are claimed by different workers in parallel and the longest chain goes first.
+    - Join nodes (several forward parents, see analyze_dag) get one JoinArrivals row per parent
+      and are queued exactly ONCE, with merged input, when the last parent arrives.
+    - When an execution has no PENDING/RUNNING jobs left, its Executions row is finalized.
+    Stateless: all per-execution state lives in SQLite, so any worker can continue any execution.
+    """
+    @staticmethod
+    def execution_seq(cursor, execution_id):
+        """The Jobs.exec_seq of `execution_id`: its Executions rowid (creation order), None without a row."""
+        cursor.execute("SELECT rowid FROM Executions WHERE execution_id = ?", (execution_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    @staticmethod
+    def merge_join_inputs(parent_order, inputs_by_parent):
+        """
+        Builds the input of a join node. Top-level keys of dict outputs are merged in parent order
+        (first parent wins on conflicts), and every parent's full output stays under `join_inputs`.
+        """
+        merged = {}
+        for parent_id in parent_order:
+            data = inputs_by_parent.get(parent_id)
+            if isinstance(data, dict):
+                for key, value in data.items():
+                    merged.setdefault(key, value)
+        merged["join_inputs"] = {parent_id: inputs_by_parent.get(parent_id) for parent_id in parent_order} # English Hardcode
+        return merged
+    def fan_out(self, cursor, graph, execution_id, workflow_id, user_id, source_node_id, prepared, output_data):
+        """
+        (Inside a write transaction) Queues the successors of `source_node_id`.
+        Returns (jobs_queued, payload_references) where payload_references counts the rows that now
+        point at `prepared` (the caller adds them to the payload store together with its own row).
+        """
+        jobs_to_insert = []
+        references = 0
+        for target_node_id in graph.downstream_nodes(source_node_id):
+            join_parents = graph.join_parents.get(target_node_id)
+            if not join_parents or source_node_id not in join_parents:
+                jobs_to_insert.append((target_node_id, prepared.inline_text, prepared.payload_hash))
+                references += 1
+                continue
+            cursor.execute(
+                "SELECT source_node_id, input_data, input_payload_hash FROM JoinArrivals "
+                "WHERE execution_id = ? AND node_id = ? AND source_node_id != ?",
+                (execution_id, target_node_id, source_node_id)
+            )
+            arrivals = cursor.fetchall()
+            arrived_parents = {row[0] for row in arrivals if row[0] in join_parents}
+            if len(arrived_parents) + 1 < len(join_parents):
+                cursor.execute(
+                    "INSERT OR IGNORE INTO JoinArrivals (execution_id, node_id, source_node_id, input_data, input_payload_hash) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (execution_id, target_node_id, source_node_id, prepared.inline_text, prepared.payload_hash)
+                )
+                references += cursor.rowcount # (English Hardcode) 0 when this parent already arrived (re-run after a reaped lease)
+                logging.debug(f"[DagScheduler] Join {target_node_id} of {execution_id}: {len(arrived_parents) + 1}/{len(join_parents)} parents arrived.") # English Hardcode
+                continue
+            inputs_by_parent = {source_node_id: output_data}
+            for parent_id, inline_text, payload_hash in arrivals:
+                inputs_by_parent[parent_id] = load_payload(cursor, inline_text, payload_hash)
+            merged_payload = prepare_payload(self.merge_join_inputs(join_parents, inputs_by_parent))
+            cursor.execute(
+                "DELETE FROM JoinArrivals WHERE execution_id = ? AND node_id = ?",
+                (execution_id, target_node_id)
+            )
+            merged_inline, merged_hash = store_payload(cursor, merged_payload, 1)
+            jobs_to_insert.append((target_node_id, merged_inline, merged_hash))
+            logging.info(f"[DagScheduler] Join {target_node_id} of {execution_id}: all {len(join_parents)} parents arrived, queued once.") # English Hardcode
+        if jobs_to_insert:
+            exec_seq = self.execution_seq(cursor, execution_id)
+            cursor.executemany(
+                "INSERT INTO Jobs (job_id, execution_id, node_id, status, input_data, input_payload_hash, workflow_id, user_id, priority, exec_seq) "
+                "VALUES (?, ?, ?, 'PENDING', ?, ?, ?, ?, ?, ?)",
+                [
+                    (str(uuid.uuid4()), execution_id, node_id, inline_text, payload_hash, workflow_id, user_id, graph.priority.get(node_id, 0), exec_seq)
+                    for node_id, inline_text, payload_hash in jobs_to_insert
+                ]
+            )
+        return len(jobs_to_insert), references
+    @staticmethod
+    def complete_execution_if_idle(cursor, execution_id):
+        """
+        (Inside a write transaction) Marks the execution DONE (or FAILED if any job failed) once no
+        job is PENDING or RUNNING anymore, and drops join arrivals that can never fire.
+        Returns the final status, or None while the execution is still in progress.
+        """
+        cursor.execute(
+            "SELECT "
+            "SUM(CASE WHEN status IN ('PENDING', 'RUNNING') THEN 1 ELSE 0 END), "
+            "SUM(CASE WHEN status = 'FAILED' THEN 1 ELSE 0 END) "
+            "FROM Jobs WHERE execution_id = ?",
+            (execution_id,)
+        )
+        active, failed = cursor.fetchone()
+        if active:
+            return None
+        final_status = 'FAILED' if failed else 'DONE'
+        cursor.execute(
+            "UPDATE Executions SET status = ?, finished_at = CURRENT_TIMESTAMP WHERE execution_id = ? AND status = 'RUNNING'",
+            (final_status, execution_id)
+        )
+        cursor.execute("DELETE FROM JoinArrivals WHERE execution_id = ?", (execution_id,))
+        return final_status
 class WorkflowExecutorService(BaseService):
     def __init__(self, kernel, service_id):
         super().__init__(kernel, service_id)
@@ -19,6 +138,209 @@ class WorkflowExecutorService(BaseService):
         except Exception as e:
             self.logger.error(f"CRITICAL: Failed to get Singleton instances: {e}") # English Hardcode
             self.db_service = None
+        self.scheduler = DagScheduler()
+    @staticmethod
+    def plan_start(nodes, edges, start_node_id=None):
+        """
+        Returns [(node_id, priority), ...] for the first jobs of a run: the given start node, or
+        every node without incoming edges, each with its critical-path priority.
+        """
+        node_ids = [node['id'] for node in nodes]
+        edge_pairs = [(edge['source'], edge['target']) for edge in edges]
+        priority, _ = analyze_dag(node_ids, edge_pairs)
+        if start_node_id:
+            starting_nodes = [start_node_id]
+        else:
+            target_node_ids = {target for _, target in edge_pairs}
+            starting_nodes = [node_id for node_id in node_ids if node_id not in target_node_ids]
+        return [(node_id, priority.get(node_id, 0)) for node_id in starting_nodes]
+    @staticmethod
+    def raw_workflow_id(nodes, edges):
+        """Content-addressed workflow_id for a graph that was sent inline instead of saved as a preset."""
+        canonical = json.dumps(
+            {
+                "nodes": [[node.get("id"), node.get("module_id"), node.get("config_values", {})] for node in nodes],
+                "edges": [[edge.get("source"), edge.get("target")] for edge in edges],
+            },
+            sort_keys=True, default=str,
+        )
+        return RAW_WORKFLOW_PREFIX + hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+    def submit_execution(self, workflow_data: dict, workflow_id: str = None, user_id: str = None, initial_payload=None,
+                         start_node_id: str = None, execution_id: str = None, source: str = "api") -> str:
+        """
+        Queues one workflow run and returns its execution_id.
+        Raises ExecutionRejectedError when the queue or the user's quota is full, ValueError for an
+        unusable workflow definition.
+        """
+        result = self.submit_executions([{
+            "workflow_data": workflow_data,
+            "workflow_id": workflow_id,
+            "user_id": user_id,
+            "initial_payload": initial_payload,
+            "start_node_id": start_node_id,
+            "execution_id": execution_id,
+            "source": source,
+        }])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+    def submit_executions(self, requests: list) -> list:
+        """
+        The single entry point for starting workflow runs (engine socket, REST API, webhooks, cron,
+        event triggers). Each request is a dict with workflow_data ({"nodes", "connections"}) and
+        optionally workflow_id, user_id, initial_payload, start_node_id, execution_id and source.
+        Admission (queue depth, RUNNING executions per user) and all inserts happen in ONE
+        transaction, then the job workers are woken once. Returns one entry per request, in order:
+        the execution_id, or the exception that kept it from being queued.
+        """
+        results = [None] * len(requests)
+        planned = []
+        for index, request in enumerate(requests):
+            workflow_data = request.get("workflow_data") or {}
+            nodes = workflow_data.get("nodes", []) # English Hardcode
+            edges = workflow_data.get("connections", []) # English Hardcode
+            try:
+                plan = self.plan_start(nodes, edges, request.get("start_node_id"))
+            except (KeyError, TypeError) as e:
+                results[index] = ValueError(f"Invalid workflow definition: {e}") # English Hardcode
+                continue
+            if not plan:
+                results[index] = ValueError("Workflow has no starting nodes.") # English Hardcode
+                continue
+            planned.append((index, {
+                "execution_id": request.get("execution_id") or str(uuid.uuid4()),
+                "workflow_id": request.get("workflow_id") or self.raw_workflow_id(nodes, edges),
+                "user_id": request.get("user_id") or "system", # English Hardcode
+                "nodes": nodes,
+                "edges": edges,
+                "plan": plan,
+                "prepared": prepare_payload(request.get("initial_payload") or {}), # (English Hardcode) Serialized before the write lock is taken
+                "source": request.get("source", "api"), # English Hardcode
+            }))
+        if not planned:
+            return results
+        if not self.db_service:
+            for index, _ in planned:
+                results[index] = RuntimeError("DatabaseService is not available.") # English Hardcode
+            return results
+        queued_jobs = self.db_service.run_with_retry(self._insert_executions, planned, results)
+        if queued_jobs:
+            job_wakeup = Singleton.get_instance(JobWakeupChannel)
+            if job_wakeup:
+                job_wakeup.notify(queued_jobs) # (English Hardcode) Wake one idle worker per queued job
+            else:
+                self.logger.error("Failed to get JobWakeupChannel from Singleton. Workers may not wake up immediately.") # English Hardcode
+        rejected = sum(1 for result in results if isinstance(result, ExecutionRejectedError))
+        if rejected:
+            self.logger.warning(f"Execution admission: {rejected} of {len(requests)} run(s) deferred (queue/user limits).") # English Hardcode
+        return results
+    def _insert_executions(self, conn, planned, results):
+        """(run_with_retry body) Admits and writes the planned runs. Returns the number of queued jobs."""
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE;")
+        try:
+            pending_jobs = 0
+            if SUBMIT_MAX_PENDING_JOBS:
+                cursor.execute("SELECT COUNT(*) FROM Jobs WHERE status = 'PENDING'")
+                pending_jobs = cursor.fetchone()[0]
+            active_by_user = {}
+            queued_jobs = 0
+            for index, run in planned:
+                job_count = len(run["plan"])
+                user_id = run["user_id"]
+                if SUBMIT_MAX_PENDING_JOBS and pending_jobs + job_count > SUBMIT_MAX_PENDING_JOBS:
+                    results[index] = ExecutionRejectedError(
+                        f"Job queue is full ({pending_jobs} pending jobs).", reason="queue_full", retry_after=SUBMIT_RETRY_AFTER_SECONDS # English Hardcode
+                    )
+                    continue
+                if SUBMIT_MAX_ACTIVE_PER_USER:
+                    if user_id not in active_by_user:
+                        cursor.execute(
+                            "SELECT COUNT(*) FROM Executions e WHERE e.user_id = ? AND e.status = 'RUNNING' AND EXISTS ("
+                            "SELECT 1 FROM Jobs j WHERE j.execution_id = e.execution_id AND j.status IN ('PENDING', 'RUNNING'))", # (English Hardcode) A run counts while it has work left
+                            (user_id,)
+                        )
+                        active_by_user[user_id] = cursor.fetchone()[0]
+                    if active_by_user[user_id] >= SUBMIT_MAX_ACTIVE_PER_USER:
+                        results[index] = ExecutionRejectedError(
+                            f"User '{user_id}' already has {active_by_user[user_id]} running executions.", reason="user_limit", retry_after=SUBMIT_RETRY_AFTER_SECONDS # English Hardcode
+                        )
+                        continue
+                error = self._ensure_workflow_rows(cursor, run["workflow_id"], run["nodes"], run["edges"])
+                if error:
+                    results[index] = ValueError(error)
+                    continue
+                cursor.execute(
+                    "INSERT OR IGNORE INTO Executions (execution_id, workflow_id, user_id, status) VALUES (?, ?, ?, 'RUNNING')",
+                    (run["execution_id"], run["workflow_id"], user_id)
+                )
+                if cursor.rowcount == 0:
+                    results[index] = ValueError(f"Execution '{run['execution_id']}' already exists.") # English Hardcode
+                    continue
+                exec_seq = cursor.lastrowid
+                inline_payload, payload_hash = store_payload(cursor, run["prepared"], job_count)
+                cursor.executemany(
+                    "INSERT INTO Jobs (job_id, execution_id, node_id, status, input_data, input_payload_hash, workflow_id, user_id, priority, exec_seq) "
+                    "VALUES (?, ?, ?, 'PENDING', ?, ?, ?, ?, ?, ?)",
+                    [
+                        (str(uuid.uuid4()), run["execution_id"], node_id, inline_payload, payload_hash, run["workflow_id"], user_id, priority, exec_seq)
+                        for node_id, priority in run["plan"]
+                    ]
+                )
+                pending_jobs += job_count
+                active_by_user[user_id] = active_by_user.get(user_id, 0) + 1
+                queued_jobs += job_count
+                results[index] = run["execution_id"]
+                self.logger.debug(f"Queued execution {run['execution_id']} ({run['source']}, {job_count} starting job(s)).") # English Hardcode
+            conn.commit()
+            return queued_jobs
+        except Exception:
+            conn.rollback()
+            raise
+    def _ensure_workflow_rows(self, cursor, workflow_id, nodes, edges):
+        """
+        (Inside the submit transaction) Makes sure the job workers can load the graph: saved presets
+        already have their Workflows/Nodes/Edges rows, inline graphs get them on first use.
+        Nodes are keyed by (workflow_id, node_id), so an inline graph may reuse the node ids of a
+        preset or of an earlier version of the same canvas. Inline workflow ids are content hashes:
+        an edited graph gets new rows and JobRetentionService drops the unused old ones.
+        Returns an error message, or None.
+        """
+        cursor.execute("SELECT 1 FROM Workflows WHERE workflow_id = ?", (workflow_id,))
+        if cursor.fetchone():
+            return None
+        node_ids = [node["id"] for node in nodes]
+        if len(set(node_ids)) != len(node_ids):
+            return f"Workflow '{workflow_id}' has duplicate node IDs." # English Hardcode
+        name = "Raw Execution" if workflow_id.startswith(RAW_WORKFLOW_PREFIX) else workflow_id # English Hardcode
+        cursor.execute(
+            "INSERT INTO Workflows (workflow_id, name, graph_version) VALUES (?, ?, ?)",
+            (workflow_id, name, time.time_ns())
+        )
+        cursor.executemany(
+            "INSERT INTO Nodes (node_id, workflow_id, node_type, config_json) VALUES (?, ?, ?, ?)",
+            [(node["id"], workflow_id, node.get("module_id"), json.dumps(node.get("config_values", {}))) for node in nodes]
+        )
+        cursor.executemany(
+            "INSERT INTO Edges (workflow_id, source_node_id, target_node_id) VALUES (?, ?, ?)",
+            [(workflow_id, edge.get("source"), edge.get("target")) for edge in edges]
+        )
+        return None
+    def get_execution_statuses(self, execution_ids) -> dict:
+        """{execution_id: (status, finished_at)} for the given runs that exist in core.db."""
+        execution_ids = list(execution_ids)
+        if not execution_ids or not self.db_service:
+            return {}
+        statuses = {}
+        with self.db_service.get_connection() as conn:
+            for start in range(0, len(execution_ids), 500):
+                chunk = execution_ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT execution_id, status, finished_at FROM Executions WHERE execution_id IN ({placeholders})", chunk
+                ).fetchall()
+                statuses.update({row[0]: (row[1], row[2]) for row in rows})
+        return statuses
     async def execute_standalone_node(self, payload: dict):
         """
         (Per Roadmap 6/8) Executes a single node without a workflow context.
@@ -0,0 +1,160 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\utils\component_index.py total lines 161 
+########################################################################
+
+import os
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flowork_kernel.singleton import Singleton
+COMPONENT_INDEX_FILE = "component_index.json" # English Hardcode
+COMPONENT_INDEX_SINGLETON_KEY = "component_index" # (English Hardcode) Built by the parent, inherited by forked workers
+COMPONENT_INDEX_VERSION = 1
+DISCOVERY_WORKERS = max(1, int(os.getenv("CORE_DISCOVERY_WORKERS", "8"))) # (English Hardcode) Threads parsing changed manifests
+class ComponentIndex:
+    """
+    Shared index of component manifests (modules, plugins, tools, triggers), persisted in
+    data/component_index.json so a restart does not re-read every manifest.
+
+    Validation is stat-only: a base directory is listed again only when its mtime changed (a
+    component was added or removed), and a manifest is parsed again only when its size or mtime_ns
+    changed. Changed manifests are parsed in parallel. The parent builds the index before it forks
+    the job workers, which inherit it through the Singleton registry instead of rescanning.
+    """
+    def __init__(self, index_path: str = None, max_workers: int = DISCOVERY_WORKERS):
+        self.logger = logging.getLogger("ComponentIndex") # English Hardcode
+        self.index_path = index_path
+        self.max_workers = max_workers
+        self._lock = threading.RLock()
+        self._dirs = {} # (English Hardcode) base_dir -> {"mtime_ns", "items": [item_id, ...]}
+        self._manifests = {} # (English Hardcode) item_dir -> {"stat": [size, mtime_ns], "manifest": {...}}
+        self._dirty = False
+        self.stats = {"listed": 0, "reused": 0, "parsed": 0, "errors": 0}
+        if index_path:
+            self._load()
+    def _load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable component index '{self.index_path}': {e}") # English Log
+            return
+        if not isinstance(data, dict) or data.get("version") != COMPONENT_INDEX_VERSION:
+            return
+        self._dirs = data.get("dirs") or {}
+        self._manifests = data.get("manifests") or {}
+    def save(self):
+        """Writes the index back (atomically) if a scan changed it."""
+        if not self.index_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": COMPONENT_INDEX_VERSION, "dirs": self._dirs, "manifests": self._manifests}
+            temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            try:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    f.write(json.dumps(data)) # (English Hardcode) dumps() uses the C encoder, dump() does not
+                os.replace(temp_path, self.index_path)
+                self._dirty = False
+            except OSError as e:
+                self.logger.warning(f"Failed to write component index '{self.index_path}': {e}") # English Log
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+    def invalidate(self, base_dir: str = None):
+        """Forces a full rescan of one base directory (or of everything) on the next scan()."""
+        with self._lock:
+            if base_dir is None:
+                self._dirs.clear()
+                self._manifests.clear()
+            else:
+                base_dir = os.path.abspath(base_dir)
+                self._dirs.pop(base_dir, None)
+                prefix = base_dir + os.sep
+                for item_dir in [d for d in self._manifests if d.startswith(prefix)]:
+                    del self._manifests[item_dir]
+            self._dirty = True
+    def _list_items(self, base_dir: str):
+        mtime_ns = os.stat(base_dir).st_mtime_ns
+        cached = self._dirs.get(base_dir)
+        if cached and cached.get("mtime_ns") == mtime_ns:
+            return cached["items"]
+        items = [
+            item_id for item_id in os.listdir(base_dir)
+            if item_id != "__pycache__" and os.path.isdir(os.path.join(base_dir, item_id))
+        ]
+        self._dirs[base_dir] = {"mtime_ns": mtime_ns, "items": items}
+        self.stats["listed"] += 1
+        self._dirty = True
+        return items
+    @staticmethod
+    def _parse_manifest(manifest_path: str):
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f), None
+        except Exception as e:
+            return None, e
+    def scan(self, base_dir: str):
+        """
+        Returns [(item_id, item_dir, manifest, error)] for every sub folder of base_dir that has a
+        manifest.json, in directory order. manifest is None when it could not be parsed (error then
+        says why). Unchanged manifests are the cached dicts themselves and must be treated as
+        read-only, as the managers already do. A missing base_dir gives an empty list.
+        """
+        base_dir = os.path.abspath(base_dir)
+        with self._lock:
+            if not os.path.isdir(base_dir):
+                return []
+            entries, to_parse = [], []
+            for item_id in self._list_items(base_dir):
+                item_dir = os.path.join(base_dir, item_id)
+                manifest_path = os.path.join(item_dir, "manifest.json")
+                try:
+                    stat_result = os.stat(manifest_path)
+                except OSError:
+                    if self._manifests.pop(item_dir, None) is not None:
+                        self._dirty = True
+                    continue
+                fingerprint = [stat_result.st_size, stat_result.st_mtime_ns]
+                cached = self._manifests.get(item_dir)
+                if cached and cached.get("stat") == fingerprint:
+                    self.stats["reused"] += 1
+                    entries.append([item_id, item_dir, cached["manifest"], None])
+                    continue
+                entry = [item_id, item_dir, None, None]
+                entries.append(entry)
+                to_parse.append((entry, manifest_path, fingerprint))
+            if to_parse:
+                paths = [manifest_path for _, manifest_path, _ in to_parse]
+                if len(paths) > 1 and self.max_workers > 1:
+                    with ThreadPoolExecutor(max_workers=min(self.max_workers, len(paths)), thread_name_prefix="ComponentIndex") as pool:
+                        results = list(pool.map(self._parse_manifest, paths))
+                else:
+                    results = [self._parse_manifest(path) for path in paths]
+                for (entry, _, fingerprint), (manifest, error) in zip(to_parse, results):
+                    entry[2], entry[3] = manifest, error
+                    if error is None:
+                        self._manifests[entry[1]] = {"stat": fingerprint, "manifest": manifest}
+                        self.stats["parsed"] += 1
+                        self._dirty = True
+                    else:
+                        if self._manifests.pop(entry[1], None) is not None:
+                            self._dirty = True
+                        self.stats["errors"] += 1
+            return [tuple(entry) for entry in entries]
+def get_component_index(data_path: str = None) -> ComponentIndex:
+    """The process-wide index (the parent's, when inherited by a forked worker), created on first use."""
+    index = Singleton.get_instance(COMPONENT_INDEX_SINGLETON_KEY)
+    if index is None:
+        Singleton.set_instance(
+            COMPONENT_INDEX_SINGLETON_KEY,
+            ComponentIndex(os.path.join(data_path, COMPONENT_INDEX_FILE) if data_path else None),
+        )
+        index = Singleton.get_instance(COMPONENT_INDEX_SINGLETON_KEY)
+    return index
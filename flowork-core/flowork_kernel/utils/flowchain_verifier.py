@@ -1,13 +1,18 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\utils\flowchain_verifier.py total lines 74 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\utils\flowchain_verifier.py total lines 119 
 ########################################################################
 
 import json
 import hashlib
 import os
+import threading
+from collections import OrderedDict
 from web3.auto import w3
 from eth_account.messages import encode_defunct
+CHAIN_CACHE_SIZE = int(os.getenv("CORE_FLOWCHAIN_CACHE_SIZE", "2048")) # (English Hardcode) Verified workflow directories remembered
+_verified_chains = OrderedDict() # (English Hardcode) directory -> [(filename, size, mtime_ns, sha256)] of the verified prefix
+_verified_chains_lock = threading.Lock()
 def calculate_hash(file_path):
     """Calculates the SHA-256 hash of a file."""
     sha256 = hashlib.sha256()
@@ -18,12 +23,50 @@ def calculate_hash(file_path):
         return sha256.hexdigest()
     except IOError:
         return None
-def verify_workflow_chain(workflow_directory):
+def _version_number(filename):
+    return int(filename.split('_')[0][1:])
+def _file_fingerprint(file_path):
+    stat_result = os.stat(file_path)
+    return stat_result.st_size, stat_result.st_mtime_ns
+def invalidate_chain_cache(workflow_directory=None):
+    """Forgets the verified prefix of one workflow directory (or of all of them)."""
+    with _verified_chains_lock:
+        if workflow_directory is None:
+            _verified_chains.clear()
+        else:
+            _verified_chains.pop(os.path.abspath(workflow_directory), None)
+def _verify_version(file_path, filename, is_first, previous_file_hash):
+    """Checks signature and back-link of one version file. Returns its SHA-256 (hashed from the bytes already read)."""
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    data = json.loads(raw.decode('utf-8'))
+    signature = data.get('signature')
+    author_id = data.get('author_id')
+    workflow_data = data.get('workflow_data')
+    if not signature or not author_id or workflow_data is None:
+        raise ValueError(f"File {filename} is corrupt: missing signature, author_id, or workflow_data") # English Hardcode
+    unsigned_data_block = {"workflow_data": workflow_data}
+    message_to_verify = json.dumps(unsigned_data_block, sort_keys=True, separators=(',', ':'))
+    encoded_message = encode_defunct(text=message_to_verify)
+    recovered_address = w3.eth.account.recover_message(encoded_message, signature=signature)
+    if recovered_address.lower() != author_id.lower():
+        raise ValueError(f"Invalid signature in version {data.get('version', filename)}. Address mismatch.") # English Hardcode
+    if is_first: # Ini adalah file pertama (v1)
+        if data.get('previous_hash') is not None:
+             raise ValueError(f"Chain broken at {filename}: First version file should have null previous_hash.") # English Hardcode
+    else: # Ini v2, v3, dst.
+        if data.get('previous_hash') != previous_file_hash:
+            raise ValueError(f"Chain broken at {filename}! Hash mismatch. Expected {previous_file_hash}, got {data.get('previous_hash')}") # English Hardcode
+    return hashlib.sha256(raw).hexdigest()
+def verify_workflow_chain(workflow_directory, full_audit=False):
     """
     Verifies the entire history chain of a workflow,
     from the newest version down to the first.
     (PERBAIKAN) Logika verifikasi tanda tangan disesuaikan agar cocok
     dengan apa yang ditandatangani oleh klien (GUI).
+    Versions that were already verified and whose file name, size and mtime are unchanged are
+    taken from the cache (with their stored hash), so a normal load only verifies newly appended
+    versions. full_audit=True ignores the cache and re-checks every file (integrity scans).
     """
     if not os.path.isdir(workflow_directory):
         print(f"[Verifier] Directory not found: {workflow_directory}") # English Hardcode
@@ -31,7 +74,7 @@ def verify_workflow_chain(workflow_directory):
     try:
         files = sorted(
             [f for f in os.listdir(workflow_directory) if f.endswith('.json') and f.startswith('v')],
-            key=lambda f: int(f.split('_')[0][1:]) # Urutkan berdasarkan nomor versi
+            key=_version_number # Urutkan berdasarkan nomor versi
         )
     except FileNotFoundError:
         print(f"[Verifier] Directory not found during list: {workflow_directory}") # English Hardcode
@@ -42,32 +85,34 @@ def verify_workflow_chain(workflow_directory):
     if not files:
         print(f"[Verifier] No version files found in: {workflow_directory}") # English Hardcode
         return True, "No versions found, chain is valid by default." # Empty is valid
+    cache_key = os.path.abspath(workflow_directory)
+    cached = []
+    if not full_audit:
+        with _verified_chains_lock:
+            cached = _verified_chains.get(cache_key, [])
+    verified = []
+    newly_verified = 0
     previous_file_hash = None
     for i, filename in enumerate(files):
         file_path = os.path.join(workflow_directory, filename)
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            signature = data.get('signature')
-            author_id = data.get('author_id')
-            workflow_data = data.get('workflow_data')
-            if not signature or not author_id or workflow_data is None:
-                raise ValueError(f"File {filename} is corrupt: missing signature, author_id, or workflow_data") # English Hardcode
-            unsigned_data_block = {"workflow_data": workflow_data}
-            message_to_verify = json.dumps(unsigned_data_block, sort_keys=True, separators=(',', ':'))
-            encoded_message = encode_defunct(text=message_to_verify)
-            recovered_address = w3.eth.account.recover_message(encoded_message, signature=signature)
-            if recovered_address.lower() != author_id.lower():
-                raise ValueError(f"Invalid signature in version {data.get('version', filename)}. Address mismatch.") # English Hardcode
-            if i == 0: # Ini adalah file pertama (v1)
-                if data.get('previous_hash') is not None:
-                     raise ValueError(f"Chain broken at {filename}: First version file should have null previous_hash.") # English Hardcode
-            else: # Ini v2, v3, dst.
-                if data.get('previous_hash') != previous_file_hash:
-                    raise ValueError(f"Chain broken at {filename}! Hash mismatch. Expected {previous_file_hash}, got {data.get('previous_hash')}") # English Hardcode
-            previous_file_hash = calculate_hash(file_path)
+            size, mtime_ns = _file_fingerprint(file_path)
+            if i < len(cached) and cached[i][:3] == (filename, size, mtime_ns):
+                previous_file_hash = cached[i][3]
+            else:
+                cached = [] # (English Hardcode) Everything after a changed file is re-verified against the new hashes
+                previous_file_hash = _verify_version(file_path, filename, i == 0, previous_file_hash)
+                newly_verified += 1
+            verified.append((filename, size, mtime_ns, previous_file_hash))
         except Exception as e:
+            invalidate_chain_cache(workflow_directory)
             print(f"[Verifier] CRITICAL: Chain verification failed for {filename}: {e}") # English Hardcode
             return False, f"Verification failed for {filename}: {e}"
-    print(f"[Verifier] Workflow '{os.path.basename(workflow_directory)}' chain is valid and secure.") # English Hardcode
+    with _verified_chains_lock:
+        _verified_chains[cache_key] = verified
+        _verified_chains.move_to_end(cache_key)
+        while len(_verified_chains) > CHAIN_CACHE_SIZE:
+            _verified_chains.popitem(last=False)
+    if newly_verified:
+        print(f"[Verifier] Workflow '{os.path.basename(workflow_directory)}' chain is valid and secure ({newly_verified} version(s) verified).") # English Hardcode
     return True, "Chain verified."
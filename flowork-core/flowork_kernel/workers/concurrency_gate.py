@@ -0,0 +1,83 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\workers\concurrency_gate.py total lines 84 
+########################################################################
+
+import os
+import multiprocessing
+def _pid_alive(pid: int) -> bool:
+    """False once `pid` exited, also while it is an unreaped zombie (Linux /proc)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            return f.read().rsplit(b")", 1)[1].split()[0] != b"Z"
+    except (OSError, IndexError):
+        return True
+class ModuleConcurrencyGate:
+    """
+    Engine-wide max_concurrency per component, shared by every job worker process.
+
+    The in-process instance pool of ModuleManagerService only limits the threads of one worker;
+    with one worker per CPU a heavy module (e.g. Stable Diffusion XL) could still run on every
+    worker at once. The gate holds one bounded semaphore per limited component, so at most
+    `limit` workers run it at the same time. Components without a declared limit pass freely.
+    Each taken slot records the holder's PID; when a component is full, slots of workers that
+    died without releasing them are reclaimed before waiting.
+    Must be created in the parent before the worker processes are started.
+    """
+    def __init__(self, limits: dict, ctx=None):
+        ctx = ctx or multiprocessing
+        self.limits = {component_id: int(limit) for component_id, limit in (limits or {}).items() if limit}
+        self._slots = {component_id: ctx.BoundedSemaphore(limit) for component_id, limit in self.limits.items()}
+        self._holders = {component_id: ctx.Array("i", limit) for component_id, limit in self.limits.items()} # (English Hardcode) PID per taken slot, 0 = free
+    def is_limited(self, component_id: str) -> bool:
+        return component_id in self._slots
+    def acquire(self, component_id: str, timeout: float = None) -> bool:
+        """Takes one run slot. Returns False on timeout; always True for unlimited components."""
+        slots = self._slots.get(component_id)
+        if slots is None:
+            return True
+        acquired = slots.acquire(block=False)
+        if not acquired and self.reclaim_dead(component_id):
+            acquired = slots.acquire(block=False)
+        if not acquired and (timeout is None or timeout > 0):
+            acquired = slots.acquire(timeout=timeout)
+        if acquired:
+            holders = self._holders[component_id]
+            with holders.get_lock():
+                for index, pid in enumerate(holders):
+                    if pid == 0:
+                        holders[index] = os.getpid()
+                        break
+        return acquired
+    def release(self, component_id: str):
+        slots = self._slots.get(component_id)
+        if slots is None:
+            return
+        holders = self._holders[component_id]
+        pid = os.getpid()
+        with holders.get_lock():
+            for index, holder in enumerate(holders):
+                if holder == pid:
+                    holders[index] = 0
+                    break
+        slots.release()
+    def reclaim_dead(self, component_id: str = None) -> int:
+        """Frees the slots held by processes that no longer run. Returns the number of slots freed."""
+        reclaimed = 0
+        for gated_id in ([component_id] if component_id is not None else list(self._holders)):
+            holders = self._holders.get(gated_id)
+            if holders is None:
+                continue
+            with holders.get_lock():
+                for index, pid in enumerate(holders):
+                    if pid and not _pid_alive(pid):
+                        holders[index] = 0
+                        self._slots[gated_id].release()
+                        reclaimed += 1
+        return reclaimed
@@ -0,0 +1,193 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\workers\graph_cache.py total lines 194 
+########################################################################
+
+import os
+import json
+import logging
+import threading
+from collections import OrderedDict
+from flowork_kernel.execution.VariableResolver import CompiledTemplate
+GRAPH_EPOCH_SINGLETON_KEY = "workflow_graph_epoch" # (English Hardcode) Shared multiprocessing.Value bumped on every preset save/delete
+GRAPH_CACHE_MAX_ENTRIES = int(os.getenv("CORE_GRAPH_CACHE_SIZE", "256"))
+def _clone_json_tree(value):
+    """
+    Cheap copy for structures that came out of json.loads (dict/list/scalars only).
+    Much faster than copy.deepcopy because there is no memo bookkeeping.
+    """
+    if isinstance(value, dict):
+        return {k: _clone_json_tree(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_clone_json_tree(v) for v in value]
+    return value
+def analyze_dag(node_ids, edges):
+    """
+    Static scheduling facts for a workflow graph, given node ids and (source, target) edges.
+    Returns (priority, join_parents):
+      - priority[node]: number of nodes on the longest path from `node` to a sink
+        (critical-path rank, higher runs first).
+      - join_parents[node]: parents a join node (2+ incoming edges) must wait for. Edges that
+        close a cycle (source reachable from target) are excluded, so loops never deadlock a join.
+    """
+    node_ids = list(dict.fromkeys(list(node_ids) + [n for edge in edges for n in edge]))
+    children = {n: [] for n in node_ids}
+    parents = {n: [] for n in node_ids}
+    for source, target in edges:
+        children[source].append(target)
+        parents[target].append(source)
+    reach_memo = {}
+    def _reachable_from(start):
+        if start not in reach_memo:
+            seen, stack = set(), [start]
+            while stack:
+                for child in children[stack.pop()]:
+                    if child not in seen:
+                        seen.add(child)
+                        stack.append(child)
+            reach_memo[start] = seen
+        return reach_memo[start]
+    acyclic_children = {n: [] for n in node_ids}
+    in_degree = {n: 0 for n in node_ids}
+    join_parents = {}
+    for target in node_ids:
+        forward_parents = []
+        for source in parents[target]:
+            if source == target or source in _reachable_from(target):
+                continue # (English Hardcode) Back edge of a loop
+            forward_parents.append(source)
+            acyclic_children[source].append(target)
+            in_degree[target] += 1
+        unique_parents = tuple(dict.fromkeys(forward_parents))
+        if len(unique_parents) > 1:
+            join_parents[target] = unique_parents
+    order, ready = [], [n for n in node_ids if in_degree[n] == 0]
+    while ready:
+        node = ready.pop()
+        order.append(node)
+        for child in acyclic_children[node]:
+            in_degree[child] -= 1
+            if in_degree[child] == 0:
+                ready.append(child)
+    priority = {}
+    for node in reversed(order):
+        priority[node] = 1 + max((priority.get(child, 0) for child in acyclic_children[node]), default=0)
+    return priority, join_parents
+class CompiledWorkflowGraph:
+    """
+    (Worker Process) Read-only, pre-parsed view of one workflow version:
+    node module ids, parsed node configs compiled into variable templates, adjacency lists in
+    both directions and the scheduling facts from analyze_dag (critical-path priority, join parents).
+    """
+    __slots__ = ("workflow_id", "version", "nodes", "templates", "downstream", "upstream", "priority", "join_parents")
+    def __init__(self, workflow_id, version, node_rows, edge_rows):
+        self.workflow_id = workflow_id
+        self.version = version
+        self.nodes = {}
+        for node_id, node_type, config_json in node_rows:
+            self.nodes[node_id] = (node_type, json.loads(config_json) if config_json else {})
+        self.templates = {node_id: CompiledTemplate(entry[1]) for node_id, entry in self.nodes.items()}
+        downstream, upstream = {}, {}
+        for source_node_id, target_node_id in edge_rows:
+            downstream.setdefault(source_node_id, []).append(target_node_id)
+            upstream.setdefault(target_node_id, []).append(source_node_id)
+        self.downstream = {k: tuple(v) for k, v in downstream.items()}
+        self.upstream = {k: tuple(v) for k, v in upstream.items()}
+        self.priority, self.join_parents = analyze_dag(self.nodes.keys(), edge_rows)
+    def node_details(self, node_id, lookup=None):
+        """
+        Returns (module_id, config) like _db_get_node_details. The config is a private copy the caller may mutate.
+        With `lookup(var_name)`, `{{vars.NAME}}` placeholders are filled in from the precompiled template.
+        """
+        entry = self.nodes.get(node_id)
+        if entry is None:
+            return None, None
+        if lookup is not None:
+            return entry[0], self.templates[node_id].render(lookup)
+        return entry[0], _clone_json_tree(entry[1])
+    def downstream_nodes(self, node_id):
+        return list(self.downstream.get(node_id, ()))
+class WorkflowGraphCache:
+    """
+    (Worker Process) LRU of CompiledWorkflowGraph keyed by workflow_id.
+
+    Entries are validated against the `graph_version` stamp that PresetManagerService.save_preset
+    writes into the Workflows table. When the shared epoch counter is available, a stamp is only
+    re-read after the epoch moved (i.e. after some preset was saved or deleted), so hot workflows
+    never touch SQLite for graph metadata. Without the epoch, every lookup costs one PK read.
+    """
+    def __init__(self, max_entries: int = GRAPH_CACHE_MAX_ENTRIES, epoch=None):
+        self.max_entries = max(1, max_entries)
+        self.epoch = epoch
+        self._entries = OrderedDict()
+        self._needs_check = set()
+        self._seen_epoch = self._read_epoch()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    def _read_epoch(self):
+        if self.epoch is None:
+            return None
+        return self.epoch.value
+    def invalidate(self, workflow_id=None):
+        with self._lock:
+            if workflow_id is None:
+                self._entries.clear()
+                self._needs_check.clear()
+            else:
+                self._entries.pop(workflow_id, None)
+                self._needs_check.discard(workflow_id)
+    def get(self, db_conn, workflow_id):
+        """
+        Returns the compiled graph for `workflow_id`, or None if the workflow is not in the
+        Workflows table (callers then fall back to the per-node queries).
+        Signature matches _db_retry_wrapper (db_conn first).
+        """
+        if not workflow_id:
+            return None
+        current_epoch = self._read_epoch() # (English Hardcode) Read BEFORE touching the DB so a concurrent save is never missed
+        with self._lock:
+            if current_epoch is not None and current_epoch != self._seen_epoch:
+                self._needs_check.update(self._entries.keys())
+                self._seen_epoch = current_epoch
+            graph = self._entries.get(workflow_id)
+            must_check = graph is None or current_epoch is None or workflow_id in self._needs_check
+            if graph is not None and not must_check:
+                self._entries.move_to_end(workflow_id)
+                self.hits += 1
+                return graph
+        cursor = db_conn.cursor()
+        cursor.execute("SELECT graph_version FROM Workflows WHERE workflow_id = ?", (workflow_id,))
+        row = cursor.fetchone()
+        if not row:
+            self.invalidate(workflow_id)
+            return None
+        version = row[0]
+        if graph is not None and graph.version == version:
+            with self._lock:
+                self._needs_check.discard(workflow_id)
+                if workflow_id in self._entries:
+                    self._entries.move_to_end(workflow_id)
+                self.hits += 1
+            return graph
+        cursor.execute("SELECT node_id, node_type, config_json FROM Nodes WHERE workflow_id = ?", (workflow_id,))
+        node_rows = cursor.fetchall()
+        cursor.execute("SELECT source_node_id, target_node_id FROM Edges WHERE workflow_id = ? ORDER BY edge_id", (workflow_id,))
+        edge_rows = cursor.fetchall()
+        graph = CompiledWorkflowGraph(workflow_id, version, node_rows, edge_rows)
+        with self._lock:
+            self.misses += 1
+            self._entries[workflow_id] = graph
+            self._entries.move_to_end(workflow_id)
+            self._needs_check.discard(workflow_id)
+            while len(self._entries) > self.max_entries:
+                evicted_id, _ = self._entries.popitem(last=False)
+                self._needs_check.discard(evicted_id)
+        logging.debug(f"[GraphCache] Compiled workflow '{workflow_id}' (version {version}): {len(graph.nodes)} nodes.") # English Hardcode
+        return graph
+def bump_graph_epoch(epoch):
+    """(Main Process) Tells every worker's WorkflowGraphCache to re-validate its entries."""
+    if epoch is None:
+        return
+    with epoch.get_lock():
+        epoch.value += 1
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\workers\job_worker.py total lines 365 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\workers\job_worker.py total lines 659 
 ########################################################################
 
 import os
@@ -8,15 +8,17 @@ import logging
 import time
 import json
 import sqlite3 # <-- START ADDED CODE (FIX - RISK #2)
-import random  # <-- START ADDED CODE (FIX - RISK #2)
 import uuid # (English Hardcode) Needed for creating new job IDs
-import multiprocessing # <-- START ADDED CODE (FIX - RISK #7)
 import sys
 import asyncio
+import signal
+import collections
+import contextlib
 from flowork_kernel.singleton import Singleton
 from flowork_kernel.services.database_service.database_service import DatabaseService
 from flowork_kernel.kernel_logic import Kernel # (FIX) Menggunakan kernel_logic
 from flowork_kernel.services.module_manager_service.module_manager_service import ModuleManagerService
+from flowork_kernel.services.module_manager_service.instance_pool import ConcurrencyContract, CONCURRENCY_PROCESS
 from flowork_kernel.services.plugin_manager_service.plugin_manager_service import PluginManagerService
 from flowork_kernel.services.tools_manager_service.tools_manager_service import ToolsManagerService
 from flowork_kernel.services.trigger_manager_service.trigger_manager_service import TriggerManagerService
@@ -25,66 +27,158 @@ from flowork_kernel.services.preset_manager_service.preset_manager_service impor
 from flowork_kernel.services.variable_manager_service.variable_manager_service import VariableManagerService
 from flowork_kernel.services.localization_manager_service.localization_manager_service import LocalizationManagerService
 from flowork_kernel.services.gateway_connector_service.gateway_connector_service import GatewayConnectorService
-from flowork_kernel.services.workflow_executor_service.workflow_executor_service import WorkflowExecutorService
+from flowork_kernel.services.workflow_executor_service.workflow_executor_service import WorkflowExecutorService, DagScheduler
+from flowork_kernel.services.state_manager_service.state_manager_service import StateManagerService
 from flowork_kernel.services.base_service import BaseService
-from .watchdog import JobWatchdog
-MAX_DB_RETRIES = 5
+from flowork_kernel.services.database_service.payload_store import prepare_payload, store_payload, release_payload, load_payload
+from flowork_kernel.services.database_service.connection_pool import run_with_busy_retry
+from flowork_kernel.execution.VariableResolver import CompiledTemplate
+from .watchdog import JobWatchdog, IsolatedProcessRunner
+from .graph_cache import WorkflowGraphCache, GRAPH_EPOCH_SINGLETON_KEY
+from .wakeup import JobWakeupChannel
+from .concurrency_gate import ModuleConcurrencyGate
 POLL_INTERVAL_SECONDS = 0.5 # (English Hardcode) Re-adding this definition to fix NameError in the final exception block
+CLAIM_BATCH_SIZE = max(1, int(os.getenv("CORE_CLAIM_BATCH_SIZE", "4"))) # (English Hardcode) Jobs claimed per write transaction
+CLAIM_LEASE_SECONDS = int(os.getenv("CORE_CLAIM_LEASE_SECONDS", "300")) # (English Hardcode) Lease on prefetched jobs
+LEASE_SAFETY_MARGIN_SECONDS = 5
+LEASE_REAP_INTERVAL_SECONDS = 30
+IDLE_WAIT_SECONDS = 1.0 # (English Hardcode) Upper bound on an idle wait so shutdown requests are noticed
+ISOLATED_MAX_JOBS_PER_CHILD = int(os.getenv("CORE_ISOLATED_MAX_JOBS_PER_CHILD", "50"))
+_dag_scheduler = DagScheduler()
 class MockService(BaseService):
     def __init__(self, kernel, service_id):
         super().__init__(kernel, service_id)
 def _db_retry_wrapper(db_conn, func, *args, **kwargs):
-    """Wraps any DB function with retry logic for SQLITE_BUSY."""
-    pid = os.getpid()
-    for attempt in range(MAX_DB_RETRIES):
-        try:
-            return func(db_conn, *args, **kwargs)
-        except sqlite3.Error as e:
-            if 'locked' in str(e) or 'busy' in str(e): # (English Hardcode) Check for busy/locked
-                logging.warning(f"[Worker PID {pid}] DB Busy/Locked on attempt {attempt+1}/{MAX_DB_RETRIES}. Retrying...") # English Hardcode
-                if attempt == MAX_DB_RETRIES - 1:
-                    logging.critical(f"[Worker PID {pid}] DB failed permanently after {MAX_DB_RETRIES} retries.") # English Hardcode
-                    raise # Re-raise the final exception
-                sleep_time = random.uniform(0.1, 0.5) * (2 ** attempt) # Exponential backoff
-                time.sleep(sleep_time)
-            else:
-                logging.error(f"[Worker PID {pid}] Unhandled DB Error: {e}", exc_info=True) # English Hardcode
-                raise # Re-raise other DB errors immediately
-        except Exception as e:
-            logging.error(f"[Worker PID {pid}] Non-DB Error in wrapper: {e}", exc_info=True) # English Hardcode
-            raise # Re-raise non-DB errors
-    return None # Should not be reached
-def _db_atomic_claim_job(db_conn):
-    """(Worker Process) Atomically claims one PENDING job."""
+    """Wraps any DB function with the shared SQLITE_BUSY retry policy of DatabaseService."""
+    return run_with_busy_retry(db_conn, func, *args, **kwargs)
+def _db_claim_job_batch(db_conn, worker_tag, batch_size, lease_seconds):
+    """
+    (Worker Process) Atomically claims up to `batch_size` PENDING jobs in ONE write transaction.
+    The claimed rows are marked RUNNING with a lease, so a crashed worker's prefetch can be reaped.
+    Jobs of the oldest execution (lowest exec_seq, the Executions rowid copied onto each job) go
+    first; the critical-path priority only orders jobs within one execution, so a stream of new runs
+    cannot starve the tail of an older one. Jobs without an Executions row have no exec_seq and go
+    first. The order is served by idx_jobs_status_exec_seq, so no sort runs under the write lock.
+    """
     cursor = db_conn.cursor()
     cursor.execute("BEGIN IMMEDIATE;")
     try:
         cursor.execute(
-            "SELECT job_id, execution_id, node_id, input_data, workflow_id, user_id FROM Jobs " # (MODIFIED) Get workflow_id and user_id too
-            "WHERE status = 'PENDING' ORDER BY created_at ASC LIMIT 1"
+            "SELECT job_id FROM Jobs WHERE status = 'PENDING' "
+            "ORDER BY exec_seq ASC, priority DESC, created_at ASC LIMIT ?",
+            (batch_size,)
         )
-        row = cursor.fetchone()
-        if row:
-            job_id, execution_id, node_id, input_data, workflow_id, user_id = row
+        claim_order = {row[0]: index for index, row in enumerate(cursor.fetchall())}
+        rows = []
+        if claim_order:
+            placeholders = ",".join("?" for _ in claim_order)
             cursor.execute(
-                "UPDATE Jobs SET status = 'RUNNING', started_at = CURRENT_TIMESTAMP "
-                "WHERE job_id = ?", (job_id,)
+                "UPDATE Jobs SET status = 'RUNNING', started_at = CURRENT_TIMESTAMP, "
+                "claimed_by = ?, lease_expires_at = datetime('now', ?) "
+                f"WHERE job_id IN ({placeholders}) AND +status = 'PENDING' " # (English Hardcode) Unary + keeps the planner on the primary key, not the status indexes
+                "RETURNING job_id, execution_id, node_id, input_data, workflow_id, user_id, input_payload_hash",
+                (worker_tag, f"+{int(lease_seconds)} seconds", *claim_order) # English Hardcode
             )
-            db_conn.commit()
-            return {
-                'job_id': job_id,
-                'execution_id': execution_id,
-                'node_id': node_id,
-                'input_data': input_data,
-                'workflow_id': workflow_id, # (ADDED)
-                'user_id': user_id # (ADDED)
-            }
-        else:
-            db_conn.commit() # Commit (release lock) even if no job was found
-            return None
+            rows = cursor.fetchall() # (English Hardcode) RETURNING rows must be read before COMMIT
+        db_conn.commit()
     except Exception as e:
         db_conn.rollback() # Rollback on error
         raise e # Re-raise to be caught by _db_retry_wrapper
+    rows.sort(key=lambda r: claim_order[r[0]]) # (English Hardcode) RETURNING order is unspecified
+    return [
+        {
+            'job_id': job_id,
+            'execution_id': execution_id,
+            'node_id': node_id,
+            'input_data': input_data,
+            'workflow_id': workflow_id,
+            'user_id': user_id,
+            'input_payload_hash': input_payload_hash
+        }
+        for job_id, execution_id, node_id, input_data, workflow_id, user_id, input_payload_hash in rows
+    ]
+def _db_load_job_input(db_conn, job):
+    """(Worker Process) Resolves the job's input, either inline JSON or a reference into the payload store."""
+    return load_payload(db_conn.cursor(), job['input_data'], job.get('input_payload_hash'), default={})
+def _db_release_jobs(db_conn, worker_tag, job_ids):
+    """(Worker Process) Hands prefetched-but-unstarted jobs back to the PENDING queue."""
+    if not job_ids:
+        return 0
+    cursor = db_conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE;")
+    try:
+        placeholders = ",".join("?" for _ in job_ids)
+        cursor.execute(
+            "UPDATE Jobs SET status = 'PENDING', started_at = NULL, claimed_by = NULL, lease_expires_at = NULL "
+            f"WHERE status = 'RUNNING' AND claimed_by = ? AND job_id IN ({placeholders})",
+            (worker_tag, *job_ids)
+        )
+        released = cursor.rowcount
+        db_conn.commit()
+        return released
+    except Exception as e:
+        db_conn.rollback()
+        raise e
+def _db_extend_lease(db_conn, worker_tag, job_id, lease_seconds):
+    """(Worker Process) Pushes a claimed job's lease out to cover a deadline longer than the claim lease."""
+    cursor = db_conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE;")
+    try:
+        cursor.execute(
+            "UPDATE Jobs SET lease_expires_at = datetime('now', ?) "
+            "WHERE status = 'RUNNING' AND claimed_by = ? AND job_id = ?",
+            (f"+{int(lease_seconds)} seconds", worker_tag, job_id) # English Hardcode
+        )
+        extended = cursor.rowcount
+        db_conn.commit()
+        return extended
+    except Exception as e:
+        db_conn.rollback()
+        raise e
+def _db_reap_expired_leases(db_conn):
+    """(Worker Process) Returns jobs whose claim lease expired (e.g. the claiming worker died) to PENDING."""
+    cursor = db_conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE;")
+    try:
+        cursor.execute(
+            "UPDATE Jobs SET status = 'PENDING', started_at = NULL, claimed_by = NULL, lease_expires_at = NULL "
+            "WHERE status = 'RUNNING' AND lease_expires_at IS NOT NULL AND lease_expires_at < CURRENT_TIMESTAMP"
+        )
+        reaped = cursor.rowcount
+        db_conn.commit()
+        return reaped
+    except Exception as e:
+        db_conn.rollback()
+        raise e
+class JobPrefetchBuffer:
+    """
+    (Worker Process) Local FIFO of jobs claimed in one batch but not started yet.
+    Each entry remembers its lease deadline on the monotonic clock, mirroring `lease_expires_at` in the DB.
+    """
+    def __init__(self, lease_seconds: int):
+        self.lease_seconds = lease_seconds
+        self._jobs = collections.deque()
+    def __len__(self):
+        return len(self._jobs)
+    def extend(self, jobs, claimed_at: float):
+        lease_deadline = claimed_at + self.lease_seconds
+        for job in jobs:
+            job['lease_deadline'] = lease_deadline
+            self._jobs.append(job)
+    def pop(self):
+        return self._jobs.popleft() if self._jobs else None
+    def drain_expiring(self, min_remaining_seconds: float):
+        """Removes and returns the jobs that could not finish before their lease runs out."""
+        now = time.monotonic()
+        kept, expiring = collections.deque(), []
+        for job in self._jobs:
+            (expiring if job['lease_deadline'] - now < min_remaining_seconds else kept).append(job)
+        self._jobs = kept
+        return expiring
+    def drain_all(self):
+        jobs = list(self._jobs)
+        self._jobs.clear()
+        return jobs
 def execute_node_logic(node_id, module_id, config_json, input_data):
     """
     (Worker Process - BUKAN PLACEHOLDER LAGI)
@@ -98,31 +192,33 @@ def execute_node_logic(node_id, module_id, config_json, input_data):
         tools_manager = Singleton.get_instance(ToolsManagerService)
         if not module_manager or not plugin_manager or not tools_manager:
             raise Exception("Component Managers not found in worker Singleton.") # English Hardcode
-        module_instance = None
         if module_id in module_manager.loaded_modules:
-            module_instance = module_manager.get_instance(module_id)
+            instance_lease = module_manager.lease_instance(module_id) # (English Hardcode) Honors the manifest concurrency contract
         elif module_id in plugin_manager.loaded_plugins:
-            module_instance = plugin_manager.get_instance(module_id)
+            instance_lease = contextlib.nullcontext(plugin_manager.get_instance(module_id))
         elif module_id in tools_manager.loaded_tools:
-            module_instance = tools_manager.get_instance(module_id)
-        if not module_instance:
-            raise Exception(f"Component instance for '{module_id}' could not be loaded from any manager.") # English Hardcode
+            instance_lease = contextlib.nullcontext(tools_manager.get_instance(module_id))
+        else:
+            instance_lease = contextlib.nullcontext(None)
         def _dummy_status_updater(status_code, message, log_level):
             logging.info(f"[{log_level}] {message}")
-        if asyncio.iscoroutinefunction(module_instance.execute):
-            result = asyncio.run(module_instance.execute(
-                payload=input_data,
-                config=config_json,
-                status_updater=_dummy_status_updater,
-                mode='EXECUTE' # English Hardcode
-            ))
-        else:
-            result = module_instance.execute(
-                payload=input_data,
-                config=config_json,
-                status_updater=_dummy_status_updater,
-                mode='EXECUTE' # English Hardcode
-            )
+        with instance_lease as module_instance:
+            if not module_instance:
+                raise Exception(f"Component instance for '{module_id}' could not be loaded from any manager.") # English Hardcode
+            if asyncio.iscoroutinefunction(module_instance.execute):
+                result = asyncio.run(module_instance.execute(
+                    payload=input_data,
+                    config=config_json,
+                    status_updater=_dummy_status_updater,
+                    mode='EXECUTE' # English Hardcode
+                ))
+            else:
+                result = module_instance.execute(
+                    payload=input_data,
+                    config=config_json,
+                    status_updater=_dummy_status_updater,
+                    mode='EXECUTE' # English Hardcode
+                )
         logging.info(f"[Worker PID {pid}]: FINISHED node {node_id}.") # English Hardcode
         if isinstance(result, Exception):
             raise result
@@ -134,6 +230,45 @@ def execute_node_logic(node_id, module_id, config_json, input_data):
     except Exception as e:
         logging.error(f"[Worker PID {pid}]: FAILED node {node_id}. Error: {e}", exc_info=True) # English Hardcode
         return e
+def _get_isolation_policy(module_id):
+    """
+    (Worker Process) Returns the manifest `isolation` block when a component opted in to
+    process-isolated execution, e.g. {"mode": "process", "memory_limit_mb": 12288,
+    "cpu_limit_seconds": 900, "deadline_seconds": 900, "max_jobs_per_child": 20}. A
+    `"concurrency": "process-isolated"` contract without an isolation block gets the default
+    limits. `deadline_seconds` replaces CORE_JOB_DEADLINE_SECONDS for that component's jobs.
+    None means in-thread execution.
+    """
+    for manager_class, items_attr in (
+        (ModuleManagerService, "loaded_modules"),
+        (PluginManagerService, "loaded_plugins"),
+        (ToolsManagerService, "loaded_tools"),
+    ):
+        manager = Singleton.get_instance(manager_class)
+        component = getattr(manager, items_attr, {}).get(module_id) if manager else None
+        if component:
+            manifest = component.get("manifest", {})
+            policy = manifest.get("isolation")
+            if isinstance(policy, dict) and policy.get("mode") == "process": # English Hardcode
+                return policy
+            try:
+                is_isolated = ConcurrencyContract.from_manifest(manifest).mode == CONCURRENCY_PROCESS
+            except (TypeError, ValueError):
+                is_isolated = False
+            return {"mode": "process"} if is_isolated else None # English Hardcode
+    return None
+def _get_isolated_runner(runners, module_id, policy):
+    """(Worker Process) One supervised child per isolated component, so its models stay warm between jobs."""
+    runner = runners.get(module_id)
+    if runner is None:
+        runner = IsolatedProcessRunner(
+            module_id,
+            memory_limit_mb=policy.get("memory_limit_mb"),
+            cpu_limit_seconds=policy.get("cpu_limit_seconds"),
+            max_jobs_per_child=policy.get("max_jobs_per_child", ISOLATED_MAX_JOBS_PER_CHILD)
+        )
+        runners[module_id] = runner
+    return runner
 def _db_get_downstream_nodes(db_conn, workflow_id, source_node_id):
     """
     (Worker Process) Queries the Edges table to find all downstream nodes.
@@ -148,15 +283,15 @@ def _db_get_downstream_nodes(db_conn, workflow_id, source_node_id):
     except Exception as e:
         logging.error(f"[Worker PID {pid}]: Failed to get downstream nodes for {source_node_id}: {e}") # English Hardcode
         raise # (MODIFIED) Re-raise the exception to be caught by the retry wrapper
-def _db_get_node_details(db_conn, node_id):
+def _db_get_node_details(db_conn, workflow_id, node_id):
     """
     (Worker Process) Gets the node's module_id (node_type) and config.
     """
     pid = os.getpid()
     try:
         cursor = db_conn.cursor()
-        query = "SELECT node_type, config_json FROM Nodes WHERE node_id = ?" # English Hardcode
-        cursor.execute(query, (node_id,))
+        query = "SELECT node_type, config_json FROM Nodes WHERE workflow_id = ? AND node_id = ?" # English Hardcode
+        cursor.execute(query, (workflow_id, node_id))
         row = cursor.fetchone()
         if row:
             return row[0], json.loads(row[1]) if row[1] else {}
@@ -164,44 +299,69 @@ def _db_get_node_details(db_conn, node_id):
     except Exception as e:
         logging.error(f"[Worker PID {pid}]: Failed to get node details for {node_id}: {e}") # English Hardcode
         raise # (MODIFIED) Re-raise the exception to be caught by the retry wrapper
-def _db_finish_job(db_conn, job_id, execution_id, user_id, workflow_id, downstream_nodes, output_data):
-    """Atomically marks the current job as DONE and queues up the next jobs."""
+def _db_finish_job(db_conn, job_id, execution_id, user_id, workflow_id, downstream_nodes, output_data, graph=None, node_id=None):
+    """
+    Atomically marks the current job as DONE and queues up the next jobs.
+    The output is serialized once; large outputs are stored once in the payload store and
+    referenced by the parent row and every downstream job instead of being copied N+1 times.
+    With a compiled `graph`, fan-out goes through the DagScheduler (joins fire once, jobs carry
+    their critical-path priority); otherwise every downstream node is queued once per parent.
+    """
+    prepared = prepare_payload(output_data) # (English Hardcode) Serialize/hash/compress BEFORE taking the write lock
     cursor = db_conn.cursor()
     cursor.execute("BEGIN IMMEDIATE;")
     try:
+        if graph is not None:
+            queued, references = _dag_scheduler.fan_out(
+                cursor, graph, execution_id, workflow_id, user_id, node_id, prepared, output_data
+            )
+            inline_output, output_hash = store_payload(cursor, prepared, 1 + references)
+        else:
+            inline_output, output_hash = store_payload(cursor, prepared, 1 + len(downstream_nodes))
+            jobs_to_insert = []
+            exec_seq = DagScheduler.execution_seq(cursor, execution_id)
+            for next_node_id in downstream_nodes:
+                new_job_id = str(uuid.uuid4())
+                jobs_to_insert.append((
+                    new_job_id,
+                    execution_id,
+                    next_node_id,
+                    'PENDING',
+                    inline_output,
+                    output_hash,
+                    workflow_id, # (ADDED)
+                    user_id, # (ADDED)
+                    exec_seq
+                ))
+            if jobs_to_insert:
+                cursor.executemany(
+                    "INSERT INTO Jobs (job_id, execution_id, node_id, status, input_data, input_payload_hash, workflow_id, user_id, exec_seq) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    jobs_to_insert
+                )
+            queued = len(jobs_to_insert)
+        cursor.execute("SELECT output_payload_hash FROM Jobs WHERE job_id = ?", (job_id,))
+        previous = cursor.fetchone()
+        if previous:
+            release_payload(cursor, previous[0]) # (English Hardcode) A reaped job finished twice must not leak the first output's reference
         cursor.execute(
-            "UPDATE Jobs SET status = 'DONE', finished_at = CURRENT_TIMESTAMP, output_data = ? "
+            "UPDATE Jobs SET status = 'DONE', finished_at = CURRENT_TIMESTAMP, output_data = ?, output_payload_hash = ? "
             "WHERE job_id = ?",
-            (json.dumps(output_data, default=str), job_id)
+            (inline_output, output_hash, job_id)
         )
-        jobs_to_insert = []
-        for next_node_id in downstream_nodes:
-            new_job_id = str(uuid.uuid4())
-            jobs_to_insert.append((
-                new_job_id,
-                execution_id,
-                next_node_id,
-                'PENDING',
-                json.dumps(output_data, default=str),
-                workflow_id, # (ADDED)
-                user_id # (ADDED)
-            ))
-        if jobs_to_insert:
-            cursor.executemany(
-                "INSERT INTO Jobs (job_id, execution_id, node_id, status, input_data, workflow_id, user_id) "
-                "VALUES (?, ?, ?, ?, ?, ?, ?)",
-                jobs_to_insert
-            )
+        final_status = DagScheduler.complete_execution_if_idle(cursor, execution_id)
         db_conn.commit()
-        logging.info(f"[Worker PID {os.getpid()}] Job {job_id} DONE. Queued {len(jobs_to_insert)} downstream jobs.") # English Hardcode
-        return len(jobs_to_insert) > 0
+        logging.info(f"[Worker PID {os.getpid()}] Job {job_id} DONE. Queued {queued} downstream jobs.") # English Hardcode
+        if final_status:
+            logging.info(f"[Worker PID {os.getpid()}] Execution {execution_id} finished with status {final_status}.") # English Hardcode
+        return queued
     except Exception as e:
         db_conn.rollback()
         logging.error(f"[Worker PID {os.getpid()}] CRITICAL: Failed to finish job {job_id} or queue downstream jobs: {e}", exc_info=True) # English Hardcode
         raise
-    return False # (ADDED)
-def _db_fail_job(db_conn, job_id, error_message):
-    """Atomically marks the current job as FAILED."""
+    return 0 # (ADDED)
+def _db_fail_job(db_conn, job_id, error_message, execution_id=None):
+    """Atomically marks the current job as FAILED (and finalizes its execution if nothing else is left to run)."""
     cursor = db_conn.cursor()
     cursor.execute("BEGIN IMMEDIATE;")
     try:
@@ -210,6 +370,8 @@ def _db_fail_job(db_conn, job_id, error_message):
             "WHERE job_id = ?",
             (str(error_message), job_id)
         )
+        if execution_id:
+            DagScheduler.complete_execution_if_idle(cursor, execution_id)
         db_conn.commit()
         logging.error(f"[Worker PID {os.getpid()}] Job {job_id} FAILED. Status marked in DB.") # English Hardcode
     except Exception as e:
@@ -227,12 +389,13 @@ def worker_process(db_path: str, project_root: str):
     if project_root not in sys.path:
         sys.path.insert(0, project_root)
     logging.info(f"Started. DB Path: {db_path}. Waiting for jobs...") # English Hardcode
+    boot_started = time.perf_counter()
     db_service = DatabaseService(db_name=os.path.basename(db_path))
     db_conn = db_service.create_connection()
     if not db_conn:
         logging.error(f"CRITICAL: Could not create DB connection. Worker is exiting.") # English Hardcode
         return
-    job_event = None # (English Hardcode) Initialize bell
+    wakeup = None # (English Hardcode) Initialize wakeup channel
     WATCHDOG_DEADLINE = int(os.getenv("CORE_JOB_DEADLINE_SECONDS", "120"))
     wd = JobWatchdog(
         deadline_seconds=WATCHDOG_DEADLINE,
@@ -276,89 +439,220 @@ def worker_process(db_path: str, project_root: str):
                 return Singleton.get_instance(service_id)
         worker_kernel = WorkerKernel()
         Singleton.set_instance(DatabaseService, db_service)
-        job_event = Singleton.get_instance(multiprocessing.Event)
-        if not job_event:
-            logging.error("CRITICAL: Failed to get Job Event from Singleton. Worker will use polling.") # English Hardcode
-        loc_manager = LocalizationManagerService(worker_kernel, "localization_manager")
-        loc_manager.load_all_languages()
-        Singleton.set_instance(LocalizationManagerService, loc_manager)
-        var_manager = VariableManagerService(worker_kernel, "variable_manager")
-        Singleton.set_instance(VariableManagerService, var_manager)
-        preset_manager = PresetManagerService(worker_kernel, "preset_manager_service")
-        preset_manager.start() # Panggil start() untuk inject db_service
-        Singleton.set_instance(PresetManagerService, preset_manager)
-        ai_provider_manager = AIProviderManagerService(worker_kernel, "ai_provider_manager_service")
-        Singleton.set_instance(AIProviderManagerService, ai_provider_manager)
-        module_manager = ModuleManagerService(worker_kernel, "module_manager_service")
-        module_manager.discover_and_load_modules()
-        Singleton.set_instance(ModuleManagerService, module_manager)
-        plugin_manager = PluginManagerService(worker_kernel, "plugin_manager_service")
-        plugin_manager.discover_and_load_plugins()
-        Singleton.set_instance(PluginManagerService, plugin_manager)
-        tools_manager = ToolsManagerService(worker_kernel, "tools_manager_service")
-        tools_manager.discover_and_load_tools()
-        Singleton.set_instance(ToolsManagerService, tools_manager)
-        Singleton.set_instance(GatewayConnectorService, MockService(worker_kernel, "gateway_connector_service"))
-        Singleton.set_instance(WorkflowExecutorService, MockService(worker_kernel, "workflow_executor_service"))
-        logging.info(f"Worker Kernel services initialized. Modules loaded: {len(module_manager.loaded_modules)}") # English Hardcode
+        wakeup = Singleton.get_instance(JobWakeupChannel)
+        if not wakeup:
+            logging.error("CRITICAL: Failed to get JobWakeupChannel from Singleton. Worker will use polling.") # English Hardcode
+        concurrency_gate = Singleton.get_instance(ModuleConcurrencyGate)
+        if concurrency_gate is None:
+            logging.warning("ModuleConcurrencyGate not found in Singleton. Module max_concurrency is only enforced per worker.") # English Hardcode
+        graph_cache = WorkflowGraphCache(epoch=Singleton.get_instance(GRAPH_EPOCH_SINGLETON_KEY))
+        if graph_cache.epoch is None:
+            logging.warning("Workflow graph epoch not found in Singleton. Graph cache will check version stamps on every job.") # English Hardcode
+        inherited = [] # (English Hardcode) Services the parent built before forking us
+        def _reuse_or_create(service_class, factory):
+            service = Singleton.get_instance(service_class)
+            if service is not None:
+                inherited.append(service_class.__name__)
+                return service
+            service = factory()
+            Singleton.set_instance(service_class, service)
+            return service
+        def _new_loc_manager():
+            loc = LocalizationManagerService(worker_kernel, "localization_manager")
+            loc.load_all_languages()
+            return loc
+        def _new_preset_manager():
+            presets = PresetManagerService(worker_kernel, "preset_manager_service")
+            presets.start() # Panggil start() untuk inject db_service
+            return presets
+        def _new_module_manager():
+            modules = ModuleManagerService(worker_kernel, "module_manager_service")
+            modules.discover_and_load_modules()
+            return modules
+        def _new_plugin_manager():
+            plugins = PluginManagerService(worker_kernel, "plugin_manager_service")
+            plugins.discover_and_load_plugins()
+            return plugins
+        def _new_tools_manager():
+            tools = ToolsManagerService(worker_kernel, "tools_manager_service")
+            tools.discover_and_load_tools()
+            return tools
+        _reuse_or_create(LocalizationManagerService, _new_loc_manager)
+        var_manager = _reuse_or_create(VariableManagerService, lambda: VariableManagerService(worker_kernel, "variable_manager"))
+        _reuse_or_create(PresetManagerService, _new_preset_manager)
+        _reuse_or_create(AIProviderManagerService, lambda: AIProviderManagerService(worker_kernel, "ai_provider_manager_service"))
+        module_manager = _reuse_or_create(ModuleManagerService, _new_module_manager) # (English Hardcode) Uncached manifests come from the shared ComponentIndex
+        module_manager.warm_up_pools() # (English Hardcode) Pooled modules run on_load now, not on their first job
+        _reuse_or_create(PluginManagerService, _new_plugin_manager)
+        _reuse_or_create(ToolsManagerService, _new_tools_manager)
+        _reuse_or_create(GatewayConnectorService, lambda: MockService(worker_kernel, "gateway_connector_service"))
+        _reuse_or_create(WorkflowExecutorService, lambda: MockService(worker_kernel, "workflow_executor_service"))
+        logging.info(
+            f"Worker Kernel services initialized in {(time.perf_counter() - boot_started) * 1000:.0f} ms. " # English Hardcode
+            f"Modules loaded: {len(module_manager.loaded_modules)}. Inherited from parent: {', '.join(inherited) or 'none'}." # English Hardcode
+        )
     except Exception as e:
         logging.error(f"CRITICAL: Failed to initialize worker kernel: {e}", exc_info=True) # English Hardcode
         db_conn.close()
         return
-    while True:
+    worker_tag = f"worker-{pid}" # English Hardcode
+    lease_seconds = max(CLAIM_LEASE_SECONDS, WATCHDOG_DEADLINE + LEASE_SAFETY_MARGIN_SECONDS * 2)
+    min_lease_to_start = WATCHDOG_DEADLINE + LEASE_SAFETY_MARGIN_SECONDS
+    prefetch = JobPrefetchBuffer(lease_seconds)
+    isolated_runners = {} # (English Hardcode) module_id -> IsolatedProcessRunner
+    stop_state = {"requested": False}
+    def _request_shutdown(signum, frame):
+        stop_state["requested"] = True # (English Hardcode) Finish the current job, then hand back the prefetch buffer
+    signal.signal(signal.SIGTERM, _request_shutdown)
+    signal.signal(signal.SIGINT, _request_shutdown)
+    logging.info(f"Batch claiming enabled: up to {CLAIM_BATCH_SIZE} jobs per claim, lease {lease_seconds}s.") # English Hardcode
+    last_reap = 0.0
+    tokens_held = 0 # (English Hardcode) Wakeup tokens already taken for jobs we have not claimed yet
+    while not stop_state["requested"]:
         job = None
-        new_jobs_were_queued = False # (English Hardcode) Flag to ring the bell
+        jobs_queued = 0 # (English Hardcode) Number of downstream jobs to announce
+        gated_module_id = None # (English Hardcode) Module whose ModuleConcurrencyGate slot this job holds
         try:
-            job = _db_retry_wrapper(db_conn, _db_atomic_claim_job)
+            if not len(prefetch):
+                claimed_at = time.monotonic()
+                claimed_jobs = _db_retry_wrapper(db_conn, _db_claim_job_batch, worker_tag, CLAIM_BATCH_SIZE, lease_seconds)
+                if claimed_jobs:
+                    prefetch.extend(claimed_jobs, claimed_at)
+                    logging.debug(f"Claimed a batch of {len(claimed_jobs)} job(s) into the prefetch buffer.") # English Hardcode
+                    if wakeup and len(claimed_jobs) > tokens_held:
+                        wakeup.consume(len(claimed_jobs) - tokens_held) # (English Hardcode) Nobody else needs waking for these
+                tokens_held = 0
+            expiring_jobs = prefetch.drain_expiring(min_lease_to_start)
+            if expiring_jobs:
+                released = _db_retry_wrapper(db_conn, _db_release_jobs, worker_tag, [j['job_id'] for j in expiring_jobs])
+                logging.info(f"Released {released} prefetched job(s) whose lease would expire before they could finish.") # English Hardcode
+                if released and wakeup:
+                    wakeup.notify(released) # (English Hardcode) Let idle workers pick them up
+            job = prefetch.pop()
             if job is None:
-                if job_event:
-                    job_event.clear() # (English Hardcode) Clear the bell, in case it rang while we were busy
-                    logging.debug("No jobs found. Sleeping (waiting for event)...") # English Hardcode
-                    job_event.wait() # (English Hardcode) Efficiently sleep until bell rings
-                    logging.debug("Woke up by event. Checking for jobs...") # English Hardcode
+                if time.monotonic() - last_reap >= LEASE_REAP_INTERVAL_SECONDS:
+                    last_reap = time.monotonic()
+                    reaped = _db_retry_wrapper(db_conn, _db_reap_expired_leases)
+                    if reaped:
+                        logging.warning(f"Re-queued {reaped} job(s) with an expired claim lease.") # English Hardcode
+                        if wakeup:
+                            wakeup.notify(reaped - 1) # (English Hardcode) This worker claims one itself on the next pass
+                        continue
+                if wakeup:
+                    logging.debug("No jobs found. Sleeping (waiting for wakeup token)...") # English Hardcode
+                    if wakeup.wait(timeout=IDLE_WAIT_SECONDS): # (English Hardcode) Only one worker wakes per queued job
+                        tokens_held = 1
+                        logging.debug("Woke up by wakeup token. Checking for jobs...") # English Hardcode
                 else:
                     logging.debug("No jobs found. Sleeping (polling)...") # English Hardcode
                     time.sleep(POLL_INTERVAL_SECONDS)
                 continue # (English Hardcode) Go back to polling
             logging.info(f"Claimed job {job['job_id']} for node {job['node_id']}") # English Hardcode
-            input_data = json.loads(job['input_data']) if job['input_data'] else {}
-            module_id, config_json = _db_retry_wrapper(db_conn, _db_get_node_details, job['node_id'])
+            input_data = _db_retry_wrapper(db_conn, _db_load_job_input, job)
+            graph = _db_retry_wrapper(db_conn, graph_cache.get, job['workflow_id'])
+            job_user_id = job['user_id']
+            variable_lookup = lambda var_name: var_manager.get_variable(var_name, user_id=job_user_id) # (English Hardcode) Lock-free snapshot read
+            if graph is not None and job['node_id'] in graph.nodes:
+                module_id, config_json = graph.node_details(job['node_id'], variable_lookup)
+            else:
+                graph = None # (English Hardcode) Node is not part of the stored graph (ad-hoc run), use direct lookups
+                module_id, config_json = _db_retry_wrapper(db_conn, _db_get_node_details, job['workflow_id'], job['node_id'])
+                if config_json:
+                    config_json = CompiledTemplate(config_json).render(variable_lookup)
             if not module_id:
                 raise Exception(f"Node {job['node_id']} not found in DB.") # English Hardcode
-            output_data, err = wd.run_with_deadline(
-                job['job_id'],
-                execute_node_logic, # (English Hardcode) The function to run
-                job['node_id'],    # (English Hardcode) *args for execute_node_logic
-                module_id,
-                config_json,
-                input_data
-            )
+            if concurrency_gate is not None and concurrency_gate.is_limited(module_id):
+                if not concurrency_gate.acquire(module_id, timeout=0):
+                    waiting_behind = prefetch.drain_all() # (English Hardcode) Let idle workers run them while this one waits for a slot
+                    if waiting_behind:
+                        released = _db_retry_wrapper(db_conn, _db_release_jobs, worker_tag, [j['job_id'] for j in waiting_behind])
+                        if released and wakeup:
+                            wakeup.notify(released)
+                    wait_budget = job['lease_deadline'] - time.monotonic() - min_lease_to_start
+                    if not concurrency_gate.acquire(module_id, timeout=max(0.0, wait_budget)):
+                        released = _db_retry_wrapper(db_conn, _db_release_jobs, worker_tag, [job['job_id']])
+                        logging.info(f"Module '{module_id}' is at its max concurrency. Returned job {job['job_id']} to the queue.") # English Hardcode
+                        if released and wakeup:
+                            wakeup.notify(released)
+                        continue
+                gated_module_id = module_id
+            isolation_policy = _get_isolation_policy(module_id)
+            if isolation_policy:
+                job_deadline = isolation_policy.get("deadline_seconds") or WATCHDOG_DEADLINE # English Hardcode
+                if job_deadline > WATCHDOG_DEADLINE:
+                    _db_retry_wrapper(db_conn, _db_extend_lease, worker_tag, job['job_id'], job_deadline + LEASE_SAFETY_MARGIN_SECONDS * 2) # (English Hardcode) Not reaped mid-run
+                output_data, err = wd.run_isolated(
+                    job['job_id'],
+                    _get_isolated_runner(isolated_runners, module_id, isolation_policy),
+                    execute_node_logic,
+                    job['node_id'],
+                    module_id,
+                    config_json,
+                    input_data,
+                    deadline_seconds=job_deadline
+                )
+            else:
+                output_data, err = wd.run_with_deadline(
+                    job['job_id'],
+                    execute_node_logic, # (English Hardcode) The function to run
+                    job['node_id'],    # (English Hardcode) *args for execute_node_logic
+                    module_id,
+                    config_json,
+                    input_data
+                )
             if err:
                 raise err # (English Hardcode) Re-raise the timeout error or node exception
             if isinstance(output_data, Exception):
                 raise output_data # Jump to the except block
-            downstream_nodes = _db_retry_wrapper(
-                db_conn, _db_get_downstream_nodes, job['workflow_id'], job['node_id']
-            )
-            new_jobs_were_queued = _db_retry_wrapper(
+            if graph is not None:
+                downstream_nodes = None # (English Hardcode) The DagScheduler walks the compiled graph itself
+            else:
+                downstream_nodes = _db_retry_wrapper(
+                    db_conn, _db_get_downstream_nodes, job['workflow_id'], job['node_id']
+                )
+            jobs_queued = _db_retry_wrapper(
                 db_conn, _db_finish_job,
                 job['job_id'], job['execution_id'], job['user_id'], job['workflow_id'],
-                downstream_nodes, output_data
+                downstream_nodes, output_data, graph, job['node_id']
             )
         except Exception as e:
             if job:
                 logging.error(f"Execution failed for job {job['job_id']} (Node {job.get('node_id', 'N/A')}). Error: {e}", exc_info=True) # English Hardcode
                 try:
-                    _db_retry_wrapper(db_conn, _db_fail_job, job['job_id'], str(e))
+                    _db_retry_wrapper(db_conn, _db_fail_job, job['job_id'], str(e), job.get('execution_id'))
                 except Exception as db_fail_e:
                     logging.critical(f"CRITICAL: FAILED TO MARK JOB {job['job_id']} AS FAILED IN DB. {db_fail_e}", exc_info=True) # English Hardcode
             else:
                 logging.critical(f"Unhandled error in worker loop (job was not claimed): {e}", exc_info=True) # English Hardcode
                 if isinstance(e, sqlite3.Error):
                     time.sleep(POLL_INTERVAL_SECONDS * 2) # (English Hardcode) Use a backoff
-        if new_jobs_were_queued and job_event:
-            logging.debug(f"Job {job['job_id']} queued new jobs. Ringing bell...") # English Hardcode
-            job_event.set()
+        finally:
+            if gated_module_id is not None:
+                concurrency_gate.release(gated_module_id) # (English Hardcode) Slots of a worker that dies outright are reclaimed by the gate
+        if jobs_queued and wakeup:
+            to_wake = jobs_queued - 1 if not len(prefetch) else jobs_queued # (English Hardcode) An idle-after-this worker claims one itself
+            logging.debug(f"Job {job['job_id']} queued {jobs_queued} new job(s). Waking {to_wake} worker(s)...") # English Hardcode
+            wakeup.notify(to_wake)
+    unstarted_jobs = prefetch.drain_all()
+    if unstarted_jobs:
+        try:
+            released = _db_retry_wrapper(db_conn, _db_release_jobs, worker_tag, [j['job_id'] for j in unstarted_jobs])
+            logging.info(f"Returned {released} unstarted prefetched job(s) to the queue before exit.") # English Hardcode
+            if released and wakeup:
+                wakeup.notify(released)
+        except Exception as e:
+            logging.error(f"Failed to return prefetched jobs on shutdown, they will be re-queued when their lease expires: {e}") # English Hardcode
+    for runner in isolated_runners.values():
+        try:
+            runner.shutdown()
+        except Exception as e:
+            logging.error(f"Failed to stop isolated child for '{runner.name}': {e}") # English Hardcode
+    state_manager = Singleton.get_instance(StateManagerService)
+    if state_manager:
+        try:
+            state_manager.stop() # (English Hardcode) Flush what modules in this worker wrote behind
+        except Exception as e:
+            logging.error(f"Failed to flush worker state on shutdown: {e}") # English Hardcode
     if db_conn:
         db_conn.close()
     logging.info(f"Shutting down.") # English Hardcode
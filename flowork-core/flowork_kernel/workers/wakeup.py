@@ -0,0 +1,32 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\workers\wakeup.py total lines 33 
+########################################################################
+
+import multiprocessing
+class JobWakeupChannel:
+    """
+    Cross-process wakeup for idle job workers, replacing the shared multiprocessing.Event "bell".
+
+    Backed by a counting semaphore: every queued job adds one token and every sleeping worker
+    takes one token per wakeup, so notify(n) wakes at most n workers instead of all of them
+    (no thundering herd on the SQLite write lock). Workers that claim jobs without sleeping
+    consume the matching tokens with consume() so stale tokens do not cause empty wakeups later.
+    Must be created in the parent before the worker processes are started.
+    """
+    def __init__(self, ctx=None):
+        ctx = ctx or multiprocessing
+        self._tokens = ctx.Semaphore(0)
+    def notify(self, count: int = 1):
+        """Announces `count` newly runnable jobs."""
+        for _ in range(max(0, count)):
+            self._tokens.release()
+    def wait(self, timeout: float = None) -> bool:
+        """(Idle worker) Sleeps until one token is available. Returns False on timeout."""
+        return self._tokens.acquire(timeout=timeout)
+    def consume(self, count: int) -> int:
+        """(Busy worker) Takes up to `count` tokens without blocking, returns how many were taken."""
+        taken = 0
+        while taken < count and self._tokens.acquire(block=False):
+            taken += 1
+        return taken
@@ -1,11 +1,23 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\workers\watchdog.py total lines 28 
+# File NAME : C:\FLOWORK\flowork-core\flowork_kernel\workers\watchdog.py total lines 202 
 ########################################################################
 
+import signal
+import logging
 import threading
 import time
+import multiprocessing
 from typing import Callable
+try:
+    import resource
+except ImportError: # (English Hardcode) Not available on Windows, CPU limits are then skipped
+    resource = None
+try:
+    import psutil
+except ImportError:
+    psutil = None
+MONITOR_INTERVAL_SECONDS = 0.25
 class JobWatchdog:
     def __init__(self, deadline_seconds: int = 60, on_timeout: Callable[[str], None] = None):
         self.deadline = deadline_seconds
@@ -20,8 +32,170 @@ class JobWatchdog:
             self.on_timeout(job_id)
             result_container["error"] = TimeoutError(f"Job {job_id} exceeded {self.deadline}s")
         return result_container["value"], result_container["error"]
+    def run_isolated(self, job_id: str, runner: "IsolatedProcessRunner", fn: Callable, *args, deadline_seconds: float = None, **kwargs):
+        """
+        Same contract as run_with_deadline, but the job runs inside `runner`'s supervised child
+        process. On timeout the child is hard-killed, so nothing keeps running in the background.
+        `deadline_seconds` overrides the watchdog deadline for this job (per-manifest isolation policy).
+        """
+        value, error = runner.run(job_id, deadline_seconds or self.deadline, fn, *args, **kwargs)
+        if isinstance(error, TimeoutError):
+            self.on_timeout(job_id)
+        return value, error
     def _runner(self, box, fn, args, kwargs):
         try:
             box["value"] = fn(*args, **kwargs)
         except Exception as e:
             box["error"] = e
+class ResourceLimitExceeded(Exception):
+    """Raised (as a job error) when an isolated job breaks its memory or CPU limit."""
+    pass
+def _apply_job_cpu_limit(cpu_limit_seconds):
+    """(Isolated Child) Sets RLIMIT_CPU so THIS job gets `cpu_limit_seconds` on top of what the child already used."""
+    if not cpu_limit_seconds or resource is None:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    new_soft = int(usage.ru_utime + usage.ru_stime + cpu_limit_seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        new_soft = min(new_soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (new_soft, hard))
+def _isolated_child_main(conn):
+    """(Isolated Child) Executes jobs sent by the parent worker until told to stop (None) or killed."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # (English Hardcode) The parent worker decides when we stop
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        fn, args, kwargs, cpu_limit_seconds = message
+        try:
+            _apply_job_cpu_limit(cpu_limit_seconds)
+            reply = ("ok", fn(*args, **kwargs))
+        except Exception as e:
+            reply = ("error", e)
+        try:
+            conn.send(reply)
+        except Exception as e: # (English Hardcode) Unpicklable result/exception
+            conn.send(("error", RuntimeError(f"Isolated job result could not be returned: {reply[1]!r} ({e})")))
+    conn.close()
+class IsolatedProcessRunner:
+    """
+    (Worker Process) Supervises one long-lived child process used to run heavy nodes.
+
+    The child is forked from the fully initialized worker, so it inherits the loaded component
+    managers and keeps its module instances (and their models) warm across jobs. The parent
+    enforces the deadline, an RSS memory limit (needs psutil) and a per-job CPU-time limit
+    (RLIMIT_CPU, POSIX only); any breach hard-kills the child. The child is recycled after
+    `max_jobs_per_child` jobs so leaks cannot accumulate.
+    """
+    def __init__(self, name: str, memory_limit_mb: int = None, cpu_limit_seconds: int = None, max_jobs_per_child: int = 50, ctx=None):
+        self.name = name
+        self.memory_limit_bytes = int(memory_limit_mb) * 1024 * 1024 if memory_limit_mb else None
+        self.cpu_limit_seconds = cpu_limit_seconds
+        self.max_jobs_per_child = max(1, int(max_jobs_per_child or 1))
+        self._ctx = ctx or multiprocessing.get_context("fork")
+        self._process = None
+        self._conn = None
+        self._jobs_in_child = 0
+        self.stats = {"jobs": 0, "timeouts": 0, "limit_kills": 0, "crashes": 0, "recycles": 0}
+    def _ensure_child(self):
+        if self._process is not None and self._process.is_alive():
+            return
+        self._discard_child()
+        parent_conn, child_conn = self._ctx.Pipe(duplex=True)
+        process = self._ctx.Process(target=_isolated_child_main, args=(child_conn,), name=f"isolated-{self.name}", daemon=True)
+        process.start()
+        child_conn.close() # (English Hardcode) Parent must drop its copy so a dead child shows up as EOF
+        self._process, self._conn, self._jobs_in_child = process, parent_conn, 0
+        logging.info(f"[Isolation] Started child PID {process.pid} for '{self.name}'.") # English Hardcode
+    def _discard_child(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        if self._process is not None:
+            self._process.join(timeout=0)
+        self._process, self._conn = None, None
+    def _kill_child(self, reason: str):
+        if self._process is not None and self._process.is_alive():
+            logging.warning(f"[Isolation] Killing child PID {self._process.pid} for '{self.name}': {reason}") # English Hardcode
+            self._process.kill()
+            self._process.join(timeout=5)
+        self._discard_child()
+    def _child_rss(self):
+        if psutil is None or self._process is None:
+            return None
+        try:
+            return psutil.Process(self._process.pid).memory_info().rss
+        except Exception:
+            return None
+    def _child_death_error(self, job_id):
+        self._process.join(timeout=1)
+        exitcode = self._process.exitcode
+        self._discard_child()
+        sigxcpu = getattr(signal, "SIGXCPU", None)
+        if sigxcpu is not None and exitcode == -sigxcpu:
+            self.stats["limit_kills"] += 1
+            return ResourceLimitExceeded(f"Job {job_id} exceeded its CPU limit of {self.cpu_limit_seconds}s") # English Hardcode
+        self.stats["crashes"] += 1
+        return RuntimeError(f"Isolated child for job {job_id} died unexpectedly (exit code {exitcode})") # English Hardcode
+    def run(self, job_id: str, deadline_seconds: float, fn: Callable, *args, **kwargs):
+        """Runs fn(*args, **kwargs) in the child. Returns (value, error) like JobWatchdog.run_with_deadline."""
+        self._ensure_child()
+        self.stats["jobs"] += 1
+        try:
+            self._conn.send((fn, args, kwargs, self.cpu_limit_seconds))
+        except Exception as e:
+            self._kill_child(f"could not send job: {e}") # English Hardcode
+            return None, e
+        deadline_at = time.monotonic() + deadline_seconds
+        while True:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                self.stats["timeouts"] += 1
+                self._kill_child("deadline exceeded") # English Hardcode
+                return None, TimeoutError(f"Job {job_id} exceeded {deadline_seconds}s")
+            try:
+                ready = self._conn.poll(min(remaining, MONITOR_INTERVAL_SECONDS))
+                if ready:
+                    status, payload = self._conn.recv()
+                    break
+            except (EOFError, OSError):
+                return None, self._child_death_error(job_id)
+            if not self._process.is_alive():
+                return None, self._child_death_error(job_id)
+            if self.memory_limit_bytes:
+                rss = self._child_rss()
+                if rss is not None and rss > self.memory_limit_bytes:
+                    self.stats["limit_kills"] += 1
+                    self._kill_child(f"RSS {rss // (1024 * 1024)} MB over limit") # English Hardcode
+                    return None, ResourceLimitExceeded(
+                        f"Job {job_id} exceeded its memory limit of {self.memory_limit_bytes // (1024 * 1024)} MB" # English Hardcode
+                    )
+        self._jobs_in_child += 1
+        if self._jobs_in_child >= self.max_jobs_per_child:
+            self.recycle()
+        if status == "ok":
+            return payload, None
+        return None, payload
+    def recycle(self):
+        """Stops the current child gracefully; the next job starts a fresh one."""
+        if self._process is None:
+            return
+        self.stats["recycles"] += 1
+        try:
+            self._conn.send(None)
+            self._process.join(timeout=5)
+        except Exception:
+            pass
+        if self._process is not None and self._process.is_alive():
+            self._kill_child("did not exit on recycle") # English Hardcode
+        else:
+            self._discard_child()
+    def shutdown(self):
+        self.recycle()
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-core\run_server.py total lines 405 
+# File NAME : C:\FLOWORK\flowork-core\run_server.py total lines 447 
 ########################################################################
 
 import sys
@@ -26,6 +26,10 @@ from multiprocessing import Process, Queue, Event  # <-- START MODIFIED CODE (FI
 from flowork_kernel.singleton import Singleton
 from flowork_kernel.services.database_service.database_service import DatabaseService
 from flowork_kernel.workers.job_worker import worker_process
+from flowork_kernel.workers.graph_cache import GRAPH_EPOCH_SINGLETON_KEY
+from flowork_kernel.workers.wakeup import JobWakeupChannel
+from flowork_kernel.workers.concurrency_gate import ModuleConcurrencyGate
+from flowork_kernel.utils.component_index import get_component_index
 from flowork_kernel.services.gateway_connector_service.gateway_connector_service import GatewayConnectorService
 from flowork_kernel.services.module_manager_service.module_manager_service import ModuleManagerService
 from flowork_kernel.services.plugin_manager_service.plugin_manager_service import PluginManagerService
@@ -37,6 +41,7 @@ from flowork_kernel.services.preset_manager_service.preset_manager_service impor
 from flowork_kernel.services.api_server_service.api_server_service import ApiServerService
 from flowork_kernel.services.localization_manager_service.localization_manager_service import LocalizationManagerService
 from flowork_kernel.services.state_manager_service.state_manager_service import StateManagerService
+from flowork_kernel.services.job_retention_service.job_retention_service import JobRetentionService
 from flowork_kernel.heartbeat import start_heartbeat
 
 class SafeDict(dict):
@@ -187,6 +192,8 @@ def main():
 
     db_service = None
     gateway_connector = None
+    job_retention = None
+    state_manager = None
     workers = []
 
     try:
@@ -199,11 +206,14 @@ def main():
         sys.exit(1)
 
     try:
-        job_event = multiprocessing.Event()
-        Singleton.set_instance(multiprocessing.Event, job_event)
-        logging.info("Multiprocessing Job Event (bell) initialized and stored in Singleton.") # English Hardcode
+        job_wakeup = JobWakeupChannel()
+        Singleton.set_instance(JobWakeupChannel, job_wakeup)
+        logging.info("Job wakeup channel (counting semaphore) initialized and stored in Singleton.") # English Hardcode
+        graph_epoch = multiprocessing.Value('q', 0)
+        Singleton.set_instance(GRAPH_EPOCH_SINGLETON_KEY, graph_epoch)
+        logging.info("Shared workflow graph epoch initialized and stored in Singleton.") # English Hardcode
     except Exception as e:
-        logging.error(f"CRITICAL: Failed to initialize multiprocessing.Event: {e}") # English Hardcode
+        logging.error(f"CRITICAL: Failed to initialize multiprocessing primitives: {e}") # English Hardcode
         sys.exit(1)
 
     project_root = os.path.abspath(os.path.dirname(__file__))
@@ -307,6 +317,8 @@ def main():
         sys.exit(1)
 
     try:
+        discovery_started = time.perf_counter()
+        component_index = get_component_index(mock_kernel.data_path) # (English Hardcode) Inherited by the forked workers
         preset_manager = PresetManagerService(mock_kernel, "preset_manager_service")
         preset_manager.start() # Panggil start() untuk inject db_service
         Singleton.set_instance(PresetManagerService, preset_manager)
@@ -314,6 +326,10 @@ def main():
         module_manager = ModuleManagerService(mock_kernel, "module_manager_service")
         module_manager.discover_and_load_modules()
         Singleton.set_instance(ModuleManagerService, module_manager)
+        concurrency_limits = module_manager.get_concurrency_limits()
+        Singleton.set_instance(ModuleConcurrencyGate, ModuleConcurrencyGate(concurrency_limits)) # (English Hardcode) Before the workers are forked
+        if concurrency_limits:
+            logging.info(f"Engine-wide module concurrency limits: {concurrency_limits}") # English Hardcode
 
         plugin_manager = PluginManagerService(mock_kernel, "plugin_manager_service")
         plugin_manager.discover_and_load_plugins()
@@ -331,6 +347,7 @@ def main():
         Singleton.set_instance(AIProviderManagerService, ai_provider_manager)
 
         logging.info("All component managers initialized and stored in Singleton.") # English Hardcode
+        logging.info(f"Component discovery took {(time.perf_counter() - discovery_started) * 1000:.0f} ms (index: {component_index.stats}).") # English Hardcode
 
         kernel_services = {
             "preset_manager_service": preset_manager,
@@ -364,6 +381,13 @@ def main():
 
     start_heartbeat()
 
+    try:
+        job_retention = JobRetentionService(mock_kernel, "job_retention_service") # (English Hardcode) After the fork, so workers never inherit its thread
+        Singleton.set_instance(JobRetentionService, job_retention)
+        job_retention.start()
+    except Exception as e:
+        logging.error(f"Failed to start JobRetentionService, finished jobs will not be archived: {e}") # English Hardcode
+
     try:
         asyncio.run(main_async(gateway_connector))
     except ImportError as e:
@@ -374,13 +398,25 @@ def main():
         print(f"[FATAL] A critical error occurred: {e}") # English Hardcode
         traceback.print_exc()
     finally:
+        if job_retention:
+            try:
+                job_retention.stop()
+            except Exception as e:
+                logging.error(f"Error stopping JobRetentionService: {e}") # English Hardcode
+
         logging.info("Initiating graceful shutdown for workers...") # English Hardcode
+        for w in workers:
+            try:
+                if w.is_alive():
+                    w.terminate() # (English Hardcode) SIGTERM: worker finishes its current job and returns its prefetch buffer
+            except Exception as e:
+                logging.error(f"Error signalling worker {w.pid}: {e}") # English Hardcode
         for w in workers:
             try:
                 w.join(timeout=5)
                 if w.is_alive():
-                    logging.warning(f"Worker {w.pid} did not exit gracefully. Terminating...") # English Hardcode
-                    w.terminate()
+                    logging.warning(f"Worker {w.pid} did not exit gracefully. Killing...") # English Hardcode
+                    w.kill()
             except Exception as e:
                 logging.error(f"Error during worker shutdown: {e}") # English Hardcode
 
@@ -390,6 +426,12 @@ def main():
             except Exception as e:
                 logging.error(f"Error stopping GatewayConnectorService: {e}") # English Hardcode
 
+        if state_manager:
+            try:
+                state_manager.stop() # (English Hardcode) Flushes write-behind state durably, after the workers are gone
+            except Exception as e:
+                logging.error(f"Error flushing StateManagerService: {e}") # English Hardcode
+
         logging.info("All processes stopped.") # English Hardcode
         print("[SUCCESS] Core Server stopped gracefully.") # English Hardcode
 
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\__init__.py total lines 176 
+# File NAME : C:\FLOWORK\flowork-gateway\app\__init__.py total lines 191 
 ########################################################################
 
 """
@@ -87,11 +87,29 @@ def create_app(config_class: type = Config):
     app.config.from_object(config_class)
     app.logger = root_logger
     app.logger.info("[Startup] Initializing core services...")
-    CORS(app, origins=["https://flowork.cloud", "http://localhost:5173"], supports_credentials=True)
+    CORS(
+        app,
+        origins=["https://flowork.cloud", "http://localhost:5173"],
+        supports_credentials=True,
+        expose_headers=["X-Session-Token", "X-Session-Expires"], # (English Hardcode) Lets the GUI read its session token
+    )
     gateway_db.init_app(app)
     migrate.init_app(app, gateway_db)
     with app.app_context():
         init_pragma(app, gateway_db)
+        try:
+            from .models import ensure_user_address_index
+            ensure_user_address_index()
+        except Exception as e:
+            gateway_db.session.rollback()
+            app.logger.warning(f"[Startup] Could not ensure users.lower(public_address) index (table missing?): {e}")
+        from .queue.dispatcher import USE_SHARDED
+        if not USE_SHARDED:
+            try:
+                from .queue.models import ensure_queue_schema
+                ensure_queue_schema()
+            except Exception as e:
+                app.logger.warning(f"[Startup] Could not ensure queue depth counters (retried on first use): {e}")
     register_metrics(app)
     limiter.init_app(app)
     db_router.init_app(app)
@@ -145,10 +163,7 @@ def create_app(config_class: type = Config):
     def internal_error(error):
         app.logger.exception("Internal server error")
         return jsonify({"error": "Internal Server Error"}), 500
-    from app.rl.limiter import init_rl_schema, allow as rl_allow
-    with app.app_context():
-        app.logger.info("[Startup] Initializing Rate Limiter schema (Roadmap 2.2)...")
-        init_rl_schema()
+    from app.rl.limiter import allow as rl_allow
     USER_RATE = float(os.getenv("USER_RATE", "5"))
     USER_BURST = float(os.getenv("USER_BURST", "20"))
     ENGINE_RATE = float(os.getenv("ENGINE_RATE", "20"))
@@ -1,15 +1,20 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\db\router.py total lines 76 
+# File NAME : C:\FLOWORK\flowork-gateway\app\db\router.py total lines 115 
 ########################################################################
 
 import os
 import sqlite3
 import logging
-from functools import lru_cache
+import threading
 from typing import Optional
 from flask import Flask
 log = logging.getLogger(__name__)
+try:
+    from gevent.monkey import get_original, is_module_patched
+    OSThreadLocal = get_original("threading", "local") if is_module_patched("threading") else threading.local
+except ImportError:
+    OSThreadLocal = threading.local
 DATA_DIR = os.getenv("SQLITE_DATA_DIR", "/app/data/engines")
 os.makedirs(DATA_DIR, exist_ok=True)
 PRAGMAS = [
@@ -33,28 +38,45 @@ class ShardManager: # (FIXED) Name matches manage.py
     """
     Manages sharded SQLite connections for engine job queues.
     This is the class expected by app/manage.py.
+    Connections are long-lived, one per shard per OS thread (sqlite3 connections must not cross
+    threads). Under gevent the greenlets of a thread share it, which is safe because sqlite calls
+    never yield to the hub.
     """
     def __init__(self):
         self.app: Optional[Flask] = None
+        self._local = OSThreadLocal()
+        self._schema_ready = set()
+        self._schema_lock = threading.Lock()
         log.info("[DB Router] ShardManager instance created.")
     def init_app(self, app: Flask):
         self.app = app
         log.info("[DB Router] Initialized sharded engine DB router (init_app).")
-    @lru_cache(maxsize=1024)
     def get_connection(self, engine_id: str) -> sqlite3.Connection:
         """
-        Gets a cached, PRAGMA-optimized connection for a specific engine.
+        Gets this thread's cached, PRAGMA-optimized connection for a specific engine.
         """
         path = _db_path(engine_id)
-        con = sqlite3.connect(path, timeout=5.0, isolation_level=None)
-        _apply_pragmas(con)
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+        con = connections.get(path)
+        if con is None:
+            con = sqlite3.connect(path, timeout=5.0, isolation_level=None)
+            _apply_pragmas(con)
+            connections[path] = con
         return con
     def ensure_engine_schema(self, engine_id: str):
         """
-        Ensures the job queue tables exist in the specific engine's DB.
+        Ensures the job queue tables exist in the specific engine's DB (once per engine and process).
+        queue_counters holds the number of queued jobs; the triggers keep it in step with every
+        write to jobs inside the same transaction, so queue_depth() never has to COUNT(*).
         """
+        path = _db_path(engine_id)
+        if path in self._schema_ready:
+            return
         con = self.get_connection(engine_id)
         con.executescript("""
+        BEGIN IMMEDIATE;
         CREATE TABLE IF NOT EXISTS jobs(
           id TEXT PRIMARY KEY,
           user_id TEXT NOT NULL,
@@ -70,6 +92,23 @@ class ShardManager: # (FIXED) Name matches manage.py
           version INTEGER NOT NULL DEFAULT 0
         );
         CREATE INDEX IF NOT EXISTS idx_jobs_status_prio ON jobs(status, priority, available_at, created_at);
+        CREATE TABLE IF NOT EXISTS queue_counters(
+          counter TEXT PRIMARY KEY,
+          value INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO queue_counters(counter, value)
+          SELECT 'queued', COUNT(*) FROM jobs WHERE status='queued';
+        CREATE TRIGGER IF NOT EXISTS trg_jobs_queued_insert AFTER INSERT ON jobs WHEN NEW.status='queued'
+        BEGIN UPDATE queue_counters SET value=value+1 WHERE counter='queued'; END;
+        CREATE TRIGGER IF NOT EXISTS trg_jobs_queued_delete AFTER DELETE ON jobs WHEN OLD.status='queued'
+        BEGIN UPDATE queue_counters SET value=value-1 WHERE counter='queued'; END;
+        CREATE TRIGGER IF NOT EXISTS trg_jobs_queued_leave AFTER UPDATE OF status ON jobs WHEN OLD.status='queued' AND NEW.status!='queued'
+        BEGIN UPDATE queue_counters SET value=value-1 WHERE counter='queued'; END;
+        CREATE TRIGGER IF NOT EXISTS trg_jobs_queued_enter AFTER UPDATE OF status ON jobs WHEN OLD.status!='queued' AND NEW.status='queued'
+        BEGIN UPDATE queue_counters SET value=value+1 WHERE counter='queued'; END;
+        COMMIT;
         """)
+        with self._schema_lock:
+            self._schema_ready.add(path)
         log.debug(f"[DB Router] Schema ensured for engine {engine_id}")
 db_router = ShardManager()
@@ -1,10 +1,10 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\helpers.py total lines 670 
+# File NAME : C:\FLOWORK\flowork-gateway\app\helpers.py total lines 699 
 ########################################################################
 
 import functools
-from flask import request, current_app as app, jsonify, g
+from flask import request, current_app as app, jsonify, g, after_this_request
 from functools import wraps
 import jwt
 import logging
@@ -20,9 +20,15 @@ from sqlalchemy.orm import joinedload
 
 from .extensions import db
 from .models import User, RegisteredEngine
+from .security.session_tokens import (
+    SESSION_TOKEN_HEADER,
+    SESSION_EXPIRES_HEADER,
+    get_session_signer,
+    signature_cache,
+)
 from werkzeug.security import check_password_hash
 
-from web3 import Web3
+from eth_account import Account
 from eth_account.messages import encode_defunct
 
 
@@ -115,9 +121,8 @@ def verify_web3_signature(address: str, message: str, signature: str) -> bool:
         return False
 
     try:
-        w3 = Web3()
         message_hash = encode_defunct(text=message)
-        signer = w3.eth.account.recover_message(message_hash, signature=signature)
+        signer = Account.recover_message(message_hash, signature=signature) # (English Hardcode) Same as Web3().eth.account, without building a Web3 per call
 
         is_valid = signer.lower() == address.lower()
         if not is_valid:
@@ -211,11 +216,22 @@ def crypto_auth_required(f):
     Decorator for routes requiring Web3 cryptographic signature authentication.
     Verifies headers (X-User-Address, X-Signed-Message, X-Signature)
     and places the authenticated 'User' object into 'g.user'.
+    A valid X-Session-Token (handed out in the response to a signed request) replaces the
+    signature headers until it expires, so the signer is not recovered on every request.
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
         app_log = app.logger
 
+        session_token = request.headers.get(SESSION_TOKEN_HEADER)
+        if session_token:
+            token_address = get_session_signer(app).verify(session_token)
+            if token_address:
+                return _run_as_user(f, token_address, args, kwargs)
+            if not request.headers.get("X-Signature"):
+                app_log.warning("[Gateway Auth] Access denied: Invalid or expired session token.") # English log
+                return jsonify({"error": "Invalid or expired session token."}), 401 # English Hardcode
+
         address = request.headers.get("X-User-Address")
         message = request.headers.get("X-Signed-Message")
         signature = request.headers.get("X-Signature")
@@ -235,27 +251,40 @@ def crypto_auth_required(f):
             app_log.warning(f"[Gateway Auth] Access denied: Invalid message format for {address[:10]}.") # English log
             return jsonify({"error": "Invalid authentication message format."}), 401 # English Hardcode
 
-        if not verify_web3_signature(address, message, signature):
-            app_log.warning(f"[Gateway Auth] Access denied: Invalid signature for {address[:10]}.") # English log
-            return jsonify({"error": "Invalid signature."}), 401 # English Hardcode
-
-        try:
-            user = db.session.query(User).filter(User.public_address.ilike(address)).first()
-            if not user:
-                app_log.info(f"[Gateway Auth] New user authenticated: {address[:10]}. Creating user entry.") # English log
-                placeholder_username = f"user_{address[:6]}...{address[-4:]}"
-                user = User(public_address=address, username=placeholder_username)
-                db.session.add(user)
-                db.session.commit()
-
-            g.user = user # (English Hardcode) Set user in Flask global context
-            return f(*args, **kwargs)
-        except Exception as e:
-            db.session.rollback()
-            app_log.error(f"[Gateway Auth] DB error during user lookup/create: {e}") # English log
-            return jsonify({"error": "Internal server error during authentication."}), 500 # English Hardcode
+        if not signature_cache.contains(address, message, signature):
+            if not verify_web3_signature(address, message, signature):
+                app_log.warning(f"[Gateway Auth] Access denied: Invalid signature for {address[:10]}.") # English log
+                return jsonify({"error": "Invalid signature."}), 401 # English Hardcode
+            signature_cache.add(address, message, signature, ts)
+
+        token, expires_at = get_session_signer(app).issue(address)
+        @after_this_request
+        def _attach_session_token(response):
+            response.headers[SESSION_TOKEN_HEADER] = token
+            response.headers[SESSION_EXPIRES_HEADER] = str(expires_at)
+            return response
+        return _run_as_user(f, address, args, kwargs)
     return decorated_function
 
+def _run_as_user(f, address, args, kwargs):
+    """(English Hardcode) Loads (or creates) the user of an authenticated address into g.user and runs the view."""
+    app_log = app.logger
+    try:
+        user = db.session.query(User).filter(User.address_matches(address)).first()
+        if not user:
+            app_log.info(f"[Gateway Auth] New user authenticated: {address[:10]}. Creating user entry.") # English log
+            placeholder_username = f"user_{address[:6]}...{address[-4:]}"
+            user = User(public_address=address, username=placeholder_username)
+            db.session.add(user)
+            db.session.commit()
+
+        g.user = user # (English Hardcode) Set user in Flask global context
+        return f(*args, **kwargs)
+    except Exception as e:
+        db.session.rollback()
+        app_log.error(f"[Gateway Auth] DB error during user lookup/create: {e}") # English log
+        return jsonify({"error": "Internal server error during authentication."}), 500 # English Hardcode
+
 def get_user_permissions(user_obj):
     """
     (REMASTERED) Calculates the user's tier and capabilities.
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\models.py total lines 284 
+# File NAME : C:\FLOWORK\flowork-gateway\app\models.py total lines 295 
 ########################################################################
 
 from .extensions import db # <-- INI FIX DARI SEBELUMNYA
@@ -28,9 +28,20 @@ class User(db.Model):
     variables = db.relationship('Variable', back_populates='user')
     backups = db.relationship('UserBackup', back_populates='user')
     workflows = db.relationship('Workflow', back_populates='user')
+    __table_args__ = (
+        Index('ix_users_public_address_lower', db.func.lower(public_address)), # (English Hardcode) Serves address_matches()
+    )
     @property
     def is_active(self):
         return self.status == 'active'
+    @classmethod
+    def address_matches(cls, address: str):
+        """(English Hardcode) Exact case-insensitive address filter: lower(public_address) = ?, indexed (unlike ilike)."""
+        return db.func.lower(cls.public_address) == address.lower()
+def ensure_user_address_index():
+    """(English Hardcode) create_all() skips tables that already exist, so add the index to older databases too."""
+    db.session.execute(db.text("CREATE INDEX IF NOT EXISTS ix_users_public_address_lower ON users (lower(public_address))"))
+    db.session.commit()
 class Subscription(db.Model):
     __tablename__ = 'subscriptions'
     id = db.Column(db.String, primary_key=True)
@@ -4,15 +4,15 @@
 ########################################################################
 
 import os
-import requests
 from .breaker import CircuitBreaker
+from .core_http import core_request
 CORE_URL = os.getenv("CORE_URL","http://core:9000")
 _breaker = CircuitBreaker(failure_threshold=5, recovery_time=30)
 def post_core(path:str, json):
     if not _breaker.allow():
         raise RuntimeError("circuit_open")
     try:
-        r = requests.post(f"{CORE_URL}{path}", json=json, timeout=5)
+        r = core_request("POST", f"{CORE_URL}{path}", json=json, timeout=5)
         r.raise_for_status()
         _breaker.on_success()
         return r.json()
@@ -0,0 +1,167 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-gateway\app\net\core_http.py total lines 168 
+########################################################################
+
+"""
+Pooled HTTP client for Gateway -> Core traffic.
+One keep-alive connection pool per Core base URL (scheme://host:port), with a cap on in-flight
+requests per engine so one slow engine cannot take every gateway worker. Pools are kept for the
+CORE_HTTP_MAX_ENGINES most recently used engines; older ones are closed.
+ENV:
+- CORE_HTTP_MAX_ENGINES=256       (engines with a kept pool, least recently used closed first)
+- CORE_HTTP_POOL_SIZE=32          (kept-alive connections per engine)
+- CORE_HTTP_MAX_IN_FLIGHT=64      (concurrent requests per engine, streams included)
+- CORE_HTTP_ACQUIRE_TIMEOUT=5     (seconds to wait for a free slot before answering 503)
+- CORE_HTTP_CONNECT_TIMEOUT=3.05  (seconds)
+- CORE_HTTP_READ_TIMEOUT=30       (seconds, default when the caller gives none)
+- CORE_HTTP_CHUNK_SIZE=65536      (bytes per chunk when streaming a response through)
+"""
+import os
+import threading
+from collections import OrderedDict
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+MAX_ENGINES = max(1, int(os.getenv("CORE_HTTP_MAX_ENGINES", "256")))
+POOL_SIZE = int(os.getenv("CORE_HTTP_POOL_SIZE", "32"))
+MAX_IN_FLIGHT = int(os.getenv("CORE_HTTP_MAX_IN_FLIGHT", "64"))
+ACQUIRE_TIMEOUT = float(os.getenv("CORE_HTTP_ACQUIRE_TIMEOUT", "5"))
+CONNECT_TIMEOUT = float(os.getenv("CORE_HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("CORE_HTTP_READ_TIMEOUT", "30"))
+CHUNK_SIZE = int(os.getenv("CORE_HTTP_CHUNK_SIZE", str(64 * 1024)))
+HOP_BY_HOP_HEADERS = frozenset((
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade",
+))
+class CoreBusyError(requests.exceptions.ConnectionError):
+    """No request slot for this engine freed up within CORE_HTTP_ACQUIRE_TIMEOUT (handled like an unreachable Core)."""
+    pass
+class CoreHttpClient:
+    """
+    Keep-alive session for one Core engine. Every request holds one of MAX_IN_FLIGHT slots:
+    until it returns, or for stream=True until the response is closed (see RawBody).
+    The session never stores cookies, so one user's Core cookies cannot leak to another user.
+    """
+    def __init__(self, base_url: str, pool_size: int = POOL_SIZE, max_in_flight: int = MAX_IN_FLIGHT):
+        self.base_url = base_url
+        self.session = requests.Session()
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self.session.headers["Accept-Encoding"] = "identity" # (English Hardcode) Streamed bodies pass through as-is, so only compress what the client asked for
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size), max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.max_in_flight = max(1, max_in_flight)
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._stats_lock = threading.Lock()
+        self._closing = False
+        self.stats = {"requests": 0, "in_flight": 0, "busy_rejections": 0, "errors": 0}
+    def _acquire(self):
+        if not self._slots.acquire(timeout=ACQUIRE_TIMEOUT):
+            with self._stats_lock:
+                self.stats["busy_rejections"] += 1
+            raise CoreBusyError(f"Core {self.base_url} has {self.max_in_flight} requests in flight.")
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            self.stats["in_flight"] += 1
+    def _release(self):
+        with self._stats_lock:
+            self.stats["in_flight"] -= 1
+            close_now = self._closing and self.stats["in_flight"] == 0
+        self._slots.release()
+        if close_now:
+            self.session.close()
+    def close(self):
+        """Closes the pooled connections once the requests (and open streams) still in flight are done."""
+        with self._stats_lock:
+            self._closing = True
+            close_now = self.stats["in_flight"] == 0
+        if close_now:
+            self.session.close()
+    def request(self, method: str, url: str, timeout=None, stream: bool = False, **kwargs) -> requests.Response:
+        """
+        Like requests.request(). timeout may be a number (read timeout, connect stays
+        CORE_HTTP_CONNECT_TIMEOUT), a (connect, read) tuple or None for the defaults.
+        With stream=True the caller must close the response (RawBody does).
+        """
+        if timeout is None:
+            timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+        elif not isinstance(timeout, tuple):
+            timeout = (min(CONNECT_TIMEOUT, timeout), timeout)
+        self._acquire()
+        try:
+            resp = self.session.request(method, url, timeout=timeout, stream=stream, **kwargs)
+        except BaseException:
+            with self._stats_lock:
+                self.stats["errors"] += 1
+            self._release()
+            raise
+        if not stream:
+            self._release()
+            return resp
+        released = []
+        original_close = resp.close
+        def _close_and_release():
+            try:
+                original_close()
+            finally:
+                if not released:
+                    released.append(True)
+                    self._release()
+        resp.close = _close_and_release
+        return resp
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+_clients = OrderedDict() # (English Hardcode) pool key -> CoreHttpClient, least recently used first
+_clients_lock = threading.Lock()
+def _pool_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+def get_core_client(url: str) -> CoreHttpClient:
+    """
+    The shared client for the engine serving `url` (any URL on that engine works). Creating one
+    beyond CORE_HTTP_MAX_ENGINES closes the least recently used client.
+    """
+    key = _pool_key(url)
+    evicted = []
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = CoreHttpClient(key)
+            while len(_clients) > MAX_ENGINES:
+                evicted.append(_clients.popitem(last=False)[1])
+        else:
+            _clients.move_to_end(key)
+    for old_client in evicted:
+        old_client.close()
+    return client
+def core_request(method: str, url: str, **kwargs) -> requests.Response:
+    return get_core_client(url).request(method, url, **kwargs)
+class RawBody:
+    """
+    WSGI body that yields the Core response as it arrives, still encoded (gzip stays gzip).
+    The response (its connection and slot) is closed when the body is exhausted or when the
+    server calls close(), also when the client went away before the first chunk was read.
+    """
+    def __init__(self, resp: requests.Response, chunk_size: int = CHUNK_SIZE):
+        self.resp = resp
+        self.chunk_size = chunk_size
+    def __iter__(self):
+        try:
+            for chunk in self.resp.raw.stream(self.chunk_size, decode_content=False):
+                if chunk:
+                    yield chunk
+        finally:
+            self.close()
+    def close(self):
+        self.resp.close()
+def passthrough_headers(resp: requests.Response) -> list:
+    """Core response headers minus hop-by-hop ones. Content-Encoding/-Length stay valid for RawBody."""
+    return [(name, value) for name, value in resp.raw.headers.items() if name.lower() not in HOP_BY_HOP_HEADERS]
+def get_pool_stats() -> dict:
+    with _clients_lock:
+        clients = list(_clients.values())
+    return {client.base_url: dict(client.stats) for client in clients}
@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\queue\api.py total lines 373 
+# File NAME : C:\FLOWORK\flowork-gateway\app\queue\api.py total lines 346 
 ########################################################################
 
 import os
@@ -8,9 +8,9 @@ import time
 import json
 import inspect
 import threading
-from collections import deque
 from typing import Any, Dict, List, Optional, Tuple
 from flask import Blueprint, request, jsonify, current_app
+from app.rl.limiter import get_limiter
 from app.metrics import (
     ENQ_TOTAL,
     ENQ_IDEM_HIT,
@@ -175,28 +175,13 @@ _ENQ_WIN_S = max(1, int(os.getenv("ENQUEUE_RATE_WINDOW_S", "60")))
 _ENQ_MAX = max(1, int(os.getenv("ENQUEUE_RATE_MAX", "120")))
 _U_ENQ_WIN_S = max(1, int(os.getenv("USER_ENQUEUE_RATE_WINDOW_S", "60")))
 _U_ENQ_MAX = max(1, int(os.getenv("USER_ENQUEUE_RATE_MAX", "60")))
-_enq_lock = threading.Lock()
-_enq_user_lock = threading.Lock()
-_enq_window: Dict[str, deque] = {}
-_enq_user_window: Dict[str, deque] = {}
 def _rate_limit_engine(engine_id: str) -> Tuple[bool, int, int]:
     """
     Return (allowed, retry_after_seconds, window_size_after).
+    Token bucket of _ENQ_MAX tokens refilled over _ENQ_WIN_S; the "window size" is the tokens in use.
     """
-    now = time.time()
-    with _enq_lock:
-        dq = _enq_window.get(engine_id)
-        if dq is None:
-            dq = deque()
-            _enq_window[engine_id] = dq
-        cutoff = now - _ENQ_WIN_S
-        while dq and dq[0] < cutoff:
-            dq.popleft()
-        if len(dq) >= _ENQ_MAX:
-            retry_after = int(max(0.0, _ENQ_WIN_S - (now - dq[0])))
-            return False, retry_after, len(dq)
-        dq.append(now)
-        return True, 0, len(dq)
+    allowed, retry_after, tokens_left = get_limiter().consume(f"engine:enqueue:{engine_id}", _ENQ_MAX / _ENQ_WIN_S, _ENQ_MAX)
+    return allowed, retry_after, int(_ENQ_MAX - tokens_left)
 def _rate_limit_user(user_id: str) -> Tuple[bool, int, int]:
     """
     Return (allowed, retry_after_seconds, window_size_after).
@@ -204,20 +189,8 @@ def _rate_limit_user(user_id: str) -> Tuple[bool, int, int]:
     """
     if not user_id:
         return True, 0, 0
-    now = time.time()
-    with _enq_user_lock:
-        dq = _enq_user_window.get(user_id)
-        if dq is None:
-            dq = deque()
-            _enq_user_window[user_id] = dq
-        cutoff = now - _U_ENQ_WIN_S
-        while dq and dq[0] < cutoff:
-            dq.popleft()
-        if len(dq) >= _U_ENQ_MAX:
-            retry_after = int(max(0.0, _U_ENQ_WIN_S - (now - dq[0])))
-            return False, retry_after, len(dq)
-        dq.append(now)
-        return True, 0, len(dq)
+    allowed, retry_after, tokens_left = get_limiter().consume(f"user:enqueue:{user_id}", _U_ENQ_MAX / _U_ENQ_WIN_S, _U_ENQ_MAX)
+    return allowed, retry_after, int(_U_ENQ_MAX - tokens_left)
 def _extract_job_id(res: Any) -> Optional[str]:
     job_id = None
     if isinstance(res, dict):
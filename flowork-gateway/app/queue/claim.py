@@ -0,0 +1,48 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-gateway\app\queue\claim.py total lines 49 
+########################################################################
+
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional
+HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0) # (English Hardcode) UPDATE ... RETURNING needs SQLite 3.35+
+ORDER_BY = "priority ASC, available_at ASC, created_at ASC"
+def claim_jobs(con: sqlite3.Connection, now: int, worker_id: Optional[str], max_n: int, engine_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Claims up to max_n queued jobs in priority order with ONE statement:
+        UPDATE jobs SET status='claimed' ... WHERE id IN (SELECT id ... LIMIT ?) RETURNING ...
+    SQLite runs the statement under its write lock, so concurrent claimers (threads or processes)
+    never get the same job and nobody has to retry. engine_id filters the shared (non-sharded) table.
+    `con` must be in autocommit mode (isolation_level=None), as every queue connection is.
+    """
+    where = "status='queued' AND available_at<=?"
+    params = [now]
+    if engine_id is not None:
+        where = "engine_id=? AND " + where
+        params.insert(0, engine_id)
+    if HAS_RETURNING:
+        rows = con.execute(f"""
+            UPDATE jobs
+               SET status='claimed', claimed_at=?, worker_id=?, version=version+1
+             WHERE id IN (SELECT id FROM jobs WHERE {where} ORDER BY {ORDER_BY} LIMIT ?)
+            RETURNING id, payload, priority, available_at, created_at
+        """, (now, worker_id, *params, max_n)).fetchall()
+        rows.sort(key=lambda row: (row[2], row[3], row[4])) # (English Hardcode) RETURNING order is unspecified
+    else:
+        con.execute("BEGIN IMMEDIATE") # (English Hardcode) Takes the write lock before the SELECT
+        try:
+            rows = con.execute(
+                f"SELECT id, payload, priority, available_at, created_at FROM jobs WHERE {where} ORDER BY {ORDER_BY} LIMIT ?",
+                (*params, max_n),
+            ).fetchall()
+            if rows:
+                con.execute(
+                    f"UPDATE jobs SET status='claimed', claimed_at=?, worker_id=?, version=version+1 WHERE id IN ({','.join('?' * len(rows))})",
+                    (now, worker_id, *[row[0] for row in rows]),
+                )
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+    return [{"id": jid, "payload": json.loads(payload), "priority": prio} for jid, payload, prio, _, _ in rows]
@@ -1,17 +1,19 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\queue\dispatcher.py total lines 76 
+# File NAME : C:\FLOWORK\flowork-gateway\app\queue\dispatcher.py total lines 109 
 ########################################################################
 
 import os
 import time
 import logging
+import threading
 from typing import Dict, Any, Optional
 USE_SHARDED = os.getenv("ENGINE_QUEUE_SHARDED", "true").lower() == "true"
 if USE_SHARDED:
-    from .models_sharded import enqueue_job, queue_depth
+    from .models_sharded import enqueue_job, queue_depth, reconcile_depth
 else:
-    from .models import enqueue_job, queue_depth
+    from .models import enqueue_job, queue_depth, reconcile_depth
+QUEUE_DEPTH_RECONCILE_S = float(os.getenv("QUEUE_DEPTH_RECONCILE_S", "300")) # (English Hardcode) 0 disables the reconciler
 from app.metrics import QUEUE_DEPTH
 from app.etl.outbox import enqueue_event
 from app.rl.limiter import RateLimitExceeded # (Placeholder if needed later)
@@ -27,7 +29,8 @@ class JobDispatcher:
     Central Logic for dispatching jobs to appropriate engine queues.
     Handles:
     - Engine selection (routing) - *To be implemented fully in Roadmap 3.2*
-    - Backpressure checks (QueueFullError)
+    - Backpressure checks (QueueFullError), against the trigger-maintained depth counters
+      (no COUNT(*) per enqueue); a background reconciler re-counts them every QUEUE_DEPTH_RECONCILE_S
     - Rate limiting hooks
     - Enqueuing to persistence layer (SQLite)
     - Emitting ETL events
@@ -35,6 +38,35 @@ class JobDispatcher:
     def __init__(self):
         self.max_queue = int(os.getenv("ENGINE_MAX_QUEUE", "500"))
         self.default_priority = int(os.getenv("JOB_DEFAULT_PRIORITY", "100"))
+        self._known_engines = set()
+        self._reconciler = None
+        self._reconciler_lock = threading.Lock()
+    def _track_engine(self, engine_id: str):
+        """Remembers engines for the reconciler and starts it on first use."""
+        if engine_id in self._known_engines:
+            return
+        with self._reconciler_lock:
+            self._known_engines.add(engine_id)
+            if self._reconciler is None and QUEUE_DEPTH_RECONCILE_S > 0:
+                self._reconciler = threading.Thread(target=self._reconcile_loop, name="QueueDepthReconciler", daemon=True)
+                self._reconciler.start()
+    def _reconcile_loop(self):
+        while True:
+            time.sleep(QUEUE_DEPTH_RECONCILE_S)
+            self.reconcile_depths()
+    def reconcile_depths(self) -> Dict[str, int]:
+        """Re-counts the queue of every known engine. Returns the drift found per engine."""
+        drift = {}
+        for engine_id in list(self._known_engines):
+            try:
+                counted, actual = reconcile_depth(engine_id)
+            except Exception as e:
+                log.warning(f"[Dispatcher] Queue depth reconcile failed for engine {engine_id}: {e}")
+                continue
+            if counted != actual:
+                drift[engine_id] = actual - counted
+                log.warning(f"[Dispatcher] Queue depth counter for engine {engine_id} drifted: {counted} -> {actual}")
+        return drift
     def check_rate_limit(self, remote_addr: str):
         """
         Hook for checking rate limits before dispatching.
@@ -54,6 +86,7 @@ class JobDispatcher:
             raise ValueError("engine_id is currently required until smart routing is enabled.")
         if not user_id:
              raise ValueError("user_id is required.")
+        self._track_engine(engine_id)
         current_depth = queue_depth(engine_id)
         QUEUE_DEPTH.set(current_depth)
         if current_depth >= self.max_queue:
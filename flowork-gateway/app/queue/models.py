@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\queue\models.py total lines 148 
+# File NAME : C:\FLOWORK\flowork-gateway\app\queue\models.py total lines 189 
 ########################################################################
 
 import os
@@ -8,21 +8,37 @@ import sqlite3
 import json
 import time
 import uuid
-from typing import Optional, Dict, Any
+import threading
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime # (ADDED) Dibutuhkan untuk 'get_job'
 from .. import db
 from ..models import Job
+from ..db.router import OSThreadLocal
+from .claim import claim_jobs
 DB_PATH = os.getenv("SQLITE_DB_PATH", "/app/data/gateway.db")
 os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+_local = OSThreadLocal()
+_schema_ready = False
+_schema_lock = threading.Lock()
 def _conn():
-    con = sqlite3.connect(DB_PATH, timeout=5.0, isolation_level=None)
-    con.execute("PRAGMA journal_mode=WAL;")
-    con.execute("PRAGMA synchronous=NORMAL;")
-    con.execute("PRAGMA busy_timeout=5000;")
+    """ (English Hardcode) This thread's long-lived connection (see ShardManager.get_connection). """
+    con = getattr(_local, "con", None)
+    if con is None:
+        con = sqlite3.connect(DB_PATH, timeout=5.0, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL;")
+        con.execute("PRAGMA synchronous=NORMAL;")
+        con.execute("PRAGMA busy_timeout=5000;")
+        _local.con = con
     return con
 def init_queue_schema():
+    """
+    Creates jobs, queue_depth_counters and the triggers that keep the counters in step with jobs.
+    Idempotent: counters are seeded from COUNT(*) in the same transaction that adds the triggers,
+    so a jobs table created earlier by SQLAlchemy (create_all / migrations) starts correct.
+    """
     con = _conn()
     con.executescript("""
+    BEGIN IMMEDIATE;
     CREATE TABLE IF NOT EXISTS jobs(
         id TEXT PRIMARY KEY,
         user_id TEXT NOT NULL,
@@ -40,50 +56,60 @@ def init_queue_schema():
     );
     CREATE INDEX IF NOT EXISTS idx_jobs_status_prio ON jobs(status, priority, available_at, created_at);
     CREATE INDEX IF NOT EXISTS idx_jobs_engine ON jobs(engine_id, status);
+    CREATE TABLE IF NOT EXISTS queue_depth_counters(
+        engine_id TEXT PRIMARY KEY,
+        queued INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO queue_depth_counters(engine_id, queued)
+        SELECT engine_id, COUNT(*) FROM jobs WHERE status='queued' GROUP BY engine_id;
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_queued_insert AFTER INSERT ON jobs WHEN NEW.status='queued'
+    BEGIN
+        INSERT INTO queue_depth_counters(engine_id, queued) VALUES(NEW.engine_id, 1)
+        ON CONFLICT(engine_id) DO UPDATE SET queued=queued+1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_queued_delete AFTER DELETE ON jobs WHEN OLD.status='queued'
+    BEGIN UPDATE queue_depth_counters SET queued=queued-1 WHERE engine_id=OLD.engine_id; END;
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_queued_leave AFTER UPDATE OF status ON jobs WHEN OLD.status='queued' AND NEW.status!='queued'
+    BEGIN UPDATE queue_depth_counters SET queued=queued-1 WHERE engine_id=OLD.engine_id; END;
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_queued_enter AFTER UPDATE OF status ON jobs WHEN OLD.status!='queued' AND NEW.status='queued'
+    BEGIN
+        INSERT INTO queue_depth_counters(engine_id, queued) VALUES(NEW.engine_id, 1)
+        ON CONFLICT(engine_id) DO UPDATE SET queued=queued+1;
+    END;
+    COMMIT;
     """)
-    con.close()
+def ensure_queue_schema():
+    """ (English Hardcode) Runs init_queue_schema() once per process, like ShardManager.ensure_engine_schema. """
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            init_queue_schema()
+            _schema_ready = True
 def enqueue_job(user_id:str, engine_id:str, payload:Dict[str,Any], priority:int=100, delay:int=0, job_id:str=None) -> str:
     """ (MODIFIED) Menerima job_id opsional """
     jid = job_id or str(uuid.uuid4())
     now = int(time.time())
+    ensure_queue_schema()
     con = _conn()
     con.execute(
         "INSERT INTO jobs(id,user_id,engine_id,payload,priority,status,retries,max_retries,created_at,available_at,version)"
         "VALUES(?,?,?,?,?,'queued',0,3,?,?,0)",
         (jid, user_id, engine_id, json.dumps(payload), priority, now, now + delay)
     )
-    con.close()
     return jid
-def claim_next_job(engine_id:str, worker_id:str) -> Optional[Dict[str,Any]]:
+def dequeue_jobs(engine_id:str, max_n:int=1, worker_id:Optional[str]=None) -> List[Dict[str,Any]]:
     """
-    Optimistic locking: update-one-where-queued; check rowcount to win the claim.
+    Atomically claims up to max_n queued jobs of an engine with one UPDATE ... RETURNING.
     """
-    con = _conn()
-    cur = con.cursor()
-    now = int(time.time())
-    row = cur.execute("""
-        SELECT id, payload, priority, version
-        FROM jobs
-        WHERE engine_id=? AND status='queued' AND available_at<=?
-        ORDER BY priority ASC, available_at ASC, created_at ASC
-        LIMIT 1
-    """, (engine_id, now)).fetchone()
-    if not row:
-        con.close()
-        return None
-    jid, payload, prio, ver = row
-    upd = cur.execute("""
-        UPDATE jobs
-        SET status='claimed', claimed_at=?, worker_id=?, version=version+1
-        WHERE id=? AND status='queued' AND version=?
-    """, (now, worker_id, jid, ver))
-    con.commit()
-    if upd.rowcount != 1:  # lost the race; someone else claimed
-        con.close()
-        return None
-    con.close()
-    return {"id": jid, "payload": json.loads(payload), "priority": prio}
+    ensure_queue_schema()
+    return claim_jobs(_conn(), int(time.time()), worker_id, max_n, engine_id=engine_id)
+def claim_next_job(engine_id:str, worker_id:str) -> Optional[Dict[str,Any]]:
+    jobs = dequeue_jobs(engine_id, 1, worker_id)
+    return jobs[0] if jobs else None
 def finish_job(jid:str, ok:bool, retry_delay:int=0):
+    ensure_queue_schema()
     con = _conn()
     cur = con.cursor()
     now = int(time.time())
@@ -93,7 +119,7 @@ def finish_job(jid:str, ok:bool, retry_delay:int=0):
         cur.execute("SELECT retries, max_retries FROM jobs WHERE id=?", (jid,))
         row = cur.fetchone()
         if not row:
-            con.close(); return
+            return
         retries, max_retries = row
         if retries + 1 >= max_retries:
             cur.execute("UPDATE jobs SET status='error', version=version+1 WHERE id=?", (jid,))
@@ -102,13 +128,28 @@ def finish_job(jid:str, ok:bool, retry_delay:int=0):
                 UPDATE jobs
                 SET status='queued', retries=retries+1, available_at=?, version=version+1
                 WHERE id=?""", (now + retry_delay, jid))
-    con.commit()
-    con.close()
 def queue_depth(engine_id:str) -> int:
+    ensure_queue_schema()
     con = _conn()
-    row = con.execute("SELECT COUNT(*) FROM jobs WHERE engine_id=? AND status='queued'", (engine_id,)).fetchone()
-    con.close()
+    row = con.execute("SELECT queued FROM queue_depth_counters WHERE engine_id=?", (engine_id,)).fetchone()
     return row[0] if row else 0
+def reconcile_depth(engine_id:str) -> Tuple[int, int]:
+    """
+    Resets the engine's counter to the real COUNT(*) in one write transaction.
+    Returns (counter_before, actual); they differ only if something bypassed the triggers.
+    """
+    ensure_queue_schema()
+    con = _conn()
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        row = con.execute("SELECT queued FROM queue_depth_counters WHERE engine_id=?", (engine_id,)).fetchone()
+        actual = con.execute("SELECT COUNT(*) FROM jobs WHERE engine_id=? AND status='queued'", (engine_id,)).fetchone()[0]
+        con.execute("INSERT OR REPLACE INTO queue_depth_counters(engine_id, queued) VALUES(?, ?)", (engine_id, actual))
+        con.execute("COMMIT")
+    except BaseException:
+        con.execute("ROLLBACK")
+        raise
+    return (row[0] if row else 0), actual
 def get_job(jid: str) -> Optional[Job]:
     """
     (ADDED) Fungsi ini hilang dan dibutuhkan oleh dispatch.py.
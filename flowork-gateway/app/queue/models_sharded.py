@@ -1,13 +1,14 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\queue\models_sharded.py total lines 68 
+# File NAME : C:\FLOWORK\flowork-gateway\app\queue\models_sharded.py total lines 73 
 ########################################################################
 
 import json
 import time
 import uuid
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from app.db.router import db_router
+from .claim import claim_jobs
 def enqueue_job(engine_id:str, user_id:str, payload:Dict[str,Any], priority:int=100, delay:int=0, job_id:str=None) -> str:
     db_router.ensure_engine_schema(engine_id)
     con = db_router.get_connection(engine_id)
@@ -20,28 +21,13 @@ def enqueue_job(engine_id:str, user_id:str, payload:Dict[str,Any], priority:int=
     )
     con.commit()
     return jid
+def dequeue_jobs(engine_id:str, max_n:int=1, worker_id:Optional[str]=None) -> List[Dict[str,Any]]:
+    """ (English Hardcode) Atomically claims up to max_n jobs of this engine's shard. """
+    db_router.ensure_engine_schema(engine_id)
+    return claim_jobs(db_router.get_connection(engine_id), int(time.time()), worker_id, max_n)
 def claim_next_job(engine_id:str, worker_id:str) -> Optional[Dict[str,Any]]:
-    con = db_router.get_connection(engine_id)
-    now = int(time.time())
-    row = con.execute("""
-        SELECT id, payload, priority, version
-          FROM jobs
-         WHERE status='queued' AND available_at<=?
-         ORDER BY priority ASC, available_at ASC, created_at ASC
-         LIMIT 1
-    """, (now,)).fetchone()
-    if not row:
-        return None
-    jid, payload, prio, ver = row
-    upd = con.execute("""
-        UPDATE jobs
-           SET status='claimed', claimed_at=?, worker_id=?, version=version+1
-         WHERE id=? AND status='queued' AND version=?
-    """, (now, worker_id, jid, ver))
-    con.commit()
-    if upd.rowcount != 1:
-        return None
-    return {"id": jid, "payload": json.loads(payload), "priority": prio}
+    jobs = dequeue_jobs(engine_id, 1, worker_id)
+    return jobs[0] if jobs else None
 def finish_job(engine_id:str, jid:str, ok:bool, retry_delay:int=0):
     con = db_router.get_connection(engine_id)
     now = int(time.time())
@@ -62,6 +48,25 @@ def finish_job(engine_id:str, jid:str, ok:bool, retry_delay:int=0):
              WHERE id=?""", (now + retry_delay, jid))
     con.commit()
 def queue_depth(engine_id:str) -> int:
+    """ (English Hardcode) Queued jobs of the engine, read from the trigger-maintained counter. """
+    db_router.ensure_engine_schema(engine_id)
     con = db_router.get_connection(engine_id)
-    row = con.execute("SELECT COUNT(*) FROM jobs WHERE status='queued'").fetchone()
+    row = con.execute("SELECT value FROM queue_counters WHERE counter='queued'").fetchone()
     return row[0] if row else 0
+def reconcile_depth(engine_id:str) -> Tuple[int, int]:
+    """
+    Resets the counter to the real COUNT(*) in one write transaction.
+    Returns (counter_before, actual); they differ only if something bypassed the triggers.
+    """
+    db_router.ensure_engine_schema(engine_id)
+    con = db_router.get_connection(engine_id)
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        row = con.execute("SELECT value FROM queue_counters WHERE counter='queued'").fetchone()
+        actual = con.execute("SELECT COUNT(*) FROM jobs WHERE status='queued'").fetchone()[0]
+        con.execute("INSERT OR REPLACE INTO queue_counters(counter, value) VALUES('queued', ?)", (actual,))
+        con.execute("COMMIT")
+    except BaseException:
+        con.execute("ROLLBACK")
+        raise
+    return (row[0] if row else 0), actual
@@ -1,13 +1,18 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\rl\limiter.py total lines 93 
+# File NAME : C:\FLOWORK\flowork-gateway\app\rl\limiter.py total lines 244 
 ########################################################################
 
-import time, sqlite3, os
-from typing import Tuple, Any
-from flask import g, jsonify, request, current_app, Response
+import time, sqlite3, os, threading, atexit, logging, zlib
+from typing import Tuple, Any, Optional
+from flask import g, jsonify, request
 from functools import wraps
+from app.metrics import RATE_LIMIT_HIT
 DB_PATH = os.getenv("SQLITE_DB_PATH", "/app/data/gateway.db")
+RL_STRIPES = max(1, int(os.getenv("RL_STRIPES", "64"))) # (English Hardcode) Lock stripes, keys hash onto one
+RL_SWEEP_INTERVAL_S = float(os.getenv("RL_SWEEP_INTERVAL_S", "10")) # (English Hardcode) Evicts refilled buckets and checkpoints
+RL_CHECKPOINT = os.getenv("RL_CHECKPOINT", "true").lower() == "true" # (English Hardcode) Persist buckets in SQLite across restarts
+log = logging.getLogger(__name__)
 def _conn():
     """ (English Hardcode) Creates a WAL-enabled connection. """
     con = sqlite3.connect(DB_PATH, timeout=5.0, isolation_level=None)
@@ -28,65 +33,211 @@ def init_rl_schema():
     );
     """)
     con.close()
-def _now():
-    return int(time.time())
+def _scope_of(key: str) -> str:
+    """ (English Hardcode) "user:42" -> "user", the label of RATE_LIMIT_HIT. """
+    scope, sep, _ = key.partition(":")
+    return scope if sep else "global"
+class _Stripe:
+    __slots__ = ("lock", "buckets", "dirty")
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {} # (English Hardcode) key -> [tokens, last_refill (monotonic), rate, burst]
+        self.dirty = set()
+class TokenBucketLimiter:
+    """
+    In-memory token buckets, one per key ("user:<id>", "engine:<id>", "route:<name>:<id>", ...).
+    Keys hash onto RL_STRIPES lock stripes, so requests for different keys rarely wait on each
+    other and a check is a dict lookup plus a little arithmetic, with no I/O.
+
+    Buckets live in this gateway process. Every RL_SWEEP_INTERVAL_S seconds sweep() drops the
+    buckets that refilled completely (the same as no bucket) and, when a checkpoint path is set,
+    writes the changed ones to the rl_bucket table in one transaction (again at exit). They are
+    loaded on start, so a restart does not hand every user a full burst.
+    """
+    def __init__(self, stripes: int = RL_STRIPES, checkpoint_path: Optional[str] = None):
+        self._stripes = [_Stripe() for _ in range(max(1, stripes))]
+        self.checkpoint_path = checkpoint_path
+        self._sweep_lock = threading.Lock()
+        self._sweep_thread = None
+        self._stop_event = threading.Event()
+    def _stripe(self, key: str) -> _Stripe:
+        return self._stripes[zlib.crc32(key.encode("utf-8")) % len(self._stripes)]
+    def consume(self, key: str, rate: float, burst: float, cost: float = 1.0) -> Tuple[bool, int, float]:
+        """
+        Takes `cost` tokens from the bucket of `key` if it has them.
+        Returns (allowed, retry_after_seconds, tokens_left). A bucket whose rate or burst changed
+        starts over full, as the SQLite limiter did.
+        """
+        now = time.monotonic()
+        stripe = self._stripe(key)
+        with stripe.lock:
+            bucket = stripe.buckets.get(key)
+            if bucket is None or bucket[2] != rate or bucket[3] != burst:
+                bucket = stripe.buckets[key] = [burst, now, rate, burst]
+            else:
+                bucket[0] = min(bucket[0] + (now - bucket[1]) * rate, burst)
+                bucket[1] = now
+            stripe.dirty.add(key)
+            tokens = bucket[0]
+            if tokens >= cost:
+                bucket[0] = tokens - cost
+                return True, 0, bucket[0]
+        retry = int((cost - tokens) / rate + 0.999) if rate > 0 else 1
+        RATE_LIMIT_HIT.labels(scope=_scope_of(key)).inc()
+        return False, max(retry, 1), tokens
+    def allow(self, key: str, rate: float, burst: float, cost: float = 1.0) -> Tuple[bool, int]:
+        allowed, retry_after, _ = self.consume(key, rate, burst, cost)
+        return allowed, retry_after
+    def reset(self, key: Optional[str] = None):
+        for stripe in ([self._stripe(key)] if key is not None else self._stripes):
+            with stripe.lock:
+                if key is None:
+                    stripe.dirty.update(stripe.buckets)
+                    stripe.buckets.clear()
+                elif stripe.buckets.pop(key, None) is not None:
+                    stripe.dirty.add(key)
+    def __len__(self) -> int:
+        return sum(len(stripe.buckets) for stripe in self._stripes)
+    def restore(self) -> int:
+        """Loads the checkpointed buckets, refilled for the time the gateway was down."""
+        if not self.checkpoint_path:
+            return 0
+        con = sqlite3.connect(self.checkpoint_path, timeout=5.0)
+        try:
+            rows = con.execute("SELECT key,tokens,last_refill,rate,burst FROM rl_bucket").fetchall()
+        finally:
+            con.close()
+        wall_now, now = time.time(), time.monotonic()
+        restored = 0
+        for key, tokens, last_refill, rate, burst in rows:
+            tokens = min(tokens + max(0.0, wall_now - last_refill) * rate, burst)
+            if tokens >= burst:
+                continue
+            stripe = self._stripe(key)
+            with stripe.lock:
+                stripe.buckets.setdefault(key, [tokens, now, rate, burst])
+            restored += 1
+        return restored
+    def sweep(self) -> int:
+        """
+        Drops refilled buckets and checkpoints the ones changed since the last sweep (if a
+        checkpoint path is set). Returns the number of rows written or deleted.
+        """
+        with self._sweep_lock:
+            wall_now, now = time.time(), time.monotonic()
+            upserts, deletes = [], []
+            for stripe in self._stripes:
+                with stripe.lock:
+                    dirty, stripe.dirty = stripe.dirty, set()
+                    for key, bucket in list(stripe.buckets.items()):
+                        bucket[0] = min(bucket[0] + (now - bucket[1]) * bucket[2], bucket[3])
+                        bucket[1] = now
+                        if bucket[0] >= bucket[3]:
+                            del stripe.buckets[key]
+                            dirty.add(key)
+                        elif key in dirty:
+                            upserts.append((key, bucket[0], wall_now, bucket[2], bucket[3]))
+                            dirty.discard(key)
+                    deletes.extend((key,) for key in dirty)
+            if not self.checkpoint_path or not (upserts or deletes):
+                return 0
+            con = sqlite3.connect(self.checkpoint_path, timeout=5.0)
+            try:
+                with con:
+                    if upserts:
+                        con.executemany("INSERT OR REPLACE INTO rl_bucket(key,tokens,last_refill,rate,burst) VALUES(?,?,?,?,?)", upserts)
+                    if deletes:
+                        con.executemany("DELETE FROM rl_bucket WHERE key=?", deletes)
+            finally:
+                con.close()
+            return len(upserts) + len(deletes)
+    def start(self, interval_s: float = RL_SWEEP_INTERVAL_S):
+        """Starts the background sweep (idempotent); the last sweep runs at exit."""
+        if interval_s <= 0 or self._sweep_thread is not None:
+            return
+        def _loop():
+            while not self._stop_event.wait(interval_s):
+                try:
+                    self.sweep()
+                except Exception as e:
+                    log.warning(f"[RateLimit] Sweep failed: {e}") # English Log
+        self._sweep_thread = threading.Thread(target=_loop, name="RateLimitSweep", daemon=True)
+        self._sweep_thread.start()
+        atexit.register(self.stop)
+    def stop(self):
+        self._stop_event.set()
+        try:
+            self.sweep()
+        except Exception as e:
+            log.warning(f"[RateLimit] Final sweep failed: {e}") # English Log
+_default_limiter = TokenBucketLimiter()
+def get_limiter() -> TokenBucketLimiter:
+    """ (English Hardcode) The gateway-wide limiter shared by every route. """
+    return _default_limiter
 def allow(key:str, rate:float, burst:float, cost:float=1.0) -> Tuple[bool,int]:
     """
     (English Hardcode)
     Token Bucket Algorithm (from Roadmap 2.2).
     Returns (allowed, retry_after_seconds).
     """
-    con = _conn(); cur = con.cursor()
-    now = _now()
-    row = cur.execute("SELECT tokens,last_refill,rate,burst FROM rl_bucket WHERE key=?", (key,)).fetchone()
-    if row:
-        tokens, last_refill, rate_db, burst_db = row
-        if rate_db != rate or burst_db != burst:
-            tokens = burst
-            last_refill = now
-        else:
-            tokens = min(tokens + (now - last_refill) * rate_db, burst_db)
-        allowed = tokens >= cost
-        if allowed:
-            tokens -= cost
-            cur.execute("UPDATE rl_bucket SET tokens=?, last_refill=? WHERE key=?", (tokens, now, key))
-            con.commit(); con.close()
-            return True, 0
-        else:
-            deficit = cost - tokens
-            retry = int(deficit / rate_db) if rate_db > 0 else 1
-            cur.execute("UPDATE rl_bucket SET tokens=?, last_refill=? WHERE key=?", (tokens, now, key))
-            con.commit(); con.close()
-            return False, max(retry, 1)
-    else:
-        tokens = max(burst - cost, 0.0)
-        cur.execute("INSERT OR REPLACE INTO rl_bucket(key,tokens,last_refill,rate,burst) VALUES(?,?,?,?,?)",
-                    (key, tokens, now, rate, burst))
-        con.commit(); con.close()
-        return True, 0
+    return _default_limiter.allow(key, rate, burst, cost)
 class RateLimitExceeded(Exception):
     """Raised when a rate limit is exceeded."""
-    pass
+    def __init__(self, message: str = "rate_limited", retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
 class RateLimiter:
-    """(English Hardcode) Placeholder class for compatibility."""
-    def __init__(self, app: Any = None):
+    """
+    (English Hardcode) Flask extension around the shared limiter: restores the SQLite checkpoint
+    (RL_CHECKPOINT) on init_app() and starts the periodic sweep.
+    """
+    def __init__(self, app: Any = None, limiter: Optional[TokenBucketLimiter] = None):
         self.app = app
+        self.limiter = limiter or _default_limiter
         if app:
             self.init_app(app)
     def init_app(self, app: Any):
         """(English Hardcode) Initialize the limiter with app config."""
-        pass
-    def allow_request(self, key: str) -> bool:
-        """(English Hardcode) Placeholder, always returns True for now."""
-        return True
+        if RL_CHECKPOINT:
+            try:
+                init_rl_schema()
+                self.limiter.checkpoint_path = DB_PATH
+                restored = self.limiter.restore()
+                app.logger.info(f"[RateLimit] Restored {restored} buckets from {DB_PATH}") # English Log
+            except Exception as e:
+                self.limiter.checkpoint_path = None
+                app.logger.warning(f"[RateLimit] SQLite checkpoint disabled, buckets stay in memory only: {e}") # English Log
+        self.limiter.start()
+    def allow_request(self, key: str, rate: float = 1.0, burst: float = 1.0, cost: float = 1.0) -> bool:
+        """(English Hardcode) True if `key` may proceed now."""
+        return self.limiter.allow(key, rate, burst, cost)[0]
 def rl_allow(limiter: RateLimiter) -> bool:
     if request.endpoint in ['health_bp.health_check', 'prometheus_bp.metrics']:
         return True
     return True
+def _scope_identity(scope: str) -> str:
+    if scope == "engine":
+        return request.headers.get("X-Flowork-Engine-ID") or request.remote_addr or "anonymous"
+    user = getattr(g, "user", None)
+    if user is not None and getattr(user, "id", None) is not None:
+        return str(user.id)
+    return request.headers.get("X-User-Id") or request.remote_addr or "anonymous"
 def rate_limit(limit: int, per: int, scope: str):
+    """
+    (English Hardcode) Allows `limit` calls per `per` seconds (burst `limit`) for each
+    user ("user"), engine ("engine") or caller of this route ("route"). Answers 429 + Retry-After.
+    """
+    rate, burst = float(limit) / max(per, 1), float(limit)
     def decorator(f: Any):
         @wraps(f)
         def _wrapped(*args: Any, **kwargs: Any):
+            identity = _scope_identity(scope)
+            allowed, retry_after = _default_limiter.allow(f"{scope}:{request.endpoint}:{identity}", rate, burst)
+            if not allowed:
+                resp = jsonify({"error": "rate_limited", "retry_after": retry_after})
+                resp.status_code = 429
+                resp.headers["Retry-After"] = str(retry_after)
+                return resp
             return f(*args, **kwargs)
         return _wrapped
     return decorator
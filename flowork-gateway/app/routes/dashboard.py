@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\routes\dashboard.py total lines 111 
+# File NAME : C:\FLOWORK\flowork-gateway\app\routes\dashboard.py total lines 112 
 ########################################################################
 
 from flask import Blueprint, jsonify, current_app, g
@@ -11,6 +11,7 @@ from collections import Counter, defaultdict
 from sqlalchemy import func
 from ..helpers import crypto_auth_required, find_active_engine_session, get_db_session
 from ..globals import globals_instance # (ADDED) FIX: Impor instance utama
+from ..net.core_http import core_request
 from ..models import User, RegisteredEngine, EngineShare
 from ..extensions import db
 dashboard_bp = Blueprint("dashboard", __name__, url_prefix="/api/v1/dashboard")
@@ -73,7 +74,7 @@ def _get_live_stats_from_core(user_id, app):
     headers["X-User-Address"] = core_user_id # (English Hardcode) ADDED: Send this for Core auth
     app.logger.info(f"[Gateway Dashboard] Calling Core Engine endpoint: {target_url} with User-ID header: {core_user_id[:10]}...") # English Log
     try:
-        resp = requests.get(target_url, headers=headers, timeout=5)
+        resp = core_request("GET", target_url, headers=headers, timeout=5)
         resp.raise_for_status()
         live_data = resp.json()
         app.logger.info(f"[Gateway Dashboard] Successfully fetched live stats from Core Engine {active_engine_id or 'fallback'}. Active jobs: {len(live_data.get('active_jobs', []))}") # English Log
@@ -1,35 +1,25 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\routes\jobs.py total lines 72 
+# File NAME : C:\FLOWORK\flowork-gateway\app\routes\jobs.py total lines 62 
 ########################################################################
 
 import time
 import uuid
-import threading
-from typing import Dict, Any
 from flask import Blueprint, request, jsonify
 from app.ops.chaos import maybe_chaos           # Chaos injection (header-gated)
 from app.ops.drain import is_draining           # Drain guard for rolling upgrades
 from app.idem.global_client import atomic_get_or_create_global  # Global D1 idempotency
-from app.metrics import RATE_LIMIT_HIT          # Metrics (rate-limit rejections)
+from app.rl.limiter import get_limiter          # Shared token buckets (counts RATE_LIMIT_HIT)
 jobs_bp = Blueprint("jobs", __name__, url_prefix="/api/v1/jobs")
-_rate_bucket: Dict[str, Dict[str, Any]] = {}
-_rate_lock = threading.Lock()
 _LIMIT_PER_WINDOW = 30  # requests
 _WINDOW_SECONDS = 60    # seconds
 def _rate_key(req) -> str:
     uid = req.headers.get("X-User-Id") or req.remote_addr or "anonymous"
-    return f"user:{uid}"
-def _rate_limited(req) -> bool:
-    now = int(time.time())
-    key = _rate_key(req)
-    with _rate_lock:
-        entry = _rate_bucket.get(key)
-        if not entry or now - entry["ts"] >= _WINDOW_SECONDS:
-            _rate_bucket[key] = {"ts": now, "count": 1}
-            return False
-        entry["count"] += 1
-        return entry["count"] > _LIMIT_PER_WINDOW
+    return f"user:jobs:{uid}"
+def _rate_limited(req) -> int:
+    """Seconds to wait before retrying, 0 if the request may proceed."""
+    allowed, retry_after = get_limiter().allow(_rate_key(req), _LIMIT_PER_WINDOW / _WINDOW_SECONDS, _LIMIT_PER_WINDOW)
+    return 0 if allowed else retry_after
 @jobs_bp.post("/enqueue")
 def enqueue_job():
     """
@@ -44,9 +34,9 @@ def enqueue_job():
             "message": "Gateway is draining for an upgrade. Please try again later.",
             "retry_after": 30
         }), 503
-    if _rate_limited(request):
-        RATE_LIMIT_HIT.labels(scope="user").inc()
-        return jsonify({"error": "rate_limited", "retry_after": 10}), 429
+    retry_after = _rate_limited(request)
+    if retry_after:
+        return jsonify({"error": "rate_limited", "retry_after": retry_after}), 429, {"Retry-After": str(retry_after)}
     data = request.get_json(silent=True) or {}
     task_type = str(data.get("type", "generic")).strip()
     args = data.get("args", {})
@@ -1,15 +1,31 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\routes\proxy.py total lines 265 
+# File NAME : C:\FLOWORK\flowork-gateway\app\routes\proxy.py total lines 257 
 ########################################################################
 
-from flask import Blueprint, request, jsonify, make_response, g
+from flask import Blueprint, request, jsonify, make_response, g, Response
 import requests
 import os
+import threading
 from ..helpers import crypto_auth_required, find_active_engine_session
 from ..extensions import db # (ADDED) Need db session for find_active_engine_session
 from ..globals import globals_instance # (ADDED) FIX: Impor instance utama
+from ..net.core_http import core_request, RawBody, passthrough_headers
 proxy_bp = Blueprint("proxy", __name__) # (FIXED) Hapus prefix, biarkan __init__.py yang atur
+_component_list_cache = {} # (English Hardcode) (target_url, query) -> (etag, body, headers) of the last 200 from Core
+_component_list_cache_lock = threading.Lock()
+COMPONENT_LIST_CACHE_SIZE = 64
+def _stream_core_response(resp):
+    """
+    Passes the Core response through chunk by chunk, still encoded, instead of buffering it.
+    The pooled connection goes back to the pool once the client has read (or dropped) the body.
+    """
+    return Response(
+        RawBody(resp),
+        status=resp.status_code,
+        headers=passthrough_headers(resp),
+        direct_passthrough=True,
+    )
 @proxy_bp.route("/api/v1/system-data/components/<component_type>", methods=["GET"]) # (FIXED) Tambah prefix /api/v1
 def proxy_component_list(component_type):
     """
@@ -33,15 +49,37 @@ def proxy_component_list(component_type):
     target_url = f"{core_server_url}/api/v1/{component_type}"
     api_key = os.getenv("GATEWAY_SECRET_TOKEN")
     headers = {"X-API-Key": api_key} if api_key else {}
+    cache_key = (target_url, tuple(sorted(request.args.items(multi=True))))
+    with _component_list_cache_lock:
+        cached = _component_list_cache.get(cache_key)
+    if cached:
+        headers["If-None-Match"] = cached[0] # (English Hardcode) Core answers 304 while its catalog version is unchanged
     try:
-        resp = requests.get(
-            target_url, headers=headers, timeout=10, params=request.args
+        resp = core_request(
+            "GET", target_url, headers=headers, timeout=10, params=request.args
         )
-        resp.raise_for_status()
-        response = make_response(resp.content, resp.status_code)
-        for h, v in resp.headers.items():
-            if h.lower() not in ["content-encoding", "transfer-encoding", "connection"]:
-                response.headers[h] = v
+        if resp.status_code == 304 and cached:
+            etag, body, cached_headers = cached
+        else:
+            resp.raise_for_status()
+            etag, body = resp.headers.get("ETag"), resp.content
+            cached_headers = {
+                h: v for h, v in resp.headers.items()
+                if h.lower() not in ["content-encoding", "transfer-encoding", "connection", "content-length"]
+            }
+            if etag:
+                with _component_list_cache_lock:
+                    _component_list_cache.pop(cache_key, None)
+                    _component_list_cache[cache_key] = (etag, body, cached_headers)
+                    while len(_component_list_cache) > COMPONENT_LIST_CACHE_SIZE:
+                        _component_list_cache.pop(next(iter(_component_list_cache)))
+        client_etags = [tag.strip() for tag in request.headers.get("If-None-Match", "").split(",")]
+        if etag and etag in client_etags:
+            response = make_response("", 304)
+        else:
+            response = make_response(body, 200)
+        for h, v in cached_headers.items():
+            response.headers[h] = v
         return response
     except requests.exceptions.RequestException as e:
         return (
@@ -62,13 +100,13 @@ def proxy_health_check():
     headers = {
         k: v
         for k, v in request.headers
-        if k.lower() not in ["host", "authorization", "cookie"]
+        if k.lower() not in ["host", "authorization", "cookie", "x-session-token"]
     }
     api_key = os.getenv("GATEWAY_SECRET_TOKEN")
     if api_key:
         headers["X-API-Key"] = api_key
     try:
-        resp = requests.get(target_url, headers=headers, timeout=5)
+        resp = core_request("GET", target_url, headers=headers, timeout=5)
         response = make_response(resp.content, resp.status_code)
         for h, v in resp.headers.items():
             if h.lower() not in ["content-encoding", "transfer-encoding", "connection"]:
@@ -93,27 +131,16 @@ def proxy_news_request():
     headers = {
         k: v
         for k, v in request.headers
-        if k.lower() not in ["host", "authorization", "cookie"]
+        if k.lower() not in ["host", "authorization", "cookie", "x-session-token"]
     }
     api_key = os.getenv("GATEWAY_SECRET_TOKEN")
     if api_key:
         headers["X-API-Key"] = api_key
     try:
-        resp = requests.get(
-            target_url, headers=headers, params=request.args, timeout=15
+        resp = core_request(
+            "GET", target_url, headers=headers, params=request.args, timeout=15, stream=True
         )
-        excluded_headers = [
-            "content-encoding",
-            "content-length",
-            "transfer-encoding",
-            "connection",
-        ]
-        response_headers = [
-            (n, v)
-            for n, v in resp.raw.headers.items()
-            if n.lower() not in excluded_headers
-        ]
-        return make_response(resp.content, resp.status_code, response_headers)
+        return _stream_core_response(resp)
     except requests.exceptions.RequestException as e:
         return (
             jsonify(
@@ -133,27 +160,16 @@ def proxy_localization_request(lang_code):
     headers = {
         k: v
         for k, v in request.headers
-        if k.lower() not in ["host", "authorization", "cookie"]
+        if k.lower() not in ["host", "authorization", "cookie", "x-session-token"]
     }
     api_key = os.getenv("GATEWAY_SECRET_TOKEN")
     if api_key:
         headers["X-API-Key"] = api_key
     try:
-        resp = requests.get(
-            target_url, headers=headers, params=request.args, timeout=15
+        resp = core_request(
+            "GET", target_url, headers=headers, params=request.args, timeout=15, stream=True
         )
-        excluded_headers = [
-            "content-encoding",
-            "content-length",
-            "transfer-encoding",
-            "connection",
-        ]
-        response_headers = [
-            (n, v)
-            for n, v in resp.raw.headers.items()
-            if n.lower() not in excluded_headers
-        ]
-        return make_response(resp.content, resp.status_code, response_headers)
+        return _stream_core_response(resp)
     except requests.exceptions.RequestException as e:
         return (
             jsonify(
@@ -170,24 +186,10 @@ def proxy_component_assets(subpath):
     api_key = os.getenv("GATEWAY_SECRET_TOKEN")
     headers = {"X-API-Key": api_key} if api_key else {}
     try:
-        resp = requests.get(
-            target_url, headers=headers, stream=True, timeout=10, params=request.args
+        resp = core_request(
+            "GET", target_url, headers=headers, stream=True, timeout=10, params=request.args
         )
-        excluded_headers = [
-            "content-encoding",
-            "content-length",
-            "transfer-encoding",
-            "connection",
-        ]
-        headers = [
-            (name, value)
-            for (name, value) in resp.raw.headers.items()
-            if name.lower() not in excluded_headers
-        ]
-        response = make_response(resp.content, resp.status_code)
-        for name, value in headers:
-            response.headers[name] = value
-        return response
+        return _stream_core_response(resp)
     except requests.exceptions.RequestException as e:
         return (
             jsonify(
@@ -223,7 +225,7 @@ def proxy_request(subpath): # (FIXED) Removed current_user
         )
     target_url = f"{core_server_url}/api/v1/{subpath}"
     headers = {
-        k: v for k, v in request.headers if k.lower() not in ["host", "authorization"]
+        k: v for k, v in request.headers if k.lower() not in ["host", "authorization", "x-session-token"] # (English Hardcode) Gateway session tokens never reach an engine
     }
     api_key = os.getenv("GATEWAY_SECRET_TOKEN")
     if api_key:
@@ -233,28 +235,18 @@ def proxy_request(subpath): # (FIXED) Removed current_user
         if "X-Flowork-Engine-ID" not in headers and target_engine_id:
             headers["X-Flowork-Engine-ID"] = str(target_engine_id)
     try:
-        resp = requests.request(
-            method=request.method,
-            url=target_url,
+        resp = core_request(
+            request.method,
+            target_url,
             headers=headers,
             data=request.get_data(),
             cookies=request.cookies,
             allow_redirects=False,
             timeout=30,
             params=request.args,
+            stream=True,
         )
-        excluded_headers = [
-            "content-encoding",
-            "content-length",
-            "transfer-encoding",
-            "connection",
-        ]
-        response_headers = [
-            (n, v)
-            for n, v in resp.raw.headers.items()
-            if n.lower() not in excluded_headers
-        ]
-        return make_response(resp.content, resp.status_code, response_headers)
+        return _stream_core_response(resp)
     except requests.exceptions.RequestException as e:
         return (
             jsonify(
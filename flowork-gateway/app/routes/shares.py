@@ -43,11 +43,11 @@ def create_share():
         checked_guest_address = w3.to_checksum_address(share_with_address)
     except Exception:
         return jsonify({"error": "Invalid guest public address format"}), 400 # English Hardcode
-    guest_user = User.query.filter(User.public_address.ilike(checked_guest_address)).first()
+    guest_user = User.query.filter(User.address_matches(checked_guest_address)).first()
     if not guest_user:
         current_app.logger.info(f"[Shares] Creating new user record for guest: {checked_guest_address}") # English Hardcode
         placeholder_email = f"{checked_guest_address.lower()}@flowork.crypto" # Email placeholder unik
-        email_exists = User.query.filter(User.public_address.ilike(checked_guest_address)).first()
+        email_exists = User.query.filter(User.address_matches(checked_guest_address)).first()
         if email_exists:
             guest_user = email_exists # Use existing user
         else:
@@ -39,7 +39,7 @@ def get_public_profile(identifier):
     (English Hardcode) This fixes the 404 error from the GUI.
     """
     try:
-        user = User.query.filter(User.public_address.ilike(identifier)).first()
+        user = User.query.filter(User.address_matches(identifier)).first()
         if not user:
              user = User.query.filter(User.username.ilike(identifier)).first()
         if not user:
@@ -0,0 +1,131 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-gateway\app\security\session_tokens.py total lines 132 
+########################################################################
+
+"""
+Short-lived gateway sessions for crypto_auth_required.
+Recovering the signer of an EIP-191 signature costs an ECDSA public key recovery. After one good
+signature the gateway hands out an HMAC-signed session token (X-Session-Token) bound to the lower-case
+address; requests carrying it skip the recovery. Verified (address, message, signature) triples are
+also kept in a bounded LRU until their signed timestamp goes stale.
+ENV:
+- GATEWAY_SESSION_SECRET      (HMAC key; falls back to the app SECRET_KEY unless that is a known default
+                                or shorter than 16 characters, in which case a random per-process key is used)
+- GATEWAY_SESSION_TTL_S=900   (token lifetime in seconds)
+- GATEWAY_SIG_CACHE_SIZE=10000
+"""
+import os
+import hmac
+import logging
+import secrets
+import time
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+SESSION_TOKEN_HEADER = "X-Session-Token" # English Hardcode
+SESSION_EXPIRES_HEADER = "X-Session-Expires" # English Hardcode
+SESSION_TTL_S = int(os.getenv("GATEWAY_SESSION_TTL_S", "900"))
+SIG_CACHE_SIZE = int(os.getenv("GATEWAY_SIG_CACHE_SIZE", "10000"))
+SIGNATURE_MAX_AGE_S = 300 # (English Hardcode) Same window as the timestamp check in crypto_auth_required
+_TOKEN_VERSION = "v1"
+MIN_SECRET_LENGTH = 16
+KNOWN_DEFAULT_SECRETS = frozenset(("dev_dummy_secret_do_not_use_in_prod", "changeme")) # (English Hardcode) See app/config.py and env_guard.py
+log = logging.getLogger(__name__)
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+class SessionTokenSigner:
+    """Issues and checks "<payload>.<hmac>" tokens whose payload is "v1|<address lower>|<expires unix>"."""
+    def __init__(self, secret: str, ttl_s: int = SESSION_TTL_S):
+        if not secret:
+            raise ValueError("Session token secret is empty.") # English Hardcode
+        self._key = hashlib.sha256(("flowork-session|" + secret).encode("utf-8")).digest() # (English Hardcode) Not the raw JWT key
+        self.ttl_s = ttl_s
+    def _mac(self, payload: bytes) -> bytes:
+        return hmac.new(self._key, payload, hashlib.sha256).digest()
+    def issue(self, address: str, now: Optional[float] = None) -> Tuple[str, int]:
+        """Returns (token, expires_at)."""
+        expires_at = int(now if now is not None else time.time()) + self.ttl_s
+        payload = f"{_TOKEN_VERSION}|{address.lower()}|{expires_at}".encode("utf-8")
+        return f"{_b64encode(payload)}.{_b64encode(self._mac(payload))}", expires_at
+    def verify(self, token: str, now: Optional[float] = None) -> Optional[str]:
+        """The lower-case address the token was issued for, or None if it is forged, malformed or expired."""
+        try:
+            payload_text, mac_text = token.split(".", 1)
+            payload = _b64decode(payload_text)
+            if not hmac.compare_digest(self._mac(payload), _b64decode(mac_text)):
+                return None
+            version, address, expires_at = payload.decode("utf-8").split("|")
+            if version != _TOKEN_VERSION or int(expires_at) < (now if now is not None else time.time()):
+                return None
+            return address
+        except (ValueError, UnicodeDecodeError):
+            return None
+class VerifiedSignatureCache:
+    """
+    Bounded LRU of signatures that already passed verification. An entry expires with the
+    timestamp inside its signed message, so the cache never widens the replay window.
+    """
+    def __init__(self, max_size: int = SIG_CACHE_SIZE):
+        self.max_size = max(1, max_size)
+        self._entries = OrderedDict() # (English Hardcode) (address lower, message, signature) -> expires_at
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    def contains(self, address: str, message: str, signature: str, now: Optional[float] = None) -> bool:
+        key = (address.lower(), message, signature)
+        now = now if now is not None else time.time()
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is None or expires_at < now:
+                if expires_at is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return False
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True
+    def add(self, address: str, message: str, signature: str, signed_at: int):
+        with self._lock:
+            self._entries[(address.lower(), message, signature)] = signed_at + SIGNATURE_MAX_AGE_S
+            self._entries.move_to_end((address.lower(), message, signature))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    def __len__(self) -> int:
+        return len(self._entries)
+_signer = None
+_signer_lock = threading.Lock()
+signature_cache = VerifiedSignatureCache()
+def _is_usable_secret(secret: Optional[str]) -> bool:
+    return bool(secret) and secret not in KNOWN_DEFAULT_SECRETS and len(secret) >= MIN_SECRET_LENGTH
+def _select_session_secret(app) -> str:
+    """
+    GATEWAY_SESSION_SECRET, else the app SECRET_KEY. A missing, known default or short secret would let
+    anyone mint tokens, so it is replaced by a random per-process key (tokens then die with the process).
+    """
+    configured = os.getenv("GATEWAY_SESSION_SECRET")
+    if _is_usable_secret(configured):
+        return configured
+    if configured:
+        log.error("[Session] GATEWAY_SESSION_SECRET is a known default or shorter than 16 characters. Ignoring it.") # English Log
+    app_secret = app.config.get("SECRET_KEY")
+    if _is_usable_secret(app_secret):
+        return app_secret
+    log.error(
+        "[Session] !!! No safe session secret: GATEWAY_SESSION_SECRET is unset and SECRET_KEY (JWT_SECRET_KEY) is the "
+        "default or too short. Using a random per-process key; session tokens will not survive a restart. "
+        "Set GATEWAY_SESSION_SECRET to a long random value. !!!"
+    ) # English Log
+    return secrets.token_hex(32)
+def get_session_signer(app) -> SessionTokenSigner:
+    """The process-wide signer, keyed as described in _select_session_secret()."""
+    global _signer
+    if _signer is None:
+        with _signer_lock:
+            if _signer is None:
+                _signer = SessionTokenSigner(_select_session_secret(app))
+    return _signer
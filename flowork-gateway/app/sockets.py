@@ -1,6 +1,6 @@
 ########################################################################
 # WEBSITE https://flowork.cloud
-# File NAME : C:\FLOWORK\flowork-gateway\app\sockets.py total lines 802 
+# File NAME : C:\FLOWORK\flowork-gateway\app\sockets.py total lines 958 
 ########################################################################
 
 from flask import request, current_app
@@ -8,6 +8,7 @@ from sqlalchemy.orm import joinedload
 from datetime import datetime
 import logging
 import json
+import time
 
 from flask_socketio import join_room, leave_room
 from werkzeug.security import check_password_hash
@@ -297,6 +298,109 @@ def on_engine_component_install_status(data):
     if not sess: return
     _emit_to_gui(sess.get('user_id'), 'component_install_status', data)
 
+@sio.on('execution_rejected', namespace='/engine-socket')
+def on_engine_execution_rejected(data):
+    sess = _safe_get_session(request.sid, namespace='/engine-socket')
+    if not sess: return
+    _emit_to_gui(sess.get('user_id'), 'execution_rejected', data)
+
+
+def _dashboard_room(user_id, mode: str) -> str:
+    """GUI room for dashboard stream subscribers: 'full' gets every delta, 'summary' only the counters."""
+    return f"{user_id}:dashboard" if mode == 'full' else f"{user_id}:dashboard_summary"
+
+DASHBOARD_ROUTE_TTL_S = 30
+DASHBOARD_ROUTE_CACHE_SIZE = 4096
+_dashboard_routes = {} # (engine_id, owner address lower) -> (GUI user_id or None, expires_at monotonic)
+
+def _dashboard_recipient(engine_id, engine_owner_id, owner_address):
+    """
+    GUI user allowed to receive dashboard messages that Core tagged with `owner_address`:
+    the engine owner or a guest the engine is shared with (EngineShare). None means drop.
+    Untagged messages go to the engine owner. Lookups are cached for DASHBOARD_ROUTE_TTL_S.
+    """
+    if not owner_address:
+        return engine_owner_id
+    key = (str(engine_id), str(owner_address).lower())
+    now = time.monotonic()
+    cached = _dashboard_routes.get(key)
+    if cached and cached[1] > now:
+        return cached[0]
+    recipient = None
+    session = get_db_session()
+    try:
+        user = session.query(User).filter(User.address_matches(key[1])).first()
+        if user is not None and (
+            str(user.id) == str(engine_owner_id)
+            or session.query(EngineShare.id).filter_by(engine_id=engine_id, user_id=user.id).first() is not None
+        ):
+            recipient = user.id
+    finally:
+        session.close()
+    if len(_dashboard_routes) >= DASHBOARD_ROUTE_CACHE_SIZE:
+        _dashboard_routes.clear()
+    _dashboard_routes[key] = (recipient, now + DASHBOARD_ROUTE_TTL_S)
+    return recipient
+
+@sio.on('dashboard_delta', namespace='/engine-socket')
+def on_engine_dashboard_delta(data):
+    """
+    One coalesced message per owner and engine tick (see DashboardStream in Core).
+    Routed to the GUI rooms of payload['owner_id'] (owner or guest of this engine, see
+    _dashboard_recipient). Relayed without per-message logging; summary subscribers get only
+    seq + counters.
+    """
+    sess = _safe_get_session(request.sid, namespace='/engine-socket')
+    if not sess: return
+    if not isinstance(data, dict) or data.get('v') != 2: return
+    payload = data.get('payload') or {}
+    engine_id = sess.get('engine_id')
+    try:
+        user_id = _dashboard_recipient(engine_id, sess.get('user_id'), payload.get('owner_id'))
+    except Exception as e:
+        current_app.logger.error(f"[Gateway] Could not resolve dashboard recipient for engine {engine_id}: {e}")
+        return
+    if user_id is None:
+        return
+    sio.emit('dashboard_delta', {'engine_id': engine_id, **payload}, room=_dashboard_room(user_id, 'full'), namespace='/gui-socket')
+    sio.emit('dashboard_summary', {
+        'engine_id': engine_id,
+        'seq': payload.get('seq'),
+        'owner_id': payload.get('owner_id'),
+        'ts': payload.get('ts'),
+        'summary': payload.get('summary'),
+    }, room=_dashboard_room(user_id, 'summary'), namespace='/gui-socket')
+
+@sio.on('response_dashboard_snapshot', namespace='/engine-socket')
+def on_engine_response_dashboard_snapshot(data):
+    """
+    Answer to request_dashboard_snapshot. `gui_sid` comes from the engine, so the snapshot only goes
+    to that GUI socket if its user is the engine owner or a guest (_dashboard_recipient); otherwise
+    it is dropped. Without a gui_sid it goes to the engine owner.
+    """
+    sess = _safe_get_session(request.sid, namespace='/engine-socket')
+    if not sess: return
+    if not isinstance(data, dict) or data.get('v') != 2: return
+    payload = data.get('payload') or {}
+    gui_sid = payload.pop('gui_sid', None)
+    engine_id = sess.get('engine_id')
+    payload['engine_id'] = engine_id
+    if not gui_sid:
+        sio.emit('dashboard_snapshot', payload, room=str(sess.get('user_id')), namespace='/gui-socket')
+        return
+    gui_sess = _safe_get_session(gui_sid, namespace='/gui-socket')
+    if gui_sess is None:
+        return
+    try:
+        recipient = _dashboard_recipient(engine_id, sess.get('user_id'), gui_sess.get('user_address'))
+    except Exception as e:
+        current_app.logger.error(f"[Gateway] Could not resolve dashboard recipient for engine {engine_id}: {e}")
+        return
+    if recipient is None or str(recipient) != str(gui_sess.get('user_id')):
+        current_app.logger.warning(f"[Gateway] Dropped dashboard snapshot from engine {engine_id} for GUI {gui_sid}: no access.")
+        return
+    sio.emit('dashboard_snapshot', payload, room=gui_sid, namespace='/gui-socket')
+
 
 @sio.on('connect', namespace='/gui-socket')
 def on_gui_connect(auth):
@@ -347,7 +451,7 @@ def on_gui_connect(auth):
 
     session = get_db_session()
     try:
-        user = session.query(User).filter(User.public_address.ilike(address)).first()
+        user = session.query(User).filter(User.address_matches(address)).first()
         if not user:
             app.logger.info(f"[Gateway GUI] First connect for {address}. Creating user.")
             user = User(public_address=address, username=f"User-{address[:6]}")
@@ -394,10 +498,11 @@ def on_gui_disconnect():
         return
     user_id = sess.get('user_id')
     app.logger.info(f"[Gateway GUI Disconnect] GUI for User {user_id} disconnected. SID: {sid}")
-    try:
-        leave_room(str(user_id), sid, namespace='/gui-socket')
-    except Exception:
-        pass
+    for room in (str(user_id), _dashboard_room(user_id, 'full'), _dashboard_room(user_id, 'summary')):
+        try:
+            leave_room(room, sid, namespace='/gui-socket')
+        except Exception:
+            pass
 
 
 def _resolve_target_engine_sid(session, user_id, target_engine_id):
@@ -415,6 +520,56 @@ def _resolve_target_engine_sid(session, user_id, target_engine_id):
     return eng_id, eng_sid
 
 
+@sio.on('subscribe_dashboard', namespace='/gui-socket')
+def on_subscribe_dashboard(data):
+    """
+    payload: {mode: 'full' | 'summary', since_seq: last seq seen (optional), target_engine_id}.
+    Joins the matching dashboard room and asks the engine for the missed deltas or a snapshot.
+    """
+    app = current_app._get_current_object()
+    sid = request.sid
+    gui_sess = _safe_get_session(sid, namespace='/gui-socket')
+    if gui_sess is None:
+        app.logger.warning(f"[Gateway] 'subscribe_dashboard' from unauthenticated SID {sid}.")
+        return
+
+    user_id = gui_sess.get('user_id')
+    user_addr = gui_sess.get('user_address')
+    if not isinstance(data, dict) or data.get('v') != 2:
+        app.logger.error(f"[Core] Non-versioned 'subscribe_dashboard' from GUI {sid}.")
+        return
+    payload = data.get('payload', {})
+    mode = 'summary' if payload.get('mode') == 'summary' else 'full'
+    leave_room(_dashboard_room(user_id, 'summary' if mode == 'full' else 'full'), sid, namespace='/gui-socket')
+    join_room(_dashboard_room(user_id, mode), sid, namespace='/gui-socket')
+
+    session = get_db_session()
+    try:
+        eng_id, eng_sid = _resolve_target_engine_sid(session, user_id, payload.get('target_engine_id'))
+        if not eng_id or not eng_sid:
+            app.logger.warning(f"[Gateway] Cannot forward 'request_dashboard_snapshot'. No LIVE SID for engine DB-active.")
+            return
+        sio.emit('request_dashboard_snapshot', {'v': 2, 'payload': {
+            'user_context': {'id': user_addr, 'tier': 'architect'},
+            'since_seq': payload.get('since_seq'),
+            'gui_sid': sid,
+        }}, room=eng_sid, namespace='/engine-socket')
+        app.logger.info(f"[Gateway] GUI {sid} subscribed to '{mode}' dashboard stream of Engine {eng_id}.")
+    except Exception as e:
+        app.logger.error(f"[Gateway] Error forwarding 'request_dashboard_snapshot': {e}", exc_info=True)
+    finally:
+        session.close()
+
+
+@sio.on('unsubscribe_dashboard', namespace='/gui-socket')
+def on_unsubscribe_dashboard(data=None):
+    sid = request.sid
+    gui_sess = _safe_get_session(sid, namespace='/gui-socket')
+    if gui_sess is None: return
+    for mode in ('full', 'summary'):
+        leave_room(_dashboard_room(gui_sess.get('user_id'), mode), sid, namespace='/gui-socket')
+
+
 @sio.on('request_presets_list', namespace='/gui-socket')
 def on_request_presets_list(data):
     app = current_app._get_current_object()
@@ -795,7 +950,8 @@ def on_gui_catch_all(event, data):
         'request_prompts_list', 'update_prompt', 'delete_prompt', 'load_preset',
         'delete_preset', 'request_dataset_data', 'create_dataset', 'add_dataset_data',
         'delete_dataset', 'update_dataset_row', 'delete_dataset_row',
-        'install_component', 'uninstall_component', 'start_training_job'
+        'install_component', 'uninstall_component', 'start_training_job',
+        'subscribe_dashboard', 'unsubscribe_dashboard'
     }
     if event not in known:
         app.logger.warning(f"[Gateway GUI] Unhandled event '{event}' from SID {sid}. Data: {data}")
@@ -0,0 +1,81 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-gateway\benchmarks\bench_auth.py total lines 82 
+########################################################################
+
+"""
+crypto_auth_required cost per request: EIP-191 signer recovery (verify_web3_signature) vs an
+X-Session-Token check vs a hit in the verified-signature LRU, and the user lookup by address with
+ILIKE vs the indexed lower(public_address) = ? of User.address_matches(). Also checks that forged
+and expired tokens are refused.
+Usage: python benchmarks/bench_auth.py [users]   (default 100000)
+Runs against throwaway SQLite files in a temporary directory.
+"""
+import os
+import sys
+import time
+import tempfile
+_data_dir = tempfile.mkdtemp(prefix="flowork-bench-") # (English Hardcode) Before app.* reads its env
+os.environ["SQLITE_DATA_DIR"] = _data_dir
+os.environ["SQLITE_DB_PATH"] = os.path.join(_data_dir, "gateway.db")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from sqlalchemy import create_engine, insert, select
+from app.helpers import verify_web3_signature
+from app.models import User
+from app.security.session_tokens import SessionTokenSigner, VerifiedSignatureCache
+RECOVERIES = 200
+CHECKS = 100000
+LOOKUPS = 200
+def rate(label: str, calls: int, func):
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    per_second = calls / (time.perf_counter() - started)
+    print(f"{label:<36}{per_second:>12,.0f} /s")
+def check_tokens(signer: SessionTokenSigner, address: str):
+    token, expires_at = signer.issue(address, now=1000)
+    assert signer.verify(token, now=1000) == address.lower()
+    assert signer.verify(token, now=expires_at + 1) is None, "expired token accepted"
+    payload, mac = token.split(".")
+    forged_mac = ("B" if mac[0] == "A" else "A") + mac[1:] # (English Hardcode) The first base64 char maps to whole bits of the MAC
+    assert signer.verify(f"{payload}.{forged_mac}", now=1000) is None, "forged token accepted"
+    assert SessionTokenSigner("another-secret-of-16+").verify(token, now=1000) is None, "token valid under another key"
+    print("session tokens: forged, expired and foreign-key tokens refused")
+def bench_auth():
+    account = Account.create()
+    message = f"flowork_api_auth|{int(time.time())}"
+    signature = account.sign_message(encode_defunct(text=message)).signature.hex()
+    assert verify_web3_signature(account.address, message, signature)
+    signer = SessionTokenSigner("bench-session-secret-0123456789")
+    check_tokens(signer, account.address)
+    token, _ = signer.issue(account.address)
+    cache = VerifiedSignatureCache()
+    cache.add(account.address, message, signature, int(time.time()))
+    rate("signature recovery per request", RECOVERIES, lambda: verify_web3_signature(account.address, message, signature))
+    rate("session token check", CHECKS, lambda: signer.verify(token))
+    rate("verified-signature LRU hit", CHECKS, lambda: cache.contains(account.address, message, signature))
+def bench_lookup(users: int):
+    engine = create_engine(f"sqlite:///{os.path.join(_data_dir, 'users.db')}")
+    User.__table__.create(engine) # (English Hardcode) With ix_users_public_address_lower, as create_all() makes it
+    addresses = [f"0x{i:040X}" for i in range(users)]
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [
+            {"id": str(i), "username": f"user_{i}", "email": f"user{i}@bench.invalid", "password_hash": "-", "public_address": address}
+            for i, address in enumerate(addresses)
+        ])
+    target = addresses[users // 2].lower()
+    with engine.connect() as conn:
+        for label, condition in (
+            ("user lookup, public_address ILIKE ?", User.public_address.ilike(target)),
+            ("user lookup, lower(public_address)=?", User.address_matches(target)),
+        ):
+            query = select(User.__table__.c.id).where(condition)
+            assert conn.execute(query).scalar() == str(users // 2)
+            calls = LOOKUPS if "ILIKE" not in label else max(5, LOOKUPS // 20)
+            rate(label, calls, lambda: conn.execute(query).scalar())
+    print(f"({users:,} users)")
+if __name__ == "__main__":
+    bench_auth()
+    bench_lookup(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,93 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-gateway\benchmarks\bench_core_http.py total lines 94 
+########################################################################
+
+"""
+Gateway -> Core request latency: a new connection per request (requests.get, what the routes did)
+vs the pooled keep-alive client of app.net.core_http, against a local threaded HTTP/1.1 stub Core
+with TCP_NODELAY. Also checks that streamed responses give their slot back on close and that
+clients beyond CORE_HTTP_MAX_ENGINES are evicted least recently used first and closed.
+Usage: python benchmarks/bench_core_http.py [requests per thread] [threads]   (default 500 8)
+"""
+import os
+import sys
+import time
+import threading
+import statistics
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import requests
+from app.net import core_http
+BODY = b"x" * 2048
+class StubCoreHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+    def log_message(self, *args):
+        pass
+def start_stub_core() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubCoreHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+def check_behaviour(base_url: str):
+    client = core_http.get_core_client(base_url)
+    resp = client.get(f"{base_url}/stream", stream=True)
+    assert client.stats["in_flight"] == 1
+    assert b"".join(core_http.RawBody(resp)) == BODY
+    assert client.stats["in_flight"] == 0, "closing a streamed response did not free its slot"
+    max_engines = core_http.MAX_ENGINES
+    core_http.MAX_ENGINES = 2
+    try:
+        first = core_http.get_core_client("http://engine-a.invalid:8989/")
+        second = core_http.get_core_client("http://engine-b.invalid:8989/")
+        core_http.get_core_client("http://engine-a.invalid:8989/health")
+        core_http.get_core_client("http://engine-c.invalid:8989/")
+        engines = list(core_http._clients)
+        assert engines == ["http://engine-a.invalid:8989", "http://engine-c.invalid:8989"], engines
+        assert first is core_http.get_core_client("http://engine-a.invalid:8989/") and second._closing
+    finally:
+        core_http.MAX_ENGINES = max_engines
+        with core_http._clients_lock:
+            core_http._clients.clear()
+    print("core_http: streamed slot released, least recently used engine evicted")
+def _run(label: str, fetch, url: str, per_thread: int, threads: int):
+    latencies, lock = [], threading.Lock()
+    def _worker():
+        mine = []
+        for _ in range(per_thread):
+            started = time.perf_counter()
+            resp = fetch(url)
+            assert resp.status_code == 200 and len(resp.content) == len(BODY)
+            mine.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(mine)
+    workers = [threading.Thread(target=_worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label}: p50 {statistics.median(latencies) * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms, {len(latencies) / elapsed:,.0f} req/s")
+def bench(base_url: str, per_thread: int, threads: int):
+    url = f"{base_url}/api/v1/health"
+    _run("new connection per request", lambda target: requests.get(target, timeout=5), url, per_thread, threads)
+    _run("pooled CoreHttpClient     ", lambda target: core_http.core_request("GET", target, timeout=5), url, per_thread, threads)
+    print(f"pool stats: {core_http.get_pool_stats()}")
+if __name__ == "__main__":
+    stub = start_stub_core()
+    stub_url = f"http://127.0.0.1:{stub.server_address[1]}"
+    try:
+        check_behaviour(stub_url)
+        bench(stub_url, int(sys.argv[1]) if len(sys.argv) > 1 else 500, int(sys.argv[2]) if len(sys.argv) > 2 else 8)
+    finally:
+        stub.shutdown()
@@ -0,0 +1,75 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-gateway\benchmarks\bench_queue_depth.py total lines 76 
+########################################################################
+
+"""
+Dispatcher admission cost at a deep queue: COUNT(*) over the queued jobs vs the trigger-maintained
+counter, each followed by one enqueue. Also checks that the non-sharded queue creates its counters
+on first use when the jobs table came from SQLAlchemy without them.
+Usage: python benchmarks/bench_queue_depth.py [depth ...]   (default 10000 1000000)
+Runs against throwaway SQLite files in a temporary directory.
+"""
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+import statistics
+_data_dir = tempfile.mkdtemp(prefix="flowork-bench-") # (English Hardcode) Before app.* reads its env
+os.environ["SQLITE_DATA_DIR"] = _data_dir
+os.environ["SQLITE_DB_PATH"] = os.path.join(_data_dir, "gateway.db")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.db.router import db_router
+from app.queue import models, models_sharded
+SAMPLES = 200
+def check_first_use_schema():
+    con = sqlite3.connect(os.environ["SQLITE_DB_PATH"])
+    con.execute(
+        "CREATE TABLE jobs(id VARCHAR(128) PRIMARY KEY, user_id VARCHAR NOT NULL, engine_id VARCHAR NOT NULL, payload TEXT NOT NULL,"
+        " priority INTEGER NOT NULL, status VARCHAR(64) NOT NULL, retries INTEGER NOT NULL, max_retries INTEGER NOT NULL,"
+        " created_at INTEGER NOT NULL, available_at INTEGER NOT NULL, claimed_at INTEGER, worker_id VARCHAR, version INTEGER NOT NULL)"
+    ) # (English Hardcode) The table as create_all() makes it, without counters or triggers
+    con.executemany(
+        "INSERT INTO jobs VALUES(?, 'u', 'engine-a', '{}', 100, 'queued', 0, 3, 0, 0, NULL, NULL, 0)",
+        [(f"old-{i}",) for i in range(5)]
+    )
+    con.commit()
+    con.close()
+    assert models.queue_depth("engine-a") == 5, "counter was not seeded from the existing rows"
+    models.enqueue_job("u", "engine-a", {})
+    claimed = models.dequeue_jobs("engine-a", 2, "bench")
+    assert len(claimed) == 2 and models.queue_depth("engine-a") == 4
+    assert models.reconcile_depth("engine-a") == (4, 4)
+    print("non-sharded queue: counters created on first use, depth tracks enqueue/claim")
+def bench(depth):
+    engine_id = f"bench-{depth}"
+    db_router.ensure_engine_schema(engine_id)
+    con = db_router.get_connection(engine_id)
+    now = int(time.time())
+    con.execute("BEGIN")
+    con.executemany(
+        "INSERT INTO jobs(id, user_id, payload, created_at, available_at) VALUES(?, 'u', '{}', ?, ?)",
+        ((f"seed-{i}", now, now) for i in range(depth))
+    )
+    con.execute("COMMIT")
+    samples = SAMPLES if depth < 100000 else SAMPLES // 5
+    results = []
+    for name, read_depth in (
+        ("COUNT(*)", lambda: con.execute("SELECT COUNT(*) FROM jobs WHERE status='queued'").fetchone()[0]),
+        ("counter", lambda: models_sharded.queue_depth(engine_id)),
+    ):
+        latencies = []
+        for i in range(samples):
+            started = time.perf_counter()
+            read_depth()
+            models_sharded.enqueue_job(engine_id, "u", {"i": i})
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        results.append(f"{name}: p50 {statistics.median(latencies):.3f} ms, p99 {latencies[int(len(latencies) * 0.99) - 1]:.3f} ms")
+    print(f"depth {depth:>9,} admission+enqueue  " + " | ".join(results))
+    assert models_sharded.queue_depth(engine_id) == depth + 2 * samples
+if __name__ == "__main__":
+    check_first_use_schema()
+    for depth in [int(arg) for arg in sys.argv[1:]] or [10000, 1000000]:
+        bench(depth)
@@ -0,0 +1,78 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-gateway\benchmarks\bench_rate_limiter.py total lines 79 
+########################################################################
+
+"""
+Rate limiter calls/sec: the in-memory striped token buckets of app.rl.limiter vs the former
+SQLite limiter (one connection and transaction per check, reproduced below as sqlite_allow).
+Also checks burst, refill and the checkpoint round trip before timing.
+Usage: python benchmarks/bench_rate_limiter.py [calls]   (default 200000)
+Runs against throwaway SQLite files in a temporary directory.
+"""
+import os
+import sys
+import time
+import tempfile
+import threading
+_data_dir = tempfile.mkdtemp(prefix="flowork-bench-") # (English Hardcode) Before app.* reads its env
+os.environ["SQLITE_DATA_DIR"] = _data_dir
+os.environ["SQLITE_DB_PATH"] = os.path.join(_data_dir, "gateway.db")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.rl import limiter
+SQLITE_CALLS = 2000
+KEYS = 1000
+def sqlite_allow(key: str, rate: float, burst: float, cost: float = 1.0) -> bool:
+    """The per-request SQLite token bucket the gateway used before the in-memory limiter."""
+    con = limiter._conn()
+    try:
+        now = int(time.time())
+        row = con.execute("SELECT tokens,last_refill,rate,burst FROM rl_bucket WHERE key=?", (key,)).fetchone()
+        tokens = burst if row is None or row[2] != rate or row[3] != burst else min(row[0] + (now - row[1]) * rate, burst)
+        allowed = tokens >= cost
+        con.execute(
+            "INSERT OR REPLACE INTO rl_bucket(key,tokens,last_refill,rate,burst) VALUES(?,?,?,?,?)",
+            (key, tokens - cost if allowed else tokens, now, rate, burst)
+        )
+        return allowed
+    finally:
+        con.close()
+def check_behaviour():
+    buckets = limiter.TokenBucketLimiter()
+    assert [buckets.allow("user:a", 10, 3)[0] for _ in range(4)] == [True, True, True, False]
+    buckets.allow("user:b", 0.5, 1)
+    allowed, retry_after = buckets.allow("user:b", 0.5, 1)
+    assert not allowed and retry_after == 2, (allowed, retry_after)
+    time.sleep(0.15)
+    assert buckets.allow("user:a", 10, 3)[0], "bucket did not refill"
+    saved = limiter.TokenBucketLimiter(checkpoint_path=limiter.DB_PATH)
+    for _ in range(4):
+        saved.allow("user:c", 0.01, 5)
+    saved.allow("user:d", 1000, 5)
+    time.sleep(0.05)
+    assert saved.sweep() == 2 and len(saved) == 1, "refilled bucket was not evicted"
+    restored = limiter.TokenBucketLimiter(checkpoint_path=limiter.DB_PATH)
+    assert restored.restore() == 1 and restored.consume("user:c", 0.01, 5)[2] < 1
+    print("token buckets: burst, retry_after, refill and checkpoint round trip OK")
+def bench(calls):
+    started = time.perf_counter()
+    for i in range(SQLITE_CALLS):
+        sqlite_allow(f"user:{i % 100}", 1000, 1e6)
+    print(f"SQLite limiter:             {SQLITE_CALLS / (time.perf_counter() - started):>12,.0f} calls/s")
+    buckets = limiter.TokenBucketLimiter()
+    for threads in (1, 8):
+        per_thread = calls // threads
+        def _worker(worker):
+            for i in range(per_thread):
+                buckets.allow(f"user:{worker}:{i % KEYS}", 1000, 1e6)
+        workers = [threading.Thread(target=_worker, args=(worker,)) for worker in range(threads)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        print(f"token buckets, {threads} thread(s): {per_thread * threads / (time.perf_counter() - started):>12,.0f} calls/s")
+if __name__ == "__main__":
+    limiter.init_rl_schema()
+    check_behaviour()
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
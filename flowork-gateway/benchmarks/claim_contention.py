@@ -0,0 +1,93 @@
+########################################################################
+# WEBSITE https://flowork.cloud
+# File NAME : C:\FLOWORK\flowork-gateway\benchmarks\claim_contention.py total lines 94 
+########################################################################
+
+"""
+Contention check for app/queue/claim.py: many processes x threads claim from one engine shard
+until it is empty. Fails if any job is delivered twice or left unclaimed, for the
+UPDATE ... RETURNING path and for the BEGIN IMMEDIATE fallback of older SQLite builds.
+Usage: python benchmarks/claim_contention.py [jobs] [processes] [threads]   (default 4000 4 4)
+Runs against throwaway SQLite files in a temporary directory.
+"""
+import os
+import sys
+import time
+import json
+import sqlite3
+import tempfile
+import threading
+import multiprocessing
+_data_dir = tempfile.mkdtemp(prefix="flowork-bench-") # (English Hardcode) Before app.* reads its env
+os.environ["SQLITE_DATA_DIR"] = _data_dir
+os.environ["SQLITE_DB_PATH"] = os.path.join(_data_dir, "gateway.db")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.db.router import db_router, _db_path, _apply_pragmas
+from app.queue import claim
+def _connect(path):
+    con = sqlite3.connect(path, timeout=30.0, isolation_level=None)
+    _apply_pragmas(con)
+    return con
+def _seed(engine_id, jobs):
+    db_router.ensure_engine_schema(engine_id)
+    con = db_router.get_connection(engine_id)
+    now = int(time.time())
+    con.execute("BEGIN")
+    con.executemany(
+        "INSERT INTO jobs(id, user_id, payload, priority, created_at, available_at) VALUES(?, 'u', ?, ?, ?, ?)",
+        [(f"job-{i}", json.dumps({"i": i}), i % 5, now, now) for i in range(jobs)]
+    )
+    con.execute("COMMIT")
+def _claimer_process(path, batch, threads, use_returning, results):
+    claim.HAS_RETURNING = use_returning
+    claimed = []
+    claimed_lock = threading.Lock()
+    def _claimer(thread_index):
+        con = _connect(path)
+        mine = []
+        while True:
+            jobs = claim.claim_jobs(con, int(time.time()), f"{os.getpid()}-{thread_index}", batch)
+            if not jobs:
+                break
+            mine.extend(job["id"] for job in jobs)
+        con.close()
+        with claimed_lock:
+            claimed.extend(mine)
+    pool = [threading.Thread(target=_claimer, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put(claimed)
+def run(jobs, processes, threads, batch, use_returning):
+    engine_id = f"contention-{batch}-{int(use_returning)}"
+    _seed(engine_id, jobs)
+    path = _db_path(engine_id)
+    results = multiprocessing.Queue()
+    started = time.perf_counter()
+    claimers = [
+        multiprocessing.Process(target=_claimer_process, args=(path, batch, threads, use_returning, results))
+        for _ in range(processes)
+    ]
+    for process in claimers:
+        process.start()
+    claimed = [job_id for _ in claimers for job_id in results.get()]
+    for process in claimers:
+        process.join()
+    elapsed = time.perf_counter() - started
+    duplicates = len(claimed) - len(set(claimed))
+    assert duplicates == 0, f"{duplicates} job(s) delivered twice"
+    assert len(claimed) == jobs, f"{jobs - len(claimed)} job(s) never claimed"
+    con = _connect(path)
+    assert con.execute("SELECT COUNT(*) FROM jobs WHERE status='claimed'").fetchone()[0] == jobs
+    assert con.execute("SELECT value FROM queue_counters WHERE counter='queued'").fetchone()[0] == 0
+    con.close()
+    print(
+        f"{'RETURNING' if use_returning else 'BEGIN IMMEDIATE'} batch={batch:>2}: {jobs} jobs, "
+        f"{processes}x{threads} claimers, no duplicates, {jobs / elapsed:,.0f} claims/s"
+    )
+if __name__ == "__main__":
+    jobs, processes, threads = ([int(arg) for arg in sys.argv[1:4]] + [4000, 4, 4][len(sys.argv[1:4]):])
+    for use_returning in ([True, False] if claim.HAS_RETURNING else [False]):
+        for batch in (1, 16):
+            run(jobs, processes, threads, batch, use_returning)